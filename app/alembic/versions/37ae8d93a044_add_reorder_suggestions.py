@@ -0,0 +1,49 @@
+"""Add reorder suggestions
+
+Revision ID: 37ae8d93a044
+Revises: fad375ed6d6d
+Create Date: 2026-10-19 10:03:17.552910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '37ae8d93a044'
+down_revision = 'fad375ed6d6d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'reorder_suggestions',
+        sa.Column('suggestion_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('item_type', sa.Enum('product', 'raw_material', name='reorderitemtype'), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('item_name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True),
+        sa.Column('warehouse_id', sa.Integer(), nullable=True),
+        sa.Column('location', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+        sa.Column('supplier_id', sa.Integer(), nullable=True),
+        sa.Column('current_stock', sa.Numeric(precision=14, scale=3), nullable=False),
+        sa.Column('minimum_stock_level', sa.Numeric(precision=14, scale=3), nullable=False),
+        sa.Column('maximum_stock_level', sa.Numeric(precision=14, scale=3), nullable=True),
+        sa.Column('daily_velocity', sa.Numeric(precision=14, scale=3), nullable=False),
+        sa.Column('lead_time_days', sa.Integer(), nullable=False),
+        sa.Column('reorder_point', sa.Numeric(precision=14, scale=3), nullable=False),
+        sa.Column('suggested_quantity', sa.Numeric(precision=14, scale=3), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('suggestion_id')
+    )
+    op.create_index(op.f('ix_reorder_suggestions_warehouse_id'), 'reorder_suggestions', ['warehouse_id'], unique=False)
+    # Sales velocity is aggregated from recent order lines by product
+    op.create_index('ix_order_details_product_id', 'order_details', ['product_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_order_details_product_id', table_name='order_details')
+    op.drop_index(op.f('ix_reorder_suggestions_warehouse_id'), table_name='reorder_suggestions')
+    op.drop_table('reorder_suggestions')
+    sa.Enum(name='reorderitemtype').drop(op.get_bind(), checkfirst=True)
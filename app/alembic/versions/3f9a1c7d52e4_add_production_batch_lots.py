@@ -0,0 +1,37 @@
+"""Add raw material lots consumed per production batch
+
+Revision ID: 3f9a1c7d52e4
+Revises: b255d727830f
+Create Date: 2026-10-20 06:41:09.227153
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c7d52e4'
+down_revision = 'b255d727830f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Batches created before this have no lots recorded and keep being
+    # costed at their materials' cost
+    op.create_table(
+        'production_batch_lots',
+        sa.Column('batch_id', sa.Integer(), nullable=False),
+        sa.Column('lot_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Numeric(precision=14, scale=4), nullable=False),
+        sa.ForeignKeyConstraint(['batch_id'], ['production_batches.batch_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['lot_id'], ['raw_material_lots.lot_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('batch_id', 'lot_id')
+    )
+    op.create_index(op.f('ix_production_batch_lots_lot_id'), 'production_batch_lots', ['lot_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_production_batch_lots_lot_id'), table_name='production_batch_lots')
+    op.drop_table('production_batch_lots')
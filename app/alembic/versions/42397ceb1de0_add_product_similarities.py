@@ -0,0 +1,37 @@
+"""Add product similarities
+
+Revision ID: 42397ceb1de0
+Revises: ff1bab6e4bdb
+Create Date: 2026-10-19 17:05:37.992410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '42397ceb1de0'
+down_revision = 'ff1bab6e4bdb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled by the product-similarity job; the primary key serves
+    # /products/{id}/suggested as a single index range scan
+    op.create_table(
+        'product_similarities',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('similar_product_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['similar_product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('product_id', 'rank')
+    )
+
+
+def downgrade():
+    op.drop_table('product_similarities')
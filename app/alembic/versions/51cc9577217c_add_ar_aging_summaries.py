@@ -0,0 +1,74 @@
+"""Add accounts receivable aging summaries
+
+Revision ID: 51cc9577217c
+Revises: e288e67c0add
+Create Date: 2026-10-20 03:41:52.284417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '51cc9577217c'
+down_revision = 'e288e67c0add'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ar_aging_summaries',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('current_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('days_1_30', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('days_31_60', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('days_61_90', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('days_over_90', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('total_outstanding', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('uninvoiced_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('open_invoices', sa.Integer(), nullable=False),
+        sa.Column('overdue_invoices', sa.Integer(), nullable=False),
+        sa.Column('oldest_due_date', sa.Date(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_orders_user_id', 'orders', ['user_id'], unique=False)
+    op.create_index(
+        'ix_invoice_payments_open_due_date', 'invoice_payments', ['due_date'], unique=False,
+        postgresql_where=sa.text("payment_status <> 'paid'")
+    )
+    # Frozen copy of the aging rebuild as it stood at this revision: unpaid
+    # invoices by days past due, plus orders still waiting for one
+    op.execute("""
+        INSERT INTO ar_aging_summaries (
+            user_id, current_amount, days_1_30, days_31_60, days_61_90, days_over_90,
+            total_outstanding, uninvoiced_amount, open_invoices, overdue_invoices,
+            oldest_due_date, updated_at
+        )
+        SELECT o.user_id,
+               COALESCE(SUM(i.total_amount) FILTER (WHERE i.due_date >= CURRENT_DATE), 0),
+               COALESCE(SUM(i.total_amount) FILTER (WHERE CURRENT_DATE - i.due_date BETWEEN 1 AND 30), 0),
+               COALESCE(SUM(i.total_amount) FILTER (WHERE CURRENT_DATE - i.due_date BETWEEN 31 AND 60), 0),
+               COALESCE(SUM(i.total_amount) FILTER (WHERE CURRENT_DATE - i.due_date BETWEEN 61 AND 90), 0),
+               COALESCE(SUM(i.total_amount) FILTER (WHERE CURRENT_DATE - i.due_date > 90), 0),
+               COALESCE(SUM(i.total_amount), 0),
+               COALESCE(SUM(o.order_total) FILTER (WHERE i.invoice_id IS NULL), 0),
+               COUNT(i.invoice_id),
+               COUNT(i.invoice_id) FILTER (WHERE i.due_date < CURRENT_DATE),
+               MIN(i.due_date),
+               now()
+        FROM orders o
+        LEFT JOIN invoice_payments i ON i.order_id = o.order_id
+        WHERE i.payment_status <> 'paid'
+           OR (i.invoice_id IS NULL AND o.order_status::text <> 'cancelled')
+        GROUP BY o.user_id
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_invoice_payments_open_due_date', table_name='invoice_payments')
+    op.drop_index('ix_orders_user_id', table_name='orders')
+    op.drop_table('ar_aging_summaries')
@@ -0,0 +1,70 @@
+"""Add manufacturing daily aggregates
+
+Revision ID: 78f6f8122bd2
+Revises: cf0478b53ea9
+Create Date: 2026-10-19 21:04:37.512908
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '78f6f8122bd2'
+down_revision = 'cf0478b53ea9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'manufacturing_daily_aggregates',
+        sa.Column('production_date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('machine_id', sa.Integer(), nullable=False),
+        sa.Column('batch_count', sa.Integer(), nullable=False),
+        sa.Column('quantity_produced', sa.Integer(), nullable=False),
+        sa.Column('production_cost', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('costed_quantity', sa.Integer(), nullable=False),
+        sa.Column('qc_checks', sa.Integer(), nullable=False),
+        sa.Column('qc_passed', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('production_date', 'product_id', 'machine_id')
+    )
+    op.create_index(op.f('ix_manufacturing_daily_aggregates_machine_id'), 'manufacturing_daily_aggregates', ['machine_id'], unique=False)
+    op.create_index('ix_production_batches_date_product', 'production_batches', ['production_date', 'product_id'], unique=False)
+    op.create_index('ix_quality_controls_batch_id', 'quality_controls', ['batch_id'], unique=False)
+    op.execute("""
+        INSERT INTO manufacturing_daily_aggregates (
+            production_date, product_id, machine_id, batch_count, quantity_produced,
+            production_cost, costed_quantity, qc_checks, qc_passed, updated_at
+        )
+        SELECT b.production_date,
+               b.product_id,
+               COALESCE(b.machine_id, 0),
+               COUNT(*),
+               SUM(b.quantity_produced),
+               COALESCE(SUM(b.production_cost), 0),
+               COALESCE(SUM(b.quantity_produced) FILTER (WHERE b.production_cost IS NOT NULL), 0),
+               COALESCE(SUM(q.checks), 0),
+               COALESCE(SUM(q.passed), 0),
+               now()
+        FROM production_batches b
+        LEFT JOIN (
+            SELECT batch_id,
+                   COUNT(*) AS checks,
+                   COUNT(*) FILTER (WHERE status::text = 'passed') AS passed
+            FROM quality_controls
+            GROUP BY batch_id
+        ) q ON q.batch_id = b.batch_id
+        GROUP BY b.production_date, b.product_id, COALESCE(b.machine_id, 0)
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_quality_controls_batch_id', table_name='quality_controls')
+    op.drop_index('ix_production_batches_date_product', table_name='production_batches')
+    op.drop_index(op.f('ix_manufacturing_daily_aggregates_machine_id'), table_name='manufacturing_daily_aggregates')
+    op.drop_table('manufacturing_daily_aggregates')
@@ -0,0 +1,117 @@
+"""Add parsed maintenance intervals and next due date to machines
+
+Revision ID: 80cb56e22276
+Revises: e7c4d8e33dec
+Create Date: 2026-10-19 23:58:41.127604
+
+"""
+import math
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '80cb56e22276'
+down_revision = 'e7c4d8e33dec'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of the schedule parser in app.crud.maintenance as of this
+# revision, so replaying the migration doesn't depend on the app code.
+# The maintenance-schedule job re-parses every machine with the current one
+_OPERATING_HOURS_PER_DAY = 16
+
+_NAMED_INTERVALS = {
+    "diario": (0, 1), "diaria": (0, 1), "daily": (0, 1),
+    "semanal": (0, 7), "weekly": (0, 7),
+    "quincenal": (0, 15), "biweekly": (0, 14),
+    "mensual": (1, 0), "monthly": (1, 0),
+    "bimestral": (2, 0), "bimonthly": (2, 0),
+    "trimestral": (3, 0), "quarterly": (3, 0),
+    "cuatrimestral": (4, 0),
+    "semestral": (6, 0), "semiannual": (6, 0),
+    "anual": (12, 0), "annual": (12, 0), "yearly": (12, 0),
+}
+
+_UNITS = {
+    "hora": "hours", "horas": "hours", "hour": "hours", "hours": "hours", "h": "hours", "hrs": "hours",
+    "dia": "days", "dias": "days", "day": "days", "days": "days", "d": "days",
+    "semana": "weeks", "semanas": "weeks", "week": "weeks", "weeks": "weeks",
+    "mes": "months", "meses": "months", "month": "months", "months": "months",
+    "ano": "years", "anos": "years", "year": "years", "years": "years",
+}
+
+_EVERY_N = re.compile(r"^(cada|every)?\s*(\d*)\s*([a-z]+)$")
+
+
+def _parse_schedule(schedule):
+    """(months, days) of a free-text maintenance schedule, None when it can't be parsed"""
+    decomposed = unicodedata.normalize("NFKD", schedule)
+    ascii_text = "".join(char for char in decomposed if not unicodedata.combining(char))
+    normalized = " ".join(ascii_text.lower().replace("-", " ").split()).strip(" .")
+    named = _NAMED_INTERVALS.get(normalized.removeprefix("mantenimiento ").removeprefix("maintenance "))
+    if named:
+        return named
+    match = _EVERY_N.match(normalized)
+    if not match or not (match.group(1) or match.group(2)) or match.group(3) not in _UNITS:
+        return None
+    count, unit = int(match.group(2) or 1), _UNITS[match.group(3)]
+    if count <= 0:
+        return None
+    if unit == "hours":
+        return 0, math.ceil(count / _OPERATING_HOURS_PER_DAY)
+    if unit == "weeks":
+        return 0, count * 7
+    if unit == "months":
+        return count, 0
+    if unit == "years":
+        return count * 12, 0
+    return 0, count
+
+
+def upgrade():
+    op.add_column('manufacturing_machines', sa.Column('maintenance_interval_months', sa.Integer(), nullable=True))
+    op.add_column('manufacturing_machines', sa.Column('maintenance_interval_days', sa.Integer(), nullable=True))
+    op.add_column('manufacturing_machines', sa.Column('next_maintenance_date', sa.Date(), nullable=True))
+    op.create_index(op.f('ix_manufacturing_machines_next_maintenance_date'), 'manufacturing_machines', ['next_maintenance_date'], unique=False)
+    # The schedule texts are parsed in Python, the due dates set in one UPDATE
+    connection = op.get_bind()
+    schedules = connection.execute(
+        sa.text("SELECT DISTINCT maintenance_schedule FROM manufacturing_machines WHERE maintenance_schedule <> ''")
+    ).scalars().all()
+    parsed = [(schedule, _parse_schedule(schedule)) for schedule in schedules]
+    parsed = [(schedule, interval) for schedule, interval in parsed if interval]
+    if not parsed:
+        return
+    connection.execute(
+        sa.text("""
+            UPDATE manufacturing_machines m
+            SET maintenance_interval_months = s.months,
+                maintenance_interval_days = s.days,
+                next_maintenance_date = (
+                    COALESCE(m.last_maintenance_date, m.purchase_date)
+                    + make_interval(months => s.months, days => s.days)
+                )::date
+            FROM unnest(
+                CAST(:schedules AS text[]), CAST(:months AS integer[]), CAST(:days AS integer[])
+            ) AS s(schedule, months, days)
+            WHERE m.maintenance_schedule = s.schedule
+        """),
+        {
+            "schedules": [schedule for schedule, _ in parsed],
+            "months": [months for _, (months, _) in parsed],
+            "days": [days for _, (_, days) in parsed],
+        },
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_manufacturing_machines_next_maintenance_date'), table_name='manufacturing_machines')
+    op.drop_column('manufacturing_machines', 'next_maintenance_date')
+    op.drop_column('manufacturing_machines', 'maintenance_interval_days')
+    op.drop_column('manufacturing_machines', 'maintenance_interval_months')
@@ -0,0 +1,65 @@
+"""Add invoice refunds and customer return indexes
+
+Revision ID: 812fe18a32c8
+Revises: ceba49086014
+Create Date: 2026-10-20 05:12:36.470981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '812fe18a32c8'
+down_revision = 'ceba49086014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'invoice_payments',
+        sa.Column('refunded_amount', sa.Numeric(precision=10, scale=2), server_default='0', nullable=False)
+    )
+    op.create_index('ix_customer_returns_order_product', 'customer_returns', ['order_id', 'product_id'], unique=False)
+    op.create_index('ix_customer_returns_return_date', 'customer_returns', ['return_date'], unique=False)
+    op.create_index(
+        'ix_customer_returns_pending', 'customer_returns', ['return_id'], unique=False,
+        postgresql_where=sa.text("status = 'pending'")
+    )
+    # Aging summaries are net of refunds from here on; frozen copy of the
+    # aging rebuild as it stood at this revision
+    op.execute("DELETE FROM ar_aging_summaries")
+    op.execute("""
+        INSERT INTO ar_aging_summaries (
+            user_id, current_amount, days_1_30, days_31_60, days_61_90, days_over_90,
+            total_outstanding, uninvoiced_amount, open_invoices, overdue_invoices,
+            oldest_due_date, updated_at
+        )
+        SELECT o.user_id,
+               COALESCE(SUM(b.balance) FILTER (WHERE i.due_date >= CURRENT_DATE), 0),
+               COALESCE(SUM(b.balance) FILTER (WHERE CURRENT_DATE - i.due_date BETWEEN 1 AND 30), 0),
+               COALESCE(SUM(b.balance) FILTER (WHERE CURRENT_DATE - i.due_date BETWEEN 31 AND 60), 0),
+               COALESCE(SUM(b.balance) FILTER (WHERE CURRENT_DATE - i.due_date BETWEEN 61 AND 90), 0),
+               COALESCE(SUM(b.balance) FILTER (WHERE CURRENT_DATE - i.due_date > 90), 0),
+               COALESCE(SUM(b.balance), 0),
+               COALESCE(SUM(o.order_total) FILTER (WHERE i.invoice_id IS NULL), 0),
+               COUNT(i.invoice_id),
+               COUNT(i.invoice_id) FILTER (WHERE i.due_date < CURRENT_DATE),
+               MIN(i.due_date),
+               now()
+        FROM orders o
+        LEFT JOIN invoice_payments i ON i.order_id = o.order_id
+        CROSS JOIN LATERAL (SELECT i.total_amount - i.refunded_amount AS balance) b
+        WHERE (i.payment_status <> 'paid' AND b.balance > 0)
+           OR (i.invoice_id IS NULL AND o.order_status::text <> 'cancelled')
+        GROUP BY o.user_id
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_customer_returns_pending', table_name='customer_returns')
+    op.drop_index('ix_customer_returns_return_date', table_name='customer_returns')
+    op.drop_index('ix_customer_returns_order_product', table_name='customer_returns')
+    op.drop_column('invoice_payments', 'refunded_amount')
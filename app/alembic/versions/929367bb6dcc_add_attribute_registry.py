@@ -0,0 +1,87 @@
+"""Add attribute registry and normalized product attribute values
+
+Revision ID: 929367bb6dcc
+Revises: ec6e63be3cf4
+Create Date: 2026-10-19 15:02:41.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '929367bb6dcc'
+down_revision = 'ec6e63be3cf4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'category_attributes',
+        sa.Column('attribute_key', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+        sa.Column('display_name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True),
+        sa.Column('value_type', sa.Enum('string', 'number', 'boolean', name='attributevaluetype'), nullable=False),
+        sa.Column('unit', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=True),
+        sa.Column('is_filterable', sa.Boolean(), nullable=False),
+        sa.Column('display_order', sa.Integer(), nullable=False),
+        sa.Column('category_attribute_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.category_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('category_attribute_id'),
+        sa.UniqueConstraint('category_id', 'attribute_key')
+    )
+    op.create_index(
+        op.f('ix_category_attributes_category_id'), 'category_attributes', ['category_id'], unique=False
+    )
+    op.create_table(
+        'product_attribute_values',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('key', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+        sa.Column('value', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('value_numeric', sa.Numeric(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('product_id', 'key', 'value')
+    )
+    op.create_index(
+        'ix_product_attribute_values_key_value', 'product_attribute_values', ['key', 'value'], unique=False
+    )
+    op.create_index(
+        'ix_product_attribute_values_key_numeric', 'product_attribute_values', ['key', 'value_numeric'], unique=False
+    )
+    # The registry starts empty, so only JSON numbers get a numeric value here;
+    # run the attribute-index job after declaring numeric attributes
+    op.execute("""
+        INSERT INTO product_attribute_values (product_id, key, value, value_numeric)
+        SELECT DISTINCT ON (p.product_id, a.key, v.value)
+               p.product_id,
+               a.key,
+               v.value,
+               CASE WHEN jsonb_typeof(v.elem) = 'number' THEN (v.elem #>> '{}')::numeric END
+        FROM products p
+        CROSS JOIN LATERAL jsonb_each(p.attributes) AS a(key, val)
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(a.val) = 'array' THEN a.val ELSE jsonb_build_array(a.val) END
+        ) AS e(elem)
+        CROSS JOIN LATERAL (
+            SELECT CASE jsonb_typeof(e.elem)
+                       WHEN 'boolean' THEN initcap(e.elem #>> '{}')
+                       ELSE e.elem #>> '{}'
+                   END AS value,
+                   e.elem
+        ) AS v
+        WHERE jsonb_typeof(p.attributes) = 'object'
+          AND jsonb_typeof(v.elem) IN ('string', 'number', 'boolean')
+          AND v.value <> ''
+        ORDER BY p.product_id, a.key, v.value
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_product_attribute_values_key_numeric', table_name='product_attribute_values')
+    op.drop_index('ix_product_attribute_values_key_value', table_name='product_attribute_values')
+    op.drop_table('product_attribute_values')
+    op.drop_index(op.f('ix_category_attributes_category_id'), table_name='category_attributes')
+    op.drop_table('category_attributes')
+    sa.Enum(name='attributevaluetype').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,58 @@
+"""Add product availability aggregate
+
+Revision ID: a69669353b07
+Revises: 37ae8d93a044
+Create Date: 2026-10-19 11:26:05.034871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'a69669353b07'
+down_revision = '37ae8d93a044'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'product_availability',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('available_quantity', sa.Integer(), nullable=False),
+        sa.Column('reserved_quantity', sa.Integer(), nullable=False),
+        sa.Column('net_available', sa.Integer(), nullable=False),
+        sa.Column('warehouse_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index(
+        'ix_product_availability_in_stock',
+        'product_availability',
+        ['product_id'],
+        unique=False,
+        postgresql_where=sa.text('net_available > 0'),
+    )
+    op.execute("""
+        INSERT INTO product_availability (
+            product_id, available_quantity, reserved_quantity,
+            net_available, warehouse_count, updated_at
+        )
+        SELECT p.product_id,
+               COALESCE(SUM(i.available_quantity), 0),
+               COALESCE(SUM(i.reserved_quantity), 0),
+               COALESCE(SUM(GREATEST(i.available_quantity - i.reserved_quantity, 0)), 0),
+               COUNT(i.inventory_id),
+               now()
+        FROM products p
+        LEFT JOIN inventory i ON i.product_id = p.product_id
+        GROUP BY p.product_id
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_product_availability_in_stock', table_name='product_availability')
+    op.drop_table('product_availability')
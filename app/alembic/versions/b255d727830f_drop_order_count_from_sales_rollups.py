@@ -0,0 +1,30 @@
+"""Drop order_count from sales daily rollups
+
+Revision ID: b255d727830f
+Revises: 812fe18a32c8
+Create Date: 2026-10-20 06:02:17.518344
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'b255d727830f'
+down_revision = '812fe18a32c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Distinct orders can't be summed across rollup rows; reports count them
+    # from the order lines
+    op.drop_column('sales_daily_rollups', 'order_count')
+
+
+def downgrade():
+    op.add_column(
+        'sales_daily_rollups',
+        sa.Column('order_count', sa.Integer(), nullable=False, server_default='0')
+    )
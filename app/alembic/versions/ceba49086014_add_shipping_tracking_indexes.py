@@ -0,0 +1,27 @@
+"""Index shipments by tracking number and order
+
+Revision ID: ceba49086014
+Revises: 51cc9577217c
+Create Date: 2026-10-20 04:27:08.613590
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'ceba49086014'
+down_revision = '51cc9577217c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_shipping_deliveries_tracking_number', 'shipping_deliveries', ['tracking_number'], unique=False)
+    op.create_index('ix_shipping_deliveries_order_id', 'shipping_deliveries', ['order_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_shipping_deliveries_order_id', table_name='shipping_deliveries')
+    op.drop_index('ix_shipping_deliveries_tracking_number', table_name='shipping_deliveries')
@@ -0,0 +1,56 @@
+"""Add frequently-bought-together counts and associations
+
+Revision ID: cf0478b53ea9
+Revises: 42397ceb1de0
+Create Date: 2026-10-19 18:12:54.260397
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'cf0478b53ea9'
+down_revision = '42397ceb1de0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'product_order_counts',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_table(
+        'product_pair_counts',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('other_product_id', sa.Integer(), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['other_product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('product_id', 'other_product_id')
+    )
+    op.create_table(
+        'product_associations',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('associated_product_id', sa.Integer(), nullable=False),
+        sa.Column('pair_orders', sa.Integer(), nullable=False),
+        sa.Column('support', sa.Float(), nullable=False),
+        sa.Column('confidence', sa.Float(), nullable=False),
+        sa.Column('lift', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['associated_product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('product_id', 'rank')
+    )
+
+
+def downgrade():
+    op.drop_table('product_associations')
+    op.drop_table('product_pair_counts')
+    op.drop_table('product_order_counts')
@@ -0,0 +1,63 @@
+"""Add raw material lots
+
+Revision ID: da9dc6da0ae7
+Revises: e3ab98b7ca01
+Create Date: 2026-10-20 01:37:52.418806
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'da9dc6da0ae7'
+down_revision = 'e3ab98b7ca01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'raw_material_lots',
+        sa.Column('lot_number', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+        sa.Column('quantity_received', sa.Numeric(precision=14, scale=4), nullable=False),
+        sa.Column('cost_per_unit', sa.Numeric(precision=14, scale=4), nullable=True),
+        sa.Column('received_date', sa.Date(), nullable=False),
+        sa.Column('expiration_date', sa.Date(), nullable=True),
+        sa.Column('lot_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('material_id', sa.Integer(), nullable=False),
+        sa.Column('material_type', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+        sa.Column('quantity_remaining', sa.Numeric(precision=14, scale=4), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['material_id'], ['raw_material_inventories.material_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('lot_id')
+    )
+    op.create_index('ix_raw_material_lots_type_expiration', 'raw_material_lots', ['material_type', 'expiration_date'], unique=False, postgresql_where=sa.text('quantity_remaining > 0'))
+    op.create_index('ix_raw_material_lots_open_expiration', 'raw_material_lots', ['expiration_date'], unique=False, postgresql_where=sa.text('quantity_remaining > 0'))
+    op.create_index('ix_raw_material_lots_material_expiration', 'raw_material_lots', ['material_id', 'expiration_date'], unique=False)
+    # The stock on hand of every material becomes its first lot
+    op.execute("""
+        INSERT INTO raw_material_lots (
+            lot_number, quantity_received, cost_per_unit, received_date, expiration_date,
+            material_id, material_type, quantity_remaining, created_at
+        )
+        SELECT 'INICIAL',
+               quantity_available,
+               cost_per_unit,
+               COALESCE(last_purchase_date, created_at::date),
+               expiration_date,
+               material_id,
+               material_type,
+               quantity_available,
+               now()
+        FROM raw_material_inventories
+        WHERE quantity_available > 0
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_raw_material_lots_material_expiration', table_name='raw_material_lots')
+    op.drop_index('ix_raw_material_lots_open_expiration', table_name='raw_material_lots', postgresql_where=sa.text('quantity_remaining > 0'))
+    op.drop_index('ix_raw_material_lots_type_expiration', table_name='raw_material_lots', postgresql_where=sa.text('quantity_remaining > 0'))
+    op.drop_table('raw_material_lots')
@@ -0,0 +1,51 @@
+"""Add invoice number sequences and rendered invoice documents
+
+Revision ID: e288e67c0add
+Revises: da9dc6da0ae7
+Create Date: 2026-10-20 02:26:13.905132
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e288e67c0add'
+down_revision = 'da9dc6da0ae7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'invoice_sequences',
+        sa.Column('series', sqlmodel.sql.sqltypes.AutoString(length=30), nullable=False),
+        sa.Column('last_number', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('series')
+    )
+    op.create_table(
+        'invoice_documents',
+        sa.Column('invoice_id', sa.Integer(), nullable=False),
+        sa.Column('html', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('rendered_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['invoice_id'], ['invoice_payments.invoice_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('invoice_id')
+    )
+    op.create_index('ix_invoice_payments_order_id', 'invoice_payments', ['order_id'], unique=False)
+    # Continue the series of invoices already numbered like the pipeline
+    # does (default INVOICE_NUMBER_PREFIX, e.g. FAC-2026-000123)
+    op.execute("""
+        INSERT INTO invoice_sequences (series, last_number)
+        SELECT substring(invoice_number FROM '^(FAC-[0-9]{4})-'),
+               MAX(CAST(substring(invoice_number FROM '-([0-9]+)$') AS integer))
+        FROM invoice_payments
+        WHERE invoice_number ~ '^FAC-[0-9]{4}-[0-9]{1,9}$'
+        GROUP BY 1
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_invoice_payments_order_id', table_name='invoice_payments')
+    op.drop_table('invoice_documents')
+    op.drop_table('invoice_sequences')
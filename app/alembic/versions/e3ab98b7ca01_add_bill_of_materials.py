@@ -0,0 +1,47 @@
+"""Add bill of materials and production batch material consumption
+
+Revision ID: e3ab98b7ca01
+Revises: 80cb56e22276
+Create Date: 2026-10-20 00:41:19.630254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3ab98b7ca01'
+down_revision = '80cb56e22276'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'bill_of_materials',
+        sa.Column('material_id', sa.Integer(), nullable=False),
+        sa.Column('quantity_per_unit', sa.Numeric(precision=14, scale=4), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['material_id'], ['raw_material_inventories.material_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('material_id', 'product_id')
+    )
+    op.create_index('ix_bill_of_materials_product_id', 'bill_of_materials', ['product_id'], unique=False)
+    op.create_table(
+        'production_batch_materials',
+        sa.Column('batch_id', sa.Integer(), nullable=False),
+        sa.Column('material_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Numeric(precision=14, scale=4), nullable=False),
+        sa.ForeignKeyConstraint(['batch_id'], ['production_batches.batch_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['material_id'], ['raw_material_inventories.material_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('batch_id', 'material_id')
+    )
+    op.create_index(op.f('ix_production_batch_materials_material_id'), 'production_batch_materials', ['material_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_production_batch_materials_material_id'), table_name='production_batch_materials')
+    op.drop_table('production_batch_materials')
+    op.drop_index('ix_bill_of_materials_product_id', table_name='bill_of_materials')
+    op.drop_table('bill_of_materials')
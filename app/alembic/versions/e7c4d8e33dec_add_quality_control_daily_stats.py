@@ -0,0 +1,90 @@
+"""Add quality control daily stats and failure reasons
+
+Revision ID: e7c4d8e33dec
+Revises: 78f6f8122bd2
+Create Date: 2026-10-19 23:12:08.304517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c4d8e33dec'
+down_revision = '78f6f8122bd2'
+branch_labels = None
+depends_on = None
+
+# Same test-result patterns as app.crud.quality_analytics
+FAILED_RESULT = "~* '(fail|fall|rechaz|reject|no conforme|^nok?$)'"
+
+
+def upgrade():
+    op.create_table(
+        'quality_control_daily_stats',
+        sa.Column('check_date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('machine_id', sa.Integer(), nullable=False),
+        sa.Column('checks', sa.Integer(), nullable=False),
+        sa.Column('passed', sa.Integer(), nullable=False),
+        sa.Column('pressure_failed', sa.Integer(), nullable=False),
+        sa.Column('dimensional_failed', sa.Integer(), nullable=False),
+        sa.Column('visual_failed', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('check_date', 'product_id', 'machine_id')
+    )
+    op.create_index(op.f('ix_quality_control_daily_stats_machine_id'), 'quality_control_daily_stats', ['machine_id'], unique=False)
+    op.create_index('ix_quality_control_daily_stats_product_date', 'quality_control_daily_stats', ['product_id', 'check_date'], unique=False)
+    op.create_table(
+        'quality_control_failure_reasons',
+        sa.Column('check_date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('machine_id', sa.Integer(), nullable=False),
+        sa.Column('reason', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column('failures', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('check_date', 'product_id', 'machine_id', 'reason')
+    )
+    op.create_index(op.f('ix_quality_control_failure_reasons_machine_id'), 'quality_control_failure_reasons', ['machine_id'], unique=False)
+    op.create_index('ix_quality_controls_check_date', 'quality_controls', ['check_date'], unique=False)
+    op.execute(f"""
+        INSERT INTO quality_control_daily_stats (
+            check_date, product_id, machine_id, checks, passed,
+            pressure_failed, dimensional_failed, visual_failed, updated_at
+        )
+        SELECT qc.check_date,
+               b.product_id,
+               COALESCE(b.machine_id, 0),
+               COUNT(*),
+               COUNT(*) FILTER (WHERE qc.status::text = 'passed'),
+               COUNT(*) FILTER (WHERE qc.pressure_test_result {FAILED_RESULT}),
+               COUNT(*) FILTER (WHERE qc.dimensional_check_result {FAILED_RESULT}),
+               COUNT(*) FILTER (WHERE qc.visual_inspection_result {FAILED_RESULT}),
+               now()
+        FROM quality_controls qc
+        JOIN production_batches b ON b.batch_id = qc.batch_id
+        GROUP BY qc.check_date, b.product_id, COALESCE(b.machine_id, 0)
+    """)
+    op.execute("""
+        INSERT INTO quality_control_failure_reasons (check_date, product_id, machine_id, reason, failures)
+        SELECT qc.check_date,
+               b.product_id,
+               COALESCE(b.machine_id, 0),
+               left(COALESCE(NULLIF(lower(btrim(qc.rejection_reason)), ''), 'sin motivo'), 255),
+               COUNT(*)
+        FROM quality_controls qc
+        JOIN production_batches b ON b.batch_id = qc.batch_id
+        WHERE qc.status::text = 'failed'
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_quality_controls_check_date', table_name='quality_controls')
+    op.drop_index(op.f('ix_quality_control_failure_reasons_machine_id'), table_name='quality_control_failure_reasons')
+    op.drop_table('quality_control_failure_reasons')
+    op.drop_index('ix_quality_control_daily_stats_product_date', table_name='quality_control_daily_stats')
+    op.drop_index(op.f('ix_quality_control_daily_stats_machine_id'), table_name='quality_control_daily_stats')
+    op.drop_table('quality_control_daily_stats')
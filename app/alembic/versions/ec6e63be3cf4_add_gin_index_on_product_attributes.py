@@ -0,0 +1,34 @@
+"""Add GIN index on product attributes
+
+Revision ID: ec6e63be3cf4
+Revises: a69669353b07
+Create Date: 2026-10-19 13:48:52.601127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'ec6e63be3cf4'
+down_revision = 'a69669353b07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # jsonb_path_ops only supports containment and jsonpath operators (@>, @?, @@),
+    # which is all attribute filtering uses, and is much smaller than jsonb_ops
+    op.create_index(
+        'ix_products_attributes',
+        'products',
+        ['attributes'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'attributes': 'jsonb_path_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('ix_products_attributes', table_name='products')
@@ -0,0 +1,52 @@
+"""Add sales daily rollups
+
+Revision ID: fad375ed6d6d
+Revises:
+Create Date: 2026-10-19 09:12:41.218334
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'fad375ed6d6d'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'job_watermarks',
+        sa.Column('job_name', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+        sa.Column('last_processed_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('job_name')
+    )
+    op.create_table(
+        'sales_daily_rollups',
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('subcategory_id', sa.Integer(), nullable=True),
+        sa.Column('brand_id', sa.Integer(), nullable=True),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('units_sold', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('discount_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('tax_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.product_id']),
+        sa.PrimaryKeyConstraint('sale_date', 'product_id')
+    )
+    op.create_index(op.f('ix_sales_daily_rollups_category_id'), 'sales_daily_rollups', ['category_id'], unique=False)
+    op.create_index(op.f('ix_sales_daily_rollups_brand_id'), 'sales_daily_rollups', ['brand_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_sales_daily_rollups_brand_id'), table_name='sales_daily_rollups')
+    op.drop_index(op.f('ix_sales_daily_rollups_category_id'), table_name='sales_daily_rollups')
+    op.drop_table('sales_daily_rollups')
+    op.drop_table('job_watermarks')
@@ -0,0 +1,37 @@
+"""Add category facet snapshots
+
+Revision ID: ff1bab6e4bdb
+Revises: 929367bb6dcc
+Create Date: 2026-10-19 16:20:13.504918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'ff1bab6e4bdb'
+down_revision = '929367bb6dcc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Snapshots are filled lazily on first browse, or by the facet-snapshots job
+    op.create_table(
+        'category_facet_snapshots',
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('filter_values', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('product_count', sa.Integer(), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.Column('computed_generation', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.category_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('category_id')
+    )
+
+
+def downgrade():
+    op.drop_table('category_facet_snapshots')
@@ -2,7 +2,7 @@ from collections.abc import Generator
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
@@ -10,8 +10,8 @@ from sqlmodel import Session
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
-from app.models import TokenPayload, User
+from app.core.db import get_engine, get_read_engine, reads_pinned_to_primary, track_writes
+from app.models import TokenPayload, User, UserType
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -19,11 +19,27 @@ reusable_oauth2 = OAuth2PasswordBearer(
 
 
 def get_db() -> Generator[Session, None, None]:
+    with Session(get_engine()) as session:
+        track_writes(session)
+        yield session
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Session for read-only endpoints: served by a replica unless none is
+    configured or the client wrote recently (read-your-writes).
+    """
+    if reads_pinned_to_primary(request.cookies):
+        engine = get_engine()
+    else:
+        engine = get_read_engine()
     with Session(engine) as session:
+        session.info["replica"] = engine is not get_engine()
         yield session
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
+ReadSessionDep = Annotated[Session, Depends(get_read_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
@@ -55,3 +71,11 @@ def get_current_active_superuser(current_user: CurrentUser) -> User:
             status_code=403, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+def get_current_administrator(current_user: CurrentUser) -> User:
+    if current_user.role != UserType.administrator:
+        raise HTTPException(
+            status_code=403, detail="Only administrators can access this endpoint"
+        )
+    return current_user
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.routes import category, inventory, login, order, private, promotion, raw_material_inventory, shipping_delivery, supplier, technical_specification, users, utils, categories, products
+from app.api.routes import category, inventory, login, order, private, promotion, raw_material_inventory, shipping_delivery, supplier, technical_specification, users, utils, categories, products, report, diagnostics, production_batch, quality_control, manufacturing_machine, bill_of_materials, invoice_payment, customer_return
 from app.core.config import settings
 
 api_router = APIRouter()
@@ -14,8 +14,17 @@ api_router.include_router(technical_specification.router, prefix="/technical-spe
 api_router.include_router(order.router, prefix="/orders", tags=["orders"])
 api_router.include_router(raw_material_inventory.router, prefix="/raw-material-inventory", tags=["raw-material-inventory"])
 api_router.include_router(supplier.router, prefix="/suppliers", tags=["suppliers"])
+api_router.include_router(invoice_payment.aging_router, prefix="/invoice-payments", tags=["invoice-payments"])
+api_router.include_router(invoice_payment.router, prefix="/invoice-payments", tags=["invoice-payments"])
 api_router.include_router(shipping_delivery.router, prefix="/shipping-delivery", tags=["shipping-delivery"])
+api_router.include_router(customer_return.router, prefix="/customer-returns", tags=["customer-returns"])
 api_router.include_router(promotion.router, prefix="/promotions", tags=["promotions"])
+api_router.include_router(manufacturing_machine.router, prefix="/manufacturing-machines", tags=["manufacturing-machines"])
+api_router.include_router(bill_of_materials.router, prefix="/bill-of-materials", tags=["bill-of-materials"])
+api_router.include_router(production_batch.router, prefix="/production-batches", tags=["production-batches"])
+api_router.include_router(quality_control.router, prefix="/quality-control", tags=["quality-control"])
+api_router.include_router(report.router, prefix="/reports", tags=["reports"])
+api_router.include_router(diagnostics.router, prefix="/diagnostics", tags=["diagnostics"])
 
 
 
@@ -0,0 +1,23 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    # Pydantic serializes Decimal as a string; keep the same wire format
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Encodes plain dicts and lists with orjson, skipping model validation.
+    Meant for hot read endpoints whose rows are already shaped like the
+    documented response model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
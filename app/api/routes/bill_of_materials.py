@@ -0,0 +1,27 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Body
+from sqlmodel import Session
+from app.api.deps import get_current_administrator, get_db, get_read_db
+from app.models import BillOfMaterialsLine, BillOfMaterialsLineBase, Product
+from app.crud.bill_of_materials import get_bill_of_materials, set_bill_of_materials
+
+router = APIRouter(dependencies=[Depends(get_current_administrator)])
+
+@router.get("/{product_id}", response_model=List[BillOfMaterialsLine])
+def read_bill_of_materials(product_id: int, db: Session = Depends(get_read_db)):
+    """Raw material quantities needed per unit of the product"""
+    return get_bill_of_materials(db, product_id)
+
+@router.put("/{product_id}", response_model=List[BillOfMaterialsLine])
+def replace_bill_of_materials(
+    product_id: int,
+    lines: List[BillOfMaterialsLineBase] = Body(...),
+    db: Session = Depends(get_db),
+):
+    """Replace the product's bill of materials; an empty list removes it"""
+    if not db.get(Product, product_id):
+        raise HTTPException(status_code=404, detail="Product not found")
+    try:
+        return set_bill_of_materials(db, product_id, lines)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
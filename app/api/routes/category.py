@@ -1,8 +1,13 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Body
 from sqlmodel import Session, select, func
-from app.api.deps import get_db
-from app.models import Category, CategoryCreate
+from app.api.deps import get_current_administrator, get_db, get_read_db
+from app.models import Category, CategoryAttribute, CategoryAttributeCreate, CategoryCreate
+from app.crud.attribute import (
+    create_category_attribute,
+    delete_category_attribute,
+    get_category_attributes,
+)
 from app.crud.category import (
     get_category_by_id,
     get_categories,
@@ -18,7 +23,7 @@ router = APIRouter()
 
 @router.get("/main", response_model=List[Category])
 def read_main_categories(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> List[Category]:
     """
     Retrieve all main categories (categories without parent).
@@ -27,11 +32,11 @@ def read_main_categories(
     return categories
 
 @router.get("/", response_model=List[Category])
-def read_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     return get_categories(db, skip=skip, limit=limit)
 
 @router.get("/menu", response_model=List[Category])
-def get_menu_categories(db: Session = Depends(get_db)) -> List[Category]:
+def get_menu_categories(db: Session = Depends(get_read_db)) -> List[Category]:
     """
     Retrieve all categories for menu.
     """
@@ -39,12 +44,56 @@ def get_menu_categories(db: Session = Depends(get_db)) -> List[Category]:
     return categories
 
 @router.get("/{category_id}", response_model=Category)
-def read_category(category_id: int, db: Session = Depends(get_db)):
+def read_category(category_id: int, db: Session = Depends(get_read_db)):
     category = get_category_by_id(db, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
 
+@router.get("/{category_id}/attributes", response_model=List[CategoryAttribute])
+def read_category_attributes(category_id: int, db: Session = Depends(get_read_db)):
+    """
+    Attributes declared for a category and its parent, in display order.
+    """
+    category = get_category_by_id(db, category_id)
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    category_ids = [category_id]
+    if category.parent_category_id:
+        category_ids.append(category.parent_category_id)
+    return get_category_attributes(db, category_ids)
+
+@router.post(
+    "/{category_id}/attributes",
+    response_model=CategoryAttribute,
+    dependencies=[Depends(get_current_administrator)],
+)
+def create_category_attribute_endpoint(
+    category_id: int,
+    attribute_in: CategoryAttributeCreate,
+    db: Session = Depends(get_db),
+):
+    """
+    Declare an attribute for a category. Products in the category are
+    re-indexed so numeric attributes become range-filterable.
+    """
+    if not get_category_by_id(db, category_id):
+        raise HTTPException(status_code=404, detail="Category not found")
+    if any(a.attribute_key == attribute_in.attribute_key for a in get_category_attributes(db, [category_id])):
+        raise HTTPException(status_code=400, detail="Attribute already declared for this category")
+    return create_category_attribute(db, category_id, attribute_in)
+
+@router.delete(
+    "/attributes/{category_attribute_id}",
+    response_model=CategoryAttribute,
+    dependencies=[Depends(get_current_administrator)],
+)
+def delete_category_attribute_endpoint(category_attribute_id: int, db: Session = Depends(get_db)):
+    db_obj = delete_category_attribute(db, category_attribute_id)
+    if not db_obj:
+        raise HTTPException(status_code=404, detail="Category attribute not found")
+    return db_obj
+
 @router.post("/", response_model=Category)
 def create_category_endpoint(category_in: CategoryCreate, db: Session = Depends(get_db)):
     return create_category(db, category_in)
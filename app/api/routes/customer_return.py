@@ -1,7 +1,8 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Body
+import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
 from sqlmodel import Session, select, func
-from app.api.deps import get_db
+from app.api.deps import get_current_active_superuser, get_db, get_read_db
 from app.models import CustomerReturn, CustomerReturnCreate
 from app.crud.customer_return import (
     get_customer_return_by_id,
@@ -10,10 +11,39 @@ from app.crud.customer_return import (
     update_customer_return,
     delete_customer_return
 )
-from app.schemas import PaginatedUsersRequest
+from app.crud.return_processing import get_return_metrics, process_returns
+from app.schemas import (
+    PaginatedUsersRequest,
+    ReturnMetricsResponse,
+    ReturnProcessingRequest,
+    ReturnProcessingResponse,
+)
 from pydantic import BaseModel
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(get_current_active_superuser)])
+
+@router.post("/process", response_model=ReturnProcessingResponse)
+def process_returns_endpoint(params: ReturnProcessingRequest = Body(...), db: Session = Depends(get_db)):
+    """
+    Process pending returns (all, or the given ids) in batches: check the
+    quantity against the order line, restock, refund at the line's price
+    and set the refund against the invoice. Invalid returns are rejected
+    with the reason in their notes; large queues are better left to the
+    `returns` job.
+    """
+    return process_returns(db, return_ids=params.return_ids, max_returns=params.max_returns)
+
+@router.get("/metrics", response_model=ReturnMetricsResponse)
+def read_return_metrics(
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+):
+    """Return rate per product over a period, the last RETURN_METRICS_WINDOW_DAYS days by default"""
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    return get_return_metrics(session=db, start_date=start_date, end_date=end_date, limit=limit)
 
 @router.get("/", response_model=List[CustomerReturn])
 def read_customer_returns(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
@@ -0,0 +1,42 @@
+import datetime
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+
+from app.api.deps import get_current_administrator
+from app.core import slow_query
+from app.models import Message
+
+router = APIRouter(dependencies=[Depends(get_current_administrator)])
+
+class SlowQueryResponse(BaseModel):
+    recorded_at: datetime.datetime
+    duration_ms: float
+    statement: str
+    parameters: Any = None
+    route: Optional[str] = None
+    executemany: bool = False
+    plan: Optional[Any] = None
+    plan_error: Optional[str] = None
+
+def _get_log() -> slow_query.SlowQueryLog:
+    if slow_query.slow_query_log is None:
+        raise HTTPException(status_code=404, detail="Slow query log is disabled")
+    return slow_query.slow_query_log
+
+@router.get("/slow-queries", response_model=List[SlowQueryResponse])
+def read_slow_queries(
+    route: Optional[str] = Query(default=None, description="Route template, e.g. /api/v1/products/"),
+    min_duration_ms: Optional[float] = Query(default=None, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    """
+    Statements slower than SLOW_QUERY_THRESHOLD_MS recorded by this process,
+    newest first, with redacted parameters and, with SLOW_QUERY_EXPLAIN, their plan.
+    """
+    return _get_log().entries(route=route, min_duration_ms=min_duration_ms, limit=limit)
+
+@router.delete("/slow-queries", response_model=Message)
+def clear_slow_queries():
+    cleared = _get_log().clear()
+    return Message(message=f"{cleared} slow queries cleared")
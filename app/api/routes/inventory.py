@@ -1,15 +1,17 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Body
 from sqlalchemy import String
 from sqlmodel import Session, select, func
-from app.api.deps import get_db
-from app.models import Inventory, InventoryCreate
+from app.api.deps import get_current_administrator, get_db
+from app.models import Inventory, InventoryCreate, Message, ReorderItemType, ReorderSuggestion
 from app.crud.inventory import (
     get_inventory_by_id,
     get_inventories,
     create_inventory,
     update_inventory,
-    delete_inventory
+    delete_inventory,
+    compute_reorder_suggestions,
+    get_reorder_suggestions
 )
 from app.schemas import PaginatedUsersRequest
 from pydantic import BaseModel
@@ -20,6 +22,39 @@ router = APIRouter()
 def read_inventories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     return get_inventories(db, skip=skip, limit=limit)
 
+class ReorderSuggestionResponse(BaseModel):
+    data: list[ReorderSuggestion]
+    total: int
+
+@router.get("/reorder", response_model=ReorderSuggestionResponse)
+def read_reorder_suggestions(
+    item_type: Optional[ReorderItemType] = None,
+    warehouse_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+):
+    """
+    Reorder suggestions for products and raw materials, as computed by the
+    last run of the reorder job.
+    """
+    items, total = get_reorder_suggestions(
+        db, item_type=item_type, warehouse_id=warehouse_id, skip=skip, limit=limit
+    )
+    return ReorderSuggestionResponse(data=items, total=total)
+
+@router.post(
+    "/reorder/refresh",
+    response_model=Message,
+    dependencies=[Depends(get_current_administrator)],
+)
+def refresh_reorder_suggestions(db: Session = Depends(get_db)):
+    """
+    Recompute the reorder suggestions now instead of waiting for the scheduled job.
+    """
+    count = compute_reorder_suggestions(db)
+    return Message(message=f"Computed {count} reorder suggestions")
+
 @router.get("/{inventory_id}", response_model=Inventory)
 def read_inventory(inventory_id: int, db: Session = Depends(get_db)):
     inventory = get_inventory_by_id(db, inventory_id)
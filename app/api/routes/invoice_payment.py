@@ -1,7 +1,9 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Body
+import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from fastapi.responses import HTMLResponse
 from sqlmodel import Session, select, func
-from app.api.deps import get_db
+from app.api.deps import get_current_active_superuser, get_current_administrator, get_db, get_read_db
 from app.models import InvoicePayment, InvoicePaymentCreate
 from app.crud.invoice_payment import (
     get_invoice_payment_by_id,
@@ -10,10 +12,72 @@ from app.crud.invoice_payment import (
     update_invoice_payment,
     delete_invoice_payment
 )
-from app.schemas import PaginatedUsersRequest
+from app.crud.ar_aging import get_ar_aging, get_ar_aging_for_user, refresh_ar_aging
+from app.crud.invoicing import generate_invoices, get_invoice_document
+from app.schemas import (
+    ArAgingAccount,
+    ArAgingRefreshResponse,
+    ArAgingResponse,
+    InvoiceGenerationResponse,
+    PaginatedUsersRequest,
+)
 from pydantic import BaseModel
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(get_current_active_superuser)])
+
+# Receivables of every customer and distributor, for the administrators
+aging_router = APIRouter(dependencies=[Depends(get_current_administrator)])
+
+@router.post("/generate", response_model=InvoiceGenerationResponse)
+def generate_invoices_endpoint(
+    invoice_date: Optional[datetime.date] = None,
+    max_invoices: Optional[int] = Query(default=None, ge=1),
+    render: bool = True,
+    db: Session = Depends(get_db),
+):
+    """
+    Invoice delivered orders that have no invoice yet, in batches, with
+    gap-free numbers, and render their HTML documents. Reports throughput;
+    large backlogs are better left to the `invoices` job.
+    """
+    return generate_invoices(db, invoice_date=invoice_date, max_invoices=max_invoices, render=render)
+
+@aging_router.get("/aging", response_model=ArAgingResponse)
+def read_ar_aging(
+    role: Optional[str] = None,
+    overdue_only: bool = False,
+    skip: int = 0,
+    limit: int = Query(default=100, le=1000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Accounts receivable aging per customer or distributor (current, 1-30,
+    31-60, 61-90 and over 90 days past due), served from the aging summaries
+    """
+    try:
+        return get_ar_aging(session=db, role=role, overdue_only=overdue_only, skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@aging_router.post("/aging/refresh", response_model=ArAgingRefreshResponse)
+def refresh_ar_aging_endpoint(as_of: Optional[datetime.date] = None, db: Session = Depends(get_db)):
+    """Mark invoices past due as overdue and move the aging summaries forward; what the `ar-aging` job runs"""
+    return refresh_ar_aging(db, as_of)
+
+@aging_router.get("/aging/{user_id}", response_model=ArAgingAccount)
+def read_ar_aging_for_user(user_id: int, db: Session = Depends(get_read_db)):
+    account = get_ar_aging_for_user(db, user_id)
+    if account is None:
+        raise HTTPException(status_code=404, detail="No receivables for this user")
+    return account
+
+@router.get("/{invoice_id}/document", response_class=HTMLResponse)
+def read_invoice_document(invoice_id: int, db: Session = Depends(get_db)):
+    """The invoice as an HTML document"""
+    html = get_invoice_document(db, invoice_id)
+    if html is None:
+        raise HTTPException(status_code=404, detail="InvoicePayment not found")
+    return HTMLResponse(html)
 
 @router.get("/", response_model=List[InvoicePayment])
 def read_invoice_payments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
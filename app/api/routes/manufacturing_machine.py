@@ -1,7 +1,8 @@
+import datetime
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
 from sqlmodel import Session, select, func
-from app.api.deps import get_db
+from app.api.deps import get_current_administrator, get_db, get_read_db
 from app.models import ManufacturingMachine, ManufacturingMachineCreate
 from app.crud.manufacturing_machine import (
     get_manufacturing_machine_by_id,
@@ -10,10 +11,37 @@ from app.crud.manufacturing_machine import (
     update_manufacturing_machine,
     delete_manufacturing_machine
 )
-from app.schemas import PaginatedUsersRequest
+from app.crud.maintenance import get_machines_due
+from app.schemas import MaintenanceDueResponse, MaintenanceRecord, PaginatedUsersRequest
 from pydantic import BaseModel
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(get_current_administrator)])
+
+@router.get("/maintenance/due", response_model=MaintenanceDueResponse)
+def read_machines_due_for_maintenance(
+    days: int = Query(default=7, ge=0, le=3660),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Machines whose next maintenance is due within `days` days, overdue
+    ones first. Answered from the precomputed next_maintenance_date index.
+    """
+    return MaintenanceDueResponse(days=days, data=get_machines_due(session=db, days=days, limit=limit))
+
+@router.post("/{machine_id}/maintenance", response_model=ManufacturingMachine)
+def record_machine_maintenance(machine_id: int, record: MaintenanceRecord, db: Session = Depends(get_db)):
+    """Record a maintenance (today by default), which moves the next due date"""
+    db_obj = get_manufacturing_machine_by_id(db, machine_id)
+    if not db_obj:
+        raise HTTPException(status_code=404, detail="ManufacturingMachine not found")
+    db_obj.last_maintenance_date = record.maintenance_date or datetime.date.today()
+    if record.notes:
+        db_obj.notes = f"{db_obj.notes}\n{record.notes}" if db_obj.notes else record.notes
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
 
 @router.get("/", response_model=List[ManufacturingMachine])
 def read_manufacturing_machines(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
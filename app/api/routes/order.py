@@ -11,6 +11,7 @@ from app.crud.order import (
     update_order,
     delete_order
 )
+from app.crud.ar_aging import CreditLimitExceededError
 from app.schemas import PaginatedUsersRequest
 from pydantic import BaseModel
 
@@ -29,7 +30,10 @@ def read_order(order_id: int, db: Session = Depends(get_db)):
 
 @router.post("/", response_model=Order)
 def create_order_endpoint(order_in: OrderCreate, db: Session = Depends(get_db)):
-    return create_order(db, order_in)
+    try:
+        return create_order(db, order_in)
+    except CreditLimitExceededError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 @router.put("/{order_id}", response_model=Order)
 def update_order_endpoint(order_id: int, order_in: OrderCreate, db: Session = Depends(get_db)):
@@ -1,8 +1,11 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Body
+from sqlalchemy import String
 from sqlmodel import Session, select, func
-from app.api.deps import get_db
+from app.api.deps import get_current_administrator, get_db
 from app.models import ProductionBatch, ProductionBatchCreate
+from app.crud.bill_of_materials import create_production_batches, recompute_batch_costs
+from app.crud.raw_material_lot import InsufficientRawMaterialError
 from app.crud.production_batch import (
     get_production_batch_by_id,
     get_production_batches,
@@ -10,10 +13,10 @@ from app.crud.production_batch import (
     update_production_batch,
     delete_production_batch
 )
-from app.schemas import PaginatedUsersRequest
+from app.schemas import BatchCostingRequest, BatchCostingResponse, PaginatedUsersRequest
 from pydantic import BaseModel
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(get_current_administrator)])
 
 @router.get("/", response_model=List[ProductionBatch])
 def read_production_batches(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
@@ -28,7 +31,46 @@ def read_production_batch(batch_id: int, db: Session = Depends(get_db)):
 
 @router.post("/", response_model=ProductionBatch)
 def create_production_batch_endpoint(batch_in: ProductionBatchCreate, db: Session = Depends(get_db)):
-    return create_production_batch(db, batch_in)
+    """
+    Create a batch, taking its product's bill of materials out of raw
+    material stock and costing it. 409 if the stock doesn't cover it.
+    """
+    try:
+        return create_production_batch(db, batch_in)
+    except InsufficientRawMaterialError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/bulk", response_model=List[ProductionBatch])
+def create_production_batches_endpoint(
+    batches_in: List[ProductionBatchCreate] = Body(..., max_length=1000),
+    db: Session = Depends(get_db),
+):
+    """Create many batches at once; either all of them or, if stock runs short, none"""
+    try:
+        return create_production_batches(db, batches_in)
+    except InsufficientRawMaterialError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/costing/recompute", response_model=BatchCostingResponse)
+def recompute_production_costs(params: BatchCostingRequest = Body(...), db: Session = Depends(get_db)):
+    """
+    Recost batches from the raw material lots they consumed, e.g. after a
+    lot's cost was corrected; batches created before lots were tracked are
+    priced at the current material costs. Filters combine; with none, every
+    batch with recorded material consumption is recosted.
+
+    - **batch_ids**: Only these batches
+    - **material_ids**: Only batches that consumed any of these materials
+    - **start_date** / **end_date**: Only batches produced in this range
+    """
+    costed, updated = recompute_batch_costs(
+        db,
+        batch_ids=params.batch_ids,
+        material_ids=params.material_ids,
+        start_date=params.start_date,
+        end_date=params.end_date,
+    )
+    return BatchCostingResponse(batches_costed=costed, batches_updated=updated)
 
 @router.put("/{batch_id}", response_model=ProductionBatch)
 def update_production_batch_endpoint(batch_id: int, batch_in: ProductionBatchCreate, db: Session = Depends(get_db)):
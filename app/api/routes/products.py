@@ -3,17 +3,30 @@ from decimal import Decimal
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session
 
-from app.api.deps import get_db
-from app.crud.product import get_detailed_product, get_products, get_suggested_products, get_quick_search_products
+from app.api.deps import get_read_db
+from app.api.responses import FastJSONResponse
+from app.crud.product import get_bought_together_products, get_detailed_product, get_products, get_suggested_products, get_quick_search_products, resolve_product_fields
 from app.models import Product
-from app.schemas import DetailedProductView, ProductFilterRequest, ProductBasicListResponse, ProductListResponse, ProductListResponsePaginated, ProductListView, ProductFilterValues, ProductQuickSearchView, QuickProductSearchResponse
+from app.schemas import BoughtTogetherResponse, DetailedProductView, ProductFilterRequest, ProductBasicListResponse, ProductListResponse, ProductListView, ProductQuickSearchView, QuickProductSearchResponse
 
 router = APIRouter()
 
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    try:
+        return resolve_product_fields(requested)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+FIELDS_DESCRIPTION = "Comma-separated product fields to return, e.g. product_id,name,regular_price,image_url"
+
 @router.post("/", response_model=ProductListResponse)
 def read_products(
     payload: ProductFilterRequest,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db),
 ):
     """
     Retrieve products with filters and sorting.
@@ -27,7 +40,10 @@ def read_products(
     - **max_price**: Maximum price filter
     - **sort_by**: Sort by "price" or "name"
     - **sort_order**: Sort order "asc" or "desc"
-    - **attributes**: Dictionary of attributes and their allowed values
+    - **attributes**: Dictionary of attributes and their allowed values (scalar or list-valued)
+    - **attribute_ranges**: Dictionary of numeric attributes and their min/max bounds
+    - **in_stock_only**: Only products with stock available in any warehouse
+    - **fields** (query): Return only these product fields; product_id is always included
     """
     products, total, filter_values = get_products(
         session=db,
@@ -40,18 +56,22 @@ def read_products(
         max_price=payload.max_price,
         sort_by=payload.sort_by,
         sort_order=payload.sort_order,
-        attributes=payload.attributes
-    )
-    return ProductListResponse(
-        data=[ProductListView(**product) for product in products],
-        total=total,
-        filter_values=ProductFilterValues(**filter_values)
+        attributes=payload.attributes,
+        attribute_ranges=payload.attribute_ranges,
+        in_stock_only=payload.in_stock_only,
+        fields=_parse_fields(fields)
     )
+    return FastJSONResponse({
+        "data": products,
+        "total": total,
+        "filter_values": filter_values
+    })
 
 @router.post("/paginated", response_model=ProductListResponse)
 def read_products_paginated(
     payload: ProductFilterRequest,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db),
 ):
     """
     Retrieve products with filters and sorting.
@@ -65,7 +85,10 @@ def read_products_paginated(
     - **max_price**: Maximum price filter
     - **sort_by**: Sort by "price" or "name"
     - **sort_order**: Sort order "asc" or "desc"
-    - **attributes**: Dictionary of attributes and their allowed values
+    - **attributes**: Dictionary of attributes and their allowed values (scalar or list-valued)
+    - **attribute_ranges**: Dictionary of numeric attributes and their min/max bounds
+    - **in_stock_only**: Only products with stock available in any warehouse
+    - **fields** (query): Return only these product fields; product_id is always included
     """
     products, total, filter_values = get_products(
         session=db,
@@ -78,17 +101,22 @@ def read_products_paginated(
         max_price=payload.max_price,
         sort_by=payload.sort_by,
         sort_order=payload.sort_order,
-        attributes=payload.attributes
-    )
-    return ProductListResponsePaginated(
-        data=[ProductListView(**product) for product in products],
-        total=total,
+        attributes=payload.attributes,
+        attribute_ranges=payload.attribute_ranges,
+        in_stock_only=payload.in_stock_only,
+        fields=_parse_fields(fields),
+        include_filter_values=False
     )
+    return FastJSONResponse({
+        "data": products,
+        "total": total,
+        "filter_values": None
+    })
 
 @router.get("/{product_id}", response_model=DetailedProductView)
 async def get_product_detail(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> DetailedProductView:
     """
     Get detailed information about a specific product, including:
@@ -107,45 +135,65 @@ async def get_product_detail(
     return product
 
 @router.get("/{product_id}/suggested", response_model=ProductBasicListResponse)
-async def get_suggested_products_route(
+def get_suggested_products_route(
     product_id: int,
     limit: int = Query(default=4, ge=1, le=10),
-    db: Session = Depends(get_db),
-) -> ProductListResponse:
+    db: Session = Depends(get_read_db),
+) -> ProductBasicListResponse:
     """
-    Get suggested products based on the current product's:
-    - Category/subcategory
-    - Brand
-    - Price range
-    - Active status
-    
-    Returns a list of suggested products that are similar to the current product.
+    Get suggested products, precomputed by the product-similarity job from:
+    - Attribute overlap
+    - Category/subcategory and brand
+    - Price distance
+    - Products bought in the same orders
+
+    Returns a list of active products similar to the current product.
     """
-    # First get the current product details
-    current_product = await get_detailed_product(db=db, product_id=product_id)
-    if not current_product:
+    suggested = get_suggested_products(
+        session=db,
+        product_id=product_id,
+        limit=limit
+    )
+    if suggested is None:
         raise HTTPException(
             status_code=404,
             detail="Product not found"
         )
-    
-    # Get suggested products
-    suggested_products, total = get_suggested_products(
-        session=db,
-        current_product=current_product,
-        limit=limit
-    )
-    
+    suggested_products, total = suggested
+
     return ProductBasicListResponse(
        data = [ProductListView(**product) for product in suggested_products],
-       
     )
 
+@router.get("/{product_id}/bought-together", response_model=BoughtTogetherResponse)
+def get_bought_together_route(
+    product_id: int,
+    limit: int = Query(default=4, ge=1, le=10),
+    db: Session = Depends(get_read_db),
+) -> BoughtTogetherResponse:
+    """
+    Get products frequently bought in the same order as this one, mined from
+    order history by the bought-together job. Each item carries the number of
+    orders with both products, the confidence (share of this product's
+    orders that include it) and the lift.
+    """
+    products = get_bought_together_products(
+        session=db,
+        product_id=product_id,
+        limit=limit
+    )
+    if products is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Product not found"
+        )
+    return BoughtTogetherResponse(data=products)
+
 @router.get("/search/quick", response_model=QuickProductSearchResponse)
 async def quick_product_search(
     search: str = Query(..., min_length=1, description="Search term to find products"),
     limit: int = Query(default=5, ge=1, le=10, description="Maximum number of results to return"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> QuickProductSearchResponse:
     """
     Quick search for products in a search bar dropdown.
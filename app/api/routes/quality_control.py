@@ -1 +1,137 @@
- 
\ No newline at end of file
+import datetime
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from sqlalchemy import String
+from sqlmodel import Session, select, func
+from app.api.deps import get_current_administrator, get_db, get_read_db
+from app.models import QualityControl, QualityControlCreate
+from app.crud.quality_control import (
+    get_quality_control_by_id,
+    get_quality_controls,
+    create_quality_control,
+    update_quality_control,
+    delete_quality_control
+)
+from app.crud.quality_analytics import (
+    QC_ANALYTICS_SCOPES,
+    get_quality_analytics,
+    get_quality_summary,
+)
+from app.schemas import PaginatedUsersRequest, QualityAnalyticsResponse, QualitySummaryResponse
+from pydantic import BaseModel
+
+router = APIRouter(dependencies=[Depends(get_current_administrator)])
+
+# Longest range the analytics endpoints compute in one request
+MAX_ANALYTICS_DAYS = 3660
+
+
+def _check_analytics_params(scope: str, start_date: datetime.date, end_date: datetime.date) -> None:
+    if scope not in QC_ANALYTICS_SCOPES:
+        raise HTTPException(status_code=400, detail=f"scope must be one of {', '.join(QC_ANALYTICS_SCOPES)}")
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days >= MAX_ANALYTICS_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must be at most {MAX_ANALYTICS_DAYS} days")
+
+@router.get("/analytics/{scope}", response_model=QualitySummaryResponse)
+def read_quality_summary(
+    scope: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    window_days: int = Query(default=7, ge=1, le=365),
+    limit: int = Query(default=100, ge=1, le=10000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Pass rate, trailing pass rate and p-chart out-of-control days of every
+    product or machine inspected in the range, worst pass rate first.
+
+    - **scope**: "product" or "machine" (machine 0 groups batches without one)
+    - **window_days**: Length of the trailing window ending at end_date
+    """
+    _check_analytics_params(scope, start_date, end_date)
+    rows = get_quality_summary(
+        session=db, scope=scope, start_date=start_date, end_date=end_date, window_days=window_days, limit=limit
+    )
+    return QualitySummaryResponse(
+        scope=scope, start_date=start_date, end_date=end_date, window_days=window_days, data=rows
+    )
+
+@router.get("/analytics/{scope}/{entity_id}", response_model=QualityAnalyticsResponse)
+def read_quality_analytics(
+    scope: str,
+    entity_id: int,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    window_days: int = Query(default=7, ge=1, le=365),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Daily and rolling pass rates, p-chart control limits, failed tests and
+    rejection reasons of one product or machine.
+
+    - **scope**: "product" or "machine"
+    - **window_days**: Length of the rolling pass-rate window
+    """
+    _check_analytics_params(scope, start_date, end_date)
+    return get_quality_analytics(
+        session=db,
+        scope=scope,
+        entity_id=entity_id,
+        start_date=start_date,
+        end_date=end_date,
+        window_days=window_days,
+    )
+
+@router.get("/", response_model=List[QualityControl])
+def read_quality_controls(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    return get_quality_controls(db, skip=skip, limit=limit)
+
+@router.get("/{quality_check_id}", response_model=QualityControl)
+def read_quality_control(quality_check_id: int, db: Session = Depends(get_db)):
+    qc = get_quality_control_by_id(db, quality_check_id)
+    if not qc:
+        raise HTTPException(status_code=404, detail="QualityControl not found")
+    return qc
+
+@router.post("/", response_model=QualityControl)
+def create_quality_control_endpoint(qc_in: QualityControlCreate, db: Session = Depends(get_db)):
+    return create_quality_control(db, qc_in)
+
+@router.put("/{quality_check_id}", response_model=QualityControl)
+def update_quality_control_endpoint(quality_check_id: int, qc_in: QualityControlCreate, db: Session = Depends(get_db)):
+    db_obj = get_quality_control_by_id(db, quality_check_id)
+    if not db_obj:
+        raise HTTPException(status_code=404, detail="QualityControl not found")
+    return update_quality_control(db, db_obj, qc_in)
+
+@router.delete("/{quality_check_id}", response_model=QualityControl)
+def delete_quality_control_endpoint(quality_check_id: int, db: Session = Depends(get_db)):
+    db_obj = delete_quality_control(db, quality_check_id)
+    if not db_obj:
+        raise HTTPException(status_code=404, detail="QualityControl not found")
+    return db_obj
+
+class PaginatedQualityControlResponse(BaseModel):
+    data: list[QualityControl]
+    total: int
+
+@router.post("/paginated", response_model=PaginatedQualityControlResponse)
+def quality_control_paginated(
+    params: PaginatedUsersRequest = Body(...),
+    db: Session = Depends(get_db)
+):
+    query = select(QualityControl)
+    if params.search:
+        query = query.where(QualityControl.quality_check_id.cast(String).ilike(f"%{params.search}%"))
+    sort_col = getattr(QualityControl, params.sort, QualityControl.quality_check_id)
+    if params.order.lower() == "desc":
+        query = query.order_by(sort_col.desc())
+    else:
+        query = query.order_by(sort_col.asc())
+    total_count = db.exec(select(func.count()).select_from(QualityControl)).one()
+    total_count = total_count[0] if isinstance(total_count, tuple) else total_count
+    offset = (params.page - 1) * params.size
+    items = db.exec(query.offset(offset).limit(params.size)).all()
+    return PaginatedQualityControlResponse(data=items, total=total_count)
@@ -1,8 +1,8 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Body
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
 from sqlmodel import Session, select, func
-from app.api.deps import get_db
-from app.models import RawMaterialInventory, RawMaterialInventoryCreate
+from app.api.deps import get_db, get_read_db
+from app.models import RawMaterialInventory, RawMaterialInventoryCreate, RawMaterialLot, RawMaterialLotCreate
 from app.crud.raw_material_inventory import (
     get_raw_material_inventory_by_id,
     get_raw_material_inventories,
@@ -10,11 +10,42 @@ from app.crud.raw_material_inventory import (
     update_raw_material_inventory,
     delete_raw_material_inventory
 )
-from app.schemas import PaginatedUsersRequest
+from app.crud.raw_material_lot import add_lot, get_expiring_lots, get_material_lots
+from app.schemas import ExpiringLotsResponse, PaginatedUsersRequest
 from pydantic import BaseModel
 
 router = APIRouter()
 
+@router.get("/expiring", response_model=ExpiringLotsResponse)
+def read_expiring_lots(
+    days: int = Query(default=30, ge=0, le=3660),
+    material_type: Optional[str] = None,
+    include_expired: bool = True,
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Raw material lots with stock left that expire within `days` days,
+    soonest first (already expired ones too, unless include_expired=false).
+    """
+    lots = get_expiring_lots(
+        session=db, days=days, material_type=material_type, include_expired=include_expired, limit=limit
+    )
+    return ExpiringLotsResponse(days=days, data=lots)
+
+@router.get("/{material_id}/lots", response_model=List[RawMaterialLot])
+def read_material_lots(material_id: int, include_empty: bool = False, db: Session = Depends(get_db)):
+    """Lots of the material in consumption (first-expiry-first-out) order"""
+    return get_material_lots(db, material_id, include_empty=include_empty)
+
+@router.post("/{material_id}/lots", response_model=RawMaterialLot)
+def receive_material_lot(material_id: int, lot_in: RawMaterialLotCreate, db: Session = Depends(get_db)):
+    """Receive a lot of the material into stock"""
+    material = get_raw_material_inventory_by_id(db, material_id)
+    if not material:
+        raise HTTPException(status_code=404, detail="RawMaterialInventory not found")
+    return add_lot(db, material, lot_in)
+
 @router.get("/", response_model=List[RawMaterialInventory])
 def read_raw_material_inventories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     return get_raw_material_inventories(db, skip=skip, limit=limit)
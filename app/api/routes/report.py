@@ -0,0 +1,142 @@
+import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from app.api.deps import get_current_administrator, get_db, get_read_db
+from app.crud.manufacturing import (
+    MANUFACTURING_REPORT_GROUPS,
+    get_manufacturing_report,
+    rebuild_manufacturing_aggregates,
+)
+from app.crud.report import (
+    SALES_REPORT_GROUPS,
+    get_sales_report,
+    rebuild_sales_rollups,
+    refresh_sales_rollups,
+)
+from app.models import Message
+from app.schemas import (
+    ManufacturingReportResponse,
+    ManufacturingReportRow,
+    ManufacturingReportTotals,
+    SalesReportResponse,
+    SalesReportRow,
+    SalesReportTotals,
+    SalesRollupRefreshResponse,
+)
+
+router = APIRouter(dependencies=[Depends(get_current_administrator)])
+
+@router.get("/sales", response_model=SalesReportResponse)
+def read_sales_report(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    group_by: str = Query(default="day", description="One of: day, product, category, brand"),
+    category_id: Optional[int] = None,
+    brand_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    limit: int = Query(default=1000, ge=1, le=10000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Sales totals for a date range, answered from the daily rollups.
+
+    - **group_by**: "day", "product", "category" or "brand"
+    - **category_id** / **brand_id** / **product_id**: Optional filters
+    """
+    if group_by not in SALES_REPORT_GROUPS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(SALES_REPORT_GROUPS)}")
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    rows, totals = get_sales_report(
+        session=db,
+        start_date=start_date,
+        end_date=end_date,
+        group_by=group_by,
+        category_id=category_id,
+        brand_id=brand_id,
+        product_id=product_id,
+        limit=limit,
+    )
+    return SalesReportResponse(
+        group_by=group_by,
+        start_date=start_date,
+        end_date=end_date,
+        data=[SalesReportRow(**row) for row in rows],
+        totals=SalesReportTotals(**totals),
+    )
+
+@router.post("/sales/refresh", response_model=SalesRollupRefreshResponse)
+def refresh_sales_report(db: Session = Depends(get_db)):
+    """
+    Fold orders placed since the last refresh into the daily rollups.
+    """
+    return SalesRollupRefreshResponse(**refresh_sales_rollups(db))
+
+@router.post("/sales/rebuild", response_model=Message)
+def rebuild_sales_report(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    db: Session = Depends(get_db),
+):
+    """
+    Recompute the rollups of a date range from the raw order lines.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    rows = rebuild_sales_rollups(db, start_date, end_date)
+    return Message(message=f"Rebuilt {rows} rollup rows")
+
+@router.get("/manufacturing", response_model=ManufacturingReportResponse)
+def read_manufacturing_report(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    group_by: str = Query(default="day", description="One of: day, machine, product"),
+    machine_id: Optional[int] = Query(default=None, description="0 for batches without a machine"),
+    product_id: Optional[int] = None,
+    limit: int = Query(default=1000, ge=1, le=10000),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Units produced, production cost, cost per unit and QC pass rate for a
+    date range, answered from the daily manufacturing aggregates.
+
+    - **group_by**: "day", "machine" or "product"
+    - **machine_id** / **product_id**: Optional filters
+    """
+    if group_by not in MANUFACTURING_REPORT_GROUPS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(MANUFACTURING_REPORT_GROUPS)}")
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    rows, totals = get_manufacturing_report(
+        session=db,
+        start_date=start_date,
+        end_date=end_date,
+        group_by=group_by,
+        machine_id=machine_id,
+        product_id=product_id,
+        limit=limit,
+    )
+    return ManufacturingReportResponse(
+        group_by=group_by,
+        start_date=start_date,
+        end_date=end_date,
+        data=[ManufacturingReportRow(**row) for row in rows],
+        totals=ManufacturingReportTotals(**totals),
+    )
+
+@router.post("/manufacturing/rebuild", response_model=Message)
+def rebuild_manufacturing_report(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    db: Session = Depends(get_db),
+):
+    """
+    Recompute the manufacturing aggregates of a date range from the raw
+    production batches and quality controls.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    rows = rebuild_manufacturing_aggregates(db, start_date, end_date)
+    return Message(message=f"Rebuilt {rows} aggregate rows")
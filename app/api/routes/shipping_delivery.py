@@ -1,7 +1,8 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Body
 from sqlmodel import Session, select, func
-from app.api.deps import get_db
+from app.api.deps import get_current_administrator, get_db
+from app.core.config import settings
 from app.models import ShippingDelivery, ShippingDeliveryCreate
 from app.crud.shipping_delivery import (
     get_shipping_delivery_by_id,
@@ -10,11 +11,35 @@ from app.crud.shipping_delivery import (
     update_shipping_delivery,
     delete_shipping_delivery
 )
-from app.schemas import PaginatedUsersRequest
+from app.crud.shipment_tracking import ingest_tracking_feed
+from app.schemas import PaginatedUsersRequest, TrackingIngestResponse
 from pydantic import BaseModel
 
 router = APIRouter()
 
+@router.post(
+    "/tracking-updates",
+    dependencies=[Depends(get_current_administrator)],
+    response_model=TrackingIngestResponse,
+)
+def ingest_tracking_updates(
+    feed: bytes = Body(..., media_type="application/x-ndjson"),
+    db: Session = Depends(get_db),
+):
+    """
+    Carrier tracking feed, one JSON event per line, e.g.
+    `{"tracking_number": "1Z999", "status": "out_for_delivery", "event_time": "2026-10-20T08:15:00Z"}`.
+    The latest event of each tracking number is applied to its shipments
+    in one statement, and orders whose shipments are all delivered are
+    marked delivered. Unparseable lines are reported, not applied.
+    """
+    if feed.count(b"\n") > settings.SHIPMENT_TRACKING_MAX_LINES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Feeds are limited to {settings.SHIPMENT_TRACKING_MAX_LINES} lines, send it in parts",
+        )
+    return ingest_tracking_feed(db, feed)
+
 @router.get("/", response_model=List[ShippingDelivery])
 def read_shipping_deliveries(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     return get_shipping_deliveries(db, skip=skip, limit=limit)
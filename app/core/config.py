@@ -51,6 +51,30 @@ class Settings(BaseSettings):
 
     PROJECT_NAME: str = "pvc-shop"
     SENTRY_DSN: HttpUrl | None = None
+
+    # Create the database engine, Sentry and the email client in the app
+    # lifespan instead of at import time, so workers boot faster
+    LAZY_INIT: bool = True
+
+    # Request/SQL metrics at /metrics, on by default only in local; a
+    # Server-Timing header is added outside production. With METRICS_TOKEN
+    # set, scrapers must send it as "Authorization: Bearer <token>"
+    METRICS_ENABLED: bool | None = None
+    METRICS_TOKEN: str | None = None
+
+    @computed_field
+    @property
+    def metrics_enabled(self) -> bool:
+        if self.METRICS_ENABLED is None:
+            return self.ENVIRONMENT == "local"
+        return self.METRICS_ENABLED
+
+    # Slow query log (browsable at /diagnostics/slow-queries). With
+    # SLOW_QUERY_EXPLAIN, a background thread adds each statement's plan
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SLOW_QUERY_LOG_SIZE: int = 200
+    SLOW_QUERY_EXPLAIN: bool = False
     
     # Database settings
     POSTGRES_SERVER: str = os.getenv("POSTGRES_SERVER", "localhost")
@@ -70,7 +94,64 @@ class Settings(BaseSettings):
             port=self.POSTGRES_PORT,
             path=f"{self.POSTGRES_DB}",
         )
-   
+
+    # Read replicas as "host" or "host:port", with the primary's credentials
+    # and database. Read-only catalog and report endpoints are served from
+    # them; a client that just wrote reads from the primary for
+    # REPLICA_STICKY_SECONDS so it sees its own writes despite replication lag.
+    POSTGRES_REPLICA_SERVERS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    REPLICA_STICKY_SECONDS: int = 5
+
+    @computed_field
+    @property
+    def SQLALCHEMY_REPLICA_DATABASE_URIS(self) -> list[PostgresDsn]:
+        uris = []
+        for server in self.POSTGRES_REPLICA_SERVERS:
+            host, _, port = server.partition(":")
+            uris.append(MultiHostUrl.build(
+                scheme="postgresql+psycopg2",
+                username=self.POSTGRES_USER,
+                password=self.POSTGRES_PASSWORD,
+                host=host,
+                port=int(port) if port else self.POSTGRES_PORT,
+                path=f"{self.POSTGRES_DB}",
+            ))
+        return uris
+
+    # Inventory reorder job
+    REORDER_VELOCITY_WINDOW_DAYS: int = 30
+    REORDER_DEFAULT_LEAD_TIME_DAYS: int = 7
+
+    # Machine maintenance: schedules by operating hours ("Cada 500 horas")
+    # are converted to calendar days at this utilization
+    MAINTENANCE_OPERATING_HOURS_PER_DAY: int = 16
+
+    # Invoicing: numbers look like FAC-2026-000001, one series per year
+    INVOICE_NUMBER_PREFIX: str = "FAC"
+    INVOICE_PAYMENT_TERMS_DAYS: int = 30
+    INVOICE_BATCH_SIZE: int = 500
+    # Processes rendering invoice documents; smaller runs render in-process
+    INVOICE_RENDER_WORKERS: int = int(os.getenv("INVOICE_RENDER_WORKERS", "4"))
+    INVOICE_RENDER_POOL_MIN_DOCUMENTS: int = 50
+
+    # Carrier tracking feeds: larger feeds are refused, to be sent in parts
+    SHIPMENT_TRACKING_MAX_LINES: int = 50000
+
+    # Customer returns: processed this many per transaction; return rates
+    # are measured over this many days by default
+    RETURN_BATCH_SIZE: int = 500
+    RETURN_METRICS_WINDOW_DAYS: int = 90
+
+    # Product recommendations job
+    SIMILAR_PRODUCTS_TOP_N: int = 10
+    SIMILAR_PRODUCTS_COPURCHASE_WINDOW_DAYS: int = 365
+
+    # Frequently-bought-together job
+    BOUGHT_TOGETHER_TOP_N: int = 10
+    BOUGHT_TOGETHER_MIN_PAIR_ORDERS: int = 3
+    BOUGHT_TOGETHER_MIN_SUPPORT: float = 0.0
+    BOUGHT_TOGETHER_MIN_LIFT: float = 1.2
+
     # Email settings
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
@@ -120,5 +201,3 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
-
-print(settings.SQLALCHEMY_DATABASE_URI)
@@ -1,10 +1,150 @@
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from typing import Mapping, Optional
+
+from sqlalchemy import Engine, event
 from sqlmodel import Session, create_engine, select
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.crud import user
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.slow_query import install_slow_query_log
 from app.models import User, UserCreate
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+_engine: Engine | None = None
+_replica_engines: list[Engine] | None = None
+_engine_lock = threading.Lock()
+_replica_turn = itertools.count()
+
+# Cookie holding the time until which a client that wrote reads from the primary
+PRIMARY_READS_COOKIE = "db_primary_until"
+
+
+def get_engine() -> Engine:
+    """The application (primary) engine, created and instrumented on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    return _engine
+
+
+def get_replica_engines() -> list[Engine]:
+    """Engines of the configured read replicas, possibly none"""
+    global _replica_engines
+    if _replica_engines is None:
+        with _engine_lock:
+            if _replica_engines is None:
+                _replica_engines = [
+                    _create_engine(str(uri), read_only=True)
+                    for uri in settings.SQLALCHEMY_REPLICA_DATABASE_URIS
+                ]
+    return _replica_engines
+
+
+def get_read_engine() -> Engine:
+    """A replica engine (round-robin), or the primary when there are none"""
+    replicas = get_replica_engines()
+    if not replicas:
+        return get_engine()
+    return replicas[next(_replica_turn) % len(replicas)]
+
+
+def _create_engine(url: str, read_only: bool = False) -> Engine:
+    if read_only:
+        # Read-only transactions, so a write routed to a replica fails loudly
+        new_engine = create_engine(
+            url, pool_pre_ping=True, execution_options={"postgresql_readonly": True}
+        )
+    else:
+        new_engine = create_engine(url)
+    instrument_engine(new_engine)
+    if settings.SLOW_QUERY_LOG_ENABLED:
+        install_slow_query_log(
+            new_engine,
+            threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+            maxlen=settings.SLOW_QUERY_LOG_SIZE,
+            explain=settings.SLOW_QUERY_EXPLAIN,
+        )
+    return new_engine
+
+
+def dispose_engine() -> None:
+    """Close the pooled connections, e.g. on application shutdown"""
+    for pooled_engine in [_engine, *(_replica_engines or [])]:
+        if pooled_engine is not None:
+            pooled_engine.dispose()
+
+
+def __getattr__(name: str):
+    # `from app.core.db import engine` keeps working for scripts and jobs;
+    # the app itself goes through get_engine() so importing it stays cheap
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _WriteTracker:
+    wrote: bool = False
+
+    def mark(self, session: Session) -> None:
+        self.wrote = True
+
+
+_current_writes: ContextVar[Optional[_WriteTracker]] = ContextVar("current_writes", default=None)
+
+
+def track_writes(session: Session) -> None:
+    """Count commits of `session` as writes of the request being served"""
+    tracker = _current_writes.get()
+    if tracker is not None:
+        event.listen(session, "after_commit", tracker.mark)
+
+
+def reads_pinned_to_primary(cookies: Mapping[str, str]) -> bool:
+    try:
+        return float(cookies.get(PRIMARY_READS_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """
+    After a request commits on the primary, set a short-lived cookie that
+    sends the client's reads to the primary until the replicas have caught up.
+    """
+
+    def __init__(self, app: ASGIApp, sticky_seconds: int) -> None:
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracker = _WriteTracker()
+        token = _current_writes.set(tracker)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and tracker.wrote:
+                cookie = (
+                    f"{PRIMARY_READS_COOKIE}={time.time() + self.sticky_seconds:.0f}; "
+                    f"Max-Age={self.sticky_seconds}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_writes.reset(token)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -0,0 +1,270 @@
+"""
+Per-route request and SQL metrics.
+
+A SQLAlchemy cursor hook counts statements and their time into the stats of
+the request being served (tracked in a context variable), and the ASGI
+middleware folds them into per-route aggregates rendered in the Prometheus
+text format by /metrics. Statements are only ever reported as fingerprints,
+with their literals replaced by placeholders.
+"""
+import re
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Upper bounds (seconds) of the request duration histogram
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Longest statement fingerprint kept as the slowest statement of a route
+_MAX_STATEMENT_LENGTH = 300
+
+# Literals replaced by "?" in statement fingerprints: quoted strings
+# (including E'' and $$ strings) and numbers not part of an identifier or
+# bind parameter name
+_LITERALS = re.compile(
+    r"""[Ee]'(?:[^'\\]|\\.|'')*'|'(?:[^']|'')*'|\$\$.*?\$\$|(?<![\w$.:%])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b""",
+    re.DOTALL,
+)
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+# A list of placeholders, e.g. IN (?, ?, ?), is folded into one
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+@dataclass
+class RequestStats:
+    route: str = "unmatched"
+    query_count: int = 0
+    db_time: float = 0.0
+    slowest_time: float = 0.0
+    slowest_statement: Optional[str] = None
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current_request.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = _current_request.get()
+    if stats is None:
+        return
+    stats.query_count += 1
+    stats.db_time += elapsed
+    if elapsed > stats.slowest_time:
+        stats.slowest_time = elapsed
+        stats.slowest_statement = statement
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count every statement run on `engine` towards the current request"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@dataclass
+class _RouteMetrics:
+    requests: Dict[str, int] = field(default_factory=dict)
+    bucket_counts: list = field(default_factory=lambda: [0] * (len(DURATION_BUCKETS) + 1))
+    duration_sum: float = 0.0
+    query_count: int = 0
+    db_time: float = 0.0
+    slowest_time: float = 0.0
+    slowest_statement: str = ""
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], _RouteMetrics] = {}
+
+    def observe(self, method: str, status: int, duration: float, stats: RequestStats) -> None:
+        with self._lock:
+            metrics = self._routes.setdefault((method, stats.route), _RouteMetrics())
+            status_label = str(status)
+            metrics.requests[status_label] = metrics.requests.get(status_label, 0) + 1
+            metrics.bucket_counts[bisect_left(DURATION_BUCKETS, duration)] += 1
+            metrics.duration_sum += duration
+            metrics.query_count += stats.query_count
+            metrics.db_time += stats.db_time
+            if stats.slowest_statement and stats.slowest_time > metrics.slowest_time:
+                metrics.slowest_time = stats.slowest_time
+                metrics.slowest_statement = statement_fingerprint(stats.slowest_statement)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                "# HELP http_requests_total Requests served, by route and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route), metrics in routes:
+                for status, count in sorted(metrics.requests.items()):
+                    lines.append(
+                        f"http_requests_total{_labels(method=method, route=route, status=status)} {count}"
+                    )
+
+            lines += [
+                "# HELP http_request_duration_seconds Request duration, by route.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), metrics in routes:
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS + ("+Inf",), metrics.bucket_counts):
+                    cumulative += count
+                    labels = _labels(method=method, route=route, le=str(bound))
+                    lines.append(f"http_request_duration_seconds_bucket{labels} {cumulative}")
+                labels = _labels(method=method, route=route)
+                lines.append(f"http_request_duration_seconds_sum{labels} {metrics.duration_sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{labels} {cumulative}")
+
+            lines += [
+                "# HELP http_request_db_queries_total SQL statements run while serving requests, by route.",
+                "# TYPE http_request_db_queries_total counter",
+            ]
+            for (method, route), metrics in routes:
+                lines.append(
+                    f"http_request_db_queries_total{_labels(method=method, route=route)} {metrics.query_count}"
+                )
+
+            lines += [
+                "# HELP http_request_db_seconds_total Time spent in SQL statements, by route.",
+                "# TYPE http_request_db_seconds_total counter",
+            ]
+            for (method, route), metrics in routes:
+                lines.append(
+                    f"http_request_db_seconds_total{_labels(method=method, route=route)} {metrics.db_time:.6f}"
+                )
+
+            lines += [
+                "# HELP http_request_slowest_query_seconds Slowest SQL statement seen, by route.",
+                "# TYPE http_request_slowest_query_seconds gauge",
+            ]
+            for (method, route), metrics in routes:
+                if metrics.slowest_statement:
+                    labels = _labels(method=method, route=route, statement=metrics.slowest_statement)
+                    lines.append(f"http_request_slowest_query_seconds{labels} {metrics.slowest_time:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+registry = MetricsRegistry()
+
+
+def statement_fingerprint(statement: str) -> str:
+    """
+    The statement with comments dropped, literals replaced by "?" and
+    whitespace collapsed, so statements differing only in their values
+    share one fingerprint and no data ends up in a metric label.
+    """
+    statement = _COMMENTS.sub(" ", statement)
+    statement = _LITERALS.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("?", statement)
+    statement = " ".join(statement.split())
+    if len(statement) > _MAX_STATEMENT_LENGTH:
+        statement = statement[:_MAX_STATEMENT_LENGTH] + "..."
+    return statement
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the matched route, e.g. /api/v1/products/{product_id}.
+    Routes of included routers may report their path relative to the
+    router prefix, so the prefix is recovered from the request path.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+    path = scope.get("path", "")
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is None or path_regex.match(path):
+        return template
+    for match in re.finditer("/", path):
+        if path_regex.match(path[match.start():]):
+            return path[:match.start()] + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Record duration, SQL statement count, SQL time and slowest statement of
+    every HTTP request. With `server_timing`, the numbers are also sent in a
+    Server-Timing header (visible in the browser's network panel).
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False, exclude_paths: tuple = ()) -> None:
+        self.app = app
+        self.server_timing = server_timing
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    header = (
+                        f"app;dur={elapsed:.1f}, "
+                        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.query_count} queries"'
+                    )
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (b"server-timing", header.encode("latin-1"))
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stats.route = route_template(scope)
+            registry.observe(scope["method"], status, time.perf_counter() - start, stats)
+            _current_request.reset(token)
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not secrets.compare_digest(token, settings.METRICS_TOKEN):
+            return PlainTextResponse("Not authenticated", status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,248 @@
+"""
+Slow query log.
+
+Statements slower than a threshold are kept in an in-process ring buffer
+with their redacted parameters and the route that ran them, which
+SlowQueryRouteMiddleware keeps at hand whether or not metrics are enabled.
+On PostgreSQL they can also get their EXPLAIN (FORMAT JSON) plan: a
+background thread plans them on a connection of its own, so the request
+that ran the slow statement doesn't wait for a second planner round trip.
+"""
+import datetime
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Statement kinds EXPLAIN accepts without running them (no ANALYZE)
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+
+# Parameter names whose values are hidden whatever their type
+_SENSITIVE_NAMES = ("password", "token", "secret", "hash")
+
+# Same statement isn't explained again within this many seconds
+_EXPLAIN_COOLDOWN_SECONDS = 60
+
+# Slow statements waiting for a plan; more are recorded without one
+_EXPLAIN_QUEUE_SIZE = 100
+
+
+_current_scope: ContextVar[Optional[Scope]] = ContextVar("slow_query_scope", default=None)
+
+
+def current_route() -> Optional[str]:
+    """Route template of the request being served, if any"""
+    scope = _current_scope.get()
+    return route_template(scope) if scope is not None else None
+
+
+class SlowQueryRouteMiddleware:
+    """Keep the request being served at hand, so slow statements record its route"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
+
+
+@dataclass
+class SlowQuery:
+    recorded_at: datetime.datetime
+    duration_ms: float
+    statement: str
+    parameters: Any
+    route: Optional[str]
+    executemany: bool
+    plan: Optional[Any] = None
+    plan_error: Optional[str] = None
+
+
+def _redact_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, Decimal, datetime.date, datetime.time)):
+        return value
+    return f"<redacted {type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """
+    Keep numbers, dates and NULLs (useful to reproduce a plan) and hide
+    strings, JSON and anything under a sensitive-looking name.
+    """
+    if isinstance(parameters, dict):
+        return {
+            name: "<redacted>"
+            if any(word in str(name).lower() for word in _SENSITIVE_NAMES)
+            else _redact_value(value)
+            for name, value in parameters.items()
+        }
+    if isinstance(parameters, (list, tuple)):
+        return [redact_parameters(value) if isinstance(value, (dict, list, tuple)) else _redact_value(value)
+                for value in parameters]
+    return _redact_value(parameters)
+
+
+class SlowQueryLog:
+    def __init__(self, maxlen: int) -> None:
+        self._lock = threading.Lock()
+        self._entries: deque[SlowQuery] = deque(maxlen=maxlen)
+        self._explained_at: Dict[str, float] = {}
+
+    def add(self, entry: SlowQuery) -> None:
+        with self._lock:
+            self._entries.append(entry)
+
+    def should_explain(self, statement: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(statement)
+            if last is not None and now - last < _EXPLAIN_COOLDOWN_SECONDS:
+                return False
+            if len(self._explained_at) >= 10 * (self._entries.maxlen or 1):
+                self._explained_at.clear()
+            self._explained_at[statement] = now
+            return True
+
+    def entries(
+        self,
+        *,
+        route: Optional[str] = None,
+        min_duration_ms: Optional[float] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Recorded slow queries, newest first"""
+        with self._lock:
+            entries = list(self._entries)
+        result = []
+        for entry in reversed(entries):
+            if route is not None and entry.route != route:
+                continue
+            if min_duration_ms is not None and entry.duration_ms < min_duration_ms:
+                continue
+            result.append(asdict(entry))
+            if len(result) >= limit:
+                break
+        return result
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._explained_at.clear()
+        return count
+
+
+slow_query_log: Optional[SlowQueryLog] = None
+
+
+def _explain(engine: Engine, statement: str, parameters: Any) -> Any:
+    """
+    Plan the statement on a new connection of `engine`. It sees committed
+    data only, so statements on objects the slow transaction created (e.g.
+    temporary tables) end up with a plan error.
+    """
+    with engine.connect() as connection:
+        return connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar_one()
+
+
+class _ExplainWorker:
+    """Background thread filling in the plan of queued slow query entries"""
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue = queue.Queue(maxsize=_EXPLAIN_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, engine: Engine, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-query-explain", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((engine, entry, statement, parameters))
+        except queue.Full:
+            entry.plan_error = "Not explained: too many slow queries waiting for a plan"
+
+    def _run(self) -> None:
+        while True:
+            engine, entry, statement, parameters = self._queue.get()
+            try:
+                entry.plan = _explain(engine, statement, parameters)
+            except Exception as e:
+                entry.plan_error = str(e)
+            finally:
+                self._queue.task_done()
+
+    def join(self) -> None:
+        """Wait until every queued statement is explained"""
+        self._queue.join()
+
+
+explain_worker = _ExplainWorker()
+
+
+def install_slow_query_log(
+    engine: Engine,
+    threshold_ms: float,
+    maxlen: int = 200,
+    explain: bool = False,
+) -> SlowQueryLog:
+    """
+    Record statements on `engine` slower than `threshold_ms`. Engines
+    installed on (primary and replicas) share the same log. With `explain`,
+    their plans are added in the background.
+    """
+    global slow_query_log
+    if slow_query_log is None:
+        slow_query_log = SlowQueryLog(maxlen)
+    log = slow_query_log
+    explain = explain and engine.dialect.name == "postgresql"
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["slow_query_start_time"].pop()) * 1000
+        if duration_ms < threshold_ms:
+            return
+        entry = SlowQuery(
+            recorded_at=datetime.datetime.now(),
+            duration_ms=round(duration_ms, 3),
+            statement=statement,
+            parameters=redact_parameters(parameters),
+            route=current_route(),
+            executemany=executemany,
+        )
+        if (
+            explain
+            and not executemany
+            and statement.lstrip().lower().startswith(_EXPLAINABLE)
+            and log.should_explain(statement)
+        ):
+            explain_worker.submit(engine, entry, statement, parameters)
+        log.add(entry)
+        logger.warning(f"Slow query ({duration_ms:.0f} ms) on {entry.route}: {' '.join(statement.split())[:200]}")
+
+    return log
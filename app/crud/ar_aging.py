@@ -0,0 +1,279 @@
+import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session
+
+from app.crud.utils import lock_watermark, previous_values, set_watermark, users_of_orders
+from app.models import InvoicePayment, Order
+
+AR_AGING_JOB = "ar_aging"
+
+# An invoice moves to the next bucket on the day it is this many days past due
+AGING_BOUNDARIES = (1, 31, 61, 91)
+
+AR_AGING_ROLES = ("customer", "distributor")
+
+
+class CreditLimitExceededError(ValueError):
+    """Raised when an order would take a distributor over its credit limit"""
+
+
+_SUMMARY_COLUMNS = """
+    ar_aging_summaries (
+        user_id, current_amount, days_1_30, days_31_60, days_61_90, days_over_90,
+        total_outstanding, uninvoiced_amount, open_invoices, overdue_invoices,
+        oldest_due_date, updated_at
+    )
+"""
+
+# Unpaid invoices, less refunds, by days past due (partially paid ones
+# count in full: the amount paid so far isn't recorded), plus orders still
+# waiting for an invoice
+_SUMMARY_SELECT = """
+    SELECT o.user_id,
+           COALESCE(SUM(b.balance) FILTER (WHERE i.due_date >= CAST(:as_of AS date)), 0),
+           COALESCE(SUM(b.balance) FILTER (WHERE CAST(:as_of AS date) - i.due_date BETWEEN 1 AND 30), 0),
+           COALESCE(SUM(b.balance) FILTER (WHERE CAST(:as_of AS date) - i.due_date BETWEEN 31 AND 60), 0),
+           COALESCE(SUM(b.balance) FILTER (WHERE CAST(:as_of AS date) - i.due_date BETWEEN 61 AND 90), 0),
+           COALESCE(SUM(b.balance) FILTER (WHERE CAST(:as_of AS date) - i.due_date > 90), 0),
+           COALESCE(SUM(b.balance), 0),
+           COALESCE(SUM(o.order_total) FILTER (WHERE i.invoice_id IS NULL), 0),
+           COUNT(i.invoice_id),
+           COUNT(i.invoice_id) FILTER (WHERE i.due_date < CAST(:as_of AS date)),
+           MIN(i.due_date),
+           now()
+    FROM orders o
+    LEFT JOIN invoice_payments i ON i.order_id = o.order_id
+    CROSS JOIN LATERAL (SELECT i.total_amount - i.refunded_amount AS balance) b
+    WHERE {user_filter}
+      AND (
+          (i.payment_status <> 'paid' AND b.balance > 0)
+          OR (i.invoice_id IS NULL AND o.order_status::text <> 'cancelled')
+      )
+    GROUP BY o.user_id
+"""
+
+
+def refresh_ar_aging_summaries(
+    connection: Connection | Session, user_ids: Iterable[Optional[int]], as_of: Optional[datetime.date] = None
+) -> None:
+    """
+    Recompute the aging summaries of the given users from their orders and
+    invoices. Users are locked first, so concurrent writes for the same
+    customer recompute one after the other.
+    """
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if not user_ids:
+        return
+    params = {"user_ids": user_ids, "as_of": as_of or datetime.date.today()}
+    connection.execute(
+        text("""
+            SELECT pg_advisory_xact_lock(hashtextextended('ar_aging:' || u.user_id, 0))
+            FROM unnest(CAST(:user_ids AS integer[])) AS u(user_id)
+        """),
+        params,
+    )
+    connection.execute(text("DELETE FROM ar_aging_summaries WHERE user_id = ANY(:user_ids)"), params)
+    connection.execute(
+        text(f"INSERT INTO {_SUMMARY_COLUMNS}" + _SUMMARY_SELECT.format(user_filter="o.user_id = ANY(:user_ids)")),
+        params,
+    )
+
+
+def rebuild_ar_aging(
+    connection: Connection | Session, as_of: Optional[datetime.date] = None, commit: bool = True
+) -> int:
+    """Recompute every aging summary, e.g. after bulk loads that bypass the ORM"""
+    as_of = as_of or datetime.date.today()
+    connection.execute(text("DELETE FROM ar_aging_summaries"))
+    result = connection.execute(
+        text(f"INSERT INTO {_SUMMARY_COLUMNS}" + _SUMMARY_SELECT.format(user_filter="true")),
+        {"as_of": as_of},
+    )
+    if commit:
+        connection.commit()
+    return result.rowcount
+
+
+def mark_overdue_invoices(session: Session, as_of: Optional[datetime.date] = None) -> List[int]:
+    """Set pending invoices past their due date to overdue; returns the users they belong to"""
+    return session.execute(
+        text("""
+            UPDATE invoice_payments i
+            SET payment_status = 'overdue'
+            FROM orders o
+            WHERE o.order_id = i.order_id
+              AND i.payment_status = 'pending'
+              AND i.due_date < :as_of
+            RETURNING o.user_id
+        """),
+        {"as_of": as_of or datetime.date.today()},
+    ).scalars().all()
+
+
+def bucket_crossing_ranges(
+    last_date: datetime.date, as_of: datetime.date
+) -> List[Tuple[datetime.date, datetime.date]]:
+    """
+    Due date ranges of the invoices that changed aging bucket between two
+    days. An invoice reaches boundary b on due_date + b, so it crossed b if
+    its due date is in (last_date - b, as_of - b].
+    """
+    if as_of <= last_date:
+        return []
+    return [
+        (last_date - datetime.timedelta(days=boundary - 1), as_of - datetime.timedelta(days=boundary))
+        for boundary in AGING_BOUNDARIES
+    ]
+
+
+def refresh_ar_aging(session: Session, as_of: Optional[datetime.date] = None) -> Dict[str, Any]:
+    """
+    Daily aging run: mark invoices that went past due as overdue and move
+    the summaries forward to `as_of`. Only users with an open invoice that
+    crossed a bucket boundary since the last run are recomputed, found
+    through the open invoices' due date index; the first run rebuilds all.
+    """
+    as_of = as_of or datetime.date.today()
+    # The watermark holds the date of the last run, as a day ordinal
+    last_run = lock_watermark(session, AR_AGING_JOB)
+    overdue_users = mark_overdue_invoices(session, as_of)
+
+    if not last_run:
+        refreshed = rebuild_ar_aging(session, as_of, commit=False)
+    elif last_run < as_of.toordinal():
+        ranges = bucket_crossing_ranges(datetime.date.fromordinal(last_run), as_of)
+        conditions, params = [], {}
+        for n, (low, high) in enumerate(ranges):
+            conditions.append(f"i.due_date BETWEEN :low_{n} AND :high_{n}")
+            params.update({f"low_{n}": low, f"high_{n}": high})
+        crossed_users = session.execute(
+            text(f"""
+                SELECT DISTINCT o.user_id
+                FROM invoice_payments i
+                JOIN orders o ON o.order_id = i.order_id
+                WHERE i.payment_status <> 'paid'
+                  AND ({" OR ".join(conditions)})
+            """),
+            params,
+        ).scalars().all()
+        user_ids = set(crossed_users) | set(overdue_users)
+        refresh_ar_aging_summaries(session, user_ids, as_of)
+        refreshed = len(user_ids)
+    else:
+        refresh_ar_aging_summaries(session, overdue_users, as_of)
+        refreshed = len(set(overdue_users))
+
+    set_watermark(session, AR_AGING_JOB, max(last_run, as_of.toordinal()))
+    session.commit()
+    return {"as_of": as_of, "invoices_overdue": len(overdue_users), "summaries_refreshed": refreshed}
+
+
+def get_ar_aging(
+    *,
+    session: Session,
+    role: Optional[str] = None,
+    overdue_only: bool = False,
+    skip: int = 0,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """Aging summaries, largest balance first, with the totals of every bucket"""
+    if role is not None and role not in AR_AGING_ROLES:
+        raise ValueError(f"Unknown role '{role}', expected one of: {', '.join(AR_AGING_ROLES)}")
+    filters = ["u.role::text = ANY(:roles)"]
+    if overdue_only:
+        filters.append("a.overdue_invoices > 0")
+    params = {"roles": [role] if role else list(AR_AGING_ROLES), "skip": skip, "limit": limit}
+    where = " AND ".join(filters)
+    totals = session.execute(
+        text(f"""
+            SELECT COUNT(*) AS accounts,
+                   COALESCE(SUM(a.current_amount), 0) AS current_amount,
+                   COALESCE(SUM(a.days_1_30), 0) AS days_1_30,
+                   COALESCE(SUM(a.days_31_60), 0) AS days_31_60,
+                   COALESCE(SUM(a.days_61_90), 0) AS days_61_90,
+                   COALESCE(SUM(a.days_over_90), 0) AS days_over_90,
+                   COALESCE(SUM(a.total_outstanding), 0) AS total_outstanding,
+                   COALESCE(SUM(a.uninvoiced_amount), 0) AS uninvoiced_amount
+            FROM ar_aging_summaries a
+            JOIN users u ON u.user_id = a.user_id
+            WHERE {where}
+        """),
+        params,
+    ).one()
+    rows = session.execute(
+        text(f"""
+            SELECT a.*, u.full_name, u.email, u.role::text AS role, d.company_name, d.credit_limit
+            FROM ar_aging_summaries a
+            JOIN users u ON u.user_id = a.user_id
+            LEFT JOIN distributors d ON d.user_id = a.user_id
+            WHERE {where}
+            ORDER BY a.total_outstanding DESC, a.user_id
+            OFFSET :skip LIMIT :limit
+        """),
+        params,
+    ).all()
+    return {"totals": totals._asdict(), "data": [row._asdict() for row in rows]}
+
+
+def get_ar_aging_for_user(session: Session, user_id: int) -> Optional[Dict[str, Any]]:
+    row = session.execute(
+        text("""
+            SELECT a.*, u.full_name, u.email, u.role::text AS role, d.company_name, d.credit_limit
+            FROM ar_aging_summaries a
+            JOIN users u ON u.user_id = a.user_id
+            LEFT JOIN distributors d ON d.user_id = a.user_id
+            WHERE a.user_id = :user_id
+        """),
+        {"user_id": user_id},
+    ).one_or_none()
+    return row._asdict() if row else None
+
+
+def check_credit_limit(session: Session, user_id: int, amount: Decimal) -> None:
+    """
+    Refuse an order of `amount` that would take a distributor's exposure
+    (unpaid invoices plus orders not invoiced yet) over its credit limit.
+    Reads the aging summary instead of the invoices, and locks the
+    distributor, so concurrent checkouts are checked one after the other.
+    A credit limit of zero means none was agreed and nothing is checked.
+    """
+    row = session.execute(
+        text("""
+            SELECT d.credit_limit,
+                   COALESCE(a.total_outstanding + a.uninvoiced_amount, 0) AS exposure
+            FROM distributors d
+            LEFT JOIN ar_aging_summaries a ON a.user_id = d.user_id
+            WHERE d.user_id = :user_id
+            FOR UPDATE OF d
+        """),
+        {"user_id": user_id},
+    ).one_or_none()
+    if row is None or not row.credit_limit or row.credit_limit <= 0:
+        return
+    if row.exposure + amount > row.credit_limit:
+        raise CreditLimitExceededError(
+            f"Order total {amount} exceeds the available credit "
+            f"({row.credit_limit - row.exposure} of {row.credit_limit})"
+        )
+
+
+def _order_written(mapper, connection, target: Order) -> None:
+    previous = previous_values(target, ("user_id",))
+    refresh_ar_aging_summaries(connection, {target.user_id, previous["user_id"]})
+
+
+def _invoice_written(mapper, connection, target: InvoicePayment) -> None:
+    previous = previous_values(target, ("order_id",))
+    user_ids = users_of_orders(connection, {target.order_id, previous["order_id"]})
+    refresh_ar_aging_summaries(connection, user_ids)
+
+
+# Keep the aging summaries in step with every ORM write to orders and
+# invoices; invoicing and the daily job refresh the ones they touch in SQL
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Order, _event, _order_written)
+    event.listen(InvoicePayment, _event, _invoice_written)
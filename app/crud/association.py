@@ -0,0 +1,244 @@
+from typing import Dict, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.crud.utils import lock_watermark, set_watermark
+
+BOUGHT_TOGETHER_JOB = "bought_together"
+
+
+def _unique_counts(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted distinct keys and how often each occurs (sort based, like np.unique)"""
+    keys = np.sort(keys)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.diff(np.r_[starts, len(keys)])
+
+
+def _distinct_lines(order_ids: np.ndarray, product_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """One entry per (order, product), sorted by order then product"""
+    order_ids = np.asarray(order_ids, dtype=np.int64)
+    product_ids = np.asarray(product_ids, dtype=np.int64)
+    stride = int(product_ids.max()) + 1
+    keys, _ = _unique_counts(order_ids * stride + product_ids)
+    return keys // stride, keys % stride
+
+
+def count_copurchase_pairs(
+    order_ids: np.ndarray, product_ids: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Count, for every pair of products (a < b), the orders containing both.
+    Takes one entry per order line and returns the non-zero cells of the
+    (sparse) co-occurrence matrix as (product_a, product_b, order_count).
+    """
+    empty = np.array([], dtype=np.int64)
+    if len(order_ids) == 0:
+        return empty, empty, empty
+    orders, products = _distinct_lines(order_ids, product_ids)
+
+    # Pair every line with the following lines of the same order
+    order_starts = np.flatnonzero(np.r_[True, orders[1:] != orders[:-1]])
+    order_sizes = np.diff(np.r_[order_starts, len(orders)])
+    order_ends = np.repeat(order_starts + order_sizes, order_sizes)
+    following = order_ends - np.arange(len(orders)) - 1
+    pair_total = int(following.sum())
+    if pair_total == 0:
+        return empty, empty, empty
+    left = np.repeat(np.arange(len(orders)), following)
+    pair_starts = np.repeat(np.cumsum(following) - following, following)
+    right = left + 1 + (np.arange(pair_total) - pair_starts)
+
+    # Encode (a, b) in a single int64 so counting is one sort
+    stride = int(products.max()) + 1
+    keys, counts = _unique_counts(products[left] * stride + products[right])
+    return keys // stride, keys % stride, counts.astype(np.int64)
+
+
+def count_product_orders(order_ids: np.ndarray, product_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Number of distinct orders per product, as (product_id, order_count)"""
+    if len(order_ids) == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty
+    _, products = _distinct_lines(order_ids, product_ids)
+    products, counts = _unique_counts(products)
+    return products, counts.astype(np.int64)
+
+
+def _net_counts(keys_new, counts_new, keys_old, counts_old) -> Tuple[np.ndarray, np.ndarray]:
+    """Subtract the old counts from the new ones for matching keys"""
+    keys = np.concatenate((keys_new, keys_old))
+    counts = np.concatenate((counts_new, -counts_old))
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    net = np.bincount(inverse, weights=counts, minlength=len(unique_keys)).astype(np.int64)
+    nonzero = net != 0
+    return unique_keys[nonzero], net[nonzero]
+
+
+def _pair_keys(a: np.ndarray, b: np.ndarray, stride: int) -> np.ndarray:
+    return a * stride + b
+
+
+_ASSOCIATIONS_SQL = text("""
+    INSERT INTO product_associations (
+        product_id, rank, associated_product_id, pair_orders,
+        support, confidence, lift, computed_at
+    )
+    SELECT product_id, rank, associated_product_id, pair_orders,
+           support, confidence, lift, now()
+    FROM (
+        SELECT d.product_id,
+               d.associated_product_id,
+               d.pair_orders,
+               d.pair_orders::float / :total_orders AS support,
+               d.pair_orders::float / pa.order_count AS confidence,
+               d.pair_orders::float * :total_orders / (pa.order_count::float * pb.order_count) AS lift,
+               ROW_NUMBER() OVER (
+                   PARTITION BY d.product_id
+                   ORDER BY d.pair_orders::float / pa.order_count DESC,
+                            d.pair_orders::float / pb.order_count DESC,
+                            d.associated_product_id
+               ) AS rank
+        FROM (
+            SELECT product_id, other_product_id AS associated_product_id, order_count AS pair_orders
+            FROM product_pair_counts
+            UNION ALL
+            SELECT other_product_id, product_id, order_count
+            FROM product_pair_counts
+        ) d
+        JOIN product_order_counts pa ON pa.product_id = d.product_id
+        JOIN product_order_counts pb ON pb.product_id = d.associated_product_id
+        WHERE d.pair_orders >= :min_pair_orders
+          AND d.pair_orders::float / :total_orders >= :min_support
+          AND d.pair_orders::float * :total_orders / (pa.order_count::float * pb.order_count) >= :min_lift
+    ) ranked
+    WHERE rank <= :top_n
+""")
+
+
+def refresh_bought_together(session: Session) -> Dict[str, int]:
+    """
+    Fold order lines added since the last run into the product and pair
+    order counts, then recompute the top associations of every product.
+
+    Progress is tracked by order_detail_id. For each order with new lines
+    the pairs it had before are subtracted from the pairs it has now, so
+    lines appended to an existing order are counted exactly once.
+    Orders cancelled after being counted are only dropped by
+    rebuild_bought_together.
+    """
+    last_id = lock_watermark(session, BOUGHT_TOGETHER_JOB)
+    max_id = session.execute(
+        text("SELECT COALESCE(MAX(order_detail_id), 0) FROM order_details")
+    ).scalar_one()
+
+    lines_processed = 0
+    if max_id > last_id:
+        lines = session.execute(
+            text("""
+                SELECT od.order_id, od.product_id, od.order_detail_id <= :last_id AS is_old
+                FROM order_details od
+                JOIN orders o ON o.order_id = od.order_id
+                WHERE o.order_status::text <> 'cancelled'
+                  AND od.order_detail_id <= :max_id
+                  AND od.order_id IN (
+                      SELECT order_id FROM order_details
+                      WHERE order_detail_id > :last_id AND order_detail_id <= :max_id
+                  )
+            """),
+            {"last_id": last_id, "max_id": max_id},
+        ).all()
+        lines_processed = sum(1 for line in lines if not line.is_old)
+
+        if lines:
+            data = np.array([(line.order_id, line.product_id, line.is_old) for line in lines], dtype=np.int64)
+            order_ids, product_ids, is_old = data[:, 0], data[:, 1], data[:, 2].astype(bool)
+
+            stride = int(product_ids.max()) + 1
+            new_a, new_b, new_counts = count_copurchase_pairs(order_ids, product_ids)
+            old_a, old_b, old_counts = count_copurchase_pairs(order_ids[is_old], product_ids[is_old])
+            pair_keys, pair_counts = _net_counts(
+                _pair_keys(new_a, new_b, stride), new_counts,
+                _pair_keys(old_a, old_b, stride), old_counts,
+            )
+            new_products, new_product_counts = count_product_orders(order_ids, product_ids)
+            old_products, old_product_counts = count_product_orders(order_ids[is_old], product_ids[is_old])
+            products, product_counts = _net_counts(
+                new_products, new_product_counts, old_products, old_product_counts
+            )
+
+            if len(products):
+                session.execute(
+                    text("""
+                        INSERT INTO product_order_counts (product_id, order_count)
+                        SELECT * FROM unnest(CAST(:product_ids AS integer[]), CAST(:counts AS integer[]))
+                        ON CONFLICT (product_id) DO UPDATE
+                        SET order_count = product_order_counts.order_count + EXCLUDED.order_count
+                    """),
+                    {"product_ids": products.tolist(), "counts": product_counts.tolist()},
+                )
+            if len(pair_keys):
+                session.execute(
+                    text("""
+                        INSERT INTO product_pair_counts (product_id, other_product_id, order_count)
+                        SELECT * FROM unnest(
+                            CAST(:product_ids AS integer[]),
+                            CAST(:other_product_ids AS integer[]),
+                            CAST(:counts AS integer[])
+                        )
+                        ON CONFLICT (product_id, other_product_id) DO UPDATE
+                        SET order_count = product_pair_counts.order_count + EXCLUDED.order_count
+                    """),
+                    {
+                        "product_ids": (pair_keys // stride).tolist(),
+                        "other_product_ids": (pair_keys % stride).tolist(),
+                        "counts": pair_counts.tolist(),
+                    },
+                )
+        set_watermark(session, BOUGHT_TOGETHER_JOB, max_id)
+
+    associations = _compute_associations(session, max(max_id, last_id))
+    session.commit()
+    return {
+        "lines_processed": lines_processed,
+        "associations": associations,
+        "last_processed_id": max(max_id, last_id),
+    }
+
+
+def _compute_associations(session: Session, last_id: int) -> int:
+    total_orders = session.execute(
+        text("""
+            SELECT COUNT(DISTINCT od.order_id)
+            FROM order_details od
+            JOIN orders o ON o.order_id = od.order_id
+            WHERE o.order_status::text <> 'cancelled'
+              AND od.order_detail_id <= :last_id
+        """),
+        {"last_id": last_id},
+    ).scalar_one()
+    session.execute(text("DELETE FROM product_associations"))
+    if not total_orders:
+        return 0
+    result = session.execute(
+        _ASSOCIATIONS_SQL,
+        {
+            "total_orders": total_orders,
+            "min_pair_orders": settings.BOUGHT_TOGETHER_MIN_PAIR_ORDERS,
+            "min_support": settings.BOUGHT_TOGETHER_MIN_SUPPORT,
+            "min_lift": settings.BOUGHT_TOGETHER_MIN_LIFT,
+            "top_n": settings.BOUGHT_TOGETHER_TOP_N,
+        },
+    )
+    return result.rowcount
+
+
+def rebuild_bought_together(session: Session) -> Dict[str, int]:
+    """Recount every order from scratch, e.g. to drop cancelled orders"""
+    lock_watermark(session, BOUGHT_TOGETHER_JOB)
+    session.execute(text("DELETE FROM product_pair_counts"))
+    session.execute(text("DELETE FROM product_order_counts"))
+    set_watermark(session, BOUGHT_TOGETHER_JOB, 0)
+    return refresh_bought_together(session)
@@ -0,0 +1,194 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, exists, inspect, text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, func, select
+
+from app.crud.facet import invalidate_category_facets
+from app.models import (
+    CategoryAttribute,
+    CategoryAttributeCreate,
+    Product,
+    ProductAttributeValue,
+)
+
+# Expands products.attributes into product_attribute_values. Values are stored
+# as the facet strings shown to clients (booleans as "True"/"False", like
+# Python's str()); value_numeric holds JSON numbers, and the leading number of
+# strings whose key the category registry declares as "number" (e.g. "160 PSI").
+_SYNC_SQL = r"""
+    INSERT INTO product_attribute_values (product_id, key, value, value_numeric)
+    SELECT DISTINCT ON (p.product_id, a.key, v.value)
+           p.product_id,
+           a.key,
+           v.value,
+           CASE
+               WHEN jsonb_typeof(v.elem) = 'number' THEN (v.elem #>> '{}')::numeric
+               WHEN ca.value_type::text = 'number'
+                    AND v.value ~ '^\s*-?\d+(\.\d+)?'
+                   THEN substring(v.value from '-?\d+(?:\.\d+)?')::numeric
+           END
+    FROM products p
+    CROSS JOIN LATERAL jsonb_each(p.attributes) AS a(key, val)
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(a.val) = 'array' THEN a.val ELSE jsonb_build_array(a.val) END
+    ) AS e(elem)
+    CROSS JOIN LATERAL (
+        SELECT CASE jsonb_typeof(e.elem)
+                   WHEN 'boolean' THEN initcap(e.elem #>> '{}')
+                   ELSE e.elem #>> '{}'
+               END AS value,
+               e.elem
+    ) AS v
+    LEFT JOIN category_attributes ca
+        ON ca.attribute_key = a.key
+       AND ca.category_id IN (p.category_id, p.subcategory_id)
+    WHERE jsonb_typeof(p.attributes) = 'object'
+      AND jsonb_typeof(v.elem) IN ('string', 'number', 'boolean')
+      AND v.value <> ''
+      AND {product_filter}
+    ORDER BY p.product_id, a.key, v.value, ca.value_type::text = 'number' DESC
+"""
+
+
+def sync_product_attribute_values(connection: Connection | Session, product_ids: List[int]) -> None:
+    """Rewrite the normalized attribute rows of the given products"""
+    if not product_ids:
+        return
+    params = {"product_ids": list(set(product_ids))}
+    connection.execute(
+        text("DELETE FROM product_attribute_values WHERE product_id = ANY(:product_ids)"),
+        params,
+    )
+    connection.execute(
+        text(_SYNC_SQL.format(product_filter="p.product_id = ANY(:product_ids)")),
+        params,
+    )
+
+
+def rebuild_product_attribute_values(session: Session) -> int:
+    """Rebuild the whole normalized attribute table, e.g. after bulk imports"""
+    session.execute(text("DELETE FROM product_attribute_values"))
+    result = session.execute(text(_SYNC_SQL.format(product_filter="TRUE")))
+    session.commit()
+    return result.rowcount
+
+
+def _sync_on_write(mapper, connection, target: Product) -> None:
+    state = inspect(target)
+    changed = any(
+        state.attrs[name].history.has_changes()
+        for name in ("attributes", "category_id", "subcategory_id")
+    )
+    if changed:
+        sync_product_attribute_values(connection, [target.product_id])
+
+
+# Keep product_attribute_values in step with every ORM write to products
+event.listen(Product, "after_insert", _sync_on_write)
+event.listen(Product, "after_update", _sync_on_write)
+
+
+def _is_filterable():
+    """
+    Whether an attribute row of a product can be filtered on: attributes
+    the registry of its category or subcategory marks as not filterable
+    are left out of facets and range filters. Correlates with Product.
+    """
+    return ~exists().where(
+        CategoryAttribute.attribute_key == ProductAttributeValue.key,
+        CategoryAttribute.category_id.in_([Product.category_id, Product.subcategory_id]),
+        CategoryAttribute.is_filterable.is_(False),
+    ).correlate(Product, ProductAttributeValue)
+
+
+def get_attribute_facets(session: Session, product_ids) -> List[Dict[str, Any]]:
+    """
+    Count the filterable attribute values over a set of products (a subquery
+    of product ids), grouped in SQL from the normalized table.
+    """
+    rows = session.exec(
+        select(
+            ProductAttributeValue.key,
+            ProductAttributeValue.value,
+            func.count().label("count"),
+        )
+        .join(Product, Product.product_id == ProductAttributeValue.product_id)
+        .where(ProductAttributeValue.product_id.in_(product_ids), _is_filterable())
+        .group_by(ProductAttributeValue.key, ProductAttributeValue.value)
+    ).all()
+
+    facets: Dict[str, Dict[str, Any]] = {}
+    for key, value, count in rows:
+        facets.setdefault(key, {"name": key, "values": []})["values"].append(
+            {"value": value, "count": count}
+        )
+    for facet in facets.values():
+        facet["values"].sort(key=lambda x: x["value"])
+    return sorted(facets.values(), key=lambda x: x["name"])
+
+
+def attribute_range_filter(key: str, minimum: Optional[Decimal], maximum: Optional[Decimal]):
+    """
+    Match products having a filterable numeric value for `key` within
+    [minimum, maximum], served by the (key, value_numeric) index.
+    """
+    condition = exists().where(
+        ProductAttributeValue.product_id == Product.product_id,
+        ProductAttributeValue.key == key,
+        ProductAttributeValue.value_numeric.is_not(None),
+        _is_filterable(),
+    )
+    if minimum is not None:
+        condition = condition.where(ProductAttributeValue.value_numeric >= minimum)
+    if maximum is not None:
+        condition = condition.where(ProductAttributeValue.value_numeric <= maximum)
+    return condition
+
+
+def get_category_attributes(session: Session, category_ids: List[int]) -> List[CategoryAttribute]:
+    return session.exec(
+        select(CategoryAttribute)
+        .where(CategoryAttribute.category_id.in_(category_ids))
+        .order_by(CategoryAttribute.display_order, CategoryAttribute.attribute_key)
+    ).all()
+
+
+def _resync_category_products(session: Session, category_id: int) -> None:
+    products = session.exec(
+        select(Product.product_id, Product.category_id, Product.subcategory_id).where(
+            (Product.category_id == category_id) | (Product.subcategory_id == category_id)
+        )
+    ).all()
+    sync_product_attribute_values(session, [product.product_id for product in products])
+    # Value types and is_filterable change the attribute facets of these products
+    invalidate_category_facets(
+        session,
+        [category_id]
+        + [product.category_id for product in products]
+        + [product.subcategory_id for product in products],
+    )
+
+
+def create_category_attribute(
+    session: Session, category_id: int, attribute_in: CategoryAttributeCreate
+) -> CategoryAttribute:
+    db_obj = CategoryAttribute.model_validate(attribute_in, update={"category_id": category_id})
+    session.add(db_obj)
+    session.flush()
+    # Declared value types change how existing values are indexed
+    _resync_category_products(session, category_id)
+    session.commit()
+    session.refresh(db_obj)
+    return db_obj
+
+
+def delete_category_attribute(session: Session, category_attribute_id: int) -> Optional[CategoryAttribute]:
+    db_obj = session.get(CategoryAttribute, category_attribute_id)
+    if db_obj:
+        session.delete(db_obj)
+        session.flush()
+        _resync_category_products(session, db_obj.category_id)
+        session.commit()
+    return db_obj
@@ -0,0 +1,250 @@
+import datetime
+from collections import defaultdict, deque
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, insert, text
+from sqlmodel import Session, select
+
+from app.crud.manufacturing import refresh_batch_aggregates
+from app.crud.raw_material_lot import allocate_fefo
+from app.models import (
+    BillOfMaterialsLine,
+    BillOfMaterialsLineBase,
+    ProductionBatch,
+    ProductionBatchCreate,
+    ProductionBatchLot,
+    ProductionBatchMaterial,
+    RawMaterialInventory,
+)
+
+CENTS = Decimal("0.01")
+LINE_COST = Decimal("0.0001")
+
+
+def get_bill_of_materials(session: Session, product_id: int) -> List[BillOfMaterialsLine]:
+    return session.exec(
+        select(BillOfMaterialsLine)
+        .where(BillOfMaterialsLine.product_id == product_id)
+        .order_by(BillOfMaterialsLine.material_id)
+    ).all()
+
+
+def set_bill_of_materials(
+    session: Session, product_id: int, lines: Sequence[BillOfMaterialsLineBase]
+) -> List[BillOfMaterialsLine]:
+    """Replace the bill of materials of a product"""
+    quantities: Dict[int, Decimal] = {}
+    for line in lines:
+        if line.material_id in quantities:
+            raise ValueError(f"Material {line.material_id} is listed more than once")
+        quantities[line.material_id] = line.quantity_per_unit
+    session.execute(delete(BillOfMaterialsLine).where(BillOfMaterialsLine.product_id == product_id))
+    if quantities:
+        session.execute(
+            insert(BillOfMaterialsLine),
+            [
+                {"product_id": product_id, "material_id": material_id, "quantity_per_unit": quantity}
+                for material_id, quantity in quantities.items()
+            ],
+        )
+    session.commit()
+    return get_bill_of_materials(session, product_id)
+
+
+def consume_raw_materials(session: Session, requirements: Dict[int, Decimal]) -> Dict[int, dict]:
+    """
+    Take the required quantity of every material out of stock, all or
+    nothing, from its lots first-expiry-first-out. Returns the name, unit
+    and cost per unit of each material consumed, with the lots it was taken
+    from in FEFO order.
+    """
+    if not requirements:
+        return {}
+    allocations = allocate_fefo(session, requirements)
+    materials = session.execute(
+        select(
+            RawMaterialInventory.material_id,
+            RawMaterialInventory.material_name,
+            RawMaterialInventory.unit_of_measure,
+            RawMaterialInventory.cost_per_unit,
+        ).where(RawMaterialInventory.material_id.in_(list(requirements)))
+    ).all()
+    consumed = {row.material_id: {**row._asdict(), "lots": deque()} for row in materials}
+    for allocation in allocations:
+        consumed[allocation["material_id"]]["lots"].append(allocation)
+    return consumed
+
+
+def _take_lots(material: dict, quantity: Decimal) -> List[Tuple[int, Decimal, Decimal]]:
+    """
+    (lot_id, quantity, cost per unit) of the next `quantity` of a consumed
+    material's lots. Lots without a cost are priced at the material's.
+    """
+    taken = []
+    lots = material["lots"]
+    while quantity > 0:
+        lot = lots[0]
+        take = min(lot["quantity"], quantity)
+        cost = lot["cost_per_unit"] if lot["cost_per_unit"] is not None else material["cost_per_unit"]
+        taken.append((lot["lot_id"], take, cost))
+        quantity -= take
+        if take == lot["quantity"]:
+            lots.popleft()
+        else:
+            lots[0] = {**lot, "quantity": lot["quantity"] - take}
+    return taken
+
+
+def create_production_batches(
+    session: Session, batches_in: Sequence[ProductionBatchCreate]
+) -> List[ProductionBatch]:
+    """
+    Create batches, consuming their products' bills of materials from raw
+    material stock in one statement for all of them. The lots consumed are
+    split between the batches in order, and batches of products with a bill
+    of materials get production_cost from those lots' costs, and
+    material_used from the quantities if it was left empty.
+    """
+    product_ids = sorted({batch_in.product_id for batch_in in batches_in})
+    bom: Dict[int, List[BillOfMaterialsLine]] = defaultdict(list)
+    for line in session.exec(
+        select(BillOfMaterialsLine).where(BillOfMaterialsLine.product_id.in_(product_ids))
+    ).all():
+        bom[line.product_id].append(line)
+
+    batch_lines: List[List[Tuple[int, Decimal]]] = []
+    requirements: Dict[int, Decimal] = defaultdict(Decimal)
+    for batch_in in batches_in:
+        lines = [
+            (line.material_id, line.quantity_per_unit * batch_in.quantity_produced)
+            for line in bom[batch_in.product_id]
+        ]
+        for material_id, quantity in lines:
+            requirements[material_id] += quantity
+        batch_lines.append(lines)
+
+    materials = consume_raw_materials(session, requirements)
+
+    batches = []
+    batch_lots: List[List[Tuple[int, Decimal, Decimal]]] = []
+    for batch_in, lines in zip(batches_in, batch_lines):
+        batch = ProductionBatch.model_validate(batch_in)
+        lots = []
+        if lines:
+            # Lines are costed like recompute_batch_costs does: to the
+            # ten-thousandth, then the batch total to cents
+            cost = Decimal("0")
+            for material_id, quantity in lines:
+                taken = _take_lots(materials[material_id], quantity)
+                cost += sum((take * lot_cost for _, take, lot_cost in taken), Decimal("0")).quantize(
+                    LINE_COST, rounding=ROUND_HALF_UP
+                )
+                lots.extend(taken)
+            batch.production_cost = cost.quantize(CENTS, rounding=ROUND_HALF_UP)
+            if not batch.material_used:
+                batch.material_used = ", ".join(
+                    f"{materials[material_id]['material_name']} {quantity.normalize():f} "
+                    f"{materials[material_id]['unit_of_measure']}"
+                    for material_id, quantity in lines
+                )
+        batches.append(batch)
+        batch_lots.append(lots)
+    session.add_all(batches)
+    session.flush()
+
+    consumption = [
+        {"batch_id": batch.batch_id, "material_id": material_id, "quantity": quantity}
+        for batch, lines in zip(batches, batch_lines)
+        for material_id, quantity in lines
+    ]
+    lots_consumed = [
+        {"batch_id": batch.batch_id, "lot_id": lot_id, "quantity": quantity}
+        for batch, lots in zip(batches, batch_lots)
+        for lot_id, quantity, _ in lots
+    ]
+    if consumption:
+        session.execute(insert(ProductionBatchMaterial), consumption)
+    if lots_consumed:
+        session.execute(insert(ProductionBatchLot), lots_consumed)
+    session.commit()
+    for batch in batches:
+        session.refresh(batch)
+    return batches
+
+
+def recompute_batch_costs(
+    session: Session,
+    batch_ids: Optional[Sequence[int]] = None,
+    material_ids: Optional[Sequence[int]] = None,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    commit: bool = True,
+) -> Tuple[int, int]:
+    """
+    Recost batches from what they consumed, e.g. after a lot's cost was
+    corrected: each consumption line is priced at the lots it was taken
+    from, or at the material's current cost when no lots were recorded for
+    it (batches created before lots were tracked). `material_ids` selects
+    the batches that used any of those materials. All consumption lines are
+    priced and summed per batch in one NumPy pass and written back with a
+    single UPDATE. Returns (batches costed, batches whose cost changed).
+    """
+    import numpy as np
+
+    rows = session.execute(
+        text("""
+            SELECT pbm.batch_id,
+                   CAST(round(COALESCE(lots.cost, pbm.quantity * r.cost_per_unit) * 10000) AS bigint) AS line_cost
+            FROM production_batch_materials pbm
+            JOIN raw_material_inventories r ON r.material_id = pbm.material_id
+            JOIN production_batches b ON b.batch_id = pbm.batch_id
+            LEFT JOIN LATERAL (
+                SELECT SUM(pbl.quantity * COALESCE(l.cost_per_unit, r.cost_per_unit)) AS cost
+                FROM production_batch_lots pbl
+                JOIN raw_material_lots l ON l.lot_id = pbl.lot_id
+                WHERE pbl.batch_id = pbm.batch_id AND l.material_id = pbm.material_id
+            ) lots ON true
+            WHERE (CAST(:batch_ids AS integer[]) IS NULL OR pbm.batch_id = ANY(:batch_ids))
+              AND (CAST(:material_ids AS integer[]) IS NULL OR pbm.batch_id IN (
+                  SELECT batch_id FROM production_batch_materials WHERE material_id = ANY(:material_ids)
+              ))
+              AND (CAST(:start_date AS date) IS NULL OR b.production_date >= :start_date)
+              AND (CAST(:end_date AS date) IS NULL OR b.production_date <= :end_date)
+            ORDER BY pbm.batch_id
+        """),
+        {
+            "batch_ids": list(batch_ids) if batch_ids is not None else None,
+            "material_ids": list(material_ids) if material_ids is not None else None,
+            "start_date": start_date,
+            "end_date": end_date,
+        },
+    ).all()
+    if not rows:
+        return 0, 0
+
+    # Line costs come in ten-thousandths of a unit as integers, so the sums
+    # are exact and only the batch totals are rounded (half up) to cents
+    line_batches = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    line_costs = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    # Lines are sorted by batch: each batch starts where the id changes
+    starts = np.flatnonzero(np.r_[True, line_batches[1:] != line_batches[:-1]])
+    cents = (np.add.reduceat(line_costs, starts) + 50) // 100
+    ids = line_batches[starts]
+
+    changed = session.execute(
+        text("""
+            UPDATE production_batches b
+            SET production_cost = u.cost
+            FROM unnest(CAST(:batch_ids AS integer[]), CAST(:costs AS numeric[])) AS u(batch_id, cost)
+            WHERE b.batch_id = u.batch_id
+              AND b.production_cost IS DISTINCT FROM u.cost
+            RETURNING b.batch_id
+        """),
+        {"batch_ids": ids.tolist(), "costs": [Decimal(cost).scaleb(-2) for cost in cents.tolist()]},
+    ).scalars().all()
+    # Bypasses the ORM, so the manufacturing aggregates are refreshed here
+    refresh_batch_aggregates(session, changed)
+    if commit:
+        session.commit()
+    return len(ids), len(changed)
@@ -0,0 +1,128 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, event, inspect, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Connection
+from sqlmodel import Session
+
+from app.models import Brand, Category, CategoryFacetSnapshot, Product
+
+# Product writes bump the generation of the categories they touch; a snapshot
+# is only stored if no write happened while it was being computed.
+_SAVE_SNAPSHOT_SQL = text("""
+    INSERT INTO category_facet_snapshots (
+        category_id, filter_values, product_count,
+        generation, computed_generation, computed_at
+    )
+    VALUES (:category_id, :filter_values, :product_count, :generation, :generation, now())
+    ON CONFLICT (category_id) DO UPDATE SET
+        filter_values = EXCLUDED.filter_values,
+        product_count = EXCLUDED.product_count,
+        computed_generation = EXCLUDED.computed_generation,
+        computed_at = EXCLUDED.computed_at
+    WHERE category_facet_snapshots.generation = EXCLUDED.computed_generation
+""").bindparams(bindparam("filter_values", type_=JSONB))
+
+
+def invalidate_category_facets(connection: Connection | Session, category_ids: List[Optional[int]]) -> None:
+    """Mark the facet snapshots of the given categories as outdated"""
+    category_ids = sorted({category_id for category_id in category_ids if category_id})
+    if not category_ids:
+        return
+    connection.execute(
+        text("""
+            INSERT INTO category_facet_snapshots (category_id, product_count, generation, computed_generation)
+            SELECT category_id, 0, 1, -1 FROM categories
+            WHERE category_id = ANY(:category_ids)
+            ORDER BY category_id
+            ON CONFLICT (category_id) DO UPDATE
+            SET generation = category_facet_snapshots.generation + 1
+        """),
+        {"category_ids": category_ids},
+    )
+
+
+def invalidate_all_category_facets(connection: Connection | Session) -> None:
+    connection.execute(
+        text("UPDATE category_facet_snapshots SET generation = generation + 1")
+    )
+
+
+def get_category_facet_snapshot(
+    session: Session, category_id: int
+) -> Tuple[int, Optional[Tuple[int, Dict[str, Any]]]]:
+    """
+    Return the snapshot generation and, when the snapshot is current,
+    (product_count, filter_values).
+    """
+    snapshot = session.get(CategoryFacetSnapshot, category_id, populate_existing=True)
+    if snapshot is None:
+        return 0, None
+    if snapshot.computed_generation != snapshot.generation or snapshot.filter_values is None:
+        return snapshot.generation, None
+    filter_values = dict(snapshot.filter_values)
+    filter_values["price_range"] = {
+        bound: Decimal(value) for bound, value in filter_values["price_range"].items()
+    }
+    return snapshot.generation, (snapshot.product_count, filter_values)
+
+
+def save_category_facet_snapshot(
+    session: Session,
+    category_id: int,
+    generation: int,
+    product_count: int,
+    filter_values: Dict[str, Any],
+) -> None:
+    document = dict(filter_values)
+    document["price_range"] = {
+        bound: str(value) for bound, value in filter_values["price_range"].items()
+    }
+    session.execute(
+        _SAVE_SNAPSHOT_SQL,
+        {
+            "category_id": category_id,
+            "filter_values": document,
+            "product_count": product_count,
+            "generation": generation,
+        },
+    )
+
+
+def _changed_categories(target: Product) -> List[Optional[int]]:
+    state = inspect(target)
+    category_ids = []
+    for name in ("category_id", "subcategory_id"):
+        history = state.attrs[name].history
+        category_ids.extend(history.added or ())
+        category_ids.extend(history.deleted or ())
+        category_ids.extend(history.unchanged or ())
+    return category_ids
+
+
+def _invalidate_on_product_write(mapper, connection, target: Product) -> None:
+    invalidate_category_facets(connection, _changed_categories(target))
+
+
+def _invalidate_on_product_update(mapper, connection, target: Product) -> None:
+    # Price, brand and attributes all feed the facets, so any column change counts
+    state = inspect(target)
+    if any(state.attrs[column.key].history.has_changes() for column in mapper.column_attrs):
+        invalidate_category_facets(connection, _changed_categories(target))
+
+
+def _invalidate_on_rename(names):
+    def listener(mapper, connection, target) -> None:
+        state = inspect(target)
+        if any(state.attrs[name].history.has_changes() for name in names):
+            invalidate_all_category_facets(connection)
+    return listener
+
+
+event.listen(Product, "after_insert", _invalidate_on_product_write)
+event.listen(Product, "after_update", _invalidate_on_product_update)
+event.listen(Product, "after_delete", _invalidate_on_product_write)
+# Brand and category names are part of the facets
+event.listen(Brand, "after_update", _invalidate_on_rename(("name",)))
+event.listen(Category, "after_update", _invalidate_on_rename(("category_name", "parent_category_id")))
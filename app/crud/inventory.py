@@ -1,6 +1,8 @@
 from typing import List, Optional
-from sqlmodel import Session, select
-from app.models import Inventory, InventoryCreate
+from sqlalchemy import text
+from sqlmodel import Session, func, select
+from app.core.config import settings
+from app.models import Inventory, InventoryCreate, ReorderItemType, ReorderSuggestion
 
 def get_inventory_by_id(session: Session, inventory_id: int) -> Optional[Inventory]:
     return session.get(Inventory, inventory_id)
@@ -8,18 +10,53 @@ def get_inventory_by_id(session: Session, inventory_id: int) -> Optional[Invento
 def get_inventories(session: Session, skip: int = 0, limit: int = 100) -> List[Inventory]:
     return session.exec(select(Inventory).offset(skip).limit(limit)).all()
 
+def refresh_product_availability(session: Session, product_ids: List[int]) -> None:
+    """
+    Recompute the cross-warehouse stock of the given products. Called before
+    committing inventory writes so the aggregate changes in the same transaction.
+    """
+    session.flush()
+    session.execute(
+        text("""
+            INSERT INTO product_availability (
+                product_id, available_quantity, reserved_quantity,
+                net_available, warehouse_count, updated_at
+            )
+            SELECT p.product_id,
+                   COALESCE(SUM(i.available_quantity), 0),
+                   COALESCE(SUM(i.reserved_quantity), 0),
+                   COALESCE(SUM(GREATEST(i.available_quantity - i.reserved_quantity, 0)), 0),
+                   COUNT(i.inventory_id),
+                   now()
+            FROM products p
+            LEFT JOIN inventory i ON i.product_id = p.product_id
+            WHERE p.product_id = ANY(:product_ids)
+            GROUP BY p.product_id
+            ON CONFLICT (product_id) DO UPDATE SET
+                available_quantity = EXCLUDED.available_quantity,
+                reserved_quantity = EXCLUDED.reserved_quantity,
+                net_available = EXCLUDED.net_available,
+                warehouse_count = EXCLUDED.warehouse_count,
+                updated_at = EXCLUDED.updated_at
+        """),
+        {"product_ids": list(set(product_ids))},
+    )
+
 def create_inventory(session: Session, inventory_in: InventoryCreate) -> Inventory:
     db_obj = Inventory.model_validate(inventory_in)
     session.add(db_obj)
+    refresh_product_availability(session, [db_obj.product_id])
     session.commit()
     session.refresh(db_obj)
     return db_obj
 
 def update_inventory(session: Session, db_obj: Inventory, obj_in: InventoryCreate) -> Inventory:
+    previous_product_id = db_obj.product_id
     obj_data = obj_in.model_dump(exclude_unset=True)
     for key, value in obj_data.items():
         setattr(db_obj, key, value)
     session.add(db_obj)
+    refresh_product_availability(session, [previous_product_id, db_obj.product_id])
     session.commit()
     session.refresh(db_obj)
     return db_obj
@@ -28,5 +65,105 @@ def delete_inventory(session: Session, inventory_id: int) -> Optional[Inventory]
     db_obj = session.get(Inventory, inventory_id)
     if db_obj:
         session.delete(db_obj)
+        refresh_product_availability(session, [db_obj.product_id])
         session.commit()
-    return db_obj 
\ No newline at end of file
+    return db_obj 
+
+# Suggestions are rebuilt from scratch on each run, all warehouses at once.
+# Product velocity comes from recent order lines and is split evenly across the
+# warehouses stocking the product. Raw materials have no maximum level, so they
+# are topped up to twice their minimum.
+_REORDER_SQL = """
+    WITH velocity AS (
+        SELECT od.product_id,
+               SUM(od.quantity)::numeric / :window_days AS daily_velocity
+        FROM order_details od
+        JOIN orders o ON o.order_id = od.order_id
+        WHERE o.order_date >= now() - make_interval(days => :window_days)
+          AND o.order_status::text <> 'cancelled'
+        GROUP BY od.product_id
+    ),
+    product_stock AS (
+        SELECT i.product_id,
+               p.name,
+               i.warehouse_id,
+               i.warehouse_location,
+               i.available_quantity - i.reserved_quantity AS current_stock,
+               COALESCE(i.minimum_stock_level, 0) AS minimum_stock_level,
+               i.maximum_stock_level,
+               COALESCE(v.daily_velocity, 0)
+                   / COUNT(*) OVER (PARTITION BY i.product_id) AS daily_velocity
+        FROM inventory i
+        JOIN products p ON p.product_id = i.product_id
+        LEFT JOIN velocity v ON v.product_id = i.product_id
+    ),
+    product_points AS (
+        SELECT ps.*,
+               ps.minimum_stock_level + CEIL(ps.daily_velocity * :lead_time) AS reorder_point
+        FROM product_stock ps
+    ),
+    material_points AS (
+        SELECT r.material_id,
+               r.material_name,
+               r.location,
+               r.supplier_id,
+               r.quantity_available AS current_stock,
+               r.minimum_stock_level,
+               COALESCE(s.lead_time, :lead_time) AS lead_time_days
+        FROM raw_material_inventories r
+        LEFT JOIN suppliers s ON s.supplier_id = r.supplier_id
+    )
+    INSERT INTO reorder_suggestions (
+        item_type, item_id, item_name, warehouse_id, location, supplier_id,
+        current_stock, minimum_stock_level, maximum_stock_level, daily_velocity,
+        lead_time_days, reorder_point, suggested_quantity, computed_at
+    )
+    SELECT 'product'::reorderitemtype, pp.product_id, pp.name, pp.warehouse_id, pp.warehouse_location, NULL,
+           pp.current_stock, pp.minimum_stock_level, pp.maximum_stock_level, pp.daily_velocity,
+           :lead_time, pp.reorder_point,
+           COALESCE(pp.maximum_stock_level, pp.reorder_point + CEIL(pp.daily_velocity * :lead_time))
+               - pp.current_stock,
+           now()
+    FROM product_points pp
+    WHERE pp.current_stock <= pp.reorder_point
+      AND COALESCE(pp.maximum_stock_level, pp.reorder_point + CEIL(pp.daily_velocity * :lead_time))
+          > pp.current_stock
+    UNION ALL
+    SELECT 'raw_material'::reorderitemtype, mp.material_id, mp.material_name, NULL, mp.location, mp.supplier_id,
+           mp.current_stock, mp.minimum_stock_level, NULL, 0,
+           mp.lead_time_days, mp.minimum_stock_level,
+           mp.minimum_stock_level * 2 - mp.current_stock,
+           now()
+    FROM material_points mp
+    WHERE mp.minimum_stock_level > 0
+      AND mp.current_stock <= mp.minimum_stock_level
+"""
+
+def compute_reorder_suggestions(session: Session) -> int:
+    """Recompute the reorder suggestions table in a single transaction"""
+    session.execute(text("DELETE FROM reorder_suggestions"))
+    result = session.execute(
+        text(_REORDER_SQL),
+        {
+            "window_days": settings.REORDER_VELOCITY_WINDOW_DAYS,
+            "lead_time": settings.REORDER_DEFAULT_LEAD_TIME_DAYS,
+        },
+    )
+    session.commit()
+    return result.rowcount
+
+def get_reorder_suggestions(
+    session: Session,
+    item_type: Optional[ReorderItemType] = None,
+    warehouse_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> tuple[List[ReorderSuggestion], int]:
+    query = select(ReorderSuggestion)
+    if item_type is not None:
+        query = query.where(ReorderSuggestion.item_type == item_type)
+    if warehouse_id is not None:
+        query = query.where(ReorderSuggestion.warehouse_id == warehouse_id)
+    total = session.exec(select(func.count()).select_from(query.subquery())).one()
+    query = query.order_by(ReorderSuggestion.suggested_quantity.desc())
+    return session.exec(query.offset(skip).limit(limit)).all(), total
@@ -0,0 +1,290 @@
+import datetime
+import logging
+import multiprocessing
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.crud.ar_aging import refresh_ar_aging_summaries
+
+logger = logging.getLogger(__name__)
+
+INVOICE_TEMPLATE = Path(__file__).parent.parent / "invoice-templates" / "invoice.html"
+
+
+@lru_cache(maxsize=1)
+def _invoice_template() -> Any:
+    # Loaded once per process: the render pool workers each build their own
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    environment = Environment(
+        loader=FileSystemLoader(INVOICE_TEMPLATE.parent), autoescape=select_autoescape(["html"])
+    )
+    return environment.get_template(INVOICE_TEMPLATE.name)
+
+
+def render_invoice(context: Dict[str, Any]) -> Tuple[int, str]:
+    """(invoice_id, HTML) of an invoice; module level so process pools can run it"""
+    return context["invoice_id"], _invoice_template().render(context)
+
+
+def _money(value: Optional[Decimal]) -> str:
+    return f"{value or 0:,.2f}"
+
+
+def allocate_invoice_numbers(session: Session, count: int, invoice_date: datetime.date) -> List[str]:
+    """
+    Take the next `count` numbers of the invoice date's series. The series
+    row stays locked until the caller's transaction ends, so numbers are
+    handed out in commit order and a rollback leaves no gap.
+    """
+    series = f"{settings.INVOICE_NUMBER_PREFIX}-{invoice_date.year}"
+    session.execute(
+        text("INSERT INTO invoice_sequences (series, last_number) VALUES (:series, 0) ON CONFLICT (series) DO NOTHING"),
+        {"series": series},
+    )
+    last = session.execute(
+        text("""
+            UPDATE invoice_sequences SET last_number = last_number + :count
+            WHERE series = :series
+            RETURNING last_number
+        """),
+        {"series": series, "count": count},
+    ).scalar_one()
+    return [f"{series}-{number:06d}" for number in range(last - count + 1, last + 1)]
+
+
+def invoice_delivered_orders(
+    session: Session, limit: int, invoice_date: Optional[datetime.date] = None
+) -> List[int]:
+    """
+    Invoice up to `limit` delivered orders that have no invoice yet, in
+    order id order, and return the new invoice ids. Orders are claimed with
+    SKIP LOCKED, so concurrent runs split the work instead of invoicing an
+    order twice. Does not commit.
+    """
+    invoice_date = invoice_date or datetime.date.today()
+    claimed = session.execute(
+        text("""
+            SELECT o.order_id, o.user_id
+            FROM orders o
+            WHERE o.order_status::text = 'delivered'
+              AND NOT EXISTS (SELECT 1 FROM invoice_payments i WHERE i.order_id = o.order_id)
+            ORDER BY o.order_id
+            LIMIT :limit
+            FOR UPDATE OF o SKIP LOCKED
+        """),
+        {"limit": limit},
+    ).all()
+    if not claimed:
+        return []
+    # The claim's snapshot may predate a concurrent run that invoiced an
+    # order and released its lock; the order row itself wasn't updated, so
+    # Postgres doesn't recheck NOT EXISTS. Now that the orders are locked,
+    # a new statement sees every invoice committed for them.
+    uninvoiced = set(session.execute(
+        text("""
+            SELECT c.order_id
+            FROM unnest(CAST(:order_ids AS integer[])) AS c(order_id)
+            WHERE NOT EXISTS (SELECT 1 FROM invoice_payments i WHERE i.order_id = c.order_id)
+        """),
+        {"order_ids": [order.order_id for order in claimed]},
+    ).scalars())
+    orders = [order for order in claimed if order.order_id in uninvoiced]
+    if not orders:
+        return []
+    order_ids = [order.order_id for order in orders]
+    numbers = allocate_invoice_numbers(session, len(order_ids), invoice_date)
+    invoice_ids = session.execute(
+        text("""
+            INSERT INTO invoice_payments (
+                order_id, invoice_number, invoice_date, due_date, total_amount,
+                tax_amount, payment_method, payment_status, refunded_amount
+            )
+            SELECT o.order_id, n.invoice_number, :invoice_date, :due_date, o.order_total,
+                   o.tax_amount, o.payment_method, 'pending',
+                   -- Returns processed before the order was invoiced
+                   COALESCE((
+                       SELECT SUM(r.refund_amount) FROM customer_returns r
+                       WHERE r.order_id = o.order_id AND r.status = 'processed'
+                   ), 0)
+            FROM unnest(CAST(:order_ids AS integer[]), CAST(:numbers AS varchar[])) AS n(order_id, invoice_number)
+            JOIN orders o ON o.order_id = n.order_id
+            ORDER BY n.invoice_number
+            RETURNING invoice_id
+        """),
+        {
+            "order_ids": order_ids,
+            "numbers": numbers,
+            "invoice_date": invoice_date,
+            "due_date": invoice_date + datetime.timedelta(days=settings.INVOICE_PAYMENT_TERMS_DAYS),
+        },
+    ).scalars().all()
+    # Bypasses the ORM: the orders' amounts move from uninvoiced to current
+    refresh_ar_aging_summaries(session, [order.user_id for order in orders])
+    return invoice_ids
+
+
+def invoice_contexts(session: Session, invoice_ids: Sequence[int]) -> List[Dict[str, Any]]:
+    """Template contexts of invoices, as plain strings so they pickle cheaply"""
+    invoices = session.execute(
+        text("""
+            SELECT i.invoice_id, i.invoice_number, i.invoice_date, i.due_date, i.total_amount,
+                   i.tax_amount, i.payment_method, o.order_id, o.order_date, o.shipping_cost,
+                   o.discount_amount,
+                   COALESCE(o.billing_address, c.billing_address, o.shipping_address) AS billing_address,
+                   u.full_name, u.email
+            FROM invoice_payments i
+            JOIN orders o ON o.order_id = i.order_id
+            JOIN users u ON u.user_id = o.user_id
+            LEFT JOIN customers c ON c.user_id = o.user_id
+            WHERE i.invoice_id = ANY(:invoice_ids)
+            ORDER BY i.invoice_id
+        """),
+        {"invoice_ids": list(invoice_ids)},
+    ).all()
+    lines: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    subtotals: Dict[int, Decimal] = defaultdict(Decimal)
+    for line in session.execute(
+        text("""
+            SELECT d.order_id, p.product_code, p.name, d.quantity, d.unit_price,
+                   d.discount_applied, d.total_price
+            FROM order_details d
+            JOIN products p ON p.product_id = d.product_id
+            WHERE d.order_id = ANY(:order_ids)
+            ORDER BY d.order_id, d.order_detail_id
+        """),
+        {"order_ids": [invoice.order_id for invoice in invoices]},
+    ).all():
+        subtotals[line.order_id] += line.total_price
+        lines[line.order_id].append({
+            "product_code": line.product_code,
+            "name": line.name,
+            "quantity": line.quantity,
+            "unit_price": _money(line.unit_price),
+            "discount_applied": _money(line.discount_applied),
+            "total_price": _money(line.total_price),
+        })
+    return [
+        {
+            "invoice_id": invoice.invoice_id,
+            "invoice_number": invoice.invoice_number,
+            "invoice_date": invoice.invoice_date.isoformat(),
+            "due_date": invoice.due_date.isoformat(),
+            "order_id": invoice.order_id,
+            "order_date": invoice.order_date.date().isoformat(),
+            "seller_name": settings.PROJECT_NAME,
+            "customer_name": invoice.full_name,
+            "customer_email": invoice.email,
+            "billing_address": invoice.billing_address,
+            "payment_method": invoice.payment_method,
+            "lines": lines[invoice.order_id],
+            "subtotal": _money(subtotals[invoice.order_id]),
+            "discount_amount": _money(invoice.discount_amount),
+            "shipping_cost": _money(invoice.shipping_cost),
+            "tax_amount": _money(invoice.tax_amount),
+            "total_amount": _money(invoice.total_amount),
+        }
+        for invoice in invoices
+    ]
+
+
+def _render_pool() -> ProcessPoolExecutor:
+    # spawn, not fork: this may run inside a multi-threaded API worker
+    return ProcessPoolExecutor(
+        max_workers=settings.INVOICE_RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def render_invoice_documents(
+    session: Session, invoice_ids: Sequence[int], executor: Optional[Executor] = None
+) -> int:
+    """
+    Render invoices to HTML and store them in invoice_documents, in the
+    given executor (e.g. a process pool) or in-process. Does not commit.
+    """
+    contexts = invoice_contexts(session, invoice_ids)
+    if not contexts:
+        return 0
+    if executor is not None:
+        chunksize = max(1, len(contexts) // (settings.INVOICE_RENDER_WORKERS * 4))
+        rendered = list(executor.map(render_invoice, contexts, chunksize=chunksize))
+    else:
+        rendered = [render_invoice(context) for context in contexts]
+    session.execute(
+        text("""
+            INSERT INTO invoice_documents (invoice_id, html, rendered_at)
+            SELECT invoice_id, html, now()
+            FROM unnest(CAST(:invoice_ids AS integer[]), CAST(:htmls AS text[])) AS d(invoice_id, html)
+            ON CONFLICT (invoice_id) DO UPDATE SET html = EXCLUDED.html, rendered_at = EXCLUDED.rendered_at
+        """),
+        {"invoice_ids": [invoice_id for invoice_id, _ in rendered], "htmls": [html for _, html in rendered]},
+    )
+    return len(rendered)
+
+
+def generate_invoices(
+    session: Session,
+    invoice_date: Optional[datetime.date] = None,
+    batch_size: Optional[int] = None,
+    max_invoices: Optional[int] = None,
+    render: bool = True,
+) -> Dict[str, Any]:
+    """
+    Invoice every delivered order without an invoice, `batch_size` orders
+    per transaction, rendering each batch's documents before it commits.
+    A render pool is started once a batch is big enough to be worth it.
+    Returns counts and throughput.
+    """
+    batch_size = batch_size or settings.INVOICE_BATCH_SIZE
+    start = time.perf_counter()
+    invoices = documents = 0
+    render_seconds = 0.0
+    with ExitStack() as stack:
+        executor: Optional[Executor] = None
+        while max_invoices is None or invoices < max_invoices:
+            limit = batch_size if max_invoices is None else min(batch_size, max_invoices - invoices)
+            invoice_ids = invoice_delivered_orders(session, limit, invoice_date)
+            if not invoice_ids:
+                session.rollback()
+                break
+            if render:
+                if executor is None and len(invoice_ids) >= settings.INVOICE_RENDER_POOL_MIN_DOCUMENTS:
+                    executor = stack.enter_context(_render_pool())
+                render_start = time.perf_counter()
+                documents += render_invoice_documents(session, invoice_ids, executor)
+                render_seconds += time.perf_counter() - render_start
+            session.commit()
+            invoices += len(invoice_ids)
+            logger.info(f"Invoiced {invoices} orders so far")
+            if len(invoice_ids) < limit:
+                break
+
+    seconds = time.perf_counter() - start
+    return {
+        "invoices": invoices,
+        "documents": documents,
+        "seconds": round(seconds, 2),
+        "invoices_per_minute": round(invoices / seconds * 60, 1) if seconds else 0.0,
+        "documents_per_minute": round(documents / render_seconds * 60, 1) if render_seconds else 0.0,
+    }
+
+
+def get_invoice_document(session: Session, invoice_id: int) -> Optional[str]:
+    """Stored HTML of an invoice, rendered now (and stored) if it's missing"""
+    html = session.execute(
+        text("SELECT html FROM invoice_documents WHERE invoice_id = :invoice_id"), {"invoice_id": invoice_id}
+    ).scalar_one_or_none()
+    if html is None and render_invoice_documents(session, [invoice_id]):
+        session.commit()
+        return get_invoice_document(session, invoice_id)
+    return html
@@ -0,0 +1,198 @@
+import calendar
+import datetime
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import ManufacturingMachine
+
+
+class MaintenanceInterval(NamedTuple):
+    months: int = 0
+    days: int = 0
+
+
+# Named schedules, Spanish and English, after lowercasing and dropping accents
+_NAMED_INTERVALS = {
+    "diario": MaintenanceInterval(days=1),
+    "diaria": MaintenanceInterval(days=1),
+    "daily": MaintenanceInterval(days=1),
+    "semanal": MaintenanceInterval(days=7),
+    "weekly": MaintenanceInterval(days=7),
+    "quincenal": MaintenanceInterval(days=15),
+    "biweekly": MaintenanceInterval(days=14),
+    "mensual": MaintenanceInterval(months=1),
+    "monthly": MaintenanceInterval(months=1),
+    "bimestral": MaintenanceInterval(months=2),
+    "bimonthly": MaintenanceInterval(months=2),
+    "trimestral": MaintenanceInterval(months=3),
+    "quarterly": MaintenanceInterval(months=3),
+    "cuatrimestral": MaintenanceInterval(months=4),
+    "semestral": MaintenanceInterval(months=6),
+    "semiannual": MaintenanceInterval(months=6),
+    "anual": MaintenanceInterval(months=12),
+    "annual": MaintenanceInterval(months=12),
+    "yearly": MaintenanceInterval(months=12),
+}
+
+_UNITS = {
+    "hora": "hours", "horas": "hours", "hour": "hours", "hours": "hours", "h": "hours", "hrs": "hours",
+    "dia": "days", "dias": "days", "day": "days", "days": "days", "d": "days",
+    "semana": "weeks", "semanas": "weeks", "week": "weeks", "weeks": "weeks",
+    "mes": "months", "meses": "months", "month": "months", "months": "months",
+    "ano": "years", "anos": "years", "year": "years", "years": "years",
+}
+
+# "Cada 15 días", "cada semana", "every 3 months", "500 horas", "500h"
+_EVERY_N = re.compile(r"^(cada|every)?\s*(\d*)\s*([a-z]+)$")
+
+
+def _normalize(schedule: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", schedule)
+    ascii_text = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(ascii_text.lower().replace("-", " ").split()).strip(" .")
+
+
+@lru_cache(maxsize=1024)
+def parse_maintenance_schedule(schedule: Optional[str]) -> Optional[MaintenanceInterval]:
+    """
+    Structured interval of a free-text maintenance schedule, None when it
+    can't be parsed. Schedules by operating hours ("Cada 500 horas") become
+    calendar days at settings.MAINTENANCE_OPERATING_HOURS_PER_DAY.
+    """
+    if not schedule:
+        return None
+    normalized = _normalize(schedule)
+    named = _NAMED_INTERVALS.get(normalized.removeprefix("mantenimiento ").removeprefix("maintenance "))
+    if named:
+        return named
+
+    match = _EVERY_N.match(normalized)
+    if not match or not (match.group(1) or match.group(2)) or match.group(3) not in _UNITS:
+        return None
+    count, unit = int(match.group(2) or 1), _UNITS[match.group(3)]
+    if count <= 0:
+        return None
+    if unit == "hours":
+        return MaintenanceInterval(days=math.ceil(count / settings.MAINTENANCE_OPERATING_HOURS_PER_DAY))
+    if unit == "weeks":
+        return MaintenanceInterval(days=count * 7)
+    if unit == "months":
+        return MaintenanceInterval(months=count)
+    if unit == "years":
+        return MaintenanceInterval(months=count * 12)
+    return MaintenanceInterval(days=count)
+
+
+def next_maintenance_date(
+    interval: Optional[MaintenanceInterval],
+    last_maintenance_date: Optional[datetime.date],
+    purchase_date: Optional[datetime.date] = None,
+) -> Optional[datetime.date]:
+    """
+    Due date of the next maintenance: an interval after the last one, or
+    after the purchase for machines never maintained. Months are added the
+    way PostgreSQL adds intervals, clamping to the end of shorter months.
+    """
+    base = last_maintenance_date or purchase_date
+    if interval is None or base is None:
+        return None
+    month_index = base.month - 1 + interval.months
+    year, month = base.year + month_index // 12, month_index % 12 + 1
+    day = min(base.day, calendar.monthrange(year, month)[1])
+    return datetime.date(year, month, day) + datetime.timedelta(days=interval.days)
+
+
+def _schedule_machine(mapper, connection, target: ManufacturingMachine) -> None:
+    interval = parse_maintenance_schedule(target.maintenance_schedule)
+    target.maintenance_interval_months = interval.months if interval else None
+    target.maintenance_interval_days = interval.days if interval else None
+    target.next_maintenance_date = next_maintenance_date(
+        interval, target.last_maintenance_date, target.purchase_date
+    )
+
+
+# Machines saved through the ORM get their interval and due date on the
+# same INSERT/UPDATE; refresh_maintenance_schedules covers everything else
+event.listen(ManufacturingMachine, "before_insert", _schedule_machine)
+event.listen(ManufacturingMachine, "before_update", _schedule_machine)
+
+
+def refresh_maintenance_schedules(connection: Connection | Session, commit: bool = True) -> int:
+    """
+    Parse the schedule of every machine and recompute all intervals and due
+    dates in a single UPDATE. Each distinct schedule text is parsed once.
+    """
+    schedules = connection.execute(
+        text("SELECT DISTINCT maintenance_schedule FROM manufacturing_machines")
+    ).scalars().all()
+    parsed = [(schedule, parse_maintenance_schedule(schedule)) for schedule in schedules if schedule]
+    parsed = [(schedule, interval) for schedule, interval in parsed if interval]
+    result = connection.execute(
+        text("""
+            UPDATE manufacturing_machines m
+            SET maintenance_interval_months = s.months,
+                maintenance_interval_days = s.days,
+                next_maintenance_date = (
+                    COALESCE(m.last_maintenance_date, m.purchase_date)
+                    + make_interval(months => s.months, days => s.days)
+                )::date
+            FROM manufacturing_machines t
+            LEFT JOIN unnest(
+                CAST(:schedules AS text[]), CAST(:months AS integer[]), CAST(:days AS integer[])
+            ) AS s(schedule, months, days) ON s.schedule = t.maintenance_schedule
+            WHERE t.machine_id = m.machine_id
+              AND (m.maintenance_interval_months, m.maintenance_interval_days, m.next_maintenance_date)
+                  IS DISTINCT FROM (s.months, s.days, (
+                      COALESCE(m.last_maintenance_date, m.purchase_date)
+                      + make_interval(months => s.months, days => s.days)
+                  )::date)
+        """),
+        {
+            "schedules": [schedule for schedule, _ in parsed],
+            "months": [interval.months for _, interval in parsed],
+            "days": [interval.days for _, interval in parsed],
+        },
+    )
+    if commit:
+        connection.commit()
+    return result.rowcount
+
+
+def get_machines_due(
+    *,
+    session: Session,
+    days: int,
+    today: Optional[datetime.date] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """Machines whose next maintenance falls within `days` days, overdue ones first"""
+    today = today or datetime.date.today()
+    horizon = today + datetime.timedelta(days=days)
+    machines = session.exec(
+        select(ManufacturingMachine)
+        .where(ManufacturingMachine.next_maintenance_date <= horizon)
+        .order_by(ManufacturingMachine.next_maintenance_date, ManufacturingMachine.machine_id)
+        .limit(limit)
+    ).all()
+    return [
+        {
+            "machine_id": machine.machine_id,
+            "machine_name": machine.machine_name,
+            "machine_type": machine.machine_type,
+            "operational_status": machine.operational_status,
+            "maintenance_schedule": machine.maintenance_schedule,
+            "last_maintenance_date": machine.last_maintenance_date,
+            "next_maintenance_date": machine.next_maintenance_date,
+            "days_until_due": (machine.next_maintenance_date - today).days,
+            "overdue": machine.next_maintenance_date < today,
+        }
+        for machine in machines
+    ]
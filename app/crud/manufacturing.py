@@ -0,0 +1,207 @@
+import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, func, select
+
+from app.crud.utils import DailyKey, date_range_filter, previous_values, rebuild_daily_rows, refresh_daily_rows
+from app.models import (
+    ManufacturingDailyAggregate,
+    ManufacturingMachine,
+    Product,
+    ProductionBatch,
+    QualityControl,
+)
+
+MANUFACTURING_REPORT_GROUPS = ("day", "machine", "product")
+
+# (production_date, product_id, machine_id), machine_id 0 for batches without one
+AggregateKey = DailyKey
+
+# Aggregates production batches, with the outcome of their quality controls,
+# into one row per (production_date, product_id, machine_id). `batch_filter`
+# narrows the batches being aggregated.
+_AGGREGATE_SELECT = """
+    SELECT b.production_date,
+           b.product_id,
+           COALESCE(b.machine_id, 0) AS machine_id,
+           COUNT(*) AS batch_count,
+           SUM(b.quantity_produced) AS quantity_produced,
+           COALESCE(SUM(b.production_cost), 0) AS production_cost,
+           COALESCE(SUM(b.quantity_produced) FILTER (WHERE b.production_cost IS NOT NULL), 0) AS costed_quantity,
+           COALESCE(SUM(q.checks), 0) AS qc_checks,
+           COALESCE(SUM(q.passed), 0) AS qc_passed,
+           now() AS updated_at
+    FROM production_batches b
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS checks,
+               COUNT(*) FILTER (WHERE qc.status::text = 'passed') AS passed
+        FROM quality_controls qc
+        WHERE qc.batch_id = b.batch_id
+    ) q ON true
+    WHERE {batch_filter}
+    GROUP BY b.production_date, b.product_id, COALESCE(b.machine_id, 0)
+"""
+
+_AGGREGATE_COLUMNS = """
+    manufacturing_daily_aggregates (
+        production_date, product_id, machine_id, batch_count, quantity_produced,
+        production_cost, costed_quantity, qc_checks, qc_passed, updated_at
+    )
+"""
+
+
+def refresh_manufacturing_aggregates(connection: Connection | Session, keys: Iterable[AggregateKey]) -> None:
+    """
+    Recompute the aggregate rows of the given keys from their batches;
+    keys left without batches lose their row.
+    """
+    batch_filter = (
+        "(b.production_date, b.product_id, COALESCE(b.machine_id, 0)) IN "
+        "(SELECT production_date, product_id, machine_id FROM keys)"
+    )
+    refresh_daily_rows(
+        connection,
+        keys,
+        date_column="production_date",
+        lock_name="manufacturing_daily",
+        inserts={
+            "manufacturing_daily_aggregates": (
+                f"INSERT INTO {_AGGREGATE_COLUMNS}" + _AGGREGATE_SELECT.format(batch_filter=batch_filter)
+            ),
+        },
+    )
+
+
+def refresh_batch_aggregates(connection: Connection | Session, batch_ids: Iterable[int]) -> None:
+    """Recompute the aggregate rows the given batches fall into"""
+    batch_ids = sorted({batch_id for batch_id in batch_ids if batch_id})
+    if not batch_ids:
+        return
+    keys = connection.execute(
+        text("""
+            SELECT DISTINCT production_date, product_id, COALESCE(machine_id, 0)
+            FROM production_batches
+            WHERE batch_id = ANY(:batch_ids)
+        """),
+        {"batch_ids": batch_ids},
+    ).all()
+    refresh_manufacturing_aggregates(connection, [tuple(key) for key in keys])
+
+
+def rebuild_manufacturing_aggregates(
+    session: Session,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    commit: bool = True,
+) -> int:
+    """
+    Recompute the aggregates of a date range (all dates by default) from the
+    raw batches, e.g. after bulk loads that bypass the ORM.
+    """
+    inserted = rebuild_daily_rows(
+        session,
+        start_date,
+        end_date,
+        date_column="production_date",
+        inserts={
+            "manufacturing_daily_aggregates": (
+                f"INSERT INTO {_AGGREGATE_COLUMNS}"
+                + _AGGREGATE_SELECT.format(batch_filter=date_range_filter("b.production_date"))
+            ),
+        },
+    )
+    if commit:
+        session.commit()
+    return inserted["manufacturing_daily_aggregates"]
+
+
+def _batch_key(values: Dict[str, Any]) -> AggregateKey:
+    return values["production_date"], values["product_id"], values["machine_id"] or 0
+
+
+def _batch_written(mapper, connection, target: ProductionBatch) -> None:
+    names = ("production_date", "product_id", "machine_id")
+    current = {name: getattr(target, name) for name in names}
+    keys = {_batch_key(current), _batch_key(previous_values(target, names))}
+    refresh_manufacturing_aggregates(connection, keys)
+
+
+def _quality_control_written(mapper, connection, target: QualityControl) -> None:
+    previous = previous_values(target, ("batch_id",))
+    refresh_batch_aggregates(connection, {target.batch_id, previous["batch_id"]})
+
+
+# Keep manufacturing_daily_aggregates in step with every ORM write to
+# production batches and their quality controls
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(ProductionBatch, _event, _batch_written)
+    event.listen(QualityControl, _event, _quality_control_written)
+
+
+def get_manufacturing_report(
+    *,
+    session: Session,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    group_by: str = "day",
+    machine_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    limit: int = 1000,
+) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Answer a date-range production query from the daily aggregates"""
+    measures = [
+        func.sum(ManufacturingDailyAggregate.batch_count).label("batch_count"),
+        func.sum(ManufacturingDailyAggregate.quantity_produced).label("quantity_produced"),
+        func.sum(ManufacturingDailyAggregate.production_cost).label("production_cost"),
+        func.sum(ManufacturingDailyAggregate.costed_quantity).label("costed_quantity"),
+        func.sum(ManufacturingDailyAggregate.qc_checks).label("qc_checks"),
+        func.sum(ManufacturingDailyAggregate.qc_passed).label("qc_passed"),
+    ]
+
+    if group_by == "machine":
+        keys = [ManufacturingDailyAggregate.machine_id, ManufacturingMachine.machine_name.label("name")]
+        query = select(*keys, *measures).join(
+            ManufacturingMachine,
+            ManufacturingMachine.machine_id == ManufacturingDailyAggregate.machine_id,
+            isouter=True,
+        )
+    elif group_by == "product":
+        keys = [ManufacturingDailyAggregate.product_id, Product.name.label("name")]
+        query = select(*keys, *measures).join(
+            Product, Product.product_id == ManufacturingDailyAggregate.product_id
+        )
+    else:
+        keys = [ManufacturingDailyAggregate.production_date]
+        query = select(*keys, *measures)
+
+    filters = [
+        ManufacturingDailyAggregate.production_date >= start_date,
+        ManufacturingDailyAggregate.production_date <= end_date,
+    ]
+    if machine_id is not None:
+        filters.append(ManufacturingDailyAggregate.machine_id == machine_id)
+    if product_id is not None:
+        filters.append(ManufacturingDailyAggregate.product_id == product_id)
+
+    query = query.where(*filters).group_by(*keys)
+    if group_by == "day":
+        query = query.order_by(ManufacturingDailyAggregate.production_date)
+    else:
+        query = query.order_by(func.sum(ManufacturingDailyAggregate.quantity_produced).desc())
+
+    rows = [_with_ratios(dict(row._mapping)) for row in session.exec(query.limit(limit)).all()]
+
+    totals_row = session.exec(select(*measures).where(*filters)).one()
+    totals = _with_ratios({key: value or 0 for key, value in totals_row._mapping.items()})
+    return rows, totals
+
+
+def _with_ratios(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Add cost per unit and QC pass rate, None when there is nothing to divide"""
+    row["cost_per_unit"] = (
+        round(row["production_cost"] / row["costed_quantity"], 4) if row["costed_quantity"] else None
+    )
+    row["qc_pass_rate"] = round(row["qc_passed"] / row["qc_checks"], 4) if row["qc_checks"] else None
+    return row
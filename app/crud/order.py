@@ -1,6 +1,8 @@
 from typing import List, Optional
 from sqlmodel import Session, select
-from app.models import Order, OrderCreate
+from app.models import Order, OrderCreate, OrderStatus
+from app.crud.ar_aging import check_credit_limit
+from app.crud.report import rebuild_sales_rollups
 
 def get_order_by_id(session: Session, order_id: int) -> Optional[Order]:
     return session.get(Order, order_id)
@@ -10,16 +12,24 @@ def get_orders(session: Session, skip: int = 0, limit: int = 100) -> List[Order]
 
 def create_order(session: Session, order_in: OrderCreate) -> Order:
     db_obj = Order.model_validate(order_in)
+    if db_obj.order_status != OrderStatus.cancelled:
+        check_credit_limit(session, db_obj.user_id, db_obj.order_total)
     session.add(db_obj)
     session.commit()
     session.refresh(db_obj)
     return db_obj
 
 def update_order(session: Session, db_obj: Order, obj_in: OrderCreate) -> Order:
+    previous_status = db_obj.order_status
     obj_data = obj_in.model_dump(exclude_unset=True)
     for key, value in obj_data.items():
         setattr(db_obj, key, value)
     session.add(db_obj)
+    # Cancelling (or reinstating) an order changes what the sales rollups should contain
+    if previous_status != db_obj.order_status and OrderStatus.cancelled in (previous_status, db_obj.order_status):
+        session.flush()
+        sale_date = db_obj.order_date.date()
+        rebuild_sales_rollups(session, sale_date, sale_date, commit=False)
     session.commit()
     session.refresh(db_obj)
     return db_obj
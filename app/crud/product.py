@@ -1,7 +1,8 @@
 import datetime
+import math
 from typing import List, Optional, Dict, Any, Tuple
 from decimal import Decimal
-from sqlmodel import Session, select, or_, col, and_
+from sqlmodel import Session, select, or_, col, and_, func
 from sqlalchemy.orm import aliased
 from app.models import (
     Inventory, 
@@ -10,9 +11,67 @@ from app.models import (
     Promotion, 
     TechnicalSpecification, 
     Category,
+    CategoryFacetSnapshot,
+    ProductAssociation,
+    ProductAvailability,
+    ProductSimilarity,
     ProductStatus
 )
-from app.schemas import DetailedProductView
+from app.schemas import AttributeRange, DetailedProductView
+from app.crud.attribute import attribute_range_filter, get_attribute_facets
+from app.core.db import get_engine
+from app.crud.facet import get_category_facet_snapshot, save_category_facet_snapshot
+
+def attribute_value_candidates(value: str) -> List[Any]:
+    """
+    JSON values a filter string may be stored as. Facet values are sent back
+    as strings, so "3" may be the number 3 and "True" the boolean true.
+    """
+    candidates: List[Any] = [value]
+    if value.lower() in ("true", "false"):
+        candidates.append(value.lower() == "true")
+        return candidates
+    try:
+        candidates.append(int(value))
+    except ValueError:
+        try:
+            number = float(value)
+        except ValueError:
+            return candidates
+        if math.isfinite(number):
+            candidates.append(number)
+    return candidates
+
+def attribute_contains_filter(column, key: str, values: List[str]):
+    """
+    Match documents whose `key` holds any of `values`, as a scalar or inside a
+    list. Built from @> containment so the jsonb_path_ops GIN index applies.
+    """
+    documents = []
+    for value in values:
+        for candidate in attribute_value_candidates(value):
+            documents.append({key: candidate})
+            documents.append({key: [candidate]})
+    return or_(*[column.contains(document) for document in documents])
+
+def _apply_attribute_filters(
+    query,
+    attributes: Optional[Dict[str, List[str]]],
+    attribute_ranges: Optional[Dict[str, AttributeRange]] = None,
+):
+    if attributes:
+        for attr_key, attr_values in attributes.items():
+            if attr_values:
+                query = query.where(
+                    attribute_contains_filter(Product.attributes, attr_key, attr_values)
+                )
+    if attribute_ranges:
+        for attr_key, attr_range in attribute_ranges.items():
+            if attr_range.min is not None or attr_range.max is not None:
+                query = query.where(
+                    attribute_range_filter(attr_key, attr_range.min, attr_range.max)
+                )
+    return query
 
 def get_products_paginated(
     *,
@@ -69,12 +128,7 @@ def get_products_paginated(
     if max_price is not None:
         query = query.where(Product.regular_price <= max_price)
 
-    if attributes:
-        for attr_key, attr_values in attributes.items():
-            if attr_values:
-                query = query.where(
-                    Product.attributes[attr_key].astext.in_(attr_values)
-                )
+    query = _apply_attribute_filters(query, attributes)
 
     if sort_by == "price":
         order = Product.regular_price.desc() if sort_order == "desc" else Product.regular_price
@@ -100,37 +154,95 @@ def get_products_paginated(
 
     return products, total
 
-def get_products(
+# Columns selected for product listings, keyed by their ProductListView field.
+# Listing rows are built straight from these instead of loading Product entities.
+_ParentCategory = aliased(Category)
+
+PRODUCT_LIST_COLUMNS = {
+    "product_id": Product.product_id,
+    "product_code": Product.product_code,
+    "name": Product.name,
+    "description": Product.description,
+    "regular_price": Product.regular_price,
+    "sale_price": Product.sale_price,
+    "brand_id": Product.brand_id,
+    "unit_of_measure": Product.unit_of_measure,
+    "image_url": Product.image_url,
+    "image_url_details": Product.image_url_details,
+    "status": Product.status,
+    "category_id": Product.category_id,
+    "subcategory_id": Product.subcategory_id,
+    "attributes": Product.attributes,
+    "brand_name": Brand.name,
+    "category_name": Category.category_name,
+    "parent_category_name": _ParentCategory.category_name,
+    "available_stock": ProductAvailability.net_available,
+}
+
+# Columns the filter values (facets) are computed from
+FACET_FIELDS = (
+    "regular_price",
+    "brand_id",
+    "brand_name",
+    "category_id",
+    "category_name",
+    "parent_category_name",
+)
+
+def _list_columns(fields):
+    return [PRODUCT_LIST_COLUMNS[name].label(name) for name in fields]
+
+def resolve_product_fields(fields: Optional[List[str]]) -> List[str]:
+    """
+    Validate a sparse fieldset against PRODUCT_LIST_COLUMNS. product_id is
+    always included; no fields means all of them.
+    """
+    if not fields:
+        return list(PRODUCT_LIST_COLUMNS)
+    unknown = set(fields) - PRODUCT_LIST_COLUMNS.keys()
+    if unknown:
+        raise ValueError(f"Unknown product fields: {', '.join(sorted(unknown))}")
+    return ["product_id"] + [
+        name for name in PRODUCT_LIST_COLUMNS if name in fields and name != "product_id"
+    ]
+
+def _filtered_products_query(
     *,
-    session: Session,
-    skip: int = 0,
-    limit: int = 100,
     search: Optional[str] = None,
     category_ids: Optional[List[int]] = None,
     brand_ids: Optional[List[int]] = None,
     min_price: Optional[Decimal] = None,
     max_price: Optional[Decimal] = None,
-    sort_by: Optional[str] = None,
-    sort_order: Optional[str] = "asc",
-    attributes: Optional[Dict[str, List[str]]] = None
-) -> tuple[List[Dict[str, Any]], int, Dict[str, Any]]:
-    """Get products with filters and sorting"""
-
-    ParentCategory = aliased(Category)
-
+    attributes: Optional[Dict[str, List[str]]] = None,
+    attribute_ranges: Optional[Dict[str, AttributeRange]] = None,
+    in_stock_only: bool = False,
+):
+    """Product listing query with every join and filter, selecting only product_id"""
+    # Columns are chosen per query by the callers
     query = (
-        select(
-            Product,
-            Brand.name.label("brand_name"),
-            Category.category_name.label("category_name"),
-            ParentCategory.category_name.label("parent_category_name")
-          
-        )
+        select(Product.product_id)
+        .select_from(Product)
         .join(Brand, Product.brand_id == Brand.brand_id, isouter=True)
         .join(Category, Product.subcategory_id == Category.category_id, isouter=True)
-        .join(ParentCategory, Product.category_id == ParentCategory.category_id, isouter=True)
+        .join(_ParentCategory, Product.category_id == _ParentCategory.category_id, isouter=True)
     )
 
+    if in_stock_only:
+        # Inner join on the partial index over products with stock
+        query = query.join(
+            ProductAvailability,
+            and_(
+                ProductAvailability.product_id == Product.product_id,
+                ProductAvailability.net_available > 0
+            )
+        )
+    else:
+        query = query.join(
+            ProductAvailability,
+            ProductAvailability.product_id == Product.product_id,
+            isouter=True
+        )
+
     if search:
         query = query.where(
             or_(
@@ -155,77 +267,45 @@ def get_products(
     if max_price is not None:
         query = query.where(Product.regular_price <= max_price)
 
-    if attributes:
-        for attr_key, attr_values in attributes.items():
-            if attr_values:
-                query = query.where(
-                    Product.attributes[attr_key].astext.in_(attr_values)
-                )
-
-    if sort_by == "price":
-        order = Product.regular_price.desc() if sort_order == "desc" else Product.regular_price
-        query = query.order_by(order)
-    elif sort_by == "name":
-        order = Product.name.desc() if sort_order == "desc" else Product.name
-        query = query.order_by(order)
+    return _apply_attribute_filters(query, attributes, attribute_ranges)
 
-    all_results = session.exec(query).all()
+def _compute_filter_values(session: Session, query) -> tuple[int, Dict[str, Any]]:
+    """Count the products matched by `query` and build their filter values"""
+    all_results = session.exec(query.with_only_columns(*_list_columns(FACET_FIELDS))).all()
     total = len(all_results)
 
     price_range = {
-        "min": min((r[0].regular_price for r in all_results), default=Decimal("0")),
-        "max": max((r[0].regular_price for r in all_results), default=Decimal("0"))
+        "min": min((r.regular_price for r in all_results), default=Decimal("0")),
+        "max": max((r.regular_price for r in all_results), default=Decimal("0"))
     }
 
     # Brands
     brand_counts = {}
     for r in all_results:
-        if r[0].brand_id and r[1]:
-            if r[0].brand_id not in brand_counts:
-                brand_counts[r[0].brand_id] = {"id": r[0].brand_id, "name": r[1], "count": 0}
-            brand_counts[r[0].brand_id]["count"] += 1
+        if r.brand_id and r.brand_name:
+            if r.brand_id not in brand_counts:
+                brand_counts[r.brand_id] = {"id": r.brand_id, "name": r.brand_name, "count": 0}
+            brand_counts[r.brand_id]["count"] += 1
     brands = list(brand_counts.values())
 
     # Categories
     category_counts = {}
     for r in all_results:
-        if r[0].category_id and r[2]:
-            if r[0].category_id not in category_counts:
-                category_counts[r[0].category_id] = {
-                    "id": r[0].category_id,
-                    "name": r[2],
-                    "parent_name": r[3],
+        if r.category_id and r.category_name:
+            if r.category_id not in category_counts:
+                category_counts[r.category_id] = {
+                    "id": r.category_id,
+                    "name": r.category_name,
+                    "parent_name": r.parent_category_name,
                     "count": 0
                 }
-            category_counts[r[0].category_id]["count"] += 1
+            category_counts[r.category_id]["count"] += 1
     categories = list(category_counts.values())
 
-    # Attributes
-    attribute_counts = {}
-    for r in all_results:
-        if r[0].attributes:
-            for attr, value in r[0].attributes.items():
-                if attr not in attribute_counts:
-                    attribute_counts[attr] = {"name": attr, "values": {}}
-                if value:
-                    if isinstance(value, list):
-                        for val in value:
-                            str_val = str(val)
-                            if str_val:
-                                attribute_counts[attr]["values"][str_val] = attribute_counts[attr]["values"].get(str_val, 0) + 1
-                    else:
-                        str_val = str(value)
-                        attribute_counts[attr]["values"][str_val] = attribute_counts[attr]["values"].get(str_val, 0) + 1
-
-    for attr in attribute_counts:
-        attribute_counts[attr]["values"] = [
-            {"value": val, "count": count}
-            for val, count in attribute_counts[attr]["values"].items()
-        ]
-        attribute_counts[attr]["values"].sort(key=lambda x: x["value"])
-
-    attributes_result = list(attribute_counts.values())
-    attributes_result.sort(key=lambda x: x["name"])
+    # Attributes, grouped in SQL over the normalized attribute table
+    attributes_result = get_attribute_facets(
+        session, query.with_only_columns(Product.product_id).order_by(None)
+    )
 
     filter_values = {
         "brands": brands,
@@ -233,19 +313,105 @@ def get_products(
         "attributes": attributes_result,
         "price_range": price_range
     }
+    return total, filter_values
 
-    query = query.offset(skip).limit(limit)
-    results = session.exec(query).all()
+def _category_filter_values(session: Session, category_id: int, query) -> tuple[int, Dict[str, Any]]:
+    """
+    Filter values for browsing one category with no other filters, served
+    from its snapshot and recomputed (and stored) when the snapshot is outdated.
+    """
+    generation, snapshot = get_category_facet_snapshot(session, category_id)
+    if snapshot is not None:
+        return snapshot
+    total, filter_values = _compute_filter_values(session, query)
+    if session.info.get("replica"):
+        # Replica sessions are read-only; the snapshot is stored on the primary
+        with Session(get_engine()) as primary:
+            save_category_facet_snapshot(primary, category_id, generation, total, filter_values)
+            primary.commit()
+    else:
+        save_category_facet_snapshot(session, category_id, generation, total, filter_values)
+        session.commit()
+    return total, filter_values
+
+def refresh_category_facet_snapshots(session: Session) -> Dict[str, int]:
+    """Recompute the outdated category facet snapshots"""
+    outdated = session.exec(
+        select(CategoryFacetSnapshot.category_id, CategoryFacetSnapshot.generation)
+        .where(CategoryFacetSnapshot.computed_generation != CategoryFacetSnapshot.generation)
+        .order_by(CategoryFacetSnapshot.category_id)
+    ).all()
+    for category_id, generation in outdated:
+        query = _filtered_products_query(category_ids=[category_id])
+        total, filter_values = _compute_filter_values(session, query)
+        save_category_facet_snapshot(session, category_id, generation, total, filter_values)
+        session.commit()
+    return {"snapshots_refreshed": len(outdated)}
 
-    products = []
-    for result in results:
-        product_dict = result[0].dict()
-        product_dict.update({
-            "brand_name": result[1],
-            "category_name": result[2],
-            "parent_category_name": result[3]
-        })
-        products.append(product_dict)
+def get_products(
+    *,
+    session: Session,
+    skip: int = 0,
+    limit: int = 100,
+    search: Optional[str] = None,
+    category_ids: Optional[List[int]] = None,
+    brand_ids: Optional[List[int]] = None,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = "asc",
+    attributes: Optional[Dict[str, List[str]]] = None,
+    attribute_ranges: Optional[Dict[str, AttributeRange]] = None,
+    in_stock_only: bool = False,
+    fields: Optional[List[str]] = None,
+    include_filter_values: bool = True
+) -> tuple[List[Dict[str, Any]], int, Optional[Dict[str, Any]]]:
+    """
+    Get products with filters and sorting.
+
+    Only the columns named in `fields` are selected for the page (see
+    resolve_product_fields). Filter values are skipped, and the total counted
+    in SQL, when `include_filter_values` is false. Browsing a single category
+    with no other filters is answered from its facet snapshot.
+    """
+    selected_fields = resolve_product_fields(fields)
+
+    query = _filtered_products_query(
+        search=search,
+        category_ids=category_ids,
+        brand_ids=brand_ids,
+        min_price=min_price,
+        max_price=max_price,
+        attributes=attributes,
+        attribute_ranges=attribute_ranges,
+        in_stock_only=in_stock_only,
+    )
+
+    if sort_by == "price":
+        order = Product.regular_price.desc() if sort_order == "desc" else Product.regular_price
+        query = query.order_by(order)
+    elif sort_by == "name":
+        order = Product.name.desc() if sort_order == "desc" else Product.name
+        query = query.order_by(order)
+
+    if not include_filter_values:
+        total = session.exec(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        ).one()
+        filter_values = None
+    elif category_ids and len(set(category_ids)) == 1 and not any((
+        search, brand_ids, min_price is not None, max_price is not None,
+        attributes, attribute_ranges, in_stock_only
+    )):
+        total, filter_values = _category_filter_values(session, category_ids[0], query)
+    else:
+        total, filter_values = _compute_filter_values(session, query)
+
+    results = session.exec(
+        query.with_only_columns(*_list_columns(selected_fields)).offset(skip).limit(limit)
+    ).all()
+
+    products = [dict(result._mapping) for result in results]
 
     return products, total, filter_values
 
@@ -273,10 +439,14 @@ async def get_detailed_product(db: Session, product_id: int) -> Optional[Detaile
     
     product = result[0]
     
-    # Get inventory information
-    inventory = db.exec(
-        select(Inventory).where(Inventory.product_id == product_id)
-    ).first()
+    # Get inventory information for every warehouse stocking the product
+    inventories = db.exec(
+        select(Inventory)
+        .where(Inventory.product_id == product_id)
+        .order_by(Inventory.warehouse_id)
+    ).all()
+    availability = db.get(ProductAvailability, product_id)
+    available_stock = availability.net_available if availability else 0
     
     # Get technical specifications
     tech_specs = db.exec(
@@ -306,10 +476,12 @@ async def get_detailed_product(db: Session, product_id: int) -> Optional[Detaile
     
     detailed_view = DetailedProductView(
         **product_dict,
-        inventory=inventory,
+        inventory=inventories[0] if inventories else None,
+        warehouses=inventories,
+        available_stock=available_stock,
         technical_specs=tech_specs,
         active_promotions=active_promotions,
-        stock_status="In Stock" if (inventory and inventory.available_quantity > 0) else "Out of Stock"
+        stock_status="In Stock" if available_stock > 0 else "Out of Stock"
     )
     
     return detailed_view
@@ -317,46 +489,54 @@ async def get_detailed_product(db: Session, product_id: int) -> Optional[Detaile
 def get_suggested_products(
     *,
     session: Session,
-    current_product: DetailedProductView,
+    product_id: int,
     limit: int = 4
-) -> Tuple[List[Dict[str, Any]], int]:
-    """Get suggested products based on the current product's attributes"""
-    
-    # Calculate price range (20% above and below current price)
-    price_range = Decimal("0.2")  # 20% range
-    min_price = current_product.regular_price * (1 - price_range)
-    max_price = current_product.regular_price * (1 + price_range)
-    
-    # Build the query
-    ParentCategory = aliased(Category)
+) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+    """
+    Get suggested products from the precomputed similarity index (see
+    compute_product_similarities). Products the job hasn't seen yet fall back
+    to active products of the same category within ±20% of the price.
+    Returns None if the product doesn't exist.
+    """
+    columns = _list_columns(list(PRODUCT_LIST_COLUMNS))
     query = (
-        select(
-            Product,
-            Brand.name.label("brand_name"),
-            Category.category_name.label("category_name"),
-            ParentCategory.category_name.label("parent_category_name")
-        )
-        .join(Brand, Product.brand_id == Brand.brand_id, isouter=True)
-        .join(Category, Product.subcategory_id == Category.category_id, isouter=True)
-        .join(ParentCategory, Product.category_id == ParentCategory.category_id, isouter=True)
+        _filtered_products_query()
+        .join(ProductSimilarity, ProductSimilarity.similar_product_id == Product.product_id)
         .where(
-            and_(
-                # Exclude current product
-                Product.product_id != current_product.product_id,
-                # Only active products
-                Product.status == ProductStatus.active,
-                # Price within range
-                Product.regular_price >= min_price,
-                Product.regular_price <= max_price,
-                # Same category or subcategory
-                or_(
-                    Product.category_id == current_product.category_id,
-                    Product.subcategory_id == current_product.subcategory_id
-                )
+            ProductSimilarity.product_id == product_id,
+            Product.status == ProductStatus.active
+        )
+        .order_by(ProductSimilarity.rank)
+    )
+    results = session.exec(query.with_only_columns(*columns).limit(limit)).all()
+    if results:
+        products = [dict(result._mapping) for result in results]
+        return products, len(products)
+
+    current_product = session.get(Product, product_id)
+    if current_product is None:
+        return None
+
+    # Calculate price range (20% above and below current price)
+    price_range = Decimal("0.2")  # 20% range
+    regular_price = current_product.regular_price or Decimal("0")
+    min_price = regular_price * (1 - price_range)
+    max_price = regular_price * (1 + price_range)
+
+    query = _filtered_products_query(min_price=min_price, max_price=max_price).where(
+        and_(
+            # Exclude current product
+            Product.product_id != current_product.product_id,
+            # Only active products
+            Product.status == ProductStatus.active,
+            # Same category or subcategory
+            or_(
+                Product.category_id == current_product.category_id,
+                Product.subcategory_id == current_product.subcategory_id
             )
         )
     )
-    
+
     # If product has a brand, prioritize same brand products
     if current_product.brand_id:
         query = query.order_by(
@@ -365,23 +545,41 @@ def get_suggested_products(
         )
     else:
         query = query.order_by(Product.regular_price)
-    
-    # Execute query
-    results = session.exec(query.limit(limit)).all()
-    
-    # Format results
-    products = []
-    for result in results:
-        product_dict = result[0].dict()
-        product_dict.update({
-            "brand_name": result[1],
-            "category_name": result[2],
-            "parent_category_name": result[3]
-        })
-        products.append(product_dict)
-    
+
+    results = session.exec(query.with_only_columns(*columns).limit(limit)).all()
+    products = [dict(result._mapping) for result in results]
     return products, len(products)
 
+def get_bought_together_products(
+    *,
+    session: Session,
+    product_id: int,
+    limit: int = 4
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the products most often bought together with a product, from the
+    associations kept by refresh_bought_together. Returns None if the
+    product doesn't exist.
+    """
+    query = (
+        _filtered_products_query()
+        .join(ProductAssociation, ProductAssociation.associated_product_id == Product.product_id)
+        .where(
+            ProductAssociation.product_id == product_id,
+            Product.status == ProductStatus.active
+        )
+        .order_by(ProductAssociation.rank)
+    )
+    columns = _list_columns(list(PRODUCT_LIST_COLUMNS)) + [
+        ProductAssociation.pair_orders,
+        ProductAssociation.confidence,
+        ProductAssociation.lift,
+    ]
+    results = session.exec(query.with_only_columns(*columns).limit(limit)).all()
+    if not results and session.get(Product, product_id) is None:
+        return None
+    return [dict(result._mapping) for result in results]
+
 def get_quick_search_products(
     *,
     session: Session,
@@ -1,5 +1,6 @@
 from typing import List, Optional
 from sqlmodel import Session, select
+from app.crud.bill_of_materials import create_production_batches
 from app.models import ProductionBatch, ProductionBatchCreate
 
 def get_production_batch_by_id(session: Session, batch_id: int) -> Optional[ProductionBatch]:
@@ -9,11 +10,7 @@ def get_production_batches(session: Session, skip: int = 0, limit: int = 100) ->
     return session.exec(select(ProductionBatch).offset(skip).limit(limit)).all()
 
 def create_production_batch(session: Session, batch_in: ProductionBatchCreate) -> ProductionBatch:
-    db_obj = ProductionBatch.model_validate(batch_in)
-    session.add(db_obj)
-    session.commit()
-    session.refresh(db_obj)
-    return db_obj
+    return create_production_batches(session, [batch_in])[0]
 
 def update_production_batch(session: Session, db_obj: ProductionBatch, obj_in: ProductionBatchCreate) -> ProductionBatch:
     obj_data = obj_in.model_dump(exclude_unset=True)
@@ -0,0 +1,384 @@
+import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session
+
+from app.crud.utils import DailyKey, date_range_filter, previous_values, rebuild_daily_rows, refresh_daily_rows
+from app.models import ProductionBatch, QualityControl
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy is imported where it's used: this module is loaded with the API
+# routes, and workers shouldn't pay for numpy until the first analytics query
+
+QC_ANALYTICS_SCOPES = ("product", "machine")
+
+# (check_date, product_id, machine_id), machine_id 0 for batches without one
+StatKey = DailyKey
+
+# Free-text test results that count as a failed test: ones starting with
+# "Falla", "Fallo", "fail", "Rechazado", "No conforme", ... or just "NOK".
+# Terms are anchored at the start so "Sin fallas" isn't a failure; anything
+# else, including NULL, is not a failure either
+_FAILED_RESULT_PATTERN = r"^\s*(fail|fall[aoi]|rechaz|reject|no conforme|nok?\s*$)"
+_FAILED_RESULT = f"~* '{_FAILED_RESULT_PATTERN}'"
+
+_NO_REASON = "sin motivo"
+
+_STATS_SELECT = f"""
+    SELECT qc.check_date,
+           b.product_id,
+           COALESCE(b.machine_id, 0) AS machine_id,
+           COUNT(*) AS checks,
+           COUNT(*) FILTER (WHERE qc.status::text = 'passed') AS passed,
+           COUNT(*) FILTER (WHERE qc.pressure_test_result {_FAILED_RESULT}) AS pressure_failed,
+           COUNT(*) FILTER (WHERE qc.dimensional_check_result {_FAILED_RESULT}) AS dimensional_failed,
+           COUNT(*) FILTER (WHERE qc.visual_inspection_result {_FAILED_RESULT}) AS visual_failed,
+           now() AS updated_at
+    FROM quality_controls qc
+    JOIN production_batches b ON b.batch_id = qc.batch_id
+    WHERE {{qc_filter}}
+    GROUP BY qc.check_date, b.product_id, COALESCE(b.machine_id, 0)
+"""
+
+_REASONS_SELECT = f"""
+    SELECT qc.check_date,
+           b.product_id,
+           COALESCE(b.machine_id, 0) AS machine_id,
+           left(COALESCE(NULLIF(lower(btrim(qc.rejection_reason)), ''), '{_NO_REASON}'), 255) AS reason,
+           COUNT(*) AS failures
+    FROM quality_controls qc
+    JOIN production_batches b ON b.batch_id = qc.batch_id
+    WHERE qc.status::text = 'failed' AND {{qc_filter}}
+    GROUP BY 1, 2, 3, 4
+"""
+
+_STATS_COLUMNS = """
+    quality_control_daily_stats (
+        check_date, product_id, machine_id, checks, passed,
+        pressure_failed, dimensional_failed, visual_failed, updated_at
+    )
+"""
+
+_REASONS_COLUMNS = "quality_control_failure_reasons (check_date, product_id, machine_id, reason, failures)"
+
+
+def _stats_inserts(qc_filter: str) -> Dict[str, str]:
+    return {
+        "quality_control_daily_stats": f"INSERT INTO {_STATS_COLUMNS}" + _STATS_SELECT.format(qc_filter=qc_filter),
+        "quality_control_failure_reasons": (
+            f"INSERT INTO {_REASONS_COLUMNS}" + _REASONS_SELECT.format(qc_filter=qc_filter)
+        ),
+    }
+
+
+def refresh_quality_stats(connection: Connection | Session, keys: Iterable[StatKey]) -> None:
+    """Recompute the daily stats and failure reasons of the given keys from their inspections"""
+    refresh_daily_rows(
+        connection,
+        keys,
+        date_column="check_date",
+        lock_name="quality_daily",
+        inserts=_stats_inserts(
+            "(qc.check_date, b.product_id, COALESCE(b.machine_id, 0)) IN "
+            "(SELECT check_date, product_id, machine_id FROM keys)"
+        ),
+    )
+
+
+def _keys_of_inspections(
+    connection: Connection | Session, inspections: Iterable[Tuple[datetime.date, int]]
+) -> List[StatKey]:
+    """Stat keys of (check_date, batch_id) pairs, resolving each batch's product and machine"""
+    inspections = sorted({pair for pair in inspections if pair[0] and pair[1]})
+    if not inspections:
+        return []
+    rows = connection.execute(
+        text("""
+            SELECT DISTINCT i.check_date, b.product_id, COALESCE(b.machine_id, 0)
+            FROM unnest(CAST(:dates AS date[]), CAST(:batch_ids AS integer[])) AS i(check_date, batch_id)
+            JOIN production_batches b ON b.batch_id = i.batch_id
+        """),
+        {"dates": [pair[0] for pair in inspections], "batch_ids": [pair[1] for pair in inspections]},
+    ).all()
+    return [tuple(row) for row in rows]
+
+
+def rebuild_quality_stats(
+    session: Session,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    commit: bool = True,
+) -> int:
+    """
+    Recompute the stats of a check-date range (all dates by default) from
+    the raw inspections, e.g. after bulk loads that bypass the ORM.
+    """
+    inserted = rebuild_daily_rows(
+        session,
+        start_date,
+        end_date,
+        date_column="check_date",
+        inserts=_stats_inserts(date_range_filter("qc.check_date")),
+    )
+    if commit:
+        session.commit()
+    return inserted["quality_control_daily_stats"]
+
+
+def _quality_control_written(mapper, connection, target: QualityControl) -> None:
+    previous = previous_values(target, ("check_date", "batch_id"))
+    inspections = {(target.check_date, target.batch_id), (previous["check_date"], previous["batch_id"])}
+    refresh_quality_stats(connection, _keys_of_inspections(connection, inspections))
+
+
+def _batch_updated(mapper, connection, target: ProductionBatch) -> None:
+    previous = previous_values(target, ("product_id", "machine_id"))
+    if previous["product_id"] == target.product_id and previous["machine_id"] == target.machine_id:
+        return
+    dates = connection.execute(
+        text("SELECT DISTINCT check_date FROM quality_controls WHERE batch_id = :batch_id"),
+        {"batch_id": target.batch_id},
+    ).scalars().all()
+    keys = set()
+    for check_date in dates:
+        keys.add((check_date, target.product_id, target.machine_id or 0))
+        keys.add((check_date, previous["product_id"], previous["machine_id"] or 0))
+    refresh_quality_stats(connection, keys)
+
+
+# Keep the QC stats in step with every ORM write to inspections, and with
+# batches moving to another product or machine
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(QualityControl, _event, _quality_control_written)
+event.listen(ProductionBatch, "after_update", _batch_updated)
+
+
+def rolling_sum(values: "np.ndarray", window: int) -> "np.ndarray":
+    """Trailing `window`-day sums along the last axis, shorter at the start"""
+    import numpy as np
+
+    cumulative = np.cumsum(values, axis=-1)
+    rolled = cumulative.copy()
+    rolled[..., window:] -= cumulative[..., :-window]
+    return rolled
+
+
+def p_chart(checks: "np.ndarray", failed: "np.ndarray") -> Dict[str, "np.ndarray"]:
+    """
+    Attribute control chart of the failure proportion, one subgroup per day.
+    Rows are products or machines: each gets its own center line
+    p̄ = failed / checks over the whole range, and daily limits
+    p̄ ± 3·sqrt(p̄(1 - p̄) / n) that widen on days with fewer inspections.
+    """
+    import numpy as np
+
+    checks = np.atleast_2d(checks).astype(np.float64)
+    failed = np.atleast_2d(failed).astype(np.float64)
+    total_checks = checks.sum(axis=1, keepdims=True)
+    center = np.divide(
+        failed.sum(axis=1, keepdims=True), total_checks, out=np.zeros_like(total_checks), where=total_checks > 0
+    )
+    inspected = checks > 0
+    proportion = np.divide(failed, checks, out=np.zeros_like(checks), where=inspected)
+    sigma = np.sqrt(np.divide(center * (1 - center), checks, out=np.zeros_like(checks), where=inspected))
+    upper = np.minimum(center + 3 * sigma, 1.0)
+    lower = np.maximum(center - 3 * sigma, 0.0)
+    out_of_control = inspected & ((proportion > upper) | (proportion < lower))
+    return {
+        "center": center[:, 0],
+        "proportion": proportion,
+        "upper": upper,
+        "lower": lower,
+        "inspected": inspected,
+        "out_of_control": out_of_control,
+    }
+
+
+def _daily_matrix(
+    session: Session,
+    scope: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    entity_id: Optional[int] = None,
+) -> Tuple[List[int], Dict[str, "np.ndarray"]]:
+    """
+    Daily stats of every product or machine in the range as dense
+    (entities × days) matrices, zero on days without inspections.
+    """
+    import numpy as np
+
+    column = f"{scope}_id"
+    rows = session.execute(
+        text(f"""
+            SELECT {column}, check_date - CAST(:start_date AS date) AS day,
+                   SUM(checks), SUM(passed),
+                   SUM(pressure_failed), SUM(dimensional_failed), SUM(visual_failed)
+            FROM quality_control_daily_stats
+            WHERE check_date BETWEEN :start_date AND :end_date
+              AND (CAST(:entity_id AS integer) IS NULL OR {column} = :entity_id)
+            GROUP BY 1, 2
+        """),
+        {"start_date": start_date, "end_date": end_date, "entity_id": entity_id},
+    ).all()
+    n_days = (end_date - start_date).days + 1
+    names = ("checks", "passed", "pressure_failed", "dimensional_failed", "visual_failed")
+    if not rows:
+        return [], {name: np.zeros((0, n_days), dtype=np.int64) for name in names}
+
+    data = np.array(rows, dtype=np.int64)
+    entity_ids, rows_entity = np.unique(data[:, 0], return_inverse=True)
+    flat = rows_entity * n_days + data[:, 1]
+    size = len(entity_ids) * n_days
+    matrices = {
+        name: np.bincount(flat, weights=data[:, 2 + i], minlength=size).astype(np.int64).reshape(-1, n_days)
+        for i, name in enumerate(names)
+    }
+    return entity_ids.tolist(), matrices
+
+
+def _rate(numerator: float, denominator: float) -> Optional[float]:
+    return round(float(numerator) / float(denominator), 4) if denominator else None
+
+
+def _entity_names(session: Session, scope: str, entity_ids: List[int]) -> Dict[int, str]:
+    if not entity_ids:
+        return {}
+    if scope == "machine":
+        query = "SELECT machine_id, machine_name FROM manufacturing_machines WHERE machine_id = ANY(:ids)"
+    else:
+        query = "SELECT product_id, name FROM products WHERE product_id = ANY(:ids)"
+    return dict(session.execute(text(query), {"ids": entity_ids}).all())
+
+
+def get_quality_analytics(
+    *,
+    session: Session,
+    scope: str,
+    entity_id: int,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    window_days: int = 7,
+) -> Dict[str, Any]:
+    """
+    Daily pass rates, trailing `window_days` pass rates, p-chart limits and
+    failure breakdowns of one product or machine. The window reaches back
+    before `start_date` so the first days' rolling rates are complete.
+    """
+    history_start = start_date - datetime.timedelta(days=window_days - 1)
+    _, matrices = _daily_matrix(session, scope, history_start, end_date, entity_id)
+    n_days = (end_date - start_date).days + 1
+    offset = window_days - 1
+    if not len(matrices["checks"]):
+        checks = passed = [0] * n_days
+        rolling_checks = rolling_passed = [0] * n_days
+        chart = None
+    else:
+        checks_all, passed_all = matrices["checks"][0], matrices["passed"][0]
+        rolling_checks = rolling_sum(checks_all, window_days)[offset:].tolist()
+        rolling_passed = rolling_sum(passed_all, window_days)[offset:].tolist()
+        checks, passed = checks_all[offset:], passed_all[offset:]
+        chart = p_chart(checks, checks - passed)
+        checks, passed = checks.tolist(), passed.tolist()
+
+    series = []
+    for day in range(n_days):
+        point = {
+            "check_date": start_date + datetime.timedelta(days=day),
+            "checks": checks[day],
+            "passed": passed[day],
+            "pass_rate": _rate(passed[day], checks[day]),
+            "rolling_pass_rate": _rate(rolling_passed[day], rolling_checks[day]),
+            "failure_rate": None,
+            "upper_control_limit": None,
+            "lower_control_limit": None,
+            "out_of_control": False,
+        }
+        if chart is not None and chart["inspected"][0, day]:
+            point["failure_rate"] = round(float(chart["proportion"][0, day]), 4)
+            point["upper_control_limit"] = round(float(chart["upper"][0, day]), 4)
+            point["lower_control_limit"] = round(float(chart["lower"][0, day]), 4)
+            point["out_of_control"] = bool(chart["out_of_control"][0, day])
+        series.append(point)
+
+    total_checks, total_passed = sum(checks), sum(passed)
+    failed_tests = {
+        test: int(matrices[f"{test}_failed"][:, offset:].sum())
+        for test in ("pressure", "dimensional", "visual")
+    }
+    reasons = session.execute(
+        text(f"""
+            SELECT reason, SUM(failures) AS failures
+            FROM quality_control_failure_reasons
+            WHERE {scope}_id = :entity_id AND check_date BETWEEN :start_date AND :end_date
+            GROUP BY reason
+            ORDER BY failures DESC, reason
+        """),
+        {"entity_id": entity_id, "start_date": start_date, "end_date": end_date},
+    ).all()
+    total_failures = sum(row.failures for row in reasons)
+    return {
+        "scope": scope,
+        "entity_id": entity_id,
+        "name": _entity_names(session, scope, [entity_id]).get(entity_id),
+        "start_date": start_date,
+        "end_date": end_date,
+        "window_days": window_days,
+        "checks": total_checks,
+        "passed": total_passed,
+        "pass_rate": _rate(total_passed, total_checks),
+        "center_line": round(float(chart["center"][0]), 4) if chart is not None else None,
+        "out_of_control_days": int(chart["out_of_control"].sum()) if chart is not None else 0,
+        "failed_tests": failed_tests,
+        "failure_reasons": [
+            {"reason": row.reason, "failures": int(row.failures), "share": _rate(row.failures, total_failures)}
+            for row in reasons
+        ],
+        "series": series,
+    }
+
+
+def get_quality_summary(
+    *,
+    session: Session,
+    scope: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    window_days: int = 7,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """
+    Pass rate, trailing pass rate up to `end_date` and out-of-control days of
+    every product or machine inspected in the range, computed for all of them
+    at once over the (entities × days) matrices. Worst pass rates first.
+    """
+    import numpy as np
+
+    entity_ids, matrices = _daily_matrix(session, scope, start_date, end_date)
+    if not entity_ids:
+        return []
+    checks, passed = matrices["checks"], matrices["passed"]
+    chart = p_chart(checks, checks - passed)
+    total_checks, total_passed = checks.sum(axis=1), passed.sum(axis=1)
+    window = min(window_days, checks.shape[1])
+    recent_checks, recent_passed = checks[:, -window:].sum(axis=1), passed[:, -window:].sum(axis=1)
+    out_of_control_days = chart["out_of_control"].sum(axis=1)
+
+    order = np.lexsort((np.array(entity_ids), -total_checks, total_passed / total_checks))[:limit]
+    names = _entity_names(session, scope, [entity_ids[i] for i in order])
+    return [
+        {
+            "entity_id": entity_ids[i],
+            "name": names.get(entity_ids[i]),
+            "checks": int(total_checks[i]),
+            "passed": int(total_passed[i]),
+            "pass_rate": _rate(total_passed[i], total_checks[i]),
+            "rolling_pass_rate": _rate(recent_passed[i], recent_checks[i]),
+            "center_line": round(float(chart["center"][i]), 4),
+            "out_of_control_days": int(out_of_control_days[i]),
+        }
+        for i in order
+    ]
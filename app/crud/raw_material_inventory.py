@@ -1,6 +1,9 @@
+import datetime
 from typing import List, Optional
 from sqlmodel import Session, select
-from app.models import RawMaterialInventory, RawMaterialInventoryCreate
+from sqlalchemy import update
+from app.crud.raw_material_lot import add_lot, adjust_material_stock
+from app.models import RawMaterialInventory, RawMaterialInventoryCreate, RawMaterialLot, RawMaterialLotCreate
 
 def get_raw_material_inventory_by_id(session: Session, material_id: int) -> Optional[RawMaterialInventory]:
     return session.get(RawMaterialInventory, material_id)
@@ -11,15 +14,34 @@ def get_raw_material_inventories(session: Session, skip: int = 0, limit: int = 1
 def create_raw_material_inventory(session: Session, inventory_in: RawMaterialInventoryCreate) -> RawMaterialInventory:
     db_obj = RawMaterialInventory.model_validate(inventory_in)
     session.add(db_obj)
+    session.flush()
+    # The opening stock is the material's first lot
+    if db_obj.quantity_available > 0:
+        add_lot(session, db_obj, RawMaterialLotCreate(
+            quantity_received=db_obj.quantity_available,
+            received_date=db_obj.last_purchase_date or datetime.date.today(),
+            expiration_date=db_obj.expiration_date,
+        ), commit=False)
     session.commit()
     session.refresh(db_obj)
     return db_obj
 
 def update_raw_material_inventory(session: Session, db_obj: RawMaterialInventory, obj_in: RawMaterialInventoryCreate) -> RawMaterialInventory:
     obj_data = obj_in.model_dump(exclude_unset=True)
+    # Stock and expiry follow the lots: a new quantity becomes a lot adjustment
+    quantity = obj_data.pop("quantity_available", None)
+    obj_data.pop("expiration_date", None)
     for key, value in obj_data.items():
         setattr(db_obj, key, value)
     session.add(db_obj)
+    session.flush()
+    session.execute(
+        update(RawMaterialLot)
+        .where(RawMaterialLot.material_id == db_obj.material_id, RawMaterialLot.material_type != db_obj.material_type)
+        .values(material_type=db_obj.material_type)
+    )
+    if quantity is not None and quantity != db_obj.quantity_available:
+        adjust_material_stock(session, db_obj, quantity)
     session.commit()
     session.refresh(db_obj)
     return db_obj
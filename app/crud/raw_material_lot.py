@@ -0,0 +1,259 @@
+import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app.models import RawMaterialInventory, RawMaterialLot, RawMaterialLotCreate
+
+
+class InsufficientRawMaterialError(ValueError):
+    """Raised when unexpired raw material lots can't cover a consumption"""
+
+
+def get_material_lots(session: Session, material_id: int, include_empty: bool = False) -> List[RawMaterialLot]:
+    """Lots of a material in the order they are consumed"""
+    query = select(RawMaterialLot).where(RawMaterialLot.material_id == material_id)
+    if not include_empty:
+        query = query.where(RawMaterialLot.quantity_remaining > 0)
+    return session.exec(
+        query.order_by(
+            RawMaterialLot.expiration_date.asc().nulls_last(),
+            RawMaterialLot.received_date,
+            RawMaterialLot.lot_id,
+        )
+    ).all()
+
+
+def sync_materials_from_lots(session: Session, material_ids: Iterable[int]) -> None:
+    """Set quantity_available and expiration_date of materials from their open lots"""
+    material_ids = sorted(set(material_ids))
+    if not material_ids:
+        return
+    session.execute(
+        text("""
+            UPDATE raw_material_inventories r
+            SET quantity_available = COALESCE(l.remaining, 0),
+                expiration_date = l.next_expiration,
+                updated_at = now()
+            FROM unnest(CAST(:material_ids AS integer[])) AS m(material_id)
+            LEFT JOIN LATERAL (
+                SELECT SUM(quantity_remaining) AS remaining, MIN(expiration_date) AS next_expiration
+                FROM raw_material_lots
+                WHERE material_id = m.material_id AND quantity_remaining > 0
+            ) l ON true
+            WHERE r.material_id = m.material_id
+        """),
+        {"material_ids": material_ids},
+    )
+
+
+def add_lot(
+    session: Session, material: RawMaterialInventory, lot_in: RawMaterialLotCreate, commit: bool = True
+) -> RawMaterialLot:
+    """Receive a lot into stock; it costs the material's current cost unless given"""
+    lot = RawMaterialLot.model_validate(
+        lot_in,
+        update={
+            "material_id": material.material_id,
+            "material_type": material.material_type,
+            "quantity_remaining": lot_in.quantity_received,
+            "cost_per_unit": lot_in.cost_per_unit if lot_in.cost_per_unit is not None else material.cost_per_unit,
+        },
+    )
+    session.add(lot)
+    session.flush()
+    sync_materials_from_lots(session, [material.material_id])
+    if material.last_purchase_date is None or lot.received_date > material.last_purchase_date:
+        material.last_purchase_date = lot.received_date
+        session.add(material)
+    if commit:
+        session.commit()
+        session.refresh(lot)
+        session.refresh(material)
+    return lot
+
+
+def allocate_fefo(
+    session: Session, requirements: Dict[int, Decimal], as_of: Optional[datetime.date] = None
+) -> List[Dict[str, Any]]:
+    """
+    Take the required quantity of every material out of its unexpired lots,
+    earliest expiry first, all or nothing. The whole allocation is one
+    statement: a running total per material (window function over the lots
+    in FEFO order) decides how much each lot gives. Materials are locked in
+    id order first, so concurrent consumers queue instead of deadlocking.
+    Returns the (lot_id, material_id, quantity, cost_per_unit) taken from
+    each lot, in FEFO order per material.
+    """
+    if not requirements:
+        return []
+    material_ids = sorted(requirements)
+    params = {
+        "material_ids": material_ids,
+        "quantities": [requirements[material_id] for material_id in material_ids],
+        "as_of": as_of or datetime.date.today(),
+    }
+    session.execute(
+        text("""
+            SELECT material_id FROM raw_material_inventories
+            WHERE material_id = ANY(:material_ids)
+            ORDER BY material_id
+            FOR UPDATE
+        """),
+        params,
+    )
+    short = session.execute(
+        text("""
+            SELECT n.material_id, r.material_name, n.quantity, COALESCE(SUM(l.quantity_remaining), 0) AS available
+            FROM unnest(CAST(:material_ids AS integer[]), CAST(:quantities AS numeric[])) AS n(material_id, quantity)
+            LEFT JOIN raw_material_inventories r ON r.material_id = n.material_id
+            LEFT JOIN raw_material_lots l
+              ON l.material_id = n.material_id
+             AND l.quantity_remaining > 0
+             AND (l.expiration_date IS NULL OR l.expiration_date >= :as_of)
+            GROUP BY n.material_id, r.material_name, n.quantity
+            HAVING COALESCE(SUM(l.quantity_remaining), 0) < n.quantity
+            ORDER BY n.material_id
+        """),
+        params,
+    ).all()
+    if short:
+        details = ", ".join(
+            f"{row.material_name or row.material_id}: needs {row.quantity}, has {row.available} unexpired"
+            for row in short
+        )
+        raise InsufficientRawMaterialError(f"Not enough raw material in stock ({details})")
+
+    allocations = session.execute(
+        text("""
+            WITH needed AS (
+                SELECT * FROM unnest(CAST(:material_ids AS integer[]), CAST(:quantities AS numeric[]))
+                    AS n(material_id, quantity)
+            ),
+            ranked AS (
+                SELECT l.lot_id,
+                       l.material_id,
+                       l.quantity_remaining,
+                       n.quantity AS needed,
+                       SUM(l.quantity_remaining) OVER (
+                           PARTITION BY l.material_id
+                           ORDER BY l.expiration_date NULLS LAST, l.received_date, l.lot_id
+                           ROWS UNBOUNDED PRECEDING
+                       ) - l.quantity_remaining AS taken_before
+                FROM raw_material_lots l
+                JOIN needed n ON n.material_id = l.material_id
+                WHERE l.quantity_remaining > 0
+                  AND (l.expiration_date IS NULL OR l.expiration_date >= :as_of)
+            ),
+            taken AS (
+                SELECT lot_id, material_id, LEAST(quantity_remaining, needed - taken_before) AS quantity
+                FROM ranked
+                WHERE taken_before < needed
+            ),
+            updated AS (
+                UPDATE raw_material_lots l
+                SET quantity_remaining = l.quantity_remaining - t.quantity
+                FROM taken t
+                WHERE l.lot_id = t.lot_id
+                RETURNING l.lot_id, l.material_id, t.quantity, l.cost_per_unit, l.expiration_date, l.received_date
+            )
+            SELECT lot_id, material_id, quantity, cost_per_unit
+            FROM updated
+            ORDER BY material_id, expiration_date NULLS LAST, received_date, lot_id
+        """),
+        params,
+    ).all()
+    sync_materials_from_lots(session, material_ids)
+    return [row._asdict() for row in allocations]
+
+
+def adjust_material_stock(
+    session: Session, material: RawMaterialInventory, quantity: Decimal, as_of: Optional[datetime.date] = None
+) -> None:
+    """
+    Bring a material's lots to a new total, e.g. after a stock count: a
+    surplus becomes an adjustment lot, a shortfall is taken from the open
+    lots earliest expiry first, expired ones included.
+    """
+    current = session.execute(
+        text("SELECT COALESCE(SUM(quantity_remaining), 0) FROM raw_material_lots WHERE material_id = :material_id"),
+        {"material_id": material.material_id},
+    ).scalar_one()
+    delta = Decimal(quantity) - current
+    if delta > 0:
+        add_lot(
+            session,
+            material,
+            RawMaterialLotCreate(
+                lot_number="AJUSTE",
+                quantity_received=delta,
+                received_date=as_of or datetime.date.today(),
+                expiration_date=material.expiration_date,
+            ),
+            commit=False,
+        )
+    elif delta < 0:
+        session.execute(
+            text("""
+                WITH ranked AS (
+                    SELECT lot_id, quantity_remaining,
+                           SUM(quantity_remaining) OVER (
+                               ORDER BY expiration_date NULLS LAST, received_date, lot_id
+                               ROWS UNBOUNDED PRECEDING
+                           ) - quantity_remaining AS taken_before
+                    FROM raw_material_lots
+                    WHERE material_id = :material_id AND quantity_remaining > 0
+                )
+                UPDATE raw_material_lots l
+                SET quantity_remaining = l.quantity_remaining - LEAST(r.quantity_remaining, :shortfall - r.taken_before)
+                FROM ranked r
+                WHERE l.lot_id = r.lot_id AND r.taken_before < :shortfall
+            """),
+            {"material_id": material.material_id, "shortfall": -delta},
+        )
+        sync_materials_from_lots(session, [material.material_id])
+
+
+def get_expiring_lots(
+    *,
+    session: Session,
+    days: int,
+    material_type: Optional[str] = None,
+    today: Optional[datetime.date] = None,
+    include_expired: bool = True,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """
+    Open lots expiring within `days` days, soonest first. Answered from the
+    partial expiration indexes on open lots, by type when one is given.
+    """
+    today = today or datetime.date.today()
+    filters = ["l.quantity_remaining > 0", "l.expiration_date <= :horizon"]
+    if not include_expired:
+        filters.append("l.expiration_date >= :today")
+    if material_type is not None:
+        filters.append("l.material_type = :material_type")
+    rows = session.execute(
+        text(f"""
+            SELECT l.lot_id, l.lot_number, l.material_id, r.material_name, l.material_type,
+                   l.quantity_remaining, r.unit_of_measure, l.cost_per_unit, l.received_date,
+                   l.expiration_date, r.location
+            FROM raw_material_lots l
+            JOIN raw_material_inventories r ON r.material_id = l.material_id
+            WHERE {" AND ".join(filters)}
+            ORDER BY l.expiration_date, l.lot_id
+            LIMIT :limit
+        """),
+        {
+            "horizon": today + datetime.timedelta(days=days),
+            "today": today,
+            "material_type": material_type,
+            "limit": limit,
+        },
+    ).all()
+    return [
+        {**row._asdict(), "days_until_expiration": (row.expiration_date - today).days}
+        for row in rows
+    ]
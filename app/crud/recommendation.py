@@ -0,0 +1,237 @@
+import datetime
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import insert, text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import ProductSimilarity
+
+# Weight of each signal in the similarity score; every signal is in [0, 1].
+# Candidates are always products of the same (parent) category.
+SIMILARITY_WEIGHTS = {
+    "attributes": 0.35,
+    "subcategory": 0.20,
+    "price": 0.20,
+    "copurchase": 0.20,
+    "brand": 0.05,
+}
+
+# Rows of the score matrix computed at once, bounding memory on large categories
+_BLOCK_SIZE = 1024
+
+_COPURCHASE_SQL = text("""
+    SELECT a.product_id, b.product_id, COUNT(DISTINCT a.order_id)
+    FROM order_details a
+    JOIN order_details b ON b.order_id = a.order_id AND b.product_id <> a.product_id
+    JOIN orders o ON o.order_id = a.order_id
+    JOIN products pa ON pa.product_id = a.product_id
+    JOIN products pb ON pb.product_id = b.product_id
+    WHERE o.order_status::text <> 'cancelled'
+      AND o.order_date >= now() - make_interval(days => :window_days)
+      AND pa.category_id IS NOT DISTINCT FROM pb.category_id
+    GROUP BY a.product_id, b.product_id
+""")
+
+
+# Sparse matrix rows as (row pointers, column indices, values), like CSR
+_SparseRows = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _sparse_rows(n_rows: int, rows, columns, values) -> _SparseRows:
+    """Sparse form of the matrix with n_rows rows holding `values` at (rows, columns)"""
+    rows = np.asarray(rows, dtype=np.int64)
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return (
+        indptr,
+        np.asarray(columns, dtype=np.int64)[order],
+        np.asarray(values, dtype=np.float32)[order],
+    )
+
+
+def _dense_rows(matrix: _SparseRows, start: int, stop: int, width: int) -> np.ndarray:
+    """Rows start:stop of a sparse matrix as a dense array"""
+    indptr, columns, values = matrix
+    dense = np.zeros((stop - start, width), dtype=np.float32)
+    local_rows = np.repeat(np.arange(stop - start), np.diff(indptr[start:stop + 1]))
+    cells = slice(indptr[start], indptr[stop])
+    dense[local_rows, columns[cells]] = values[cells]
+    return dense
+
+
+def _category_similarities(
+    product_ids: np.ndarray,
+    subcategory_ids: np.ndarray,
+    brand_ids: np.ndarray,
+    prices: np.ndarray,
+    features: _SparseRows,
+    copurchases: _SparseRows,
+    top_n: int,
+) -> List[tuple[int, int, int, float]]:
+    """
+    Score every pair of products in one category and keep the top_n per
+    product. `features` has a row of (key, value) attribute columns per
+    product and `copurchases` the order counts of each pair; both stay
+    sparse and only a block of rows is ever dense, so memory grows with
+    _BLOCK_SIZE times the category size. Returns (product_id, rank,
+    similar_product_id, score) rows.
+    """
+    n = len(product_ids)
+    if n < 2:
+        return []
+    feature_indptr, feature_columns, _ = features
+    feature_counts = np.diff(feature_indptr).astype(np.float32)
+    # The products having each attribute column
+    n_columns = int(feature_columns.max()) + 1 if len(feature_columns) else 0
+    feature_rows = np.repeat(np.arange(n), np.diff(feature_indptr))
+    holders_indptr, holders, _ = _sparse_rows(
+        n_columns, feature_columns, feature_rows, np.ones(len(feature_rows))
+    )
+    copurchase_counts = copurchases[2]
+    max_copurchases = copurchase_counts.max() if len(copurchase_counts) else 0
+    copurchase_scale = np.log1p(max_copurchases) if max_copurchases > 0 else 1.0
+    keep = min(top_n, n - 1)
+
+    rows = []
+    for start in range(0, n, _BLOCK_SIZE):
+        stop = min(start + _BLOCK_SIZE, n)
+        block = slice(start, stop)
+
+        # Jaccard overlap of (key, value) attribute pairs
+        overlap = np.zeros((stop - start, n), dtype=np.float32)
+        for offset in range(stop - start):
+            columns = feature_columns[feature_indptr[start + offset]:feature_indptr[start + offset + 1]]
+            if len(columns):
+                sharing = np.concatenate([holders[holders_indptr[c]:holders_indptr[c + 1]] for c in columns])
+                overlap[offset] = np.bincount(sharing, minlength=n)
+        union = feature_counts[block, None] + feature_counts[None, :] - overlap
+        attributes = np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+
+        subcategory = (
+            (subcategory_ids[block, None] == subcategory_ids[None, :])
+            & (subcategory_ids[block, None] >= 0)
+        )
+        brand = (brand_ids[block, None] == brand_ids[None, :]) & (brand_ids[block, None] >= 0)
+
+        higher = np.maximum(prices[block, None], prices[None, :])
+        distance = np.divide(
+            np.abs(prices[block, None] - prices[None, :]),
+            higher,
+            out=np.ones_like(higher),
+            where=higher > 0,
+        )
+        price = 1.0 - np.clip(distance, 0.0, 1.0)
+
+        copurchase = np.log1p(_dense_rows(copurchases, start, stop, n)) / copurchase_scale
+
+        scores = (
+            SIMILARITY_WEIGHTS["attributes"] * attributes
+            + SIMILARITY_WEIGHTS["subcategory"] * subcategory
+            + SIMILARITY_WEIGHTS["price"] * price
+            + SIMILARITY_WEIGHTS["copurchase"] * copurchase
+            + SIMILARITY_WEIGHTS["brand"] * brand
+        )
+        scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+        top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        for offset in range(stop - start):
+            product_id = int(product_ids[start + offset])
+            rank = 0
+            for candidate, score in zip(top[offset], top_scores[offset]):
+                if score <= 0:
+                    break
+                rank += 1
+                rows.append((product_id, rank, int(product_ids[candidate]), round(float(score), 6)))
+    return rows
+
+
+def compute_product_similarities(session: Session, top_n: Optional[int] = None) -> Dict[str, int]:
+    """
+    Rebuild product_similarities: the top_n most similar active products of
+    every active product, scored on attribute overlap, subcategory, brand,
+    price distance and how often both were bought in the same order.
+    """
+    top_n = top_n or settings.SIMILAR_PRODUCTS_TOP_N
+
+    products = session.execute(text("""
+        SELECT product_id, category_id, subcategory_id, brand_id, regular_price
+        FROM products
+        WHERE status::text = 'active'
+        ORDER BY product_id
+    """)).all()
+
+    features_by_product = defaultdict(list)
+    for product_id, key, value in session.execute(
+        text("SELECT product_id, key, value FROM product_attribute_values")
+    ):
+        features_by_product[product_id].append((key, value))
+
+    copurchases_by_product = defaultdict(dict)
+    for product_id, other_id, orders in session.execute(
+        _COPURCHASE_SQL,
+        {"window_days": settings.SIMILAR_PRODUCTS_COPURCHASE_WINDOW_DAYS},
+    ):
+        copurchases_by_product[product_id][other_id] = orders
+
+    groups = defaultdict(list)
+    for product in products:
+        groups[product.category_id].append(product)
+
+    rows = []
+    for group in groups.values():
+        n = len(group)
+        position = {product.product_id: i for i, product in enumerate(group)}
+
+        columns: Dict[tuple, int] = {}
+        feature_rows, feature_columns = [], []
+        copurchase_rows, copurchase_columns, copurchase_counts = [], [], []
+        for i, product in enumerate(group):
+            for feature in set(features_by_product.get(product.product_id, ())):
+                feature_rows.append(i)
+                feature_columns.append(columns.setdefault(feature, len(columns)))
+            for other_id, orders in copurchases_by_product.get(product.product_id, {}).items():
+                j = position.get(other_id)
+                if j is not None:
+                    copurchase_rows.append(i)
+                    copurchase_columns.append(j)
+                    copurchase_counts.append(orders)
+        features = _sparse_rows(n, feature_rows, feature_columns, np.ones(len(feature_rows)))
+        copurchases = _sparse_rows(n, copurchase_rows, copurchase_columns, copurchase_counts)
+
+        rows.extend(_category_similarities(
+            product_ids=np.array([p.product_id for p in group]),
+            subcategory_ids=np.array([p.subcategory_id or -1 for p in group]),
+            brand_ids=np.array([p.brand_id or -1 for p in group]),
+            prices=np.array([float(p.regular_price or 0) for p in group]),
+            features=features,
+            copurchases=copurchases,
+            top_n=top_n,
+        ))
+
+    computed_at = datetime.datetime.now()
+    session.execute(text("DELETE FROM product_similarities"))
+    if rows:
+        session.execute(
+            insert(ProductSimilarity),
+            [
+                {
+                    "product_id": product_id,
+                    "rank": rank,
+                    "similar_product_id": similar_product_id,
+                    "score": score,
+                    "computed_at": computed_at,
+                }
+                for product_id, rank, similar_product_id, score in rows
+            ],
+        )
+    session.commit()
+    return {"products": len(products), "similarities": len(rows)}
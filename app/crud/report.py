@@ -0,0 +1,277 @@
+import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlmodel import Session, func, select
+
+from app.crud.utils import lock_watermark, set_watermark
+from app.models import Brand, Category, Product, SalesDailyRollup
+
+SALES_ROLLUP_JOB = "sales_rollup"
+
+SALES_REPORT_GROUPS = ("day", "product", "category", "brand")
+
+# Aggregates order lines into one row per (sale_date, product). Order tax is
+# spread over the lines of each order in proportion to their total_price.
+# `line_filter` narrows the order lines being aggregated. Distinct orders
+# don't add up across products or runs, so reports count them from the
+# order lines instead (see `_count_orders`).
+_ROLLUP_SELECT = """
+    WITH lines AS (
+        SELECT od.order_id,
+               od.product_id,
+               od.quantity,
+               od.total_price,
+               COALESCE(od.discount_applied, 0) AS discount_applied,
+               o.order_date::date AS sale_date,
+               o.tax_amount AS order_tax
+        FROM order_details od
+        JOIN orders o ON o.order_id = od.order_id
+        WHERE o.order_status::text <> 'cancelled'
+          AND {line_filter}
+    ),
+    order_totals AS (
+        SELECT od.order_id, SUM(od.total_price) AS lines_total
+        FROM order_details od
+        WHERE od.order_id IN (SELECT DISTINCT order_id FROM lines)
+        GROUP BY od.order_id
+    )
+    SELECT l.sale_date,
+           l.product_id,
+           p.category_id,
+           p.subcategory_id,
+           p.brand_id,
+           SUM(l.quantity),
+           SUM(l.total_price),
+           SUM(l.discount_applied),
+           ROUND(SUM(CASE WHEN ot.lines_total > 0
+                          THEN l.order_tax * l.total_price / ot.lines_total
+                          ELSE 0 END), 2),
+           now()
+    FROM lines l
+    JOIN order_totals ot ON ot.order_id = l.order_id
+    JOIN products p ON p.product_id = l.product_id
+    GROUP BY l.sale_date, l.product_id, p.category_id, p.subcategory_id, p.brand_id
+"""
+
+_ROLLUP_COLUMNS = """
+    sales_daily_rollups (
+        sale_date, product_id, category_id, subcategory_id, brand_id,
+        units_sold, revenue, discount_amount, tax_amount, updated_at
+    )
+"""
+
+
+def refresh_sales_rollups(session: Session) -> Dict[str, int]:
+    """
+    Fold order lines added since the last run into the daily rollups.
+    Progress is tracked by order_detail_id, so lines appended to an existing
+    order are picked up as well.
+    """
+    last_id = lock_watermark(session, SALES_ROLLUP_JOB)
+    max_id = session.execute(
+        text("SELECT COALESCE(MAX(order_detail_id), 0) FROM order_details")
+    ).scalar_one()
+
+    if max_id <= last_id:
+        session.commit()
+        return {"lines_processed": 0, "last_processed_id": last_id}
+
+    lines_processed = session.execute(
+        text("""
+            SELECT COUNT(*) FROM order_details
+            WHERE order_detail_id > :last_id AND order_detail_id <= :max_id
+        """),
+        {"last_id": last_id, "max_id": max_id},
+    ).scalar_one()
+
+    line_filter = "od.order_detail_id > :last_id AND od.order_detail_id <= :max_id"
+    session.execute(
+        text(
+            f"INSERT INTO {_ROLLUP_COLUMNS}"
+            + _ROLLUP_SELECT.format(line_filter=line_filter)
+            + """
+            ON CONFLICT (sale_date, product_id) DO UPDATE SET
+                category_id = EXCLUDED.category_id,
+                subcategory_id = EXCLUDED.subcategory_id,
+                brand_id = EXCLUDED.brand_id,
+                units_sold = sales_daily_rollups.units_sold + EXCLUDED.units_sold,
+                revenue = sales_daily_rollups.revenue + EXCLUDED.revenue,
+                discount_amount = sales_daily_rollups.discount_amount + EXCLUDED.discount_amount,
+                tax_amount = sales_daily_rollups.tax_amount + EXCLUDED.tax_amount,
+                updated_at = EXCLUDED.updated_at
+            """
+        ),
+        {"last_id": last_id, "max_id": max_id},
+    )
+    set_watermark(session, SALES_ROLLUP_JOB, max_id)
+    session.commit()
+    return {"lines_processed": lines_processed, "last_processed_id": max_id}
+
+
+def rebuild_sales_rollups(
+    session: Session,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    commit: bool = True,
+) -> int:
+    """
+    Recompute the rollups for a date range from the raw order lines, e.g.
+    after orders were cancelled or edited. Only lines already covered by the
+    watermark are included so the next incremental run doesn't count them twice.
+    """
+    last_id = lock_watermark(session, SALES_ROLLUP_JOB)
+    params = {"start_date": start_date, "end_date": end_date, "last_id": last_id}
+    session.execute(
+        text("""
+            DELETE FROM sales_daily_rollups
+            WHERE sale_date BETWEEN :start_date AND :end_date
+        """),
+        params,
+    )
+    line_filter = (
+        "od.order_detail_id <= :last_id "
+        "AND o.order_date >= :start_date "
+        "AND o.order_date < CAST(:end_date AS date) + 1"
+    )
+    result = session.execute(
+        text(
+            f"INSERT INTO {_ROLLUP_COLUMNS}"
+            + _ROLLUP_SELECT.format(line_filter=line_filter)
+        ),
+        params,
+    )
+    if commit:
+        session.commit()
+    return result.rowcount
+
+
+# Order line expression matching each report grouping's key
+_ORDER_COUNT_KEYS = {
+    "day": "o.order_date::date",
+    "product": "od.product_id",
+    "category": "p.category_id",
+    "brand": "p.brand_id",
+}
+
+
+def _count_orders(
+    session: Session,
+    *,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    group_by: Optional[str] = None,
+    category_id: Optional[int] = None,
+    brand_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+) -> Dict[Any, int]:
+    """
+    Distinct orders per report key (a single None key without `group_by`),
+    over the same lines the rollups cover: not cancelled, in the date range
+    and up to the rollup watermark.
+    """
+    key = _ORDER_COUNT_KEYS.get(group_by, "NULL")
+    filters = [
+        "o.order_status::text <> 'cancelled'",
+        "o.order_date >= :start_date",
+        "o.order_date < CAST(:end_date AS date) + 1",
+        """od.order_detail_id <= (
+            SELECT COALESCE(MAX(last_processed_id), 0) FROM job_watermarks WHERE job_name = :job_name
+        )""",
+    ]
+    params = {"start_date": start_date, "end_date": end_date, "job_name": SALES_ROLLUP_JOB}
+    for column, value in (("p.category_id", category_id), ("p.brand_id", brand_id), ("od.product_id", product_id)):
+        if value is not None:
+            name = column.split(".")[1]
+            filters.append(f"{column} = :{name}")
+            params[name] = value
+    rows = session.execute(
+        text(f"""
+            SELECT {key} AS key, COUNT(DISTINCT od.order_id) AS order_count
+            FROM order_details od
+            JOIN orders o ON o.order_id = od.order_id
+            JOIN products p ON p.product_id = od.product_id
+            WHERE {" AND ".join(filters)}
+            GROUP BY 1
+        """),
+        params,
+    ).all()
+    return {row.key: row.order_count for row in rows}
+
+
+def get_sales_report(
+    *,
+    session: Session,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    group_by: str = "day",
+    category_id: Optional[int] = None,
+    brand_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    limit: int = 1000,
+) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Answer a date-range sales query from the daily rollups; order counts
+    come from the order lines, as an order spans several rollup rows.
+    """
+    measures = [
+        func.sum(SalesDailyRollup.units_sold).label("units_sold"),
+        func.sum(SalesDailyRollup.revenue).label("revenue"),
+        func.sum(SalesDailyRollup.discount_amount).label("discount_amount"),
+        func.sum(SalesDailyRollup.tax_amount).label("tax_amount"),
+    ]
+
+    if group_by == "product":
+        keys = [SalesDailyRollup.product_id, Product.name.label("name")]
+        query = select(*keys, *measures).join(
+            Product, Product.product_id == SalesDailyRollup.product_id
+        )
+    elif group_by == "category":
+        keys = [SalesDailyRollup.category_id, Category.category_name.label("name")]
+        query = select(*keys, *measures).join(
+            Category, Category.category_id == SalesDailyRollup.category_id, isouter=True
+        )
+    elif group_by == "brand":
+        keys = [SalesDailyRollup.brand_id, Brand.name.label("name")]
+        query = select(*keys, *measures).join(
+            Brand, Brand.brand_id == SalesDailyRollup.brand_id, isouter=True
+        )
+    else:
+        keys = [SalesDailyRollup.sale_date]
+        query = select(*keys, *measures)
+
+    filters = [
+        SalesDailyRollup.sale_date >= start_date,
+        SalesDailyRollup.sale_date <= end_date,
+    ]
+    if category_id is not None:
+        filters.append(SalesDailyRollup.category_id == category_id)
+    if brand_id is not None:
+        filters.append(SalesDailyRollup.brand_id == brand_id)
+    if product_id is not None:
+        filters.append(SalesDailyRollup.product_id == product_id)
+
+    query = query.where(*filters).group_by(*keys)
+    if group_by == "day":
+        query = query.order_by(SalesDailyRollup.sale_date)
+    else:
+        query = query.order_by(func.sum(SalesDailyRollup.revenue).desc())
+
+    rows = [dict(row._mapping) for row in session.exec(query.limit(limit)).all()]
+
+    totals_row = session.exec(select(*measures).where(*filters)).one()
+    totals = {key: value or 0 for key, value in totals_row._mapping.items()}
+
+    scope = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "category_id": category_id,
+        "brand_id": brand_id,
+        "product_id": product_id,
+    }
+    order_counts = _count_orders(session, group_by=group_by, **scope)
+    key_name = keys[0].key
+    for row in rows:
+        row["order_count"] = order_counts.get(row[key_name], 0)
+    totals["order_count"] = _count_orders(session, **scope).get(None, 0)
+    return rows, totals
@@ -0,0 +1,332 @@
+import datetime
+import logging
+import time
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.crud.ar_aging import refresh_ar_aging_summaries
+from app.crud.inventory import refresh_product_availability
+from app.crud.utils import column_type, users_of_orders
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal("0.01")
+
+LineKey = Tuple[int, int]
+
+
+def _claim_pending_returns(session: Session, limit: int, return_ids: Optional[Sequence[int]]) -> List[Any]:
+    # SKIP LOCKED: concurrent runs split the queue instead of processing a return twice
+    return session.execute(
+        text("""
+            SELECT return_id, order_id, product_id, quantity_returned
+            FROM customer_returns
+            WHERE status = 'pending'
+              AND (CAST(:return_ids AS integer[]) IS NULL OR return_id = ANY(:return_ids))
+            ORDER BY return_id
+            LIMIT :limit
+            FOR UPDATE SKIP LOCKED
+        """),
+        {"limit": limit, "return_ids": list(return_ids) if return_ids is not None else None},
+    ).all()
+
+
+def line_refund(line_total: Decimal, quantity_ordered: int, returned_before: int, quantity: int) -> Decimal:
+    """
+    Refund of `quantity` units of an order line at the price actually paid
+    (discounts included). Each return is the difference of the cumulative
+    refunds rounded to cents, so returning a line in parts refunds exactly
+    its total.
+    """
+    def refunded(units: int) -> Decimal:
+        return (line_total * units / quantity_ordered).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+    return refunded(returned_before + quantity) - refunded(returned_before)
+
+
+def _review_returns(session: Session, claimed: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Accept or reject each claimed return against its order line and what was already returned of it"""
+    keys = sorted({(row.order_id, row.product_id) for row in claimed})
+    params = {"order_ids": [key[0] for key in keys], "product_ids": [key[1] for key in keys]}
+    # Returns of the same line claimed by concurrent runs are reviewed one run after the other
+    session.execute(
+        text("""
+            SELECT pg_advisory_xact_lock(hashtextextended('return_line:' || k.order_id || ':' || k.product_id, 0))
+            FROM unnest(CAST(:order_ids AS integer[]), CAST(:product_ids AS integer[])) AS k(order_id, product_id)
+        """),
+        params,
+    )
+    lines = {
+        (row.order_id, row.product_id): row
+        for row in session.execute(
+            text("""
+                SELECT d.order_id, d.product_id, o.order_status::text AS order_status,
+                       SUM(d.quantity) AS quantity, SUM(d.total_price) AS total_price
+                FROM unnest(CAST(:order_ids AS integer[]), CAST(:product_ids AS integer[])) AS k(order_id, product_id)
+                JOIN order_details d ON d.order_id = k.order_id AND d.product_id = k.product_id
+                JOIN orders o ON o.order_id = d.order_id
+                GROUP BY d.order_id, d.product_id, o.order_status
+            """),
+            params,
+        ).all()
+    }
+    returned: Dict[LineKey, int] = defaultdict(int)
+    for row in session.execute(
+        text("""
+            SELECT r.order_id, r.product_id, SUM(r.quantity_returned) AS quantity
+            FROM unnest(CAST(:order_ids AS integer[]), CAST(:product_ids AS integer[])) AS k(order_id, product_id)
+            JOIN customer_returns r ON r.order_id = k.order_id AND r.product_id = k.product_id
+            WHERE r.status = 'processed'
+            GROUP BY r.order_id, r.product_id
+        """),
+        params,
+    ).all():
+        returned[(row.order_id, row.product_id)] = row.quantity
+
+    reviewed = []
+    for row in claimed:
+        key = (row.order_id, row.product_id)
+        line = lines.get(key)
+        reason = None
+        if line is None:
+            reason = f"Product {row.product_id} is not on order {row.order_id}"
+        elif line.order_status == "cancelled":
+            reason = f"Order {row.order_id} is cancelled"
+        elif row.quantity_returned <= 0:
+            reason = "Returned quantity must be positive"
+        elif returned[key] + row.quantity_returned > line.quantity:
+            reason = (
+                f"Only {line.quantity - returned[key]} of the {line.quantity} units ordered "
+                "can still be returned"
+            )
+        if reason:
+            reviewed.append({"return_id": row.return_id, "status": "rejected", "refund": None, "reason": reason})
+            continue
+        refund = line_refund(line.total_price, line.quantity, returned[key], row.quantity_returned)
+        returned[key] += row.quantity_returned
+        reviewed.append({
+            "return_id": row.return_id,
+            "order_id": row.order_id,
+            "product_id": row.product_id,
+            "quantity": row.quantity_returned,
+            "status": "processed",
+            "refund": refund,
+            "reason": None,
+        })
+    return reviewed
+
+
+def restock_returns(session: Session, quantities: Dict[int, int]) -> None:
+    """
+    Put returned units back into stock, all products in one statement: into
+    each product's first inventory row, or a new one if it has none. The
+    rows are locked in id order first, so concurrent restocks queue instead
+    of deadlocking.
+    """
+    if not quantities:
+        return
+    product_ids = sorted(quantities)
+    params = {"product_ids": product_ids, "quantities": [quantities[product_id] for product_id in product_ids]}
+    session.execute(
+        text("""
+            SELECT inventory_id FROM inventory
+            WHERE product_id = ANY(:product_ids)
+            ORDER BY inventory_id
+            FOR UPDATE
+        """),
+        params,
+    )
+    session.execute(
+        text("""
+            WITH returned AS (
+                SELECT * FROM unnest(CAST(:product_ids AS integer[]), CAST(:quantities AS integer[]))
+                    AS r(product_id, quantity)
+            ),
+            target AS (
+                SELECT DISTINCT ON (product_id) inventory_id, product_id
+                FROM inventory
+                WHERE product_id = ANY(:product_ids)
+                ORDER BY product_id, inventory_id
+            ),
+            restocked AS (
+                UPDATE inventory i
+                SET available_quantity = i.available_quantity + r.quantity,
+                    updated_at = now()
+                FROM target t
+                JOIN returned r ON r.product_id = t.product_id
+                WHERE i.inventory_id = t.inventory_id
+                RETURNING i.product_id
+            )
+            INSERT INTO inventory (
+                product_id, available_quantity, reserved_quantity, minimum_stock_level, updated_at
+            )
+            SELECT r.product_id, r.quantity, 0, 0, now()
+            FROM returned r
+            WHERE r.product_id NOT IN (SELECT product_id FROM restocked)
+        """),
+        params,
+    )
+    refresh_product_availability(session, product_ids)
+
+
+def refund_invoices(session: Session, refunds: Dict[int, Decimal]) -> None:
+    """Add refunds to the latest invoice of each order and refresh the customers' aging"""
+    if not refunds:
+        return
+    order_ids = sorted(refunds)
+    session.execute(
+        text("""
+            UPDATE invoice_payments i
+            SET refunded_amount = i.refunded_amount + r.refund
+            FROM unnest(CAST(:order_ids AS integer[]), CAST(:refunds AS numeric[])) AS r(order_id, refund)
+            WHERE i.invoice_id = (
+                SELECT MAX(invoice_id) FROM invoice_payments WHERE order_id = r.order_id
+            )
+        """),
+        {"order_ids": order_ids, "refunds": [refunds[order_id] for order_id in order_ids]},
+    )
+    # Bypasses the ORM, so the aging summaries are refreshed here
+    refresh_ar_aging_summaries(session, users_of_orders(session, order_ids))
+
+
+def _process_claimed(session: Session, claimed: Sequence[Any]) -> Dict[str, Any]:
+    reviewed = _review_returns(session, claimed)
+    status_type = column_type(session, "customer_returns", "status")
+    session.execute(
+        text(f"""
+            UPDATE customer_returns r
+            SET status = CAST(u.status AS {status_type}),
+                refund_amount = COALESCE(u.refund, r.refund_amount),
+                notes = CASE WHEN u.reason IS NULL THEN r.notes ELSE concat_ws(' | ', r.notes, u.reason) END
+            FROM unnest(
+                CAST(:return_ids AS integer[]), CAST(:statuses AS text[]),
+                CAST(:refunds AS numeric[]), CAST(:reasons AS text[])
+            ) AS u(return_id, status, refund, reason)
+            WHERE r.return_id = u.return_id
+        """),
+        {
+            "return_ids": [item["return_id"] for item in reviewed],
+            "statuses": [item["status"] for item in reviewed],
+            "refunds": [item["refund"] for item in reviewed],
+            "reasons": [item["reason"] for item in reviewed],
+        },
+    )
+    processed = [item for item in reviewed if item["status"] == "processed"]
+    quantities: Dict[int, int] = defaultdict(int)
+    refunds: Dict[int, Decimal] = defaultdict(Decimal)
+    for item in processed:
+        quantities[item["product_id"]] += item["quantity"]
+        refunds[item["order_id"]] += item["refund"]
+    restock_returns(session, quantities)
+    refund_invoices(session, refunds)
+    return {
+        "processed": len(processed),
+        "rejected": len(reviewed) - len(processed),
+        "units_restocked": sum(quantities.values()),
+        "refund_total": sum(refunds.values(), Decimal("0.00")),
+    }
+
+
+def process_returns(
+    session: Session,
+    return_ids: Optional[Sequence[int]] = None,
+    batch_size: Optional[int] = None,
+    max_returns: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Process pending returns (all of them, or the given ones), `batch_size`
+    per transaction: each is checked against its order line, accepted ones
+    are restocked, refunded at the line's price and the refund is set
+    against the order's invoice; the rest are rejected with the reason in
+    their notes. Returns counts for the whole run.
+    """
+    batch_size = batch_size or settings.RETURN_BATCH_SIZE
+    start = time.perf_counter()
+    totals: Dict[str, Any] = {"processed": 0, "rejected": 0, "units_restocked": 0, "refund_total": Decimal("0.00")}
+    while max_returns is None or totals["processed"] + totals["rejected"] < max_returns:
+        done = totals["processed"] + totals["rejected"]
+        limit = batch_size if max_returns is None else min(batch_size, max_returns - done)
+        claimed = _claim_pending_returns(session, limit, return_ids)
+        if not claimed:
+            session.rollback()
+            break
+        for name, value in _process_claimed(session, claimed).items():
+            totals[name] += value
+        session.commit()
+        logger.info(f"Processed {totals['processed'] + totals['rejected']} returns so far")
+        if len(claimed) < limit:
+            break
+    return {**totals, "seconds": round(time.perf_counter() - start, 2)}
+
+
+def get_return_metrics(
+    *,
+    session: Session,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """
+    Return rates per product over a period: units of processed returns
+    dated in it against units sold in it (from the daily sales rollups),
+    highest rate first, with the totals of all products.
+    """
+    end_date = end_date or datetime.date.today()
+    start_date = start_date or end_date - datetime.timedelta(days=settings.RETURN_METRICS_WINDOW_DAYS - 1)
+    params = {"start_date": start_date, "end_date": end_date, "limit": limit}
+    totals = session.execute(
+        text("""
+            SELECT (SELECT COALESCE(SUM(units_sold), 0) FROM sales_daily_rollups
+                    WHERE sale_date BETWEEN :start_date AND :end_date) AS units_sold,
+                   COUNT(*) AS returns,
+                   COALESCE(SUM(quantity_returned), 0) AS units_returned,
+                   COALESCE(SUM(refund_amount), 0) AS refund_total
+            FROM customer_returns
+            WHERE status = 'processed' AND return_date BETWEEN :start_date AND :end_date
+        """),
+        params,
+    ).one()
+    rows = session.execute(
+        text("""
+            WITH returned AS (
+                SELECT product_id, COUNT(*) AS returns, SUM(quantity_returned) AS units_returned,
+                       COALESCE(SUM(refund_amount), 0) AS refund_total
+                FROM customer_returns
+                WHERE status = 'processed' AND return_date BETWEEN :start_date AND :end_date
+                GROUP BY product_id
+            ),
+            sold AS (
+                SELECT s.product_id, SUM(s.units_sold) AS units_sold
+                FROM sales_daily_rollups s
+                WHERE s.sale_date BETWEEN :start_date AND :end_date
+                  AND s.product_id IN (SELECT product_id FROM returned)
+                GROUP BY s.product_id
+            )
+            SELECT r.product_id, p.product_code, p.name, COALESCE(s.units_sold, 0) AS units_sold,
+                   r.returns, r.units_returned, r.refund_total,
+                   round(r.units_returned::numeric / NULLIF(s.units_sold, 0), 4) AS return_rate
+            FROM returned r
+            JOIN products p ON p.product_id = r.product_id
+            LEFT JOIN sold s ON s.product_id = r.product_id
+            ORDER BY return_rate DESC NULLS LAST, r.units_returned DESC, r.product_id
+            LIMIT :limit
+        """),
+        params,
+    ).all()
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "units_sold": totals.units_sold,
+        "returns": totals.returns,
+        "units_returned": totals.units_returned,
+        "refund_total": totals.refund_total,
+        "return_rate": (
+            round(Decimal(totals.units_returned) / totals.units_sold, 4) if totals.units_sold else None
+        ),
+        "data": [row._asdict() for row in rows],
+    }
@@ -0,0 +1,207 @@
+import datetime
+import json
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.crud.utils import column_type
+from app.models import ShippingStatus
+
+# Carrier event codes (lowercased) and the shipment status each one means;
+# our own status names are accepted as well
+CARRIER_STATUSES = {
+    **{status.value: status.value for status in ShippingStatus},
+    "label_created": ShippingStatus.processing.value,
+    "pre_transit": ShippingStatus.processing.value,
+    "picked_up": ShippingStatus.shipped.value,
+    "accepted": ShippingStatus.shipped.value,
+    "departed": ShippingStatus.in_transit.value,
+    "arrived_at_facility": ShippingStatus.in_transit.value,
+    "out_for_delivery": ShippingStatus.in_transit.value,
+    "exception": ShippingStatus.failed.value,
+    "delivery_failed": ShippingStatus.failed.value,
+    "returned_to_sender": ShippingStatus.failed.value,
+}
+
+# Status a shipment may move to from each status. Delivered is final; a
+# failed delivery can be attempted again
+SHIPPING_TRANSITIONS = {
+    "processing": ("shipped", "in_transit", "delivered", "failed"),
+    "shipped": ("in_transit", "delivered", "failed"),
+    "in_transit": ("delivered", "failed"),
+    "failed": ("in_transit", "delivered"),
+    "delivered": (),
+}
+
+MAX_REPORTED_ERRORS = 100
+
+
+class TrackingUpdate(NamedTuple):
+    tracking_number: str
+    status: str
+    event_time: datetime.datetime
+    receiver_name: Optional[str] = None
+
+
+def _parse_tracking_line(line: bytes, received_at: datetime.datetime) -> TrackingUpdate:
+    event = json.loads(line)
+    if not isinstance(event, dict):
+        raise ValueError("expected a JSON object")
+    tracking_number = str(event.get("tracking_number") or "").strip()
+    if not tracking_number:
+        raise ValueError("missing tracking_number")
+    carrier_status = str(event.get("status") or "").strip().lower().replace(" ", "_").replace("-", "_")
+    if carrier_status not in CARRIER_STATUSES:
+        raise ValueError(f"unknown status '{event.get('status')}'")
+    event_time = received_at
+    if event.get("event_time"):
+        event_time = datetime.datetime.fromisoformat(str(event["event_time"]).replace("Z", "+00:00"))
+        # Naive and aware times are compared, so times are kept naive UTC
+        if event_time.tzinfo is not None:
+            event_time = event_time.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return TrackingUpdate(
+        tracking_number=tracking_number,
+        status=CARRIER_STATUSES[carrier_status],
+        event_time=event_time,
+        receiver_name=event.get("receiver_name") or None,
+    )
+
+
+def parse_tracking_feed(
+    feed: bytes | Iterable[bytes], received_at: Optional[datetime.datetime] = None
+) -> Tuple[int, Dict[str, TrackingUpdate], List[Dict[str, Any]]]:
+    """
+    Parse an NDJSON carrier feed, one tracking event per line. Carriers send
+    events late and out of order, so only the latest event of each tracking
+    number is kept (the last line wins a tie). Returns the number of lines,
+    the latest update per tracking number and the lines that were rejected.
+    """
+    received_at = received_at or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    lines = feed.splitlines() if isinstance(feed, bytes) else feed
+    latest: Dict[str, TrackingUpdate] = {}
+    errors: List[Dict[str, Any]] = []
+    count = 0
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        count += 1
+        try:
+            update = _parse_tracking_line(line, received_at)
+        except (ValueError, TypeError) as e:
+            errors.append({"line": line_number, "error": str(e)})
+            continue
+        current = latest.get(update.tracking_number)
+        if current is None or update.event_time >= current.event_time:
+            latest[update.tracking_number] = update
+    return count, latest, errors
+
+
+def cascade_delivered_orders(session: Session, order_ids: Iterable[int]) -> List[int]:
+    """
+    Mark orders delivered once every one of their shipments is, dated by the
+    last delivery. Cancelled orders are left alone. Returns the orders updated.
+    """
+    order_ids = sorted(set(order_ids))
+    if not order_ids:
+        return []
+    return session.execute(
+        text("""
+            UPDATE orders o
+            SET order_status = 'delivered',
+                delivery_date = COALESCE(d.delivered_on, o.delivery_date)
+            FROM (
+                SELECT order_id, MAX(actual_delivery_date) AS delivered_on
+                FROM shipping_deliveries
+                WHERE order_id = ANY(:order_ids)
+                GROUP BY order_id
+                HAVING bool_and(shipping_status::text = 'delivered')
+            ) d
+            WHERE o.order_id = d.order_id
+              AND o.order_status::text NOT IN ('delivered', 'cancelled')
+            RETURNING o.order_id
+        """),
+        {"order_ids": order_ids},
+    ).scalars().all()
+
+
+def apply_tracking_updates(session: Session, updates: Dict[str, TrackingUpdate]) -> Dict[str, int]:
+    """
+    Apply the latest status of each tracking number to its shipments in one
+    UPDATE, skipping moves SHIPPING_TRANSITIONS doesn't allow (including
+    stale events), then cascade delivered shipments to their orders. The
+    shipments are locked in id order first, so overlapping feeds queue
+    instead of deadlocking. Does not commit.
+    """
+    if not updates:
+        return {"shipments_matched": 0, "shipments_updated": 0, "unknown_tracking_numbers": 0, "orders_delivered": 0}
+    tracking_numbers = sorted(updates)
+    matched = session.execute(
+        text("""
+            SELECT shipping_id, tracking_number FROM shipping_deliveries
+            WHERE tracking_number = ANY(:tracking_numbers)
+            ORDER BY shipping_id
+            FOR UPDATE
+        """),
+        {"tracking_numbers": tracking_numbers},
+    ).all()
+    known = {row.tracking_number for row in matched}
+
+    transitions = [(before, after) for before, afters in SHIPPING_TRANSITIONS.items() for after in afters]
+    status_type = column_type(session, "shipping_deliveries", "shipping_status")
+    updated = session.execute(
+        text(f"""
+            UPDATE shipping_deliveries s
+            SET shipping_status = CAST(u.status AS {status_type}),
+                shipping_date = COALESCE(
+                    s.shipping_date, CASE WHEN u.status <> 'processing' THEN u.event_date END
+                ),
+                actual_delivery_date = CASE
+                    WHEN u.status = 'delivered' THEN u.event_date ELSE s.actual_delivery_date
+                END,
+                receiver_name = COALESCE(u.receiver_name, s.receiver_name)
+            FROM unnest(
+                CAST(:tracking_numbers AS varchar[]), CAST(:statuses AS text[]),
+                CAST(:event_dates AS date[]), CAST(:receiver_names AS varchar[])
+            ) AS u(tracking_number, status, event_date, receiver_name)
+            JOIN unnest(CAST(:from_statuses AS text[]), CAST(:to_statuses AS text[])) AS t(from_status, to_status)
+              ON t.to_status = u.status
+            WHERE s.tracking_number = u.tracking_number
+              AND s.shipping_status::text = t.from_status
+            RETURNING s.order_id, u.status
+        """),
+        {
+            "tracking_numbers": tracking_numbers,
+            "statuses": [updates[number].status for number in tracking_numbers],
+            "event_dates": [updates[number].event_time.date() for number in tracking_numbers],
+            "receiver_names": [updates[number].receiver_name for number in tracking_numbers],
+            "from_statuses": [before for before, _ in transitions],
+            "to_statuses": [after for _, after in transitions],
+        },
+    ).all()
+    delivered_orders = cascade_delivered_orders(
+        session, [row.order_id for row in updated if row.status == ShippingStatus.delivered.value]
+    )
+    return {
+        "shipments_matched": len(matched),
+        "shipments_updated": len(updated),
+        "unknown_tracking_numbers": len(updates) - len(known),
+        "orders_delivered": len(delivered_orders),
+    }
+
+
+def ingest_tracking_feed(session: Session, feed: bytes | Iterable[bytes]) -> Dict[str, Any]:
+    """Parse a carrier NDJSON feed and apply it in one transaction; returns counts and rejected lines"""
+    start = time.perf_counter()
+    lines, updates, errors = parse_tracking_feed(feed)
+    result = apply_tracking_updates(session, updates)
+    session.commit()
+    return {
+        "lines": lines,
+        "tracking_numbers": len(updates),
+        **result,
+        "rejected_lines": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+        "seconds": round(time.perf_counter() - start, 3),
+    }
@@ -1,6 +1,7 @@
 from typing import List, Optional
 from sqlmodel import Session, select
-from app.models import ShippingDelivery, ShippingDeliveryCreate
+from app.models import ShippingDelivery, ShippingDeliveryCreate, ShippingStatus
+from app.crud.shipment_tracking import cascade_delivered_orders
 
 def get_shipping_delivery_by_id(session: Session, shipping_id: int) -> Optional[ShippingDelivery]:
     return session.get(ShippingDelivery, shipping_id)
@@ -20,6 +21,9 @@ def update_shipping_delivery(session: Session, db_obj: ShippingDelivery, obj_in:
     for key, value in obj_data.items():
         setattr(db_obj, key, value)
     session.add(db_obj)
+    if db_obj.shipping_status == ShippingStatus.delivered:
+        session.flush()
+        cascade_delivered_orders(session, [db_obj.order_id])
     session.commit()
     session.refresh(db_obj)
     return db_obj
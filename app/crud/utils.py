@@ -0,0 +1,157 @@
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session
+
+
+def lock_watermark(session: Session, job_name: str) -> int:
+    """Return the job watermark, holding a row lock until the transaction ends"""
+    session.execute(
+        text("""
+            INSERT INTO job_watermarks (job_name, last_processed_id, updated_at)
+            VALUES (:job_name, 0, now())
+            ON CONFLICT (job_name) DO NOTHING
+        """),
+        {"job_name": job_name},
+    )
+    return session.execute(
+        text("""
+            SELECT last_processed_id FROM job_watermarks
+            WHERE job_name = :job_name
+            FOR UPDATE
+        """),
+        {"job_name": job_name},
+    ).scalar_one()
+
+
+def set_watermark(session: Session, job_name: str, last_processed_id: int) -> None:
+    session.execute(
+        text("""
+            UPDATE job_watermarks
+            SET last_processed_id = :last_id, updated_at = now()
+            WHERE job_name = :job_name
+        """),
+        {"job_name": job_name, "last_id": last_processed_id},
+    )
+
+
+def previous_values(target: Any, names: Iterable[str]) -> Dict[str, Any]:
+    """Attributes of an object being flushed as they were before the change"""
+    state = inspect(target)
+    previous = {}
+    for name in names:
+        history = state.attrs[name].history
+        previous[name] = history.deleted[0] if history.deleted else getattr(target, name)
+    return previous
+
+
+def users_of_orders(connection: Connection | Session, order_ids: Iterable[Optional[int]]) -> List[int]:
+    """Users who placed the given orders"""
+    order_ids = sorted({order_id for order_id in order_ids if order_id is not None})
+    if not order_ids:
+        return []
+    return connection.execute(
+        text("SELECT DISTINCT user_id FROM orders WHERE order_id = ANY(:order_ids)"),
+        {"order_ids": order_ids},
+    ).scalars().all()
+
+
+def column_type(connection: Connection | Session, table: str, column: str) -> str:
+    """The enum type when the schema comes from the migrations, varchar when it comes from database.sql"""
+    return connection.execute(
+        text("""
+            SELECT udt_name FROM information_schema.columns
+            WHERE table_name = :table AND column_name = :column
+        """),
+        {"table": table, "column": column},
+    ).scalar_one()
+
+
+# (day, product_id, machine_id) of per-day production stats, machine_id 0
+# for batches without a machine
+DailyKey = Tuple[datetime.date, int, int]
+
+
+def date_range_filter(column: str) -> str:
+    """SQL condition of `column` being within the optional :start_date and :end_date"""
+    return (
+        f"(CAST(:start_date AS date) IS NULL OR {column} >= :start_date) "
+        f"AND (CAST(:end_date AS date) IS NULL OR {column} <= :end_date)"
+    )
+
+
+def refresh_daily_rows(
+    connection: Connection | Session,
+    keys: Iterable[DailyKey],
+    *,
+    date_column: str,
+    lock_name: str,
+    inserts: Dict[str, str],
+) -> None:
+    """
+    Recompute the rows of the given keys in each table of `inserts`, which
+    maps tables to the INSERT ... SELECT of their rows; it reads the keys
+    from a `keys` relation of (date_column, product_id, machine_id). Keys
+    are locked first, so concurrent writers to the same key recompute one
+    after the other and the last sees both writes.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    params = {
+        "dates": [key[0] for key in keys],
+        "product_ids": [key[1] for key in keys],
+        "machine_ids": [key[2] for key in keys],
+    }
+    with_keys = f"""
+        WITH keys AS (
+            SELECT * FROM unnest(
+                CAST(:dates AS date[]), CAST(:product_ids AS integer[]), CAST(:machine_ids AS integer[])
+            ) AS k({date_column}, product_id, machine_id)
+        )
+    """
+    connection.execute(
+        text(with_keys + f"""
+            SELECT pg_advisory_xact_lock(hashtextextended(
+                '{lock_name}:' || {date_column} || ':' || product_id || ':' || machine_id, 0
+            ))
+            FROM keys
+        """),
+        params,
+    )
+    for table, insert in inserts.items():
+        connection.execute(
+            text(with_keys + f"""
+                DELETE FROM {table} t
+                USING keys k
+                WHERE t.{date_column} = k.{date_column}
+                  AND t.product_id = k.product_id
+                  AND t.machine_id = k.machine_id
+            """),
+            params,
+        )
+        connection.execute(text(with_keys + insert), params)
+
+
+def rebuild_daily_rows(
+    session: Session,
+    start_date: Optional[datetime.date],
+    end_date: Optional[datetime.date],
+    *,
+    date_column: str,
+    inserts: Dict[str, str],
+) -> Dict[str, int]:
+    """
+    Recompute the rows of a date range (all dates when both ends are None)
+    in each table of `inserts`, mapping tables to the INSERT ... SELECT of
+    their rows filtered with date_range_filter. Returns the rows inserted
+    per table.
+    """
+    params = {"start_date": start_date, "end_date": end_date}
+    inserted = {}
+    for table, insert in inserts.items():
+        session.execute(text(f"DELETE FROM {table} WHERE " + date_range_filter(date_column)), params)
+        inserted[table] = session.execute(text(insert), params).rowcount
+    return inserted
@@ -0,0 +1,60 @@
+import argparse
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.crud.ar_aging import refresh_ar_aging
+from app.crud.association import rebuild_bought_together, refresh_bought_together
+from app.crud.attribute import rebuild_product_attribute_values
+from app.crud.inventory import compute_reorder_suggestions
+from app.crud.invoicing import generate_invoices
+from app.crud.maintenance import refresh_maintenance_schedules
+from app.crud.manufacturing import rebuild_manufacturing_aggregates
+from app.crud.product import refresh_category_facet_snapshots
+from app.crud.quality_analytics import rebuild_quality_stats
+from app.crud.recommendation import compute_product_similarities
+from app.crud.return_processing import process_returns
+from app.crud.report import refresh_sales_rollups
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Scheduled jobs, meant to be run from cron (or any scheduler), e.g.
+#   */15 * * * * python app/jobs.py sales-rollup
+JOBS: dict[str, Callable[[Session], Any]] = {
+    "ar-aging": refresh_ar_aging,
+    "attribute-index": rebuild_product_attribute_values,
+    "bought-together": refresh_bought_together,
+    "bought-together-rebuild": rebuild_bought_together,
+    "facet-snapshots": refresh_category_facet_snapshots,
+    "invoices": generate_invoices,
+    "maintenance-schedule": refresh_maintenance_schedules,
+    "manufacturing-rebuild": rebuild_manufacturing_aggregates,
+    "product-similarity": compute_product_similarities,
+    "quality-stats-rebuild": rebuild_quality_stats,
+    "reorder": compute_reorder_suggestions,
+    "returns": process_returns,
+    "sales-rollup": refresh_sales_rollups,
+}
+
+
+def run(job_name: str) -> None:
+    with Session(engine) as session:
+        result = JOBS[job_name](session)
+    logger.info(f"Job {job_name} finished: {result}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a scheduled background job")
+    parser.add_argument("jobs", nargs="+", choices=sorted(JOBS))
+    args = parser.parse_args()
+    for job_name in args.jobs:
+        logger.info(f"Running job {job_name}")
+        run(job_name)
+
+
+if __name__ == "__main__":
+    main()
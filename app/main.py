@@ -1,23 +1,49 @@
-import sentry_sdk
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
 from app.core.config import settings
+from app.core.db import ReadYourWritesMiddleware, dispose_engine, get_engine
+from app.core.metrics import MetricsMiddleware, metrics_endpoint
+from app.core.slow_query import SlowQueryRouteMiddleware
+from app.utils import init_email
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
-if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
-    sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
+def init_services() -> None:
+    """Create the database engine, the Sentry client and the email client"""
+    if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
+        import sentry_sdk
+
+        sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
+    get_engine()
+    if settings.emails_enabled:
+        init_email()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if settings.LAZY_INIT:
+        init_services()
+    yield
+    dispose_engine()
+
+
+if not settings.LAZY_INIT:
+    init_services()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -30,4 +56,21 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+# Clients that just wrote read from the primary instead of a lagging replica
+if settings.POSTGRES_REPLICA_SERVERS:
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=settings.REPLICA_STICKY_SECONDS)
+
+# Slow queries are logged with the route that ran them
+if settings.SLOW_QUERY_LOG_ENABLED:
+    app.add_middleware(SlowQueryRouteMiddleware)
+
+# Per-route latency and SQL metrics, scraped from /metrics
+if settings.metrics_enabled:
+    app.add_middleware(
+        MetricsMiddleware,
+        server_timing=settings.ENVIRONMENT != "production",
+        exclude_paths=("/metrics",),
+    )
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -5,7 +5,7 @@ from typing import List, Optional
 import uuid
 
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import Column
+from sqlalchemy import Column, Index, UniqueConstraint, text
 from sqlmodel import Enum, Field, Relationship, SQLModel
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -66,6 +66,11 @@ class ShippingStatus(PyEnum):
     delivered = "delivered"
     failed = "failed"
 
+class AttributeValueType(PyEnum):
+    string = "string"
+    number = "number"
+    boolean = "boolean"
+
 class ReturnStatus(PyEnum):
     pending = "pending"
     processed = "processed"
@@ -330,6 +335,14 @@ class ProductCreate(ProductBase):
 
 class Product(ProductBase, table=True):
     __tablename__ = "products"
+    __table_args__ = (
+        Index(
+            "ix_products_attributes",
+            "attributes",
+            postgresql_using="gin",
+            postgresql_ops={"attributes": "jsonb_path_ops"},
+        ),
+    )
     product_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
     updated_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
@@ -343,6 +356,89 @@ class Product(ProductBase, table=True):
     )
 
 
+# --- Attribute Registry Models ---
+class CategoryAttributeBase(SQLModel):
+    attribute_key: str = Field(max_length=100)
+    display_name: Optional[str] = Field(default=None, max_length=100)
+    value_type: AttributeValueType = Field(default=AttributeValueType.string)
+    unit: Optional[str] = Field(default=None, max_length=20)
+    is_filterable: bool = True
+    display_order: int = 0
+
+
+class CategoryAttributeCreate(CategoryAttributeBase):
+    pass
+
+
+class CategoryAttribute(CategoryAttributeBase, table=True):
+    __tablename__ = "category_attributes"
+    __table_args__ = (UniqueConstraint("category_id", "attribute_key"),)
+    category_attribute_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    category_id: int = Field(foreign_key="categories.category_id", index=True)
+
+
+# One row per (product, attribute, value); list-valued attributes expand to several rows
+class ProductAttributeValue(SQLModel, table=True):
+    __tablename__ = "product_attribute_values"
+    __table_args__ = (
+        Index("ix_product_attribute_values_key_value", "key", "value"),
+        Index("ix_product_attribute_values_key_numeric", "key", "value_numeric"),
+    )
+    product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+    key: str = Field(primary_key=True, max_length=100)
+    value: str = Field(primary_key=True)
+    value_numeric: Optional[Decimal] = None
+
+
+# Precomputed filter values for browsing a single category. A snapshot is
+# current while computed_generation == generation; product writes bump generation.
+class CategoryFacetSnapshot(SQLModel, table=True):
+    __tablename__ = "category_facet_snapshots"
+    category_id: int = Field(primary_key=True, foreign_key="categories.category_id")
+    filter_values: Optional[dict] = Field(default=None, sa_column=Column(JSONB))
+    product_count: int = 0
+    generation: int = 0
+    computed_generation: int = -1
+    computed_at: Optional[datetime.datetime] = None
+
+
+# Top-N similar products per product, precomputed by the product-similarity job
+class ProductSimilarity(SQLModel, table=True):
+    __tablename__ = "product_similarities"
+    product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+    rank: int = Field(primary_key=True)
+    similar_product_id: int = Field(foreign_key="products.product_id")
+    score: float
+    computed_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+
+# Order counts behind the frequently-bought-together associations, kept by
+# the bought-together job. Pairs are stored once, with product_id < other_product_id.
+class ProductOrderCount(SQLModel, table=True):
+    __tablename__ = "product_order_counts"
+    product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+    order_count: int = 0
+
+
+class ProductPairCount(SQLModel, table=True):
+    __tablename__ = "product_pair_counts"
+    product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+    other_product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+    order_count: int = 0
+
+
+class ProductAssociation(SQLModel, table=True):
+    __tablename__ = "product_associations"
+    product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+    rank: int = Field(primary_key=True)
+    associated_product_id: int = Field(foreign_key="products.product_id")
+    pair_orders: int
+    support: float
+    confidence: float
+    lift: float
+    computed_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+
 # --- Suppliers Models ---
 class SupplierBase(SQLModel):
     supplier_name: str = Field(max_length=100)
@@ -391,6 +487,24 @@ class Inventory(InventoryBase, table=True):
     updated_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
 
 
+# Stock of each product summed over all its warehouses, maintained on inventory writes
+class ProductAvailability(SQLModel, table=True):
+    __tablename__ = "product_availability"
+    __table_args__ = (
+        Index(
+            "ix_product_availability_in_stock",
+            "product_id",
+            postgresql_where=text("net_available > 0"),
+        ),
+    )
+    product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+    available_quantity: int = 0
+    reserved_quantity: int = 0
+    net_available: int = 0
+    warehouse_count: int = 0
+    updated_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+
 # --- Promotions Models ---
 class PromotionBase(BaseModelWithConfig):
     product_id: Optional[int] = Field(default=None, foreign_key="product.product_id")
@@ -438,6 +552,9 @@ class OrderCreate(OrderBase):
 
 class Order(OrderBase, table=True):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_user_id", "user_id"),
+    )
     order_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
     order_date: datetime.datetime = Field(default_factory=datetime.datetime.now)
 
@@ -486,6 +603,75 @@ class RawMaterialInventory(RawMaterialInventoryBase, table=True):
     updated_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
 
 
+# A received lot of a raw material. The material's quantity_available and
+# expiration_date are kept as the sum and earliest expiry of its open lots
+# by app.crud.raw_material_lot, which also allocates lots first-expiry-first-out
+class RawMaterialLotBase(SQLModel):
+    lot_number: Optional[str] = Field(default=None, max_length=50)
+    quantity_received: Decimal = Field(max_digits=14, decimal_places=4, gt=0)
+    cost_per_unit: Optional[Decimal] = Field(default=None, max_digits=14, decimal_places=4)
+    received_date: datetime.date = Field(default_factory=datetime.date.today)
+    expiration_date: Optional[datetime.date] = None
+
+
+class RawMaterialLotCreate(RawMaterialLotBase):
+    pass
+
+
+class RawMaterialLot(RawMaterialLotBase, table=True):
+    __tablename__ = "raw_material_lots"
+    __table_args__ = (
+        Index(
+            "ix_raw_material_lots_type_expiration", "material_type", "expiration_date",
+            postgresql_where=text("quantity_remaining > 0"),
+        ),
+        Index(
+            "ix_raw_material_lots_open_expiration", "expiration_date",
+            postgresql_where=text("quantity_remaining > 0"),
+        ),
+        Index("ix_raw_material_lots_material_expiration", "material_id", "expiration_date"),
+    )
+    lot_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    material_id: int = Field(foreign_key="raw_material_inventories.material_id")
+    # Copied from the material so expiring lots can be read by type off one index
+    material_type: str = Field(max_length=50)
+    quantity_remaining: Decimal = Field(max_digits=14, decimal_places=4)
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+
+# --- Bill of Materials Models ---
+# Raw material needed per unit of a product
+class BillOfMaterialsLineBase(SQLModel):
+    material_id: int = Field(primary_key=True, foreign_key="raw_material_inventories.material_id")
+    quantity_per_unit: Decimal = Field(max_digits=14, decimal_places=4, gt=0)
+
+
+class BillOfMaterialsLine(BillOfMaterialsLineBase, table=True):
+    __tablename__ = "bill_of_materials"
+    __table_args__ = (
+        Index("ix_bill_of_materials_product_id", "product_id"),
+    )
+    product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+
+
+# Raw material consumed by a production batch, from its product's bill of
+# materials when the batch was created
+class ProductionBatchMaterial(SQLModel, table=True):
+    __tablename__ = "production_batch_materials"
+    batch_id: int = Field(primary_key=True, foreign_key="production_batches.batch_id")
+    material_id: int = Field(primary_key=True, foreign_key="raw_material_inventories.material_id", index=True)
+    quantity: Decimal = Field(max_digits=14, decimal_places=4)
+
+
+# Raw material lots a production batch consumed, and how much of each; its
+# cost is priced from them
+class ProductionBatchLot(SQLModel, table=True):
+    __tablename__ = "production_batch_lots"
+    batch_id: int = Field(primary_key=True, foreign_key="production_batches.batch_id")
+    lot_id: int = Field(primary_key=True, foreign_key="raw_material_lots.lot_id", index=True)
+    quantity: Decimal = Field(max_digits=14, decimal_places=4)
+
+
 # --- Manufacturing Machines Models ---
 class ManufacturingMachineBase(BaseModelWithConfig):
     machine_name: str = Field(max_length=100)
@@ -505,6 +691,10 @@ class ManufacturingMachineCreate(ManufacturingMachineBase):
 class ManufacturingMachine(ManufacturingMachineBase, table=True):
     __tablename__ = "manufacturing_machines"
     machine_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    # Parsed from maintenance_schedule by app.crud.maintenance on every save
+    maintenance_interval_months: Optional[int] = None
+    maintenance_interval_days: Optional[int] = None
+    next_maintenance_date: Optional[datetime.date] = Field(default=None, index=True)
 
 
 # --- Production Batches Models ---
@@ -526,6 +716,9 @@ class ProductionBatchCreate(ProductionBatchBase):
 
 class ProductionBatch(ProductionBatchBase, table=True):
     __tablename__ = "production_batches"
+    __table_args__ = (
+        Index("ix_production_batches_date_product", "production_date", "product_id"),
+    )
     batch_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
 
@@ -549,6 +742,10 @@ class QualityControlCreate(QualityControlBase):
 
 class QualityControl(QualityControlBase, table=True):
     __tablename__ = "quality_controls"
+    __table_args__ = (
+        Index("ix_quality_controls_batch_id", "batch_id"),
+        Index("ix_quality_controls_check_date", "check_date"),
+    )
     quality_check_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
 
 
@@ -572,7 +769,56 @@ class InvoicePaymentCreate(InvoicePaymentBase):
 
 class InvoicePayment(InvoicePaymentBase, table=True):
     __tablename__ = "invoice_payments"
+    __table_args__ = (
+        Index("ix_invoice_payments_order_id", "order_id"),
+        # Open invoices by due date: overdue transitions and aging bucket moves
+        Index(
+            "ix_invoice_payments_open_due_date", "due_date",
+            postgresql_where=text("payment_status <> 'paid'"),
+        ),
+    )
     invoice_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    # Refunds of processed customer returns on the invoiced order
+    refunded_amount: Decimal = Field(default=Decimal("0.00"), max_digits=10, decimal_places=2)
+
+
+# Last invoice number handed out per series (prefix and year). Numbers are
+# taken by updating the row, so they stay gap-free: the row lock serializes
+# allocators and a rolled back invoice run gives its numbers back
+class InvoiceSequence(SQLModel, table=True):
+    __tablename__ = "invoice_sequences"
+    series: str = Field(primary_key=True, max_length=30)
+    last_number: int = 0
+
+
+# Rendered HTML of an invoice, written by the invoicing pipeline
+class InvoiceDocument(SQLModel, table=True):
+    __tablename__ = "invoice_documents"
+    invoice_id: int = Field(primary_key=True, foreign_key="invoice_payments.invoice_id")
+    html: str
+    rendered_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+
+# Accounts receivable of a customer or distributor: unpaid invoices by days
+# past due and orders not invoiced yet. Kept in step with order and invoice
+# writes by app.crud.ar_aging, which moves invoices between buckets daily
+class ArAgingSummaryBase(SQLModel):
+    user_id: int = Field(primary_key=True, foreign_key="users.user_id")
+    current_amount: Decimal = Field(default=Decimal("0.00"), max_digits=14, decimal_places=2)
+    days_1_30: Decimal = Field(default=Decimal("0.00"), max_digits=14, decimal_places=2)
+    days_31_60: Decimal = Field(default=Decimal("0.00"), max_digits=14, decimal_places=2)
+    days_61_90: Decimal = Field(default=Decimal("0.00"), max_digits=14, decimal_places=2)
+    days_over_90: Decimal = Field(default=Decimal("0.00"), max_digits=14, decimal_places=2)
+    total_outstanding: Decimal = Field(default=Decimal("0.00"), max_digits=14, decimal_places=2)
+    uninvoiced_amount: Decimal = Field(default=Decimal("0.00"), max_digits=14, decimal_places=2)
+    open_invoices: int = 0
+    overdue_invoices: int = 0
+    oldest_due_date: Optional[datetime.date] = None
+
+
+class ArAgingSummary(ArAgingSummaryBase, table=True):
+    __tablename__ = "ar_aging_summaries"
+    updated_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
 
 
 # --- Shipping and Delivery Models ---
@@ -595,6 +841,10 @@ class ShippingDeliveryCreate(ShippingDeliveryBase):
 
 class ShippingDelivery(ShippingDeliveryBase, table=True):
     __tablename__ = "shipping_deliveries"
+    __table_args__ = (
+        Index("ix_shipping_deliveries_tracking_number", "tracking_number"),
+        Index("ix_shipping_deliveries_order_id", "order_id"),
+    )
     shipping_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
 
 
@@ -637,4 +887,113 @@ class CustomerReturnCreate(CustomerReturnBase):
 
 class CustomerReturn(CustomerReturnBase, table=True):
     __tablename__ = "customer_returns"
-    return_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
\ No newline at end of file
+    __table_args__ = (
+        Index("ix_customer_returns_order_product", "order_id", "product_id"),
+        Index("ix_customer_returns_return_date", "return_date"),
+        # Queue of returns waiting to be processed
+        Index("ix_customer_returns_pending", "return_id", postgresql_where=text("status = 'pending'")),
+    )
+    return_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+
+# --- Job Watermarks ---
+class JobWatermark(SQLModel, table=True):
+    __tablename__ = "job_watermarks"
+    job_name: str = Field(primary_key=True, max_length=50)
+    last_processed_id: int = 0
+    updated_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+
+# --- Sales Reporting Models ---
+class SalesDailyRollupBase(SQLModel):
+    sale_date: datetime.date = Field(primary_key=True)
+    product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+    category_id: Optional[int] = Field(default=None, index=True)
+    subcategory_id: Optional[int] = Field(default=None)
+    brand_id: Optional[int] = Field(default=None, index=True)
+    units_sold: int = 0
+    revenue: Decimal = Field(default=Decimal("0.00"), max_digits=14, decimal_places=2)
+    discount_amount: Decimal = Field(default=Decimal("0.00"), max_digits=14, decimal_places=2)
+    tax_amount: Decimal = Field(default=Decimal("0.00"), max_digits=14, decimal_places=2)
+
+
+class SalesDailyRollup(SalesDailyRollupBase, table=True):
+    __tablename__ = "sales_daily_rollups"
+    updated_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+
+# --- Manufacturing Reporting Models ---
+# One row per production day, product and machine (0 for batches without a
+# machine), maintained on production batch and quality control writes
+class ManufacturingDailyAggregateBase(SQLModel):
+    production_date: datetime.date = Field(primary_key=True)
+    product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+    machine_id: int = Field(primary_key=True, index=True)
+    batch_count: int = 0
+    quantity_produced: int = 0
+    production_cost: Decimal = Field(default=Decimal("0.00"), max_digits=14, decimal_places=2)
+    costed_quantity: int = 0
+    qc_checks: int = 0
+    qc_passed: int = 0
+
+
+class ManufacturingDailyAggregate(ManufacturingDailyAggregateBase, table=True):
+    __tablename__ = "manufacturing_daily_aggregates"
+    updated_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+
+# Quality-control inspections counted per (check_date, product_id, machine_id),
+# machine_id 0 for batches without a machine; kept in step with every ORM
+# write by app.crud.quality_analytics and the source of the QC analytics
+class QualityControlDailyStatBase(SQLModel):
+    check_date: datetime.date = Field(primary_key=True)
+    product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+    machine_id: int = Field(primary_key=True, index=True)
+    checks: int = 0
+    passed: int = 0
+    pressure_failed: int = 0
+    dimensional_failed: int = 0
+    visual_failed: int = 0
+
+
+class QualityControlDailyStat(QualityControlDailyStatBase, table=True):
+    __tablename__ = "quality_control_daily_stats"
+    __table_args__ = (
+        Index("ix_quality_control_daily_stats_product_date", "product_id", "check_date"),
+    )
+    updated_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+
+class QualityControlFailureReason(SQLModel, table=True):
+    __tablename__ = "quality_control_failure_reasons"
+    check_date: datetime.date = Field(primary_key=True)
+    product_id: int = Field(primary_key=True, foreign_key="products.product_id")
+    machine_id: int = Field(primary_key=True, index=True)
+    reason: str = Field(primary_key=True, max_length=255)
+    failures: int = 0
+
+
+# --- Reorder Suggestions Models ---
+class ReorderItemType(PyEnum):
+    product = "product"
+    raw_material = "raw_material"
+
+class ReorderSuggestionBase(SQLModel):
+    item_type: ReorderItemType
+    item_id: int
+    item_name: Optional[str] = Field(default=None, max_length=100)
+    warehouse_id: Optional[int] = Field(default=None, index=True)
+    location: Optional[str] = Field(default=None, max_length=50)
+    supplier_id: Optional[int] = None
+    current_stock: Decimal = Field(max_digits=14, decimal_places=3)
+    minimum_stock_level: Decimal = Field(max_digits=14, decimal_places=3)
+    maximum_stock_level: Optional[Decimal] = Field(default=None, max_digits=14, decimal_places=3)
+    daily_velocity: Decimal = Field(default=Decimal("0"), max_digits=14, decimal_places=3)
+    lead_time_days: int
+    reorder_point: Decimal = Field(max_digits=14, decimal_places=3)
+    suggested_quantity: Decimal = Field(max_digits=14, decimal_places=3)
+
+
+class ReorderSuggestion(ReorderSuggestionBase, table=True):
+    __tablename__ = "reorder_suggestions"
+    suggestion_id: int = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    computed_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
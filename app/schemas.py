@@ -1,4 +1,4 @@
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, Dict, List, Union
 from decimal import Decimal
 import datetime
 from sqlmodel import SQLModel
@@ -8,7 +8,10 @@ from .models import (
     TechnicalSpecificationBase,
     PromotionBase,
     BrandBase,
-    PromotionType
+    ManufacturingStatus,
+    ProductStatus,
+    PromotionType,
+    ArAgingSummaryBase
 )
 
 class ProductQuickSearchView(SQLModel):
@@ -28,6 +31,7 @@ class ProductListView(ProductBase):
     brand_name: Optional[str] = None
     category_name: Optional[str] = None
     parent_category_name: Optional[str] = None
+    available_stock: Optional[int] = None
 
 class PaginatedUsersRequest(SQLModel):
     search: Optional[str] = None
@@ -37,6 +41,10 @@ class PaginatedUsersRequest(SQLModel):
     size: int = 10
     role: Optional[str] = None
 
+class AttributeRange(SQLModel):
+    min: Optional[Decimal] = None
+    max: Optional[Decimal] = None
+
 class ProductFilterRequest(SQLModel):
     skip: int = 0
     limit: int = 100
@@ -48,6 +56,8 @@ class ProductFilterRequest(SQLModel):
     sort_by: Optional[str] = None  # Should be "price" or "name"
     sort_order: Optional[str] = "asc"  # "asc" or "desc"
     attributes: Optional[Dict[str, List[str]]] = None
+    attribute_ranges: Optional[Dict[str, AttributeRange]] = None
+    in_stock_only: bool = False
 
 class ProductFilterValues(SQLModel):
     brands: list[dict[str, Any]] 
@@ -55,8 +65,29 @@ class ProductFilterValues(SQLModel):
     attributes: list[dict[str, Any]] 
     price_range: dict[str, Decimal]
 
+class ProductSparseView(SQLModel):
+    """A listed product restricted by fields=; only product_id is always there"""
+    product_id: int
+    product_code: Optional[str] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    regular_price: Optional[Decimal] = None
+    sale_price: Optional[Decimal] = None
+    brand_id: Optional[int] = None
+    unit_of_measure: Optional[str] = None
+    image_url: Optional[str] = None
+    image_url_details: Optional[str] = None
+    status: Optional[ProductStatus] = None
+    category_id: Optional[int] = None
+    subcategory_id: Optional[int] = None
+    attributes: Optional[dict] = None
+    brand_name: Optional[str] = None
+    category_name: Optional[str] = None
+    parent_category_name: Optional[str] = None
+    available_stock: Optional[int] = None
+
 class ProductListResponsePaginated(SQLModel):
-    data: list[ProductListView]
+    data: list[Union[ProductListView, ProductSparseView]]
     total: int
 
 class ProductListResponse(ProductListResponsePaginated):
@@ -67,6 +98,14 @@ class ProductListResponse(ProductListResponsePaginated):
 class ProductBasicListResponse(SQLModel):
    data: list[ProductListView]
 
+class BoughtTogetherView(ProductListView):
+    pair_orders: int
+    confidence: float
+    lift: float
+
+class BoughtTogetherResponse(SQLModel):
+    data: list[BoughtTogetherView]
+
 class QuickProductSearchResponse(SQLModel):
     data: list[ProductQuickSearchView]
    
@@ -82,6 +121,8 @@ class DetailedProductView(ProductBase):
     
     # Related information
     inventory: Optional[InventoryBase] = None
+    warehouses: list[InventoryBase] = []
+    available_stock: int = 0
     technical_specs: Optional[TechnicalSpecificationBase] = None
     active_promotions: Optional[list[PromotionBase]] = None
     brand: Optional[BrandBase] = None
@@ -106,3 +147,244 @@ class DetailedProductView(ProductBase):
                 highest_discount = max(highest_discount, promo.discount_amount)
         
         return max(self.regular_price - highest_discount, Decimal("0.00"))
+
+
+class SalesReportRow(SQLModel):
+    sale_date: Optional[datetime.date] = None
+    product_id: Optional[int] = None
+    category_id: Optional[int] = None
+    brand_id: Optional[int] = None
+    name: Optional[str] = None
+    order_count: int
+    units_sold: int
+    revenue: Decimal
+    discount_amount: Decimal
+    tax_amount: Decimal
+
+class SalesReportTotals(SQLModel):
+    order_count: int
+    units_sold: int
+    revenue: Decimal
+    discount_amount: Decimal
+    tax_amount: Decimal
+
+class SalesReportResponse(SQLModel):
+    group_by: str
+    start_date: datetime.date
+    end_date: datetime.date
+    data: list[SalesReportRow]
+    totals: SalesReportTotals
+
+class ManufacturingReportRow(SQLModel):
+    production_date: Optional[datetime.date] = None
+    machine_id: Optional[int] = None
+    product_id: Optional[int] = None
+    name: Optional[str] = None
+    batch_count: int
+    quantity_produced: int
+    production_cost: Decimal
+    cost_per_unit: Optional[Decimal] = None
+    qc_checks: int
+    qc_passed: int
+    qc_pass_rate: Optional[float] = None
+
+class ManufacturingReportTotals(SQLModel):
+    batch_count: int
+    quantity_produced: int
+    production_cost: Decimal
+    cost_per_unit: Optional[Decimal] = None
+    qc_checks: int
+    qc_passed: int
+    qc_pass_rate: Optional[float] = None
+
+class ManufacturingReportResponse(SQLModel):
+    group_by: str
+    start_date: datetime.date
+    end_date: datetime.date
+    data: list[ManufacturingReportRow]
+    totals: ManufacturingReportTotals
+
+class QualityFailureReason(SQLModel):
+    reason: str
+    failures: int
+    share: Optional[float] = None
+
+class QualityFailedTests(SQLModel):
+    pressure: int
+    dimensional: int
+    visual: int
+
+class QualityAnalyticsPoint(SQLModel):
+    check_date: datetime.date
+    checks: int
+    passed: int
+    pass_rate: Optional[float] = None
+    rolling_pass_rate: Optional[float] = None
+    failure_rate: Optional[float] = None
+    upper_control_limit: Optional[float] = None
+    lower_control_limit: Optional[float] = None
+    out_of_control: bool = False
+
+class QualityAnalyticsResponse(SQLModel):
+    scope: str
+    entity_id: int
+    name: Optional[str] = None
+    start_date: datetime.date
+    end_date: datetime.date
+    window_days: int
+    checks: int
+    passed: int
+    pass_rate: Optional[float] = None
+    center_line: Optional[float] = None
+    out_of_control_days: int
+    failed_tests: QualityFailedTests
+    failure_reasons: list[QualityFailureReason]
+    series: list[QualityAnalyticsPoint]
+
+class QualitySummaryRow(SQLModel):
+    entity_id: int
+    name: Optional[str] = None
+    checks: int
+    passed: int
+    pass_rate: Optional[float] = None
+    rolling_pass_rate: Optional[float] = None
+    center_line: float
+    out_of_control_days: int
+
+class QualitySummaryResponse(SQLModel):
+    scope: str
+    start_date: datetime.date
+    end_date: datetime.date
+    window_days: int
+    data: list[QualitySummaryRow]
+
+class MaintenanceDueRow(SQLModel):
+    machine_id: int
+    machine_name: str
+    machine_type: str
+    operational_status: ManufacturingStatus
+    maintenance_schedule: Optional[str] = None
+    last_maintenance_date: Optional[datetime.date] = None
+    next_maintenance_date: datetime.date
+    days_until_due: int
+    overdue: bool
+
+class MaintenanceDueResponse(SQLModel):
+    days: int
+    data: list[MaintenanceDueRow]
+
+class MaintenanceRecord(SQLModel):
+    maintenance_date: Optional[datetime.date] = None
+    notes: Optional[str] = None
+
+class BatchCostingRequest(SQLModel):
+    batch_ids: Optional[list[int]] = None
+    material_ids: Optional[list[int]] = None
+    start_date: Optional[datetime.date] = None
+    end_date: Optional[datetime.date] = None
+
+class BatchCostingResponse(SQLModel):
+    batches_costed: int
+    batches_updated: int
+
+class ExpiringLotRow(SQLModel):
+    lot_id: int
+    lot_number: Optional[str] = None
+    material_id: int
+    material_name: str
+    material_type: str
+    quantity_remaining: Decimal
+    unit_of_measure: str
+    cost_per_unit: Optional[Decimal] = None
+    received_date: datetime.date
+    expiration_date: datetime.date
+    days_until_expiration: int
+    location: Optional[str] = None
+
+class ExpiringLotsResponse(SQLModel):
+    days: int
+    data: list[ExpiringLotRow]
+
+class InvoiceGenerationResponse(SQLModel):
+    invoices: int
+    documents: int
+    seconds: float
+    invoices_per_minute: float
+    documents_per_minute: float
+
+class ArAgingAccount(ArAgingSummaryBase):
+    full_name: Optional[str] = None
+    email: str
+    role: str
+    company_name: Optional[str] = None
+    credit_limit: Optional[Decimal] = None
+    updated_at: datetime.datetime
+
+class ArAgingTotals(SQLModel):
+    accounts: int
+    current_amount: Decimal
+    days_1_30: Decimal
+    days_31_60: Decimal
+    days_61_90: Decimal
+    days_over_90: Decimal
+    total_outstanding: Decimal
+    uninvoiced_amount: Decimal
+
+class ArAgingResponse(SQLModel):
+    totals: ArAgingTotals
+    data: list[ArAgingAccount]
+
+class ArAgingRefreshResponse(SQLModel):
+    as_of: datetime.date
+    invoices_overdue: int
+    summaries_refreshed: int
+
+class TrackingLineError(SQLModel):
+    line: int
+    error: str
+
+class TrackingIngestResponse(SQLModel):
+    lines: int
+    tracking_numbers: int
+    shipments_matched: int
+    shipments_updated: int
+    unknown_tracking_numbers: int
+    orders_delivered: int
+    rejected_lines: int
+    errors: list[TrackingLineError]
+    seconds: float
+
+class ReturnProcessingRequest(SQLModel):
+    return_ids: Optional[list[int]] = None
+    max_returns: Optional[int] = None
+
+class ReturnProcessingResponse(SQLModel):
+    processed: int
+    rejected: int
+    units_restocked: int
+    refund_total: Decimal
+    seconds: float
+
+class ReturnRateRow(SQLModel):
+    product_id: int
+    product_code: str
+    name: str
+    units_sold: int
+    returns: int
+    units_returned: int
+    refund_total: Decimal
+    return_rate: Optional[Decimal] = None
+
+class ReturnMetricsResponse(SQLModel):
+    start_date: datetime.date
+    end_date: datetime.date
+    units_sold: int
+    returns: int
+    units_returned: int
+    refund_total: Decimal
+    return_rate: Optional[Decimal] = None
+    data: list[ReturnRateRow]
+
+class SalesRollupRefreshResponse(SQLModel):
+    lines_processed: int
+    last_processed_id: int
@@ -0,0 +1,13 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+@pytest.mark.parametrize("method", ["get", "put"])
+def test_bill_of_materials_needs_an_administrator(
+    client: TestClient, normal_user_token_headers: dict[str, str], method: str
+) -> None:
+    url = f"{settings.API_V1_STR}/bill-of-materials/1"
+    assert client.request(method, url).status_code == 401
+    assert client.request(method, url, headers=normal_user_token_headers).status_code == 403
@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [
+        ("get", "/"),
+        ("post", "/generate"),
+        ("post", "/paginated"),
+        ("get", "/1/document"),
+        ("put", "/1"),
+        ("delete", "/1"),
+    ],
+)
+def test_invoice_payments_need_a_superuser(
+    client: TestClient, normal_user_token_headers: dict[str, str], method: str, path: str
+) -> None:
+    url = f"{settings.API_V1_STR}/invoice-payments{path}"
+    assert client.request(method, url).status_code == 401
+    assert client.request(method, url, headers=normal_user_token_headers).status_code == 403
+
+
+@pytest.mark.parametrize(
+    "method, path", [("get", "/aging"), ("get", "/aging/1"), ("post", "/aging/refresh")]
+)
+def test_ar_aging_needs_an_administrator(
+    client: TestClient, normal_user_token_headers: dict[str, str], method: str, path: str
+) -> None:
+    url = f"{settings.API_V1_STR}/invoice-payments{path}"
+    assert client.request(method, url).status_code == 401
+    assert client.request(method, url, headers=normal_user_token_headers).status_code == 403
@@ -0,0 +1,22 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [
+        ("post", "/1/maintenance"),
+        ("get", "/maintenance/due"),
+        ("post", "/"),
+        ("put", "/1"),
+        ("delete", "/1"),
+    ],
+)
+def test_manufacturing_machines_need_an_administrator(
+    client: TestClient, normal_user_token_headers: dict[str, str], method: str, path: str
+) -> None:
+    url = f"{settings.API_V1_STR}/manufacturing-machines{path}"
+    assert client.request(method, url).status_code == 401
+    assert client.request(method, url, headers=normal_user_token_headers).status_code == 403
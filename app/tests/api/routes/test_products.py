@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.tests.utils.order import create_random_product
+
+
+def test_paginated_products_keep_their_shape(client: TestClient, db: Session) -> None:
+    product = create_random_product(db)
+    url = f"{settings.API_V1_STR}/products/paginated"
+
+    response = client.post(url, json={"search": product.name})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 1
+    assert body["filter_values"] is None
+    assert body["data"][0]["name"] == product.name
+
+    response = client.post(url, params={"fields": "name"}, json={"search": product.name})
+    assert response.json()["data"] == [{"product_id": product.product_id, "name": product.name}]
+
+
+def test_sparse_product_listings_are_documented(client: TestClient) -> None:
+    schemas = client.get(f"{settings.API_V1_STR}/openapi.json").json()["components"]["schemas"]
+    assert schemas["ProductSparseView"]["required"] == ["product_id"]
+    assert "filter_values" in schemas["ProductListResponse"]["properties"]
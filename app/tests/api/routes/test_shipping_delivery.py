@@ -0,0 +1,25 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+FEED = b'{"tracking_number": "1Z999", "status": "delivered", "event_time": "2026-10-20T08:15:00Z"}\n'
+
+
+def test_tracking_updates_need_authentication(client: TestClient) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/shipping-delivery/tracking-updates",
+        content=FEED,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 401
+
+
+def test_tracking_updates_need_an_administrator(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/shipping-delivery/tracking-updates",
+        content=FEED,
+        headers={**normal_user_token_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 403
@@ -0,0 +1,27 @@
+import datetime
+
+import pytest
+
+from app.crud.ar_aging import bucket_crossing_ranges
+
+
+def _bucket(due_date: datetime.date, as_of: datetime.date) -> int:
+    days_past_due = (as_of - due_date).days
+    return sum(days_past_due >= boundary for boundary in (1, 31, 61, 91))
+
+
+@pytest.mark.parametrize("days_between_runs", [1, 2, 7, 45, 200])
+def test_bucket_crossing_ranges(days_between_runs: int) -> None:
+    as_of = datetime.date(2026, 10, 20)
+    last_run = as_of - datetime.timedelta(days=days_between_runs)
+    ranges = bucket_crossing_ranges(last_run, as_of)
+    for offset in range(-10, 400):
+        due_date = as_of - datetime.timedelta(days=offset)
+        crossed = any(low <= due_date <= high for low, high in ranges)
+        assert crossed == (_bucket(due_date, last_run) != _bucket(due_date, as_of)), due_date
+
+
+def test_bucket_crossing_ranges_same_day() -> None:
+    as_of = datetime.date(2026, 10, 20)
+    assert bucket_crossing_ranges(as_of, as_of) == []
+    assert bucket_crossing_ranges(as_of, as_of - datetime.timedelta(days=1)) == []
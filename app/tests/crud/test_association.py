@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.crud.association import rebuild_bought_together, refresh_bought_together
+from app.tests.utils.order import add_order_lines, create_random_order, create_random_product
+
+
+def _counts(db: Session, product_ids: list) -> tuple:
+    params = {"product_ids": product_ids}
+    pairs = db.execute(
+        text("""
+            SELECT product_id, other_product_id, order_count FROM product_pair_counts
+            WHERE product_id = ANY(:product_ids) ORDER BY 1, 2
+        """),
+        params,
+    ).all()
+    products = db.execute(
+        text("""
+            SELECT product_id, order_count FROM product_order_counts
+            WHERE product_id = ANY(:product_ids) ORDER BY 1
+        """),
+        params,
+    ).all()
+    associations = db.execute(
+        text("""
+            SELECT product_id, rank, associated_product_id, pair_orders, support, confidence, lift
+            FROM product_associations
+            WHERE product_id = ANY(:product_ids) ORDER BY 1, 2
+        """),
+        params,
+    ).all()
+    return pairs, products, associations
+
+
+def test_incremental_refresh_matches_a_rebuild(db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "BOUGHT_TOGETHER_MIN_PAIR_ORDERS", 1)
+    monkeypatch.setattr(settings, "BOUGHT_TOGETHER_MIN_LIFT", 0.0)
+    rebuild_bought_together(db)
+    a, b, c, d = (create_random_product(db) for _ in range(4))
+    price = Decimal("10.00")
+
+    first = create_random_order(db, [(a, 1, price), (b, 2, price)])
+    create_random_order(db, [(a, 1, price), (c, 1, price)])
+    refresh_bought_together(db)
+
+    # Lines appended to a counted order, one of them repeating a product
+    add_order_lines(db, first, [(c, 1, price), (a, 3, price)])
+    create_random_order(db, [(b, 1, price), (c, 1, price), (d, 1, price)])
+    result = refresh_bought_together(db)
+    assert result["lines_processed"] >= 5
+
+    product_ids = [a.product_id, b.product_id, c.product_id, d.product_id]
+    incremental = _counts(db, product_ids)
+    pairs, products, associations = incremental
+    assert {(row.product_id, row.order_count) for row in products} == {
+        (a.product_id, 2), (b.product_id, 2), (c.product_id, 3), (d.product_id, 1),
+    }
+    assert (min(a.product_id, c.product_id), max(a.product_id, c.product_id), 2) in {
+        tuple(row) for row in pairs
+    }
+    assert associations
+
+    rebuild_bought_together(db)
+    assert _counts(db, product_ids) == incremental
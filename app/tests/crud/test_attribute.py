@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from sqlmodel import Session, select
+
+from app.crud.attribute import (
+    attribute_range_filter,
+    create_category_attribute,
+    get_attribute_facets,
+)
+from app.models import (
+    AttributeValueType,
+    Category,
+    CategoryAttributeCreate,
+    Product,
+    ProductAttributeValue,
+)
+from app.tests.utils.order import create_random_product
+from app.tests.utils.utils import random_lower_string
+
+
+def _category(db: Session) -> Category:
+    category = Category(category_name=random_lower_string())
+    db.add(category)
+    db.commit()
+    db.refresh(category)
+    return category
+
+
+def _rows(db: Session, product: Product) -> set:
+    return {
+        (row.key, row.value, row.value_numeric)
+        for row in db.exec(
+            select(ProductAttributeValue).where(ProductAttributeValue.product_id == product.product_id)
+        )
+    }
+
+
+def test_sync_product_attribute_values(db: Session) -> None:
+    category = _category(db)
+    product = create_random_product(
+        db,
+        category_id=category.category_id,
+        attributes={"presion": "160 PSI", "colores": ["rojo", "azul"], "usb": True, "peso": 2.5, "nota": ""},
+    )
+    assert _rows(db, product) == {
+        ("presion", "160 PSI", None),
+        ("colores", "rojo", None),
+        ("colores", "azul", None),
+        ("usb", "True", None),
+        ("peso", "2.5", Decimal("2.5")),
+    }
+
+    # Declaring the key as a number indexes the leading number of its strings
+    create_category_attribute(
+        db,
+        category.category_id,
+        CategoryAttributeCreate(attribute_key="presion", value_type=AttributeValueType.number),
+    )
+    assert ("presion", "160 PSI", Decimal("160")) in _rows(db, product)
+
+    product.attributes = {"colores": "verde"}
+    db.add(product)
+    db.commit()
+    assert _rows(db, product) == {("colores", "verde", None)}
+
+
+def test_facets_and_ranges_skip_attributes_that_are_not_filterable(db: Session) -> None:
+    category = _category(db)
+    first = create_random_product(db, category_id=category.category_id, attributes={"peso": 2, "sku_interno": 10})
+    second = create_random_product(db, category_id=category.category_id, attributes={"peso": 5, "sku_interno": 20})
+    in_category = select(Product.product_id).where(Product.category_id == category.category_id)
+
+    def matching(key: str, minimum, maximum) -> set:
+        return set(db.exec(in_category.where(attribute_range_filter(key, minimum, maximum))).all())
+
+    assert [facet["name"] for facet in get_attribute_facets(db, in_category)] == ["peso", "sku_interno"]
+    assert matching("peso", Decimal("1"), Decimal("3")) == {first.product_id}
+    assert matching("peso", Decimal("3"), None) == {second.product_id}
+    assert matching("sku_interno", None, Decimal("15")) == {first.product_id}
+
+    create_category_attribute(
+        db,
+        category.category_id,
+        CategoryAttributeCreate(attribute_key="sku_interno", value_type=AttributeValueType.number, is_filterable=False),
+    )
+    assert get_attribute_facets(db, in_category) == [
+        {"name": "peso", "values": [{"value": "2", "count": 1}, {"value": "5", "count": 1}]}
+    ]
+    assert matching("sku_interno", None, Decimal("15")) == set()
+    assert matching("peso", Decimal("1"), Decimal("3")) == {first.product_id}
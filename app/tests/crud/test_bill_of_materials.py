@@ -0,0 +1,143 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app.crud.bill_of_materials import create_production_batches, recompute_batch_costs, set_bill_of_materials
+from app.crud.raw_material_lot import InsufficientRawMaterialError, add_lot, get_material_lots
+from app.models import (
+    BillOfMaterialsLineBase,
+    ProductionBatchCreate,
+    ProductionBatchLot,
+    ProductionBatchMaterial,
+    RawMaterialInventory,
+    RawMaterialLotCreate,
+)
+from app.tests.utils.order import create_random_product
+from app.tests.utils.raw_material import create_random_material
+
+PRODUCTION_DATE = datetime.date(2001, 6, 1)
+
+
+def _product_with_bom(db: Session) -> tuple:
+    product = create_random_product(db)
+    resin = create_random_material(db, quantity_available=Decimal("100"), cost_per_unit=Decimal("2.50"))
+    pigment = create_random_material(db, quantity_available=Decimal("10"), cost_per_unit=Decimal("8.00"))
+    set_bill_of_materials(
+        db,
+        product.product_id,
+        [
+            BillOfMaterialsLineBase(material_id=resin.material_id, quantity_per_unit=Decimal("1.5")),
+            BillOfMaterialsLineBase(material_id=pigment.material_id, quantity_per_unit=Decimal("0.25")),
+        ],
+    )
+    return product, resin, pigment
+
+
+def _batch(product, quantity: int) -> ProductionBatchCreate:
+    return ProductionBatchCreate(
+        production_date=PRODUCTION_DATE, product_id=product.product_id, quantity_produced=quantity
+    )
+
+
+def test_create_production_batches_consumes_materials(db: Session) -> None:
+    product, resin, pigment = _product_with_bom(db)
+
+    first, second = create_production_batches(db, [_batch(product, 10), _batch(product, 4)])
+
+    assert first.production_cost == Decimal("57.50")  # 15 x 2.50 + 2.5 x 8.00
+    assert second.production_cost == Decimal("23.00")  # 6 x 2.50 + 1 x 8.00
+    assert resin.material_name in first.material_used and pigment.material_name in first.material_used
+    consumed = db.exec(
+        select(ProductionBatchMaterial)
+        .where(ProductionBatchMaterial.batch_id.in_([first.batch_id, second.batch_id]))
+    ).all()
+    assert {(line.batch_id, line.material_id): line.quantity for line in consumed} == {
+        (first.batch_id, resin.material_id): Decimal("15"),
+        (first.batch_id, pigment.material_id): Decimal("2.5"),
+        (second.batch_id, resin.material_id): Decimal("6"),
+        (second.batch_id, pigment.material_id): Decimal("1"),
+    }
+    db.refresh(resin)
+    db.refresh(pigment)
+    assert resin.quantity_available == Decimal("79")
+    assert pigment.quantity_available == Decimal("6.5")
+
+
+def test_create_production_batches_needs_enough_stock(db: Session) -> None:
+    product, resin, pigment = _product_with_bom(db)
+
+    with pytest.raises(InsufficientRawMaterialError):
+        # 50 units need 12.5 of pigment, only 10 in stock
+        create_production_batches(db, [_batch(product, 50)])
+    db.rollback()
+
+    assert db.get(RawMaterialInventory, resin.material_id).quantity_available == Decimal("100")
+    assert db.get(RawMaterialInventory, pigment.material_id).quantity_available == Decimal("10")
+    assert db.exec(
+        select(ProductionBatchMaterial).where(ProductionBatchMaterial.material_id == pigment.material_id)
+    ).all() == []
+
+
+def test_create_production_batches_splits_lots_between_batches(db: Session) -> None:
+    product = create_random_product(db)
+    resin = create_random_material(db, quantity_available=Decimal("10"), cost_per_unit=Decimal("2.50"))
+    [opening] = get_material_lots(db, resin.material_id)
+    dearer = add_lot(
+        db,
+        resin,
+        RawMaterialLotCreate(
+            quantity_received=Decimal("100"),
+            cost_per_unit=Decimal("3.00"),
+            received_date=datetime.date.today() + datetime.timedelta(days=1),
+        ),
+    )
+    set_bill_of_materials(
+        db, product.product_id, [BillOfMaterialsLineBase(material_id=resin.material_id, quantity_per_unit=Decimal("1"))]
+    )
+
+    first, second = create_production_batches(db, [_batch(product, 6), _batch(product, 6)])
+
+    assert first.production_cost == Decimal("15.00")  # 6 x 2.50 from the opening lot
+    assert second.production_cost == Decimal("16.00")  # its last 4 x 2.50 + 2 x 3.00
+    consumed = db.exec(
+        select(ProductionBatchLot).where(ProductionBatchLot.batch_id.in_([first.batch_id, second.batch_id]))
+    ).all()
+    assert {(line.batch_id, line.lot_id): line.quantity for line in consumed} == {
+        (first.batch_id, opening.lot_id): Decimal("6"),
+        (second.batch_id, opening.lot_id): Decimal("4"),
+        (second.batch_id, dearer.lot_id): Decimal("2"),
+    }
+
+
+def test_recompute_batch_costs(db: Session) -> None:
+    product, resin, pigment = _product_with_bom(db)
+    first, second = create_production_batches(db, [_batch(product, 10), _batch(product, 4)])
+
+    # Batches are priced at the lots they consumed, not the material's price
+    pigment.cost_per_unit = Decimal("9.00")
+    db.add(pigment)
+    db.commit()
+    assert recompute_batch_costs(db, material_ids=[pigment.material_id]) == (2, 0)
+
+    db.execute(
+        text("UPDATE raw_material_lots SET cost_per_unit = 3.00 WHERE material_id = :material_id"),
+        {"material_id": resin.material_id},
+    )
+    db.commit()
+    assert recompute_batch_costs(db, material_ids=[resin.material_id]) == (2, 2)
+    db.refresh(first)
+    db.refresh(second)
+    assert first.production_cost == Decimal("65.00")  # 15 x 3.00 + 2.5 x 8.00
+    assert second.production_cost == Decimal("26.00")  # 6 x 3.00 + 1 x 8.00
+    # Nothing changed since, so nothing is rewritten
+    assert recompute_batch_costs(db, batch_ids=[first.batch_id, second.batch_id]) == (2, 0)
+
+    # Consumption without recorded lots is priced at the material's cost
+    db.execute(text("DELETE FROM production_batch_lots WHERE batch_id = :batch_id"), {"batch_id": second.batch_id})
+    db.commit()
+    assert recompute_batch_costs(db, batch_ids=[second.batch_id]) == (1, 1)
+    db.refresh(second)
+    assert second.production_cost == Decimal("24.00")  # 6 x 2.50 + 1 x 9.00
@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+from sqlmodel import Session
+
+from app.crud.facet import get_category_facet_snapshot
+from app.crud.product import get_products
+from app.models import Brand, Category, CategoryFacetSnapshot
+from app.tests.utils.order import create_random_product
+from app.tests.utils.utils import random_lower_string
+
+
+def _category(db: Session) -> Category:
+    category = Category(category_name=random_lower_string())
+    db.add(category)
+    db.commit()
+    db.refresh(category)
+    return category
+
+
+def _browse(db: Session, category: Category) -> dict:
+    _, total, filter_values = get_products(session=db, category_ids=[category.category_id])
+    return {"total": total, **filter_values}
+
+
+def _generation(db: Session, category: Category) -> int:
+    return db.get(CategoryFacetSnapshot, category.category_id, populate_existing=True).generation
+
+
+def test_product_writes_invalidate_the_snapshot(db: Session) -> None:
+    category, other = _category(db), _category(db)
+    product = create_random_product(db, category_id=category.category_id, regular_price=Decimal("10.00"))
+    assert _browse(db, category)["price_range"] == {"min": Decimal("10.00"), "max": Decimal("10.00")}
+    generation, snapshot = get_category_facet_snapshot(db, category.category_id)
+    assert snapshot is not None
+
+    product.regular_price = Decimal("25.00")
+    db.add(product)
+    db.commit()
+    assert _generation(db, category) == generation + 1
+    assert get_category_facet_snapshot(db, category.category_id)[1] is None
+    assert _browse(db, category)["price_range"] == {"min": Decimal("25.00"), "max": Decimal("25.00")}
+
+    # Moving a product outdates both the category it leaves and the one it joins
+    _browse(db, other)
+    product.category_id = other.category_id
+    db.add(product)
+    db.commit()
+    assert get_category_facet_snapshot(db, category.category_id)[1] is None
+    assert get_category_facet_snapshot(db, other.category_id)[1] is None
+    assert _browse(db, category)["total"] == 0
+    assert _browse(db, other)["total"] == 1
+
+    db.delete(product)
+    db.commit()
+    assert get_category_facet_snapshot(db, other.category_id)[1] is None
+    assert _browse(db, other)["total"] == 0
+
+
+def test_brand_and_category_renames_invalidate_the_snapshot(db: Session) -> None:
+    category = _category(db)
+    brand = Brand(name=random_lower_string()[:20])
+    db.add(brand)
+    db.commit()
+    create_random_product(db, category_id=category.category_id, brand_id=brand.brand_id)
+    _browse(db, category)
+
+    brand.name = random_lower_string()[:20]
+    db.add(brand)
+    db.commit()
+    assert get_category_facet_snapshot(db, category.category_id)[1] is None
+    assert [row["name"] for row in _browse(db, category)["brands"]] == [brand.name]
+
+    category.category_name = random_lower_string()
+    db.add(category)
+    db.commit()
+    assert get_category_facet_snapshot(db, category.category_id)[1] is None
+    assert [row["name"] for row in _browse(db, category)["categories"]] == [category.category_name]
@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from sqlmodel import Session, select
+
+from app.crud.inventory import compute_reorder_suggestions, create_inventory, delete_inventory, update_inventory
+from app.crud.product import get_products
+from app.models import Inventory, InventoryCreate, Product, ProductAvailability, ReorderItemType, ReorderSuggestion
+from app.tests.utils.order import create_random_product
+from app.tests.utils.raw_material import create_random_material
+
+
+def test_compute_reorder_suggestions(db: Session) -> None:
+    product = create_random_product(db)
+    db.add(
+        Inventory(product_id=product.product_id, available_quantity=3, minimum_stock_level=10, maximum_stock_level=40)
+    )
+    db.commit()
+    material = create_random_material(db, quantity_available=Decimal("1"), minimum_stock_level=Decimal("5"))
+
+    assert compute_reorder_suggestions(db) >= 2
+
+    suggestions = db.exec(select(ReorderSuggestion)).all()
+    by_item = {(suggestion.item_type, suggestion.item_id): suggestion for suggestion in suggestions}
+    product_suggestion = by_item[(ReorderItemType.product, product.product_id)]
+    assert product_suggestion.current_stock == 3
+    assert product_suggestion.suggested_quantity == 37
+    material_suggestion = by_item[(ReorderItemType.raw_material, material.material_id)]
+    assert material_suggestion.current_stock == 1
+    assert material_suggestion.suggested_quantity == 9
+
+
+def _availability(db: Session, product: Product) -> tuple:
+    row = db.get(ProductAvailability, product.product_id, populate_existing=True)
+    return row.available_quantity, row.reserved_quantity, row.net_available, row.warehouse_count
+
+
+def _in_stock(db: Session, product: Product) -> bool:
+    products, _, _ = get_products(
+        session=db, search=product.product_code, in_stock_only=True, include_filter_values=False
+    )
+    return [row["product_id"] for row in products] == [product.product_id]
+
+
+def test_product_availability_follows_inventory_writes(db: Session) -> None:
+    product, other = create_random_product(db), create_random_product(db)
+
+    first = create_inventory(
+        db, InventoryCreate(product_id=product.product_id, available_quantity=5, reserved_quantity=2, warehouse_id=1)
+    )
+    second = create_inventory(
+        db, InventoryCreate(product_id=product.product_id, available_quantity=1, reserved_quantity=4, warehouse_id=2)
+    )
+    # Over-reserved warehouses don't take stock from the others
+    assert _availability(db, product) == (6, 6, 3, 2)
+    assert _in_stock(db, product)
+
+    update_inventory(db, first, InventoryCreate(product_id=product.product_id, available_quantity=2, reserved_quantity=2))
+    assert _availability(db, product) == (3, 6, 0, 2)
+    assert not _in_stock(db, product)
+
+    # Moving a row to another product refreshes both
+    update_inventory(db, second, InventoryCreate(product_id=other.product_id, available_quantity=7, reserved_quantity=0))
+    assert _availability(db, product) == (2, 2, 0, 1)
+    assert _availability(db, other) == (7, 0, 7, 1)
+    assert _in_stock(db, other)
+
+    delete_inventory(db, second.inventory_id)
+    assert _availability(db, other) == (0, 0, 0, 0)
+    assert not _in_stock(db, other)
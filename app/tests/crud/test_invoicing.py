@@ -0,0 +1,40 @@
+from app.crud.invoicing import render_invoice
+
+CONTEXT = {
+    "invoice_id": 7,
+    "invoice_number": "FAC-2026-000007",
+    "invoice_date": "2026-10-20",
+    "due_date": "2026-11-19",
+    "order_id": 42,
+    "order_date": "2026-10-02",
+    "seller_name": "Tuberías & Co",
+    "customer_name": "<script>alert(1)</script>",
+    "customer_email": "cliente@example.com",
+    "billing_address": "Av. Siempre Viva 742",
+    "payment_method": "transferencia",
+    "lines": [
+        {
+            "product_code": "TUB-001",
+            "name": "Tubo PVC 1/2",
+            "quantity": 3,
+            "unit_price": "1,250.00",
+            "discount_applied": "0.00",
+            "total_price": "3,750.00",
+        }
+    ],
+    "subtotal": "3,750.00",
+    "discount_amount": "0.00",
+    "shipping_cost": "150.00",
+    "tax_amount": "712.50",
+    "total_amount": "4,612.50",
+}
+
+
+def test_render_invoice() -> None:
+    invoice_id, html = render_invoice(CONTEXT)
+    assert invoice_id == 7
+    assert "FAC-2026-000007" in html
+    assert "TUB-001" in html and "4,612.50" in html
+    # Customer data is escaped
+    assert "<script>" not in html
+    assert "&lt;script&gt;" in html
@@ -0,0 +1,43 @@
+import datetime
+
+import pytest
+
+from app.crud.maintenance import MaintenanceInterval, next_maintenance_date, parse_maintenance_schedule
+
+
+@pytest.mark.parametrize(
+    "schedule, interval",
+    [
+        ("Mensual", MaintenanceInterval(months=1)),
+        ("Semanal", MaintenanceInterval(days=7)),
+        ("Cada 15 días", MaintenanceInterval(days=15)),
+        ("cada 15 dias", MaintenanceInterval(days=15)),
+        ("Trimestral", MaintenanceInterval(months=3)),
+        ("Semestral", MaintenanceInterval(months=6)),
+        ("Cada 500 horas", MaintenanceInterval(days=32)),  # 16 operating hours a day
+        ("Cada 2 semanas", MaintenanceInterval(days=14)),
+        ("Cada año", MaintenanceInterval(months=12)),
+        ("every 2 years", MaintenanceInterval(months=24)),
+        ("500h", MaintenanceInterval(days=32)),
+        ("horas", None),
+        ("every 3 months", MaintenanceInterval(months=3)),
+        ("  MANTENIMIENTO ANUAL. ", MaintenanceInterval(months=12)),
+        ("Según uso", None),
+        ("Cada 0 días", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_maintenance_schedule(schedule: str, interval: MaintenanceInterval) -> None:
+    assert parse_maintenance_schedule(schedule) == interval
+
+
+def test_next_maintenance_date() -> None:
+    monthly = MaintenanceInterval(months=1)
+    assert next_maintenance_date(monthly, datetime.date(2026, 1, 31)) == datetime.date(2026, 2, 28)
+    assert next_maintenance_date(MaintenanceInterval(months=3), datetime.date(2026, 11, 15)) == datetime.date(2027, 2, 15)
+    assert next_maintenance_date(MaintenanceInterval(days=15), datetime.date(2026, 12, 20)) == datetime.date(2027, 1, 4)
+    # never maintained: counted from the purchase
+    assert next_maintenance_date(monthly, None, datetime.date(2026, 3, 1)) == datetime.date(2026, 4, 1)
+    assert next_maintenance_date(monthly, None) is None
+    assert next_maintenance_date(None, datetime.date(2026, 3, 1)) is None
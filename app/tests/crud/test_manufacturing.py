@@ -0,0 +1,68 @@
+import datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.models import ProductionBatch, QCStatus, QualityControl
+from app.tests.utils.order import create_random_product
+
+DAY = datetime.date(2001, 6, 4)
+NEXT_DAY = DAY + datetime.timedelta(days=1)
+
+
+def _aggregate(db: Session, production_date: datetime.date, product_id: int) -> Optional[tuple]:
+    row = db.execute(
+        text("""
+            SELECT batch_count, quantity_produced, production_cost, costed_quantity, qc_checks, qc_passed
+            FROM manufacturing_daily_aggregates
+            WHERE production_date = :production_date AND product_id = :product_id AND machine_id = 0
+        """),
+        {"production_date": production_date, "product_id": product_id},
+    ).one_or_none()
+    return tuple(row) if row else None
+
+
+def test_aggregates_follow_batch_writes(db: Session) -> None:
+    product = create_random_product(db)
+    costed = ProductionBatch(
+        production_date=DAY, product_id=product.product_id, quantity_produced=10, production_cost=Decimal("25.00")
+    )
+    uncosted = ProductionBatch(production_date=DAY, product_id=product.product_id, quantity_produced=4)
+    db.add_all([costed, uncosted])
+    db.commit()
+    assert _aggregate(db, DAY, product.product_id) == (2, 14, Decimal("25.00"), 10, 0, 0)
+
+    # Moving a batch to another day recomputes both the old and the new key
+    uncosted.production_date = NEXT_DAY
+    db.add(uncosted)
+    db.commit()
+    assert _aggregate(db, DAY, product.product_id) == (1, 10, Decimal("25.00"), 10, 0, 0)
+    assert _aggregate(db, NEXT_DAY, product.product_id) == (1, 4, Decimal("0.00"), 0, 0, 0)
+
+    # The row of a key left without batches is deleted
+    db.delete(uncosted)
+    db.commit()
+    assert _aggregate(db, NEXT_DAY, product.product_id) is None
+    assert _aggregate(db, DAY, product.product_id) is not None
+
+
+def test_aggregates_count_quality_controls(db: Session) -> None:
+    product = create_random_product(db)
+    batch = ProductionBatch(production_date=DAY, product_id=product.product_id, quantity_produced=8)
+    db.add(batch)
+    db.commit()
+    checks = [
+        QualityControl(batch_id=batch.batch_id, check_date=DAY, status=status)
+        for status in (QCStatus.passed, QCStatus.passed, QCStatus.failed)
+    ]
+    db.add_all(checks)
+    db.commit()
+    assert _aggregate(db, DAY, product.product_id)[4:] == (3, 2)
+
+    checks[0].status = QCStatus.failed
+    db.add(checks[0])
+    db.delete(checks[2])
+    db.commit()
+    assert _aggregate(db, DAY, product.product_id)[4:] == (2, 1)
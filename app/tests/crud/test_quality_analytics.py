@@ -0,0 +1,93 @@
+import datetime
+import re
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.crud.quality_analytics import _FAILED_RESULT_PATTERN, p_chart, rolling_sum
+from app.models import ProductionBatch, QCStatus, QualityControl
+from app.tests.utils.order import create_random_product
+
+
+def test_rolling_sum_trailing_window() -> None:
+    values = np.array([[1, 2, 3, 4, 5], [0, 0, 1, 0, 0]])
+    assert rolling_sum(values, 3).tolist() == [[1, 3, 6, 9, 12], [0, 0, 1, 1, 1]]
+    assert rolling_sum(values, 10).tolist() == np.cumsum(values, axis=1).tolist()
+
+
+def test_p_chart_limits_and_out_of_control_days() -> None:
+    checks = np.array([[100, 100, 100, 0, 100]])
+    failed = np.array([[2, 3, 25, 0, 0]])
+    chart = p_chart(checks, failed)
+
+    center = 30 / 400
+    sigma = np.sqrt(center * (1 - center) / 100)
+    assert chart["center"][0] == center
+    assert np.isclose(chart["upper"][0, 0], center + 3 * sigma)
+    assert chart["lower"][0, 0] == 0.0
+    # day 3 had no inspections: no point, never out of control
+    assert chart["inspected"][0].tolist() == [True, True, True, False, True]
+    assert chart["out_of_control"][0].tolist() == [False, False, True, False, False]
+
+
+def test_p_chart_rows_are_independent() -> None:
+    chart = p_chart(np.array([[10, 10], [10, 10]]), np.array([[0, 0], [5, 5]]))
+    assert chart["center"].tolist() == [0.0, 0.5]
+    assert not chart["out_of_control"].any()
+
+
+@pytest.mark.parametrize(
+    "result, failed",
+    [
+        ("Falla de presión", True),
+        ("fallo", True),
+        ("Fallido", True),
+        ("FAILED", True),
+        ("Rechazado", True),
+        ("rejected", True),
+        ("No conforme", True),
+        ("NOK", True),
+        (" nok ", True),
+        ("Sin fallas", False),
+        ("sin falla", False),
+        ("OK, sin fallas visibles", False),
+        ("Aprobado", False),
+        ("OK", False),
+        ("No aplica", False),
+        ("", False),
+    ],
+)
+def test_failed_result_pattern(result: str, failed: bool) -> None:
+    assert bool(re.search(_FAILED_RESULT_PATTERN, result, re.IGNORECASE)) == failed
+
+
+def test_sin_fallas_counts_as_passed(db: Session) -> None:
+    product = create_random_product(db)
+    batch = ProductionBatch(
+        production_date=datetime.date(2001, 5, 2), product_id=product.product_id, quantity_produced=10
+    )
+    db.add(batch)
+    db.commit()
+    for result, status in (("Sin fallas", QCStatus.passed), ("Falla de presión", QCStatus.failed)):
+        db.add(
+            QualityControl(
+                batch_id=batch.batch_id,
+                check_date=batch.production_date,
+                pressure_test_result=result,
+                dimensional_check_result="sin falla",
+                status=status,
+            )
+        )
+    db.commit()
+
+    stats = db.execute(
+        text("""
+            SELECT checks, passed, pressure_failed, dimensional_failed
+            FROM quality_control_daily_stats
+            WHERE check_date = :check_date AND product_id = :product_id
+        """),
+        {"check_date": batch.production_date, "product_id": product.product_id},
+    ).one()
+    assert tuple(stats) == (2, 1, 1, 0)
@@ -0,0 +1,117 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session
+
+from app.crud.raw_material_inventory import update_raw_material_inventory
+from app.crud.raw_material_lot import InsufficientRawMaterialError, add_lot, allocate_fefo, get_material_lots
+from app.models import RawMaterialInventoryCreate, RawMaterialLotCreate
+from app.tests.utils.raw_material import create_random_material
+
+AS_OF = datetime.date(2030, 1, 1)
+
+
+def _add_lot(db: Session, material, quantity: str, expiration_date=None, received_date=datetime.date(2029, 6, 1)):
+    return add_lot(
+        db,
+        material,
+        RawMaterialLotCreate(
+            quantity_received=Decimal(quantity), received_date=received_date, expiration_date=expiration_date
+        ),
+    )
+
+
+def test_allocate_fefo_takes_earliest_expiry_first(db: Session) -> None:
+    material = create_random_material(db)
+    later = _add_lot(db, material, "5", datetime.date(2030, 3, 1))
+    no_expiry = _add_lot(db, material, "5")
+    sooner = _add_lot(db, material, "5", datetime.date(2030, 2, 1), received_date=datetime.date(2029, 8, 1))
+    sooner_older = _add_lot(db, material, "2", datetime.date(2030, 2, 1), received_date=datetime.date(2029, 7, 1))
+
+    allocations = allocate_fefo(db, {material.material_id: Decimal("8")}, as_of=AS_OF)
+    db.commit()
+
+    assert {row["lot_id"]: row["quantity"] for row in allocations} == {
+        sooner_older.lot_id: Decimal("2"),
+        sooner.lot_id: Decimal("5"),
+        later.lot_id: Decimal("1"),
+    }
+    remaining = {lot.lot_id: lot.quantity_remaining for lot in get_material_lots(db, material.material_id)}
+    assert remaining == {later.lot_id: Decimal("4"), no_expiry.lot_id: Decimal("5")}
+    db.refresh(material)
+    assert material.quantity_available == Decimal("9")
+    assert material.expiration_date == datetime.date(2030, 3, 1)
+
+
+def test_allocate_fefo_partial_lot(db: Session) -> None:
+    material = create_random_material(db)
+    lot = _add_lot(db, material, "10", datetime.date(2030, 5, 1))
+
+    allocate_fefo(db, {material.material_id: Decimal("3.5")}, as_of=AS_OF)
+    db.commit()
+
+    db.refresh(lot)
+    db.refresh(material)
+    assert lot.quantity_remaining == Decimal("6.5")
+    assert material.quantity_available == Decimal("6.5")
+
+
+def test_allocate_fefo_skips_expired_lots(db: Session) -> None:
+    material = create_random_material(db)
+    expired = _add_lot(db, material, "10", datetime.date(2029, 12, 31))
+
+    with pytest.raises(InsufficientRawMaterialError):
+        allocate_fefo(db, {material.material_id: Decimal("1")}, as_of=AS_OF)
+    db.rollback()
+
+    db.refresh(expired)
+    db.refresh(material)
+    assert expired.quantity_remaining == Decimal("10")
+    assert material.quantity_available == Decimal("10")
+
+    # An unexpired lot alongside is used, the expired one still isn't
+    fresh = _add_lot(db, material, "3", datetime.date(2030, 6, 1))
+    allocate_fefo(db, {material.material_id: Decimal("2")}, as_of=AS_OF)
+    db.commit()
+    db.refresh(expired)
+    db.refresh(fresh)
+    assert (expired.quantity_remaining, fresh.quantity_remaining) == (Decimal("10"), Decimal("1"))
+
+
+def test_update_quantity_resyncs_from_lots(db: Session) -> None:
+    material = create_random_material(db)
+    first = _add_lot(db, material, "6", datetime.date(2030, 2, 1))
+    second = _add_lot(db, material, "4", datetime.date(2030, 4, 1))
+    db.refresh(material)
+    assert material.quantity_available == Decimal("10")
+
+    def update(quantity: str):
+        return update_raw_material_inventory(
+            db,
+            material,
+            RawMaterialInventoryCreate(
+                material_name=material.material_name,
+                material_type=material.material_type,
+                unit_of_measure=material.unit_of_measure,
+                cost_per_unit=material.cost_per_unit,
+                quantity_available=Decimal(quantity),
+            ),
+        )
+
+    # A count below the stock is taken from the earliest expiring lots
+    material = update("3")
+    db.refresh(first)
+    db.refresh(second)
+    assert (first.quantity_remaining, second.quantity_remaining) == (Decimal("0"), Decimal("3"))
+    assert material.quantity_available == Decimal("3")
+    assert material.expiration_date == datetime.date(2030, 4, 1)
+
+    # A count above it becomes an adjustment lot
+    material = update("8")
+    lots = get_material_lots(db, material.material_id)
+    assert {(lot.lot_number, lot.quantity_remaining) for lot in lots} == {
+        (None, Decimal("3")),
+        ("AJUSTE", Decimal("5")),
+    }
+    assert material.quantity_available == Decimal("8")
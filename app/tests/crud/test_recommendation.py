@@ -0,0 +1,67 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from app.crud import recommendation
+from app.crud.recommendation import SIMILARITY_WEIGHTS, _category_similarities, _sparse_rows
+
+
+def _brute_force_scores(subcategories, brands, prices, features, copurchases):
+    n = len(prices)
+    scale = math.log1p(max(copurchases.values(), default=0)) or 1.0
+    scores = {}
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                continue
+            union = len(features[i] | features[j])
+            higher = max(prices[i], prices[j])
+            scores[i, j] = (
+                SIMILARITY_WEIGHTS["attributes"] * (len(features[i] & features[j]) / union if union else 0)
+                + SIMILARITY_WEIGHTS["subcategory"] * (subcategories[i] >= 0 and subcategories[i] == subcategories[j])
+                + SIMILARITY_WEIGHTS["price"] * (1 - min(abs(prices[i] - prices[j]) / higher, 1) if higher else 0)
+                + SIMILARITY_WEIGHTS["copurchase"] * math.log1p(copurchases.get((i, j), 0)) / scale
+                + SIMILARITY_WEIGHTS["brand"] * (brands[i] >= 0 and brands[i] == brands[j])
+            )
+    return scores
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 1024])
+def test_category_similarities_match_pairwise_scores(monkeypatch, block_size: int) -> None:
+    rng = random.Random(7)
+    n = 11
+    subcategories = [rng.choice([-1, 1, 2]) for _ in range(n)]
+    brands = [rng.choice([-1, 5, 6, 7]) for _ in range(n)]
+    prices = [rng.choice([0.0, 10.0, 12.5, 40.0]) for _ in range(n)]
+    features = [{rng.randrange(6) for _ in range(rng.randrange(4))} for _ in range(n)]
+    copurchases = {(i, j): rng.randrange(1, 9) for i in range(n) for j in range(n) if i != j and rng.random() < 0.2}
+
+    monkeypatch.setattr(recommendation, "_BLOCK_SIZE", block_size)
+    feature_cells = [(i, column) for i, columns in enumerate(features) for column in columns]
+    rows = _category_similarities(
+        product_ids=np.arange(100, 100 + n),
+        subcategory_ids=np.array(subcategories),
+        brand_ids=np.array(brands),
+        prices=np.array(prices),
+        features=_sparse_rows(
+            n, [i for i, _ in feature_cells], [column for _, column in feature_cells], np.ones(len(feature_cells))
+        ),
+        copurchases=_sparse_rows(
+            n, [i for i, _ in copurchases], [j for _, j in copurchases], list(copurchases.values())
+        ),
+        top_n=4,
+    )
+
+    expected = _brute_force_scores(subcategories, brands, prices, features, copurchases)
+    by_product = {}
+    for product_id, rank, similar_product_id, score in rows:
+        by_product.setdefault(product_id - 100, []).append((rank, similar_product_id - 100, score))
+    for i in range(n):
+        best = sorted((score for (a, _), score in expected.items() if a == i and score > 0), reverse=True)[:4]
+        found = by_product.get(i, [])
+        assert [rank for rank, _, _ in found] == list(range(1, len(found) + 1))
+        assert [score for _, _, score in found] == pytest.approx(best, abs=1e-5)
+        for _, j, score in found:
+            assert expected[i, j] == pytest.approx(score, abs=1e-5)
@@ -0,0 +1,77 @@
+import datetime
+from decimal import Decimal
+
+from sqlmodel import Session
+
+from app.crud.report import get_sales_report, rebuild_sales_rollups, refresh_sales_rollups
+from app.models import Brand, OrderStatus
+from app.tests.utils.order import add_order_lines, create_random_order, create_random_product
+from app.tests.utils.utils import random_lower_string
+
+SALE_DATE = datetime.date(2001, 3, 14)
+
+
+def _sales_by_product(db: Session, brand_id: int) -> tuple[dict, dict]:
+    rows, totals = get_sales_report(
+        session=db, start_date=SALE_DATE, end_date=SALE_DATE, group_by="product", brand_id=brand_id
+    )
+    return {row["product_id"]: row for row in rows}, totals
+
+
+def test_sales_rollups_count_each_order_once(db: Session) -> None:
+    brand = Brand(name=random_lower_string()[:30])
+    db.add(brand)
+    db.commit()
+    drill = create_random_product(db, brand_id=brand.brand_id)
+    bits = create_random_product(db, brand_id=brand.brand_id)
+    order_date = datetime.datetime.combine(SALE_DATE, datetime.time(10))
+
+    create_random_order(db, [(drill, 1, Decimal("100.00")), (bits, 2, Decimal("5.00"))], order_date=order_date)
+    refresh_sales_rollups(db)
+    second = create_random_order(db, [(drill, 1, Decimal("100.00"))], order_date=order_date)
+    refresh_sales_rollups(db)
+    # Lines appended to an order already folded into the rollups
+    add_order_lines(db, second, [(drill, 3, Decimal("90.00")), (bits, 1, Decimal("5.00"))])
+    result = refresh_sales_rollups(db)
+    assert result["lines_processed"] >= 2
+
+    rows, totals = _sales_by_product(db, brand.brand_id)
+    assert rows[drill.product_id]["order_count"] == 2
+    assert rows[drill.product_id]["units_sold"] == 5
+    assert rows[drill.product_id]["revenue"] == Decimal("470.00")
+    assert rows[bits.product_id]["order_count"] == 2
+    assert rows[bits.product_id]["units_sold"] == 3
+    assert totals["order_count"] == 2
+    assert totals["units_sold"] == 8
+
+    brand_rows, brand_totals = get_sales_report(
+        session=db, start_date=SALE_DATE, end_date=SALE_DATE, group_by="brand", brand_id=brand.brand_id
+    )
+    assert [row["order_count"] for row in brand_rows] == [2]
+    assert brand_totals["order_count"] == 2
+
+
+def test_rebuild_sales_rollups_drops_cancelled_orders(db: Session) -> None:
+    brand = Brand(name=random_lower_string()[:30])
+    db.add(brand)
+    db.commit()
+    product = create_random_product(db, brand_id=brand.brand_id)
+    order_date = datetime.datetime.combine(SALE_DATE, datetime.time(16))
+    create_random_order(db, [(product, 2, Decimal("20.00"))], order_date=order_date)
+    cancelled = create_random_order(db, [(product, 4, Decimal("20.00"))], order_date=order_date)
+    refresh_sales_rollups(db)
+
+    rows, totals = _sales_by_product(db, brand.brand_id)
+    assert rows[product.product_id]["units_sold"] == 6
+    assert totals["order_count"] == 2
+
+    cancelled.order_status = OrderStatus.cancelled
+    db.add(cancelled)
+    db.commit()
+    assert rebuild_sales_rollups(db, SALE_DATE, SALE_DATE) >= 1
+
+    rows, totals = _sales_by_product(db, brand.brand_id)
+    assert rows[product.product_id]["units_sold"] == 2
+    assert rows[product.product_id]["revenue"] == Decimal("40.00")
+    assert rows[product.product_id]["order_count"] == 1
+    assert totals["order_count"] == 1
@@ -0,0 +1,116 @@
+import datetime
+from decimal import Decimal
+
+from sqlmodel import Session, select
+
+from app.crud.return_processing import line_refund, process_returns, refund_invoices, restock_returns
+from app.models import CustomerReturn, Inventory, InvoicePayment, Order, OrderStatus, Product, ReturnStatus
+from app.tests.utils.order import create_random_order, create_random_product
+from app.tests.utils.utils import random_lower_string
+
+
+def test_line_refund_at_price_paid() -> None:
+    # 3 units at 10.00 with 1.00 off the line
+    assert line_refund(Decimal("29.00"), 3, 0, 1) == Decimal("9.67")
+    assert line_refund(Decimal("29.00"), 3, 0, 3) == Decimal("29.00")
+
+
+def test_line_refund_in_parts_adds_up_to_line_total() -> None:
+    line_total, ordered = Decimal("100.00"), 7
+    refunds = [line_refund(line_total, ordered, returned, 1) for returned in range(ordered)]
+    assert sum(refunds) == line_total
+    assert max(refunds) - min(refunds) <= Decimal("0.01")
+
+
+def _invoice(db: Session, order: Order) -> InvoicePayment:
+    invoice = InvoicePayment(
+        order_id=order.order_id,
+        invoice_number=random_lower_string()[:20],
+        invoice_date=datetime.date.today(),
+        due_date=datetime.date.today() + datetime.timedelta(days=30),
+        total_amount=order.order_total,
+    )
+    db.add(invoice)
+    db.commit()
+    db.refresh(invoice)
+    return invoice
+
+
+def _return(db: Session, order: Order, product: Product, quantity: int) -> CustomerReturn:
+    customer_return = CustomerReturn(
+        order_id=order.order_id,
+        product_id=product.product_id,
+        return_date=datetime.date.today(),
+        quantity_returned=quantity,
+    )
+    db.add(customer_return)
+    db.commit()
+    db.refresh(customer_return)
+    return customer_return
+
+
+def test_process_returns_rejects_over_returns_and_cancelled_orders(db: Session) -> None:
+    product = create_random_product(db)
+    stock = Inventory(product_id=product.product_id, available_quantity=5)
+    db.add(stock)
+    db.commit()
+    order = create_random_order(db, [(product, 3, Decimal("10.00"))], order_status=OrderStatus.delivered)
+    invoice = _invoice(db, order)
+    cancelled = create_random_order(db, [(product, 1, Decimal("10.00"))], order_status=OrderStatus.cancelled)
+
+    accepted = _return(db, order, product, 2)
+    # Only 1 of the 3 units is left once the first return is processed
+    too_many = _return(db, order, product, 2)
+    of_cancelled = _return(db, cancelled, product, 1)
+    result = process_returns(db, return_ids=[accepted.return_id, too_many.return_id, of_cancelled.return_id])
+
+    assert result["processed"] == 1
+    assert result["rejected"] == 2
+    assert result["units_restocked"] == 2
+    assert result["refund_total"] == Decimal("20.00")
+    for row in (accepted, too_many, of_cancelled, stock, invoice):
+        db.refresh(row)
+    assert accepted.status == ReturnStatus.processed
+    assert accepted.refund_amount == Decimal("20.00")
+    assert too_many.status == ReturnStatus.rejected
+    assert "Only 1 of the 3 units" in too_many.notes
+    assert of_cancelled.status == ReturnStatus.rejected
+    assert "is cancelled" in of_cancelled.notes
+    assert stock.available_quantity == 7
+    assert invoice.refunded_amount == Decimal("20.00")
+
+    # A processed return is not processed again
+    assert process_returns(db, return_ids=[accepted.return_id])["processed"] == 0
+
+
+def test_restock_returns_without_inventory_adds_a_row(db: Session) -> None:
+    stocked = create_random_product(db)
+    first = Inventory(product_id=stocked.product_id, available_quantity=1)
+    second = Inventory(product_id=stocked.product_id, available_quantity=1)
+    db.add_all([first, second])
+    db.commit()
+    unstocked = create_random_product(db)
+
+    restock_returns(db, {stocked.product_id: 2, unstocked.product_id: 4})
+    db.commit()
+
+    db.refresh(first)
+    db.refresh(second)
+    assert (first.available_quantity, second.available_quantity) == (3, 1)
+    rows = db.exec(select(Inventory).where(Inventory.product_id == unstocked.product_id)).all()
+    assert [row.available_quantity for row in rows] == [4]
+
+
+def test_refund_invoices_credits_the_latest_invoice(db: Session) -> None:
+    product = create_random_product(db)
+    order = create_random_order(db, [(product, 2, Decimal("50.00"))], order_status=OrderStatus.delivered)
+    earlier, latest = _invoice(db, order), _invoice(db, order)
+
+    refund_invoices(db, {order.order_id: Decimal("12.50")})
+    refund_invoices(db, {order.order_id: Decimal("7.50")})
+    db.commit()
+
+    db.refresh(earlier)
+    db.refresh(latest)
+    assert earlier.refunded_amount == Decimal("0.00")
+    assert latest.refunded_amount == Decimal("20.00")
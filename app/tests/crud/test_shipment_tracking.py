@@ -0,0 +1,45 @@
+import datetime
+
+from app.crud.shipment_tracking import CARRIER_STATUSES, SHIPPING_TRANSITIONS, parse_tracking_feed
+from app.models import ShippingStatus
+from app.tests.utils.carrier_feed import fake_carrier_feed
+
+
+def test_parse_tracking_feed_keeps_latest_event() -> None:
+    tracking_numbers = [f"1Z{n:08d}" for n in range(500)]
+    feed, latest = fake_carrier_feed(tracking_numbers, invalid_lines=7)
+
+    lines, updates, errors = parse_tracking_feed(feed)
+
+    assert lines == feed.count(b"\n")
+    assert len(errors) == 7
+    assert set(updates) == set(tracking_numbers)
+    for tracking_number, carrier_status in latest.items():
+        assert updates[tracking_number].status == CARRIER_STATUSES[carrier_status]
+    delivered = [update for update in updates.values() if update.status == "delivered"]
+    assert delivered and all(update.receiver_name == "Recepción" for update in delivered)
+
+
+def test_parse_tracking_feed_times() -> None:
+    received_at = datetime.datetime(2026, 10, 20, 12, 0)
+    feed = (
+        b'{"tracking_number": "A1", "status": "Out for delivery", "event_time": "2026-10-20T10:00:00+02:00"}\n'
+        b'{"tracking_number": "A1", "status": "in_transit", "event_time": "2026-10-20T07:30:00Z"}\n'
+        b"\n"
+        b'{"tracking_number": "B2", "status": "delivered"}\n'
+        b'{"tracking_number": "C3", "status": "lost"}\n'
+    )
+    lines, updates, errors = parse_tracking_feed(feed, received_at)
+
+    assert lines == 4
+    # 10:00+02:00 is 08:00 UTC, later than the 07:30 event listed after it
+    assert updates["A1"].event_time == datetime.datetime(2026, 10, 20, 8, 0)
+    assert updates["B2"].event_time == received_at
+    assert errors == [{"line": 5, "error": "unknown status 'lost'"}]
+
+
+def test_shipping_transitions_cover_every_status() -> None:
+    statuses = {status.value for status in ShippingStatus}
+    assert set(SHIPPING_TRANSITIONS) == statuses
+    assert all(set(targets) <= statuses for targets in SHIPPING_TRANSITIONS.values())
+    assert SHIPPING_TRANSITIONS["delivered"] == ()
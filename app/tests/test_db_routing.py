@@ -0,0 +1,57 @@
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.deps import get_db, get_read_db
+from app.core import db as db_module
+from app.core.config import settings
+from app.core.db import PRIMARY_READS_COOKIE, ReadYourWritesMiddleware
+
+REPLICAS = ["localhost:5433", "localhost:5434"]
+
+
+@pytest.fixture
+def routing_client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    monkeypatch.setattr(settings, "POSTGRES_REPLICA_SERVERS", REPLICAS)
+    monkeypatch.setattr(db_module, "_replica_engines", None)
+
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=5)
+
+    @app.get("/read")
+    def read(db: Session = Depends(get_read_db)) -> dict:
+        return {"port": db.get_bind().url.port, "replica": db.info["replica"]}
+
+    @app.post("/write")
+    def write(db: Session = Depends(get_db)) -> dict:
+        db.dispatch.after_commit(db)  # what a commit on the primary fires
+        return {}
+
+    @app.post("/no-write")
+    def no_write(db: Session = Depends(get_db)) -> dict:
+        return {}
+
+    return TestClient(app)
+
+
+def test_reads_go_to_replicas_round_robin(routing_client: TestClient) -> None:
+    ports = {routing_client.get("/read").json()["port"] for _ in range(4)}
+    assert ports == {5433, 5434}
+
+
+def test_reads_use_primary_without_replicas(monkeypatch: pytest.MonkeyPatch, routing_client: TestClient) -> None:
+    monkeypatch.setattr(settings, "POSTGRES_REPLICA_SERVERS", [])
+    monkeypatch.setattr(db_module, "_replica_engines", None)
+    assert routing_client.get("/read").json() == {"port": settings.POSTGRES_PORT, "replica": False}
+
+
+def test_write_pins_client_reads_to_primary(routing_client: TestClient) -> None:
+    assert PRIMARY_READS_COOKIE not in routing_client.post("/no-write").cookies
+    assert routing_client.get("/read").json()["replica"] is True
+
+    response = routing_client.post("/write")
+    assert float(response.cookies[PRIMARY_READS_COOKIE]) > time.time()
+    assert routing_client.get("/read").json() == {"port": settings.POSTGRES_PORT, "replica": False}
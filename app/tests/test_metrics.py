@@ -0,0 +1,42 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.metrics import metrics_endpoint, statement_fingerprint
+
+
+@pytest.mark.parametrize(
+    "statement, fingerprint",
+    [
+        (
+            "SELECT * FROM users WHERE email = 'ana@example.com' AND user_id IN (1, 2, 3)",
+            "SELECT * FROM users WHERE email = ? AND user_id IN (?)",
+        ),
+        (
+            "SELECT t1.name FROM products t1\n  WHERE t1.price > 12.50 -- cheap ones\n  LIMIT %(param_1)s",
+            "SELECT t1.name FROM products t1 WHERE t1.price > ? LIMIT %(param_1)s",
+        ),
+        (
+            "UPDATE users SET full_name = 'O''Brien' WHERE user_id = 7",
+            "UPDATE users SET full_name = ? WHERE user_id = ?",
+        ),
+        ("SELECT now() - interval '30 days', col::text FROM t", "SELECT now() - interval ?, col::text FROM t"),
+    ],
+)
+def test_statement_fingerprint(statement: str, fingerprint: str) -> None:
+    assert statement_fingerprint(statement) == fingerprint
+
+
+def test_metrics_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    app = FastAPI()
+    app.add_route("/metrics", metrics_endpoint)
+    client = TestClient(app)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-me")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-me"}).status_code == 200
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 200
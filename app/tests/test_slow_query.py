@@ -0,0 +1,72 @@
+import datetime
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import slow_query
+from app.core.slow_query import (
+    SlowQuery,
+    SlowQueryRouteMiddleware,
+    _ExplainWorker,
+    current_route,
+    redact_parameters,
+)
+
+
+def _entry() -> SlowQuery:
+    return SlowQuery(
+        recorded_at=datetime.datetime.now(),
+        duration_ms=250.0,
+        statement="SELECT * FROM products WHERE product_id = %(id)s",
+        parameters={"id": 1},
+        route="/api/v1/products/{product_id}",
+        executemany=False,
+    )
+
+
+def test_redact_parameters() -> None:
+    assert redact_parameters({"id": 3, "email": "ana@example.com", "password_hash": 7}) == {
+        "id": 3,
+        "email": "<redacted str>",
+        "password_hash": "<redacted>",
+    }
+
+
+def test_route_is_known_without_metrics() -> None:
+    app = FastAPI()
+    app.add_middleware(SlowQueryRouteMiddleware)
+
+    @app.get("/products/{product_id}")
+    def read_product(product_id: int) -> dict:
+        return {"route": current_route()}
+
+    assert TestClient(app).get("/products/3").json() == {"route": "/products/{product_id}"}
+    assert current_route() is None
+
+
+def test_explain_runs_in_the_background(monkeypatch: pytest.MonkeyPatch) -> None:
+    release = threading.Event()
+    calls = []
+
+    def fake_explain(engine, statement, parameters):
+        release.wait(5)
+        calls.append((statement, parameters))
+        if parameters["id"] == 2:
+            raise RuntimeError("relation does not exist")
+        return [{"Plan": {"Node Type": "Index Scan"}}]
+
+    monkeypatch.setattr(slow_query, "_explain", fake_explain)
+    worker = _ExplainWorker()
+    planned, failed = _entry(), _entry()
+    # submit returns while the plan is still pending
+    worker.submit(None, planned, planned.statement, {"id": 1})
+    worker.submit(None, failed, failed.statement, {"id": 2})
+    assert planned.plan is None and not calls
+
+    release.set()
+    worker.join()
+    assert planned.plan == [{"Plan": {"Node Type": "Index Scan"}}]
+    assert failed.plan is None and failed.plan_error == "relation does not exist"
+    assert len(calls) == 2
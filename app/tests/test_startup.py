@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+
+# Generous enough for slow CI machines; a regression like importing numpy or
+# a vendor SDK at module level shows up well before this in benchmarks.startup
+IMPORT_TIME_BUDGET_SECONDS = 3.0
+
+_IMPORT_APP = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+import app.core.db
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "engine_created": app.core.db._engine is not None,
+    "loaded": [name for name in ("sentry_sdk", "emails", "numpy") if name in sys.modules],
+}))
+"""
+
+
+def _import_app() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_APP], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_import_time_within_budget() -> None:
+    seconds = min(_import_app()["seconds"] for _ in range(3))
+    assert seconds < IMPORT_TIME_BUDGET_SECONDS, (
+        f"importing app.main took {seconds:.2f}s (budget {IMPORT_TIME_BUDGET_SECONDS}s), "
+        "run `python -m benchmarks.startup` to see where the time goes"
+    )
+
+
+def test_import_does_not_initialize_services() -> None:
+    result = _import_app()
+    assert not result["engine_created"]
+    assert result["loaded"] == []
@@ -0,0 +1,43 @@
+import datetime
+import json
+import random
+from collections.abc import Sequence
+
+# Event codes a carrier sends over a parcel's life, in order
+CARRIER_JOURNEY = ("label_created", "picked_up", "departed", "arrived_at_facility", "out_for_delivery", "delivered")
+
+
+def fake_carrier_feed(
+    tracking_numbers: Sequence[str],
+    start: datetime.datetime = datetime.datetime(2026, 10, 20, 6, 0),
+    failure_rate: float = 0.1,
+    invalid_lines: int = 0,
+    seed: int = 0,
+) -> tuple[bytes, dict[str, str]]:
+    """
+    NDJSON feed like a carrier's, with part of each parcel's journey (some
+    ending in a failed delivery) shuffled out of order. Returns the feed and
+    the carrier code of the latest event per tracking number.
+    """
+    rng = random.Random(seed)
+    events = []
+    latest = {}
+    for tracking_number in tracking_numbers:
+        journey = list(CARRIER_JOURNEY[: rng.randint(1, len(CARRIER_JOURNEY))])
+        if journey[-1] == "out_for_delivery" and rng.random() < failure_rate:
+            journey.append("delivery_failed")
+        event_time = start
+        for status in journey:
+            event_time += datetime.timedelta(minutes=rng.randint(5, 600))
+            events.append({
+                "tracking_number": tracking_number,
+                "status": status.upper(),
+                "event_time": event_time.isoformat() + "Z",
+                **({"receiver_name": "Recepción"} if status == "delivered" else {}),
+            })
+        latest[tracking_number] = journey[-1]
+    rng.shuffle(events)
+    lines = [json.dumps(event) for event in events]
+    for _ in range(invalid_lines):
+        lines.insert(rng.randint(0, len(lines)), rng.choice(["{not json", '{"status": "delivered"}', "[]"]))
+    return ("\n".join(lines) + "\n").encode(), latest
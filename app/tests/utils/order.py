@@ -0,0 +1,67 @@
+import datetime
+from decimal import Decimal
+from typing import Optional, Sequence, Tuple
+
+from sqlmodel import Session
+
+from app.models import Order, OrderDetail, OrderStatus, Product, User, UserType
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+def create_random_product(db: Session, **fields) -> Product:
+    product = Product(
+        product_code=random_lower_string()[:20],
+        name=random_lower_string(),
+        regular_price=Decimal("10.00"),
+        unit_of_measure="unidad",
+        **fields,
+    )
+    db.add(product)
+    db.commit()
+    db.refresh(product)
+    return product
+
+
+def create_random_customer(db: Session) -> User:
+    user = User(email=random_email(), password=random_lower_string(), role=UserType.customer)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def create_random_order(
+    db: Session,
+    lines: Sequence[Tuple[Product, int, Decimal]],
+    *,
+    order_date: Optional[datetime.datetime] = None,
+    order_status: OrderStatus = OrderStatus.pending,
+    user: Optional[User] = None,
+) -> Order:
+    """Order with one detail per (product, quantity, unit_price) line"""
+    user = user or create_random_customer(db)
+    order = Order(
+        user_id=user.user_id,
+        order_status=order_status,
+        order_total=sum(quantity * unit_price for _, quantity, unit_price in lines),
+        order_date=order_date or datetime.datetime.now(),
+    )
+    db.add(order)
+    db.commit()
+    db.refresh(order)
+    add_order_lines(db, order, lines)
+    return order
+
+
+def add_order_lines(db: Session, order: Order, lines: Sequence[Tuple[Product, int, Decimal]]) -> None:
+    for product, quantity, unit_price in lines:
+        db.add(
+            OrderDetail(
+                order_id=order.order_id,
+                product_id=product.product_id,
+                quantity=quantity,
+                unit_price=unit_price,
+                total_price=quantity * unit_price,
+            )
+        )
+    db.commit()
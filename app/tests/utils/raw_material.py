@@ -0,0 +1,19 @@
+from decimal import Decimal
+
+from sqlmodel import Session
+
+from app.crud.raw_material_inventory import create_raw_material_inventory
+from app.models import RawMaterialInventory, RawMaterialInventoryCreate
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_material(db: Session, **fields) -> RawMaterialInventory:
+    """Raw material whose opening stock, if any, becomes its first lot"""
+    material_in = RawMaterialInventoryCreate(
+        material_name=random_lower_string(),
+        material_type="resina",
+        unit_of_measure="kg",
+        cost_per_unit=Decimal("2.50"),
+        **fields,
+    )
+    return create_raw_material_inventory(db, material_in)
@@ -0,0 +1,214 @@
+"""
+Throughput and latency of the catalog and auth hot paths.
+
+Optionally seeds the synthetic catalog (see benchmarks.seed_catalog), then
+sends each scenario's requests from a pool of threads and reports
+requests/s and p50/p95/p99 latencies. The JSON report is tagged with the
+git commit, so runs can be compared across commits with --compare.
+
+Requests go to --base-url (e.g. a uvicorn started with the production
+settings) or, without it, to the app in-process.
+
+    python -m benchmarks.api --seed --products 20000 --output bench.json
+    python -m benchmarks.api --compare bench.json
+"""
+import argparse
+import datetime
+import json
+import platform
+import random
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import engine
+from benchmarks.seed_catalog import BENCH_USER_EMAIL, BENCH_USER_PASSWORD, seed_catalog
+
+API = settings.API_V1_STR
+
+
+class Samples:
+    """Ids and terms the scenarios pick their requests from"""
+
+    def __init__(self, rng: random.Random) -> None:
+        self.rng = rng
+        self._lock = threading.Lock()
+        with engine.connect() as connection:
+            self.product_ids = connection.execute(
+                text("SELECT product_id FROM products ORDER BY product_id")
+            ).scalars().all()
+            self.category_ids = connection.execute(
+                text("SELECT category_id FROM categories ORDER BY category_id")
+            ).scalars().all()
+            self.brand_ids = connection.execute(
+                text("SELECT brand_id FROM brands ORDER BY brand_id")
+            ).scalars().all()
+        if not self.product_ids:
+            raise SystemExit("No products found, run with --seed first")
+        self.search_terms = ["tubo", "codo", "pvc", "válvula", "adaptador", "1/2", "tee", "unión"]
+
+    def choice(self, values: List[Any]) -> Any:
+        with self._lock:
+            return self.rng.choice(values)
+
+    def random(self) -> float:
+        with self._lock:
+            return self.rng.random()
+
+
+def _browse_payload(samples: Samples) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"skip": 0, "limit": 24, "category_ids": [samples.choice(samples.category_ids)]}
+    if samples.random() < 0.5:
+        payload["brand_ids"] = [samples.choice(samples.brand_ids)]
+    if samples.random() < 0.3:
+        payload["attributes"] = {"material": [samples.choice(["PVC", "CPVC", "PE", "PP"])]}
+    return payload
+
+
+# name -> function(client, samples) returning the response
+SCENARIOS: Dict[str, Callable[[Any, Samples], Any]] = {
+    "products_filter": lambda client, samples: client.post(
+        f"{API}/products/", json=_browse_payload(samples)
+    ),
+    "products_paginated": lambda client, samples: client.post(
+        f"{API}/products/paginated", json=_browse_payload(samples)
+    ),
+    "product_detail": lambda client, samples: client.get(
+        f"{API}/products/{samples.choice(samples.product_ids)}"
+    ),
+    "products_quick_search": lambda client, samples: client.get(
+        f"{API}/products/search/quick", params={"search": samples.choice(samples.search_terms), "limit": 5}
+    ),
+    "categories_menu": lambda client, samples: client.get(f"{API}/categories/menu"),
+    "login": lambda client, samples: client.post(
+        f"{API}/login/access-token",
+        data={"username": BENCH_USER_EMAIL, "password": BENCH_USER_PASSWORD},
+    ),
+}
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(percentile / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(client, samples: Samples, scenario: Callable, requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        scenario(client, samples)
+
+    def timed(_):
+        start = time.perf_counter()
+        response = scenario(client, samples)
+        return (time.perf_counter() - start) * 1000, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status >= 400)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    print(f"\n{'scenario':>22}  {'rps':>18}  {'p50 ms':>18}  {'p95 ms':>18}  {'p99 ms':>18}")
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        cells = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            change = (result[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            cells.append(f"{result[key]:>9.1f} ({change:+6.1f}%)")
+        print(f"{name:>22}  " + "  ".join(cells))
+    print(f"(vs {baseline.get('commit')} from {baseline.get('timestamp')})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the app in-process")
+    parser.add_argument("--seed", action="store_true", help="(Re)seed the synthetic catalog first")
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=50, help="Requests for login (bcrypt bound)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    if args.seed:
+        print("Seeding:", seed_catalog(args.products, args.orders))
+
+    samples = Samples(random.Random(args.random_seed))
+    if args.base_url:
+        import httpx
+        client = httpx.Client(base_url=args.base_url, timeout=60)
+    else:
+        from fastapi.testclient import TestClient
+        from app.main import app
+        client = TestClient(app)
+
+    results = {}
+    with client:
+        for name in args.scenarios:
+            requests = args.login_requests if name == "login" else args.requests
+            results[name] = run_scenario(
+                client, samples, SCENARIOS[name], requests, args.concurrency, min(args.warmup, requests)
+            )
+            result = results[name]
+            print(
+                f"{name:>22}: {result['throughput_rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f} ms  "
+                f"p95 {result['p95_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}"
+            )
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "target": args.base_url or "in-process",
+        "python": platform.python_version(),
+        "products": len(samples.product_ids),
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Attribute filtering over JSONB: per-key ->> IN (previous) vs @> containment,
+with and without the jsonb_path_ops GIN index.
+
+Builds a temporary table of synthetic products with 10 attribute keys (two of
+them list-valued) in the database configured by the app settings, so it needs
+a reachable PostgreSQL but leaves no data behind.
+
+    python -m benchmarks.attribute_filter --products 100000
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import Column, Integer, MetaData, Table, func, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.db import engine
+from app.crud.product import attribute_contains_filter
+
+bench_products = Table(
+    "bench_attribute_products",
+    MetaData(),
+    Column("product_id", Integer, primary_key=True),
+    Column("attributes", JSONB),
+    prefixes=["TEMPORARY"],
+)
+
+_SEED_SQL = """
+    INSERT INTO bench_attribute_products (product_id, attributes)
+    SELECT g, jsonb_build_object(
+        'material', (ARRAY['PVC', 'CPVC', 'PE', 'PP'])[1 + floor(random() * 4)::int],
+        'diametro', (ARRAY['1/2', '3/4', '1', '1 1/2', '2', '3', '4', '6'])[1 + floor(random() * 8)::int],
+        'presion_psi', (ARRAY[80, 100, 160, 200, 315])[1 + floor(random() * 5)::int],
+        'largo_m', 1 + floor(random() * 6)::int,
+        'color', (ARRAY['blanco', 'gris', 'naranja', 'azul'])[1 + floor(random() * 4)::int],
+        'espesor_mm', round((1 + random() * 9)::numeric, 1),
+        'union', (ARRAY['soldada', 'roscada', 'campana'])[1 + floor(random() * 3)::int],
+        'certificado', random() < 0.5,
+        'norma', jsonb_build_array(
+            (ARRAY['NTC 382', 'NTC 1339', 'ASTM D2241', 'ASTM D1785'])[1 + floor(random() * 4)::int],
+            (ARRAY['ISO 1452', 'ISO 4427', 'NTC 3722'])[1 + floor(random() * 3)::int]
+        ),
+        'usos', jsonb_build_array(
+            (ARRAY['agua potable', 'riego', 'drenaje', 'industrial'])[1 + floor(random() * 4)::int]
+        )
+    )
+    FROM generate_series(1, :products) AS g
+"""
+
+FILTERS = {
+    "material": ["PVC"],
+    "diametro": ["1/2", "3/4"],
+    "norma": ["NTC 382"],
+}
+
+
+def previous_filter(column):
+    return [column[key].astext.in_(values) for key, values in FILTERS.items()]
+
+
+def containment_filter(column):
+    return [attribute_contains_filter(column, key, values) for key, values in FILTERS.items()]
+
+
+def measure(connection, conditions, runs: int) -> tuple[int, float, float]:
+    query = select(func.count()).select_from(bench_products).where(*conditions)
+    timings = []
+    count = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        count = connection.execute(query).scalar_one()
+        timings.append((time.perf_counter() - start) * 1000)
+    return count, statistics.median(timings), max(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--seed", type=float, default=0.42)
+    args = parser.parse_args()
+
+    column = bench_products.c.attributes
+    with engine.connect() as connection:
+        bench_products.create(connection)
+        connection.execute(text("SELECT setseed(:seed)"), {"seed": args.seed})
+        connection.execute(text(_SEED_SQL), {"products": args.products})
+        connection.execute(text("ANALYZE bench_attribute_products"))
+
+        results = [
+            ("->> IN, no index", *measure(connection, previous_filter(column), args.runs)),
+            ("@> containment, no index", *measure(connection, containment_filter(column), args.runs)),
+        ]
+        connection.execute(text(
+            "CREATE INDEX ON bench_attribute_products USING gin (attributes jsonb_path_ops)"
+        ))
+        connection.execute(text("ANALYZE bench_attribute_products"))
+        results.append(
+            ("@> containment, GIN", *measure(connection, containment_filter(column), args.runs))
+        )
+        connection.rollback()
+
+    print(f"{args.products} products, 10 attribute keys, median of {args.runs} runs")
+    for name, count, median, worst in results:
+        print(f"{name:>26}: {median:9.2f} ms median  {worst:9.2f} ms max  {count:7d} matches")
+    print("(->> IN cannot match values inside list-valued attributes such as 'norma', "
+          "hence the different match count)")
+
+
+if __name__ == "__main__":
+    main()
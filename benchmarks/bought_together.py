@@ -0,0 +1,74 @@
+"""
+Co-purchase pair counting for the bought-together job over synthetic order lines.
+
+Compares a pure Python count (itertools.combinations + Counter, on a slice
+of the lines) with count_copurchase_pairs, which counts the sparse
+co-occurrence matrix with NumPy. No database needed.
+
+    python -m benchmarks.bought_together --lines 1000000
+"""
+import argparse
+import itertools
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from app.crud.association import count_copurchase_pairs, count_product_orders
+
+
+def make_lines(lines: int, products: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """Order lines with ~5 lines per order and Zipf-like product popularity"""
+    rng = np.random.default_rng(seed)
+    sizes = rng.geometric(1 / 5, size=lines)
+    sizes = sizes[np.cumsum(sizes) <= lines]
+    order_ids = np.repeat(np.arange(1, len(sizes) + 1), sizes)
+    weights = 1 / np.arange(1, products + 1) ** 0.8
+    product_ids = rng.choice(
+        np.arange(1, products + 1), size=len(order_ids), p=weights / weights.sum()
+    )
+    return order_ids, product_ids
+
+
+def python_pairs(order_ids: np.ndarray, product_ids: np.ndarray) -> Counter:
+    orders = defaultdict(set)
+    for order_id, product_id in zip(order_ids.tolist(), product_ids.tolist()):
+        orders[order_id].add(product_id)
+    pairs = Counter()
+    for order_products in orders.values():
+        pairs.update(itertools.combinations(sorted(order_products), 2))
+    return pairs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--python-lines", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    order_ids, product_ids = make_lines(args.lines, args.products, args.seed)
+    print(f"{len(order_ids)} order lines, {order_ids[-1]} orders, {args.products} products")
+
+    subset = order_ids <= order_ids[min(args.python_lines, len(order_ids)) - 1]
+    start = time.perf_counter()
+    expected = python_pairs(order_ids[subset], product_ids[subset])
+    python_seconds = time.perf_counter() - start
+
+    a, b, counts = count_copurchase_pairs(order_ids[subset], product_ids[subset])
+    assert dict(zip(zip(a.tolist(), b.tolist()), counts.tolist())) == dict(expected)
+
+    start = time.perf_counter()
+    a, b, counts = count_copurchase_pairs(order_ids, product_ids)
+    count_product_orders(order_ids, product_ids)
+    numpy_seconds = time.perf_counter() - start
+
+    print(f"{'python, ' + str(int(subset.sum())) + ' lines':>24}: {python_seconds:8.3f} s  "
+          f"{int(subset.sum()) / python_seconds:12,.0f} lines/s  {len(expected):9d} pairs")
+    print(f"{'numpy, all lines':>24}: {numpy_seconds:8.3f} s  "
+          f"{len(order_ids) / numpy_seconds:12,.0f} lines/s  {len(counts):9d} pairs")
+
+
+if __name__ == "__main__":
+    main()
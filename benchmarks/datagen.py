@@ -0,0 +1,664 @@
+"""
+Synthetic data at scale for local performance work.
+
+Generates brands, categories, suppliers, raw materials, products (with JSONB
+attributes), users with their role profiles (customers, distributors,
+employees, administrators), orders with their details, inventory,
+manufacturing machines, production batches and quality controls with NumPy,
+and bulk loads them with PostgreSQL COPY.
+
+Row counts grow linearly with --scale (scale 1 is ~340k rows, scale 10 ~3.4M)
+and the same --seed and --as-of always produce the same data. Rows are
+tagged ("SYN-" codes, "syn-" emails, "Syn " names) so --reset only removes
+generated data.
+
+    python -m benchmarks.datagen --scale 10 --seed 7
+"""
+import argparse
+import csv
+import datetime
+import io
+import json
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.db import engine
+from app.core.security import get_password_hash
+from app.crud.ar_aging import rebuild_ar_aging
+from app.crud.attribute import sync_product_attribute_values
+from app.crud.facet import invalidate_all_category_facets
+from app.crud.maintenance import refresh_maintenance_schedules
+from app.crud.manufacturing import rebuild_manufacturing_aggregates
+from app.crud.quality_analytics import rebuild_quality_stats
+
+# Rows per table at scale 1; categories are a fixed 12 x 6 tree
+BASE_COUNTS = {
+    "brands": 40,
+    "suppliers": 20,
+    "raw_materials": 60,
+    "products": 10_000,
+    "users": 10_000,
+    "orders": 50_000,
+    "machines": 12,
+    "batches": 20_000,
+}
+PARENT_CATEGORIES = 12
+SUBCATEGORIES_PER_PARENT = 6
+
+# Share of users per role; each gets the matching profile row
+ROLE_SHARES = {"customer": 0.85, "distributor": 0.10, "employee": 0.04, "administrator": 0.01}
+
+# Rows sent per COPY
+COPY_CHUNK_ROWS = 100_000
+
+SYN_PASSWORD = "syn-password"
+
+KINDS = ["Tubo", "Codo", "Tee", "Unión", "Válvula", "Adaptador", "Tapón", "Reducción"]
+MATERIALS = ["PVC", "CPVC", "PE", "PP"]
+DIAMETERS = ["1/2", "3/4", "1", "1 1/2", "2", "3", "4", "6"]
+PRESSURES = [80, 100, 160, 200, 315]
+COLORS = ["blanco", "gris", "naranja", "azul"]
+STANDARDS = ["NTC 382", "NTC 1339", "ASTM D2241", "ASTM D1785"]
+ORDER_STATUSES = ["pending", "processing", "shipped", "delivered", "cancelled"]
+ORDER_STATUS_SHARES = [0.05, 0.07, 0.08, 0.75, 0.05]
+PAYMENT_METHODS = ["tarjeta", "transferencia", "efectivo", "credito"]
+CITIES = ["Bogotá", "Medellín", "Cali", "Barranquilla", "Bucaramanga", "Pereira"]
+MACHINE_TYPES = ["Extrusora", "Inyectora", "Termoformadora"]
+MAINTENANCE_SCHEDULES = ["Mensual", "Semanal", "Cada 15 días", "Trimestral", "Cada 500 horas", "Semestral"]
+REJECTION_REASONS = [
+    "Fuga en prueba de presión",
+    "Diámetro fuera de tolerancia",
+    "Espesor de pared insuficiente",
+    "Burbujas en la superficie",
+    "Color no uniforme",
+]
+
+
+def _popularity(size: int, exponent: float) -> np.ndarray:
+    """Zipf-like probabilities, so a few products and buyers dominate"""
+    weights = 1 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _money(cents: np.ndarray) -> List[str]:
+    return [f"{value // 100}.{value % 100:02d}" for value in cents.tolist()]
+
+
+def _dates(as_of: datetime.date, days_ago: np.ndarray) -> List[str]:
+    return (np.datetime64(as_of) - days_ago.astype("timedelta64[D]")).astype(str).tolist()
+
+
+def _timestamps(as_of: datetime.date, seconds_ago: np.ndarray) -> List[str]:
+    base = np.datetime64(as_of, "s") + np.timedelta64(86_399, "s")
+    return (base - seconds_ago.astype("timedelta64[s]")).astype(str).tolist()
+
+
+def _pick(rng: np.random.Generator, values: Sequence, size: int, p=None) -> np.ndarray:
+    """Random indexes into `values`"""
+    return rng.choice(len(values), size=size, p=p)
+
+
+class DataGenerator:
+    def __init__(self, connection: Connection, scale: float, seed: int, as_of: datetime.date) -> None:
+        self.connection = connection
+        self.cursor = connection.connection.cursor()
+        self.rng = np.random.default_rng(seed)
+        self.as_of = as_of
+        self.counts = {name: max(1, int(round(count * scale))) for name, count in BASE_COUNTS.items()}
+        self.loaded: Dict[str, int] = {}
+
+    def _first_id(self, table: str, column: str) -> int:
+        return self.connection.execute(text(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}")).scalar_one()
+
+    def _copy(self, table: str, columns: Dict[str, Sequence]) -> None:
+        """COPY the given column values (all of the same length) in chunks"""
+        names = list(columns)
+        values = [value.tolist() if isinstance(value, np.ndarray) else value for value in columns.values()]
+        total = len(values[0])
+        statement = f"COPY {table} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv)"
+        for start in range(0, total, COPY_CHUNK_ROWS):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(
+                zip(*(column[start:start + COPY_CHUNK_ROWS] for column in values))
+            )
+            buffer.seek(0)
+            self.cursor.copy_expert(statement, buffer)
+        self.loaded[table] = self.loaded.get(table, 0) + total
+
+    def _sync_sequence(self, table: str, column: str) -> None:
+        self.connection.execute(text(f"""
+            SELECT setval(pg_get_serial_sequence('{table}', '{column}'), MAX({column}))
+            FROM {table} HAVING MAX({column}) IS NOT NULL
+        """))
+
+    def brands_and_categories(self) -> None:
+        count = self.counts["brands"]
+        first = self._first_id("brands", "brand_id")
+        self.brand_ids = np.arange(first, first + count)
+        self._copy("brands", {
+            "brand_id": self.brand_ids,
+            "name": [f"Syn Brand {i}" for i in range(1, count + 1)],
+            "description": [f"Synthetic brand {i}" for i in range(1, count + 1)],
+        })
+
+        first = self._first_id("categories", "category_id")
+        parents = np.arange(first, first + PARENT_CATEGORIES)
+        self.subcategory_ids = np.arange(
+            parents[-1] + 1, parents[-1] + 1 + PARENT_CATEGORIES * SUBCATEGORIES_PER_PARENT
+        )
+        self.subcategory_parents = np.repeat(parents, SUBCATEGORIES_PER_PARENT)
+        total = PARENT_CATEGORIES * (1 + SUBCATEGORIES_PER_PARENT)
+        now = _timestamps(self.as_of, np.zeros(total, dtype=np.int64))
+        self._copy("categories", {
+            "category_id": np.concatenate([parents, self.subcategory_ids]),
+            "category_name": [f"Syn Category {i}" for i in range(1, PARENT_CATEGORIES + 1)]
+            + [f"Syn Subcategory {p}-{c}" for p in range(1, PARENT_CATEGORIES + 1)
+               for c in range(1, SUBCATEGORIES_PER_PARENT + 1)],
+            "parent_category_id": [None] * PARENT_CATEGORIES + self.subcategory_parents.tolist(),
+            "description": ["Synthetic category"] * total,
+            "display_order": list(range(1, PARENT_CATEGORIES + 1))
+            + list(range(1, SUBCATEGORIES_PER_PARENT + 1)) * PARENT_CATEGORIES,
+            "is_active": ["t"] * total,
+            "created_at": now,
+            "updated_at": now,
+        })
+
+    def suppliers_and_raw_materials(self) -> None:
+        rng = self.rng
+        count = self.counts["suppliers"]
+        first = self._first_id("suppliers", "supplier_id")
+        supplier_ids = np.arange(first, first + count)
+        now = _timestamps(self.as_of, np.zeros(count, dtype=np.int64))
+        self._copy("suppliers", {
+            "supplier_id": supplier_ids,
+            "supplier_name": [f"Syn Supplier {i}" for i in range(1, count + 1)],
+            "contact_person": [f"Contacto {i}" for i in range(1, count + 1)],
+            "email": [f"syn-supplier-{i}@example.com" for i in range(1, count + 1)],
+            "supplier_type": ["resina"] * count,
+            "payment_terms": (np.array(["30 días", "60 días", "contado"])[_pick(rng, range(3), count)]).tolist(),
+            "lead_time": rng.integers(3, 30, size=count),
+            "quality_rating": np.round(rng.uniform(3, 5, size=count), 1),
+            "active_status": ["t"] * count,
+            "created_at": now,
+            "updated_at": now,
+        })
+
+        count = self.counts["raw_materials"]
+        material = _pick(rng, MATERIALS, count)
+        first = self._first_id("raw_material_inventories", "material_id")
+        self.material_ids = np.arange(first, first + count)
+        self.material_types = material
+        self.material_cost_cents = rng.integers(300, 1_500, size=count)
+        # 1-4 lots per material; stock and expiry of the material follow its lots,
+        # some of which are already expired
+        lot_material = np.repeat(np.arange(count), rng.integers(1, 5, size=count))
+        lot_count = len(lot_material)
+        lot_cents = rng.integers(20_000, 2_000_000, size=lot_count)
+        received_ago = rng.integers(0, 180, size=lot_count)
+        expires_in = rng.integers(120, 900, size=lot_count) - received_ago
+        lot_starts = np.flatnonzero(np.r_[True, lot_material[1:] != lot_material[:-1]])
+        self._copy("raw_material_inventories", {
+            "material_id": self.material_ids,
+            "material_name": [f"Syn Resina {MATERIALS[m]} {i}" for i, m in enumerate(material.tolist(), 1)],
+            "material_type": np.array(MATERIALS)[material],
+            "supplier_id": rng.choice(supplier_ids, size=count),
+            "quantity_available": _money(np.bincount(lot_material, weights=lot_cents, minlength=count).astype(np.int64)),
+            "unit_of_measure": ["kg"] * count,
+            "minimum_stock_level": ["500.00"] * count,
+            "cost_per_unit": _money(self.material_cost_cents),
+            "location": [f"Bodega MP {i % 3 + 1}" for i in range(count)],
+            "last_purchase_date": _dates(self.as_of, np.minimum.reduceat(received_ago, lot_starts)),
+            "expiration_date": _dates(self.as_of, -np.minimum.reduceat(expires_in, lot_starts)),
+            "created_at": _timestamps(self.as_of, np.zeros(count, dtype=np.int64)),
+            "updated_at": _timestamps(self.as_of, np.zeros(count, dtype=np.int64)),
+        })
+        self._copy("raw_material_lots", {
+            "material_id": self.material_ids[lot_material],
+            "material_type": np.array(MATERIALS)[material[lot_material]],
+            "lot_number": [f"SYN-L{i:06d}" for i in range(1, lot_count + 1)],
+            "quantity_received": _money(lot_cents),
+            "quantity_remaining": _money(lot_cents),
+            "cost_per_unit": _money(self.material_cost_cents[lot_material]),
+            "received_date": _dates(self.as_of, received_ago),
+            "expiration_date": _dates(self.as_of, -expires_in),
+            "created_at": _timestamps(self.as_of, received_ago * 86_400),
+        })
+
+    def products(self) -> None:
+        rng = self.rng
+        count = self.counts["products"]
+        first = self._first_id("products", "product_id")
+        self.product_ids = np.arange(first, first + count)
+        kind = _pick(rng, KINDS, count)
+        material = _pick(rng, MATERIALS, count)
+        diameter = _pick(rng, DIAMETERS, count)
+        pressure = _pick(rng, PRESSURES, count)
+        color = _pick(rng, COLORS, count)
+        standard = _pick(rng, STANDARDS, count)
+        length = rng.integers(1, 7, size=count)
+        certified = rng.random(count) < 0.5
+        subcategory = rng.integers(0, len(self.subcategory_ids), size=count)
+        # Bigger diameters cost more
+        self.price_cents = (rng.integers(500, 20_000, size=count) * (1 + diameter)).astype(np.int64)
+        on_sale = rng.random(count) < 0.15
+        self.product_materials = np.array(MATERIALS)[material]
+        self.product_material_types = material
+
+        names = []
+        descriptions = []
+        attributes = []
+        for k, m, d, p, c, s, l, cert in zip(
+            kind.tolist(), material.tolist(), diameter.tolist(), pressure.tolist(),
+            color.tolist(), standard.tolist(), length.tolist(), certified.tolist(),
+        ):
+            names.append(f'{KINDS[k]} {MATERIALS[m]} {DIAMETERS[d]}"')
+            descriptions.append(f"{KINDS[k]} de {MATERIALS[m]} de {DIAMETERS[d]} pulgadas para conducción de agua")
+            attributes.append(json.dumps({
+                "material": MATERIALS[m],
+                "diametro": DIAMETERS[d],
+                "presion_psi": PRESSURES[p],
+                "largo_m": l,
+                "color": COLORS[c],
+                "certificado": cert,
+                "norma": [STANDARDS[s]],
+            }, ensure_ascii=False))
+
+        sale_prices = _money(self.price_cents * 9 // 10)
+        created = _timestamps(self.as_of, rng.integers(86_400, 3 * 365 * 86_400, size=count))
+        self._copy("products", {
+            "product_id": self.product_ids,
+            "product_code": [f"SYN-{i:08d}" for i in self.product_ids.tolist()],
+            "name": names,
+            "description": descriptions,
+            "regular_price": _money(self.price_cents),
+            "sale_price": [price if sale else None for price, sale in zip(sale_prices, on_sale.tolist())],
+            "brand_id": rng.choice(self.brand_ids, size=count),
+            "unit_of_measure": ["unidad"] * count,
+            "image_url": [f"https://cdn.example.com/syn/{i}.jpg" for i in self.product_ids.tolist()],
+            "status": np.where(rng.random(count) < 0.92, "active", "out_of_stock"),
+            "category_id": self.subcategory_parents[subcategory],
+            "subcategory_id": self.subcategory_ids[subcategory],
+            "attributes": attributes,
+            "created_at": created,
+            "updated_at": created,
+        })
+
+    def inventory(self) -> None:
+        rng = self.rng
+        # 1-3 warehouses per product
+        warehouses = rng.integers(1, 4, size=len(self.product_ids))
+        product_ids = np.repeat(self.product_ids, warehouses)
+        warehouse_ids = np.concatenate([np.arange(1, w + 1) for w in warehouses.tolist()]) if len(warehouses) else warehouses
+        count = len(product_ids)
+        now = _timestamps(self.as_of, np.zeros(count, dtype=np.int64))
+        self._copy("inventory", {
+            "product_id": product_ids,
+            "available_quantity": rng.integers(0, 500, size=count),
+            "reserved_quantity": rng.integers(0, 20, size=count),
+            "minimum_stock_level": [20] * count,
+            "maximum_stock_level": [600] * count,
+            "warehouse_location": [f"Bodega {w}" for w in warehouse_ids.tolist()],
+            "warehouse_id": warehouse_ids,
+            "last_restock_date": _dates(self.as_of, rng.integers(0, 60, size=count)),
+            "last_count_date": _dates(self.as_of, rng.integers(0, 30, size=count)),
+            "updated_at": now,
+        })
+
+    def users(self) -> None:
+        rng = self.rng
+        count = self.counts["users"]
+        first = self._first_id("users", "user_id")
+        self.user_ids = np.arange(first, first + count)
+        roles = np.array(list(ROLE_SHARES))[_pick(rng, ROLE_SHARES, count, p=list(ROLE_SHARES.values()))]
+        password_hash = get_password_hash(SYN_PASSWORD)
+        registered_days = rng.integers(1, 3 * 365, size=count)
+        self._copy("users", {
+            "user_id": self.user_ids,
+            "email": [f"syn-{i}@example.com" for i in self.user_ids.tolist()],
+            "full_name": [f"Syn User {i}" for i in self.user_ids.tolist()],
+            "phone": [f"+57 3{i % 1_000_000_000:09d}" for i in rng.integers(0, 10**9, size=count).tolist()],
+            "is_active": np.where(rng.random(count) < 0.97, "t", "f"),
+            "password": [password_hash] * count,
+            "role": roles,
+            "registration_date": _timestamps(self.as_of, registered_days * 86_400),
+            "last_login": _timestamps(self.as_of, rng.integers(0, 90 * 86_400, size=count)),
+        })
+
+        self.customer_user_ids = self.user_ids[roles == "customer"]
+        self.distributor_user_ids = self.user_ids[roles == "distributor"]
+        self.employee_user_ids = self.user_ids[roles == "employee"]
+        admin_user_ids = self.user_ids[roles == "administrator"]
+        registered = dict(zip(self.user_ids.tolist(), registered_days.tolist()))
+
+        count = len(self.customer_user_ids)
+        addresses = [f"Calle {i % 200} # {i % 97}-{i % 50}, {CITIES[i % len(CITIES)]}"
+                     for i in self.customer_user_ids.tolist()]
+        self._copy("customers", {
+            "user_id": self.customer_user_ids,
+            "shipping_address": addresses,
+            "billing_address": addresses,
+            "membership_level": np.array(["basic", "silver", "gold"])[_pick(rng, range(3), count, p=[0.7, 0.2, 0.1])],
+            "birth_date": _dates(self.as_of, rng.integers(18 * 365, 75 * 365, size=count)),
+            "purchase_count": [0] * count,
+        })
+
+        count = len(self.distributor_user_ids)
+        self._copy("distributors", {
+            "user_id": self.distributor_user_ids,
+            "company_name": [f"Syn Distribuciones {i} S.A.S." for i in self.distributor_user_ids.tolist()],
+            "tax_id": [f"900{i:06d}" for i in self.distributor_user_ids.tolist()],
+            "business_address": [f"Zona Industrial {CITIES[i % len(CITIES)]}, Bodega {i % 40}"
+                                 for i in self.distributor_user_ids.tolist()],
+            "distribution_zone": np.array(CITIES)[_pick(rng, CITIES, count)],
+            "credit_limit": _money(rng.integers(50, 2_000, size=count) * 100_000),
+            "contract_date": _dates(
+                self.as_of, np.array([registered[i] for i in self.distributor_user_ids.tolist()], dtype=np.int64)
+            ),
+        })
+
+        count = len(self.employee_user_ids)
+        positions = np.array(["Operario", "Inspector de calidad", "Supervisor", "Técnico de mantenimiento"])
+        self._copy("employees", {
+            "user_id": self.employee_user_ids,
+            "position": positions[_pick(rng, positions, count, p=[0.6, 0.2, 0.1, 0.1])],
+            "department": ["Producción"] * count,
+            "hire_date": _dates(self.as_of, rng.integers(30, 10 * 365, size=count)),
+            "salary": _money(rng.integers(1_400, 6_000, size=count) * 100_000),
+            "employee_number": [f"SYN-E{i:08d}" for i in self.employee_user_ids.tolist()],
+            "schedule": np.array(["Turno A", "Turno B", "Turno C"])[_pick(rng, range(3), count)],
+        })
+
+        count = len(admin_user_ids)
+        self._copy("administrators", {
+            "user_id": admin_user_ids,
+            "access_level": np.array(["full", "limited"])[_pick(rng, range(2), count)],
+            "department": ["Administración"] * count,
+            "can_create_users": np.where(rng.random(count) < 0.5, "t", "f"),
+            "can_modify_products": ["t"] * count,
+            "can_view_reports": ["t"] * count,
+            "assignment_date": _dates(self.as_of, rng.integers(30, 5 * 365, size=count)),
+        })
+
+    def orders(self) -> None:
+        rng = self.rng
+        count = self.counts["orders"]
+        first = self._first_id("orders", "order_id")
+        order_ids = np.arange(first, first + count)
+
+        # Distributors buy more often, and in larger quantities
+        buyers = np.concatenate([self.customer_user_ids, self.distributor_user_ids])
+        if not len(buyers):
+            return
+        weights = np.concatenate([
+            np.ones(len(self.customer_user_ids)),
+            np.full(len(self.distributor_user_ids), 8.0),
+        ]) * rng.permutation(_popularity(len(buyers), 0.6))
+        buyer = rng.choice(len(buyers), size=count, p=weights / weights.sum())
+        user_ids = buyers[buyer]
+        is_distributor = buyer >= len(self.customer_user_ids)
+
+        lines = 1 + rng.geometric(1 / 3, size=count)
+        lines = np.minimum(lines, 15)
+        line_orders = np.repeat(np.arange(count), lines)
+        product = rng.choice(len(self.product_ids), size=len(line_orders), p=_popularity(len(self.product_ids), 0.8))
+        quantity = rng.integers(1, 11, size=len(line_orders)) * np.where(is_distributor[line_orders], 10, 1)
+        unit_cents = self.price_cents[product]
+        total_cents = unit_cents * quantity
+
+        subtotal = np.bincount(line_orders, weights=total_cents, minlength=count).astype(np.int64)
+        tax = subtotal * 19 // 100
+        shipping = np.where(subtotal >= 20_000_000, 0, 1_200_000)
+        status = _pick(rng, ORDER_STATUSES, count, p=ORDER_STATUS_SHARES)
+        days_ago = rng.integers(0, 730, size=count)
+        # Older orders are more likely to be finished
+        status = np.where((days_ago > 30) & (status < 3), 3, status)
+        delivered = status == ORDER_STATUSES.index("delivered")
+        shipped = delivered | (status == ORDER_STATUSES.index("shipped"))
+        delivery_days = np.maximum(days_ago - rng.integers(1, 8, size=count), 0)
+        addresses = [f"Calle {i % 200} # {i % 97}-{i % 50}, {CITIES[i % len(CITIES)]}" for i in user_ids.tolist()]
+
+        self._copy("orders", {
+            "order_id": order_ids,
+            "user_id": user_ids,
+            "order_status": np.array(ORDER_STATUSES)[status],
+            "payment_method": np.where(
+                is_distributor, "credito", np.array(PAYMENT_METHODS[:3])[_pick(rng, range(3), count)]
+            ),
+            "order_total": _money(subtotal + tax + shipping),
+            "tax_amount": _money(tax),
+            "shipping_cost": _money(shipping),
+            "discount_amount": ["0.00"] * count,
+            "shipping_address": addresses,
+            "billing_address": addresses,
+            "delivery_date": [d if ok else None for d, ok in zip(_dates(self.as_of, delivery_days), delivered.tolist())],
+            "tracking_number": [f"SYN{i:010d}" if ok else None for i, ok in zip(order_ids.tolist(), shipped.tolist())],
+            "order_date": _timestamps(self.as_of, days_ago * 86_400 + rng.integers(0, 86_400, size=count)),
+        })
+        self._copy("order_details", {
+            "order_id": order_ids[line_orders],
+            "product_id": self.product_ids[product],
+            "quantity": quantity,
+            "unit_price": _money(unit_cents),
+            "total_price": _money(total_cents),
+            "discount_applied": ["0.00"] * len(line_orders),
+        })
+
+        # Non-cancelled orders per customer
+        purchases = np.bincount(
+            buyer[status != ORDER_STATUSES.index("cancelled")], minlength=len(buyers)
+        )[:len(self.customer_user_ids)]
+        self.connection.execute(text("""
+            UPDATE customers c SET purchase_count = t.purchases
+            FROM unnest(CAST(:user_ids AS integer[]), CAST(:purchases AS integer[])) AS t(user_id, purchases)
+            WHERE c.user_id = t.user_id AND t.purchases > 0
+        """), {"user_ids": self.customer_user_ids.tolist(), "purchases": purchases.tolist()})
+
+    def manufacturing(self) -> None:
+        rng = self.rng
+        count = self.counts["machines"]
+        first = self._first_id("manufacturing_machines", "machine_id")
+        machine_ids = np.arange(first, first + count)
+        machine_type = _pick(rng, MACHINE_TYPES, count)
+        self._copy("manufacturing_machines", {
+            "machine_id": machine_ids,
+            "machine_name": [f"Syn Machine {i}" for i in range(1, count + 1)],
+            "machine_type": np.array(MACHINE_TYPES)[machine_type],
+            "purchase_date": _dates(self.as_of, rng.integers(365, 15 * 365, size=count)),
+            "maintenance_schedule": np.array(MAINTENANCE_SCHEDULES)[_pick(rng, MAINTENANCE_SCHEDULES, count)],
+            "last_maintenance_date": _dates(self.as_of, rng.integers(0, 120, size=count)),
+            "operational_status": np.where(rng.random(count) < 0.9, "operational", "maintenance"),
+            "production_capacity": [f"{c} unidades/día" for c in (rng.integers(5, 40, size=count) * 100).tolist()],
+        })
+
+        # Bill of materials: every product takes one resin of its material type
+        bom_material = np.empty(len(self.product_ids), dtype=np.int64)
+        for material_type in range(len(MATERIALS)):
+            products = self.product_material_types == material_type
+            same_type = np.flatnonzero(self.material_types == material_type)
+            candidates = same_type if len(same_type) else np.arange(len(self.material_ids))
+            bom_material[products] = rng.choice(candidates, size=int(products.sum()))
+        bom_grams = rng.integers(50, 2_000, size=len(self.product_ids))
+        self._copy("bill_of_materials", {
+            "product_id": self.product_ids,
+            "material_id": self.material_ids[bom_material],
+            "quantity_per_unit": [f"{g // 1000}.{g % 1000:03d}" for g in bom_grams.tolist()],
+        })
+
+        count = self.counts["batches"]
+        first = self._first_id("production_batches", "batch_id")
+        batch_ids = np.arange(first, first + count)
+        machine = rng.integers(0, len(machine_ids), size=count)
+        product = rng.choice(len(self.product_ids), size=count, p=_popularity(len(self.product_ids), 0.5))
+        quantity = rng.integers(10, 200, size=count) * 10
+        days_ago = rng.integers(0, 365, size=count)
+        # Each machine has its own failure rate, so QC analytics have something to find
+        failure_rate = rng.uniform(0.01, 0.12, size=len(machine_ids))[machine]
+        checked = days_ago > 1
+        failed = checked & (rng.random(count) < failure_rate)
+        batch_status = np.where(~checked, "pending", np.where(failed, "failed", "passed"))
+        operators = self.employee_user_ids
+        operator_ids = rng.choice(operators, size=count).tolist() if len(operators) else [None] * count
+        consumed_grams = quantity * bom_grams[product]
+        self._copy("production_batches", {
+            "batch_id": batch_ids,
+            "production_date": _dates(self.as_of, days_ago),
+            "product_id": self.product_ids[product],
+            "quantity_produced": quantity,
+            "material_used": self.product_materials[product],
+            "operator_id": operator_ids,
+            "machine_id": machine_ids[machine],
+            "quality_check_status": batch_status,
+            "production_cost": _money((consumed_grams * self.material_cost_cents[bom_material[product]] + 500) // 1000),
+            "created_at": _timestamps(self.as_of, days_ago * 86_400),
+        })
+        self._copy("production_batch_materials", {
+            "batch_id": batch_ids,
+            "material_id": self.material_ids[bom_material[product]],
+            "quantity": [f"{g // 1000}.{g % 1000:03d}" for g in consumed_grams.tolist()],
+        })
+
+        count = int(checked.sum())
+        failed = failed[checked]
+        reason = _pick(rng, REJECTION_REASONS, count)
+        inspector_ids = rng.choice(operators, size=count).tolist() if len(operators) else [None] * count
+        pressure_failed = failed & (reason == 0)
+        dimensional_failed = failed & ((reason == 1) | (reason == 2))
+        visual_failed = failed & (reason >= 3)
+        self._copy("quality_controls", {
+            "batch_id": batch_ids[checked],
+            "inspector_id": inspector_ids,
+            "check_date": _dates(self.as_of, days_ago[checked] - rng.integers(0, 2, size=count)),
+            "pressure_test_result": np.where(pressure_failed, "Falla", "OK"),
+            "dimensional_check_result": np.where(dimensional_failed, "Falla", "OK"),
+            "visual_inspection_result": np.where(visual_failed, "Falla", "OK"),
+            "status": np.where(failed, "failed", "passed"),
+            "rejection_reason": [REJECTION_REASONS[r] if f else None for r, f in zip(reason.tolist(), failed.tolist())],
+        })
+
+    def derived(self) -> None:
+        """Tables normally kept up to date by the ORM and jobs"""
+        self.connection.execute(text("""
+            INSERT INTO product_availability (
+                product_id, available_quantity, reserved_quantity,
+                net_available, warehouse_count, updated_at
+            )
+            SELECT p.product_id,
+                   COALESCE(SUM(i.available_quantity), 0),
+                   COALESCE(SUM(i.reserved_quantity), 0),
+                   COALESCE(SUM(GREATEST(i.available_quantity - i.reserved_quantity, 0)), 0),
+                   COUNT(i.inventory_id),
+                   now()
+            FROM products p
+            LEFT JOIN inventory i ON i.product_id = p.product_id
+            WHERE p.product_id BETWEEN :first AND :last
+            GROUP BY p.product_id
+        """), {"first": int(self.product_ids[0]), "last": int(self.product_ids[-1])})
+        sync_product_attribute_values(self.connection, self.product_ids.tolist())
+        refresh_maintenance_schedules(self.connection, commit=False)
+        rebuild_manufacturing_aggregates(self.connection, commit=False)
+        rebuild_quality_stats(self.connection, commit=False)
+        rebuild_ar_aging(self.connection, commit=False)
+        invalidate_all_category_facets(self.connection)
+        for table, column in (
+            ("brands", "brand_id"), ("categories", "category_id"), ("suppliers", "supplier_id"),
+            ("raw_material_inventories", "material_id"), ("products", "product_id"),
+            ("inventory", "inventory_id"), ("users", "user_id"), ("customers", "customer_id"),
+            ("distributors", "distributor_id"), ("employees", "employee_id"),
+            ("administrators", "administrator_id"), ("orders", "order_id"),
+            ("order_details", "order_detail_id"), ("manufacturing_machines", "machine_id"),
+            ("production_batches", "batch_id"), ("quality_controls", "quality_check_id"),
+        ):
+            self._sync_sequence(table, column)
+
+    def run(self) -> Dict[str, int]:
+        self.brands_and_categories()
+        self.suppliers_and_raw_materials()
+        self.products()
+        self.inventory()
+        self.users()
+        self.orders()
+        self.manufacturing()
+        self.derived()
+        return self.loaded
+
+
+def reset(connection: Connection) -> None:
+    """Delete previously generated rows"""
+    syn_users = "SELECT user_id FROM users WHERE email LIKE 'syn-%'"
+    syn_orders = f"SELECT order_id FROM orders WHERE user_id IN ({syn_users})"
+    syn_products = "SELECT product_id FROM products WHERE product_code LIKE 'SYN-%'"
+    syn_batches = f"SELECT batch_id FROM production_batches WHERE product_id IN ({syn_products})"
+    for statement in (
+        f"DELETE FROM quality_controls WHERE batch_id IN ({syn_batches})",
+        f"DELETE FROM production_batches WHERE product_id IN ({syn_products})",
+        "DELETE FROM manufacturing_machines WHERE machine_name LIKE 'Syn Machine %'",
+        f"DELETE FROM customer_returns WHERE order_id IN ({syn_orders})",
+        f"DELETE FROM invoice_payments WHERE order_id IN ({syn_orders})",
+        f"DELETE FROM shipping_deliveries WHERE order_id IN ({syn_orders})",
+        f"DELETE FROM order_details WHERE order_id IN ({syn_orders})",
+        f"DELETE FROM orders WHERE user_id IN ({syn_users})",
+        f"DELETE FROM customers WHERE user_id IN ({syn_users})",
+        f"DELETE FROM distributors WHERE user_id IN ({syn_users})",
+        f"DELETE FROM employees WHERE user_id IN ({syn_users})",
+        f"DELETE FROM administrators WHERE user_id IN ({syn_users})",
+        "DELETE FROM users WHERE email LIKE 'syn-%'",
+        f"DELETE FROM inventory WHERE product_id IN ({syn_products})",
+        f"DELETE FROM promotions WHERE product_id IN ({syn_products})",
+        f"DELETE FROM sales_daily_rollups WHERE product_id IN ({syn_products})",
+        "DELETE FROM products WHERE product_code LIKE 'SYN-%'",
+        "DELETE FROM categories WHERE category_name LIKE 'Syn %' AND parent_category_id IS NOT NULL",
+        "DELETE FROM categories WHERE category_name LIKE 'Syn %'",
+        "DELETE FROM brands WHERE name LIKE 'Syn Brand %'",
+        "DELETE FROM raw_material_inventories WHERE material_name LIKE 'Syn %'",
+        "DELETE FROM suppliers WHERE supplier_name LIKE 'Syn Supplier %'",
+    ):
+        connection.execute(text(statement))
+
+
+def generate(
+    scale: float = 1.0,
+    seed: int = 42,
+    as_of: Optional[datetime.date] = None,
+    reset_first: bool = True,
+) -> Dict[str, int]:
+    """Generate and load the synthetic data; returns the rows loaded per table"""
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        if reset_first:
+            reset(connection)
+        loaded = DataGenerator(connection, scale, seed, as_of or datetime.date.today()).run()
+        connection.execute(text("ANALYZE"))
+    loaded["seconds"] = round(time.perf_counter() - start, 2)
+    return loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=1.0, help="Scale factor; 1 is ~340k rows")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--as-of", type=datetime.date.fromisoformat, default=None,
+        help="Date the generated history ends at (YYYY-MM-DD, default today)",
+    )
+    parser.add_argument("--reset", action="store_true", help="Only delete previously generated data")
+    args = parser.parse_args()
+
+    if args.reset:
+        with engine.begin() as connection:
+            reset(connection)
+        print("Generated data removed")
+        return
+    loaded = generate(args.scale, args.seed, args.as_of)
+    seconds = loaded.pop("seconds")
+    total = sum(loaded.values())
+    for table, rows in loaded.items():
+        print(f"{table:>26}: {rows:>12,}")
+    print(f"{'total':>26}: {total:>12,} rows in {seconds:.1f} s ({total / seconds:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Synthetic catalog for the API benchmarks.
+
+Inserts brands, categories, products (with JSONB attributes), inventory,
+promotions, users and orders straight into the configured database with
+INSERT ... SELECT generate_series, so even large catalogs seed in seconds.
+Every row is tagged ("BENCH-" product codes, "bench-" emails, "Bench "
+names) so --reset only removes benchmark data.
+
+    python -m benchmarks.seed_catalog --products 20000 --orders 50000
+"""
+import argparse
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.core.security import get_password_hash
+from app.crud.attribute import rebuild_product_attribute_values
+from app.crud.facet import invalidate_all_category_facets
+from app.crud.utils import column_type
+
+BENCH_USER_EMAIL = "bench@example.com"
+BENCH_USER_PASSWORD = "bench-password"
+
+PARENT_CATEGORIES = 12
+SUBCATEGORIES_PER_PARENT = 6
+
+
+def reset(connection: Connection) -> None:
+    """Delete previously seeded benchmark rows"""
+    connection.execute(text("""
+        DELETE FROM order_details WHERE order_id IN (
+            SELECT o.order_id FROM orders o JOIN users u ON u.user_id = o.user_id
+            WHERE u.email LIKE 'bench-%' OR u.email = :email
+        )
+    """), {"email": BENCH_USER_EMAIL})
+    connection.execute(text("""
+        DELETE FROM orders WHERE user_id IN (
+            SELECT user_id FROM users WHERE email LIKE 'bench-%' OR email = :email
+        )
+    """), {"email": BENCH_USER_EMAIL})
+    connection.execute(text("DELETE FROM customers WHERE user_id IN (SELECT user_id FROM users WHERE email LIKE 'bench-%')"))
+    connection.execute(
+        text("DELETE FROM users WHERE email LIKE 'bench-%' OR email = :email"),
+        {"email": BENCH_USER_EMAIL},
+    )
+    for table in ("inventory", "promotions", "sales_daily_rollups"):
+        connection.execute(text(f"""
+            DELETE FROM {table} WHERE product_id IN (
+                SELECT product_id FROM products WHERE product_code LIKE 'BENCH-%'
+            )
+        """))
+    connection.execute(text("DELETE FROM products WHERE product_code LIKE 'BENCH-%'"))
+    connection.execute(text("DELETE FROM categories WHERE category_name LIKE 'Bench %' AND parent_category_id IS NOT NULL"))
+    connection.execute(text("DELETE FROM categories WHERE category_name LIKE 'Bench %'"))
+    connection.execute(text("DELETE FROM brands WHERE name LIKE 'Bench %'"))
+
+
+def seed(connection: Connection, products: int, orders: int, seed_value: float = 0.42) -> dict:
+    """Insert the synthetic catalog; returns the number of rows per table"""
+    product_status = column_type(connection, "products", "status")
+    order_status = column_type(connection, "orders", "order_status")
+    user_role = column_type(connection, "users", "role")
+    promotion_type = column_type(connection, "promotions", "promotion_type")
+    promotion_status = column_type(connection, "promotions", "status")
+
+    connection.execute(text("SELECT setseed(:seed)"), {"seed": seed_value})
+    brands = max(10, products // 200)
+    users = max(100, orders // 5)
+    params = {"products": products, "orders": orders, "brands": brands, "users": users}
+
+    connection.execute(text("""
+        INSERT INTO brands (name, description)
+        SELECT 'Bench Brand ' || g, 'Synthetic brand ' || g
+        FROM generate_series(1, :brands) AS g
+    """), params)
+    connection.execute(text("""
+        INSERT INTO categories (category_name, description, display_order, is_active, created_at, updated_at)
+        SELECT 'Bench Category ' || g, 'Synthetic category ' || g, g, true, now(), now()
+        FROM generate_series(1, :parents) AS g
+    """), {"parents": PARENT_CATEGORIES})
+    connection.execute(text("""
+        INSERT INTO categories (category_name, parent_category_id, description, display_order, is_active, created_at, updated_at)
+        SELECT 'Bench Subcategory ' || p.category_id || '-' || g, p.category_id, 'Synthetic subcategory', g, true, now(), now()
+        FROM categories p
+        CROSS JOIN generate_series(1, :children) AS g
+        WHERE p.category_name LIKE 'Bench Category %'
+    """), {"children": SUBCATEGORIES_PER_PARENT})
+
+    connection.execute(text(f"""
+        WITH brand_ids AS (
+            SELECT array_agg(brand_id ORDER BY brand_id) AS ids FROM brands WHERE name LIKE 'Bench Brand %'
+        ),
+        subcategories AS (
+            SELECT array_agg(category_id ORDER BY category_id) AS ids,
+                   array_agg(parent_category_id ORDER BY category_id) AS parents
+            FROM categories WHERE category_name LIKE 'Bench Subcategory %'
+        ),
+        generated AS (
+            SELECT g,
+                   (ARRAY['Tubo', 'Codo', 'Tee', 'Unión', 'Válvula', 'Adaptador', 'Tapón', 'Reducción'])[1 + floor(random() * 8)::int] AS kind,
+                   (ARRAY['PVC', 'CPVC', 'PE', 'PP'])[1 + floor(random() * 4)::int] AS material,
+                   (ARRAY['1/2', '3/4', '1', '1 1/2', '2', '3', '4', '6'])[1 + floor(random() * 8)::int] AS diametro,
+                   1 + floor(random() * array_length(s.ids, 1))::int AS sub,
+                   1 + floor(random() * array_length(b.ids, 1))::int AS brand,
+                   round((500 + random() * 90000)::numeric / 100, 2) AS price
+            FROM generate_series(1, :products) AS g
+            CROSS JOIN subcategories s
+            CROSS JOIN brand_ids b
+        )
+        INSERT INTO products (
+            product_code, name, description, regular_price, sale_price, brand_id,
+            unit_of_measure, image_url, status, category_id, subcategory_id,
+            attributes, created_at, updated_at
+        )
+        SELECT 'BENCH-' || lpad(g::text, 7, '0'),
+               kind || ' ' || material || ' ' || diametro || '"',
+               kind || ' de ' || material || ' de ' || diametro || ' pulgadas para conducción de agua',
+               price,
+               CASE WHEN random() < 0.15 THEN round(price * 0.9, 2) END,
+               (SELECT ids[brand] FROM brand_ids),
+               'unidad',
+               'https://cdn.example.com/bench/' || g || '.jpg',
+               (CASE WHEN random() < 0.9 THEN 'active' ELSE 'out_of_stock' END)::{product_status},
+               (SELECT parents[sub] FROM subcategories),
+               (SELECT ids[sub] FROM subcategories),
+               jsonb_build_object(
+                   'material', material,
+                   'diametro', diametro,
+                   'presion_psi', (ARRAY[80, 100, 160, 200, 315])[1 + floor(random() * 5)::int],
+                   'largo_m', 1 + floor(random() * 6)::int,
+                   'color', (ARRAY['blanco', 'gris', 'naranja', 'azul'])[1 + floor(random() * 4)::int],
+                   'certificado', random() < 0.5,
+                   'norma', jsonb_build_array(
+                       (ARRAY['NTC 382', 'NTC 1339', 'ASTM D2241', 'ASTM D1785'])[1 + floor(random() * 4)::int]
+                   )
+               ),
+               now(), now()
+        FROM generated
+    """), params)
+
+    connection.execute(text("""
+        INSERT INTO inventory (
+            product_id, available_quantity, reserved_quantity, minimum_stock_level,
+            maximum_stock_level, warehouse_location, warehouse_id, last_restock_date, updated_at
+        )
+        SELECT p.product_id,
+               floor(random() * 500)::int,
+               floor(random() * 20)::int,
+               20, 600,
+               'Bodega ' || w,
+               w,
+               current_date - floor(random() * 60)::int,
+               now()
+        FROM products p
+        CROSS JOIN generate_series(1, 3) AS w
+        WHERE p.product_code LIKE 'BENCH-%' AND random() < 0.6
+    """))
+    connection.execute(text(f"""
+        INSERT INTO promotions (
+            product_id, promotion_name, promotion_type, discount_percentage,
+            start_date, end_date, status, created_at, updated_at
+        )
+        SELECT product_id, 'Bench promo ' || product_id, 'percentage'::{promotion_type},
+               (5 + floor(random() * 4) * 5)::numeric,
+               now() - interval '7 days', now() + interval '30 days',
+               'active'::{promotion_status}, now(), now()
+        FROM products
+        WHERE product_code LIKE 'BENCH-%' AND random() < 0.05
+    """))
+
+    password_hash = get_password_hash(BENCH_USER_PASSWORD)
+    connection.execute(text(f"""
+        INSERT INTO users (email, full_name, is_active, password, role, registration_date)
+        SELECT 'bench-' || g || '@example.com', 'Bench User ' || g, true, :password,
+               'customer'::{user_role}, now() - (random() * interval '700 days')
+        FROM generate_series(1, :users) AS g
+        UNION ALL
+        SELECT :email, 'Bench Login', true, :password, 'customer'::{user_role}, now()
+    """), {**params, "password": password_hash, "email": BENCH_USER_EMAIL})
+
+    connection.execute(text(f"""
+        WITH user_ids AS (
+            SELECT array_agg(user_id) AS ids FROM users WHERE email LIKE 'bench-%'
+        )
+        INSERT INTO orders (
+            user_id, order_status, payment_method, order_total, tax_amount,
+            shipping_cost, discount_amount, order_date
+        )
+        SELECT u.ids[1 + floor(random() * array_length(u.ids, 1))::int],
+               (ARRAY['pending', 'processing', 'shipped', 'delivered', 'delivered', 'delivered', 'cancelled'])
+                   [1 + floor(random() * 7)::int]::{order_status},
+               'tarjeta', 0, 0, 0, 0,
+               now() - (random() * interval '365 days')
+        FROM generate_series(1, :orders) AS g
+        CROSS JOIN user_ids u
+    """), params)
+    connection.execute(text("""
+        WITH product_ids AS (
+            SELECT array_agg(product_id) AS ids FROM products WHERE product_code LIKE 'BENCH-%'
+        ),
+        lines AS (
+            SELECT o.order_id,
+                   pi.ids[1 + floor(random() * array_length(pi.ids, 1))::int] AS product_id,
+                   1 + floor(random() * 10)::int AS quantity
+            FROM orders o
+            JOIN users u ON u.user_id = o.user_id AND u.email LIKE 'bench-%'
+            CROSS JOIN product_ids pi
+            CROSS JOIN LATERAL generate_series(1, 1 + floor(random() * 5)::int) AS line
+        )
+        INSERT INTO order_details (order_id, product_id, quantity, unit_price, total_price, discount_applied)
+        SELECT l.order_id, l.product_id, l.quantity, p.regular_price, p.regular_price * l.quantity, 0
+        FROM lines l
+        JOIN products p ON p.product_id = l.product_id
+    """))
+    connection.execute(text("""
+        UPDATE orders o
+        SET order_total = t.total * 1.19,
+            tax_amount = round(t.total * 0.19, 2)
+        FROM (
+            SELECT order_id, SUM(total_price) AS total FROM order_details GROUP BY order_id
+        ) t
+        WHERE t.order_id = o.order_id
+          AND o.user_id IN (SELECT user_id FROM users WHERE email LIKE 'bench-%')
+    """))
+
+    # Derived tables normally kept up to date by the ORM and jobs
+    connection.execute(text("""
+        INSERT INTO product_availability (
+            product_id, available_quantity, reserved_quantity,
+            net_available, warehouse_count, updated_at
+        )
+        SELECT p.product_id,
+               COALESCE(SUM(i.available_quantity), 0),
+               COALESCE(SUM(i.reserved_quantity), 0),
+               COALESCE(SUM(GREATEST(i.available_quantity - i.reserved_quantity, 0)), 0),
+               COUNT(i.inventory_id),
+               now()
+        FROM products p
+        LEFT JOIN inventory i ON i.product_id = p.product_id
+        WHERE p.product_code LIKE 'BENCH-%'
+        GROUP BY p.product_id
+    """))
+    invalidate_all_category_facets(connection)
+    connection.execute(text("ANALYZE"))
+
+    counts = {}
+    for table, condition in (
+        ("brands", "name LIKE 'Bench %'"),
+        ("categories", "category_name LIKE 'Bench %'"),
+        ("products", "product_code LIKE 'BENCH-%'"),
+        ("users", "email LIKE 'bench-%'"),
+    ):
+        counts[table] = connection.execute(text(f"SELECT COUNT(*) FROM {table} WHERE {condition}")).scalar_one()
+    counts["orders"] = orders
+    return counts
+
+
+def seed_catalog(products: int, orders: int, seed_value: float = 0.42, reset_first: bool = True) -> dict:
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        if reset_first:
+            reset(connection)
+        counts = seed(connection, products, orders, seed_value)
+    with Session(engine) as session:
+        rebuild_product_attribute_values(session)
+    counts["seconds"] = round(time.perf_counter() - start, 2)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--seed", type=float, default=0.42, help="PostgreSQL setseed() value, in [-1, 1]")
+    parser.add_argument("--reset", action="store_true", help="Only delete previously seeded data")
+    args = parser.parse_args()
+
+    if args.reset:
+        with engine.begin() as connection:
+            reset(connection)
+        print("Benchmark data removed")
+        return
+    print(seed_catalog(args.products, args.orders, args.seed))
+
+
+if __name__ == "__main__":
+    main()
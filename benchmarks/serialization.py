@@ -0,0 +1,145 @@
+"""
+Per-item serialization cost of a product listing page.
+
+Compares the previous path (Product entity -> .dict() -> ProductListView ->
+ProductListResponse -> response_model validation -> JSON) with the column
+projection + FastJSONResponse path used by POST /products/, and with a sparse
+fieldset (?fields=...) as requested by grid views. No database needed.
+
+    python -m benchmarks.serialization --page-size 100
+"""
+import argparse
+import json
+import random
+import timeit
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.responses import FastJSONResponse
+from app.crud.product import PRODUCT_LIST_COLUMNS, resolve_product_fields
+from app.models import Product, ProductStatus
+from app.schemas import ProductFilterValues, ProductListResponse, ProductListView
+
+
+def make_rows(page_size: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(page_size):
+        rows.append({
+            "product_id": i + 1,
+            "product_code": f"PVC-{i:06d}",
+            "name": f"Tubo PVC {rng.choice(['1/2', '3/4', '1', '2'])}\" presión",
+            "description": "Tubería de PVC para conducción de agua a presión. " * 4,
+            "regular_price": Decimal(rng.randint(500, 90000)) / 100,
+            "sale_price": None,
+            "brand_id": rng.randint(1, 20),
+            "unit_of_measure": "unidad",
+            "image_url": f"https://cdn.example.com/products/{i}.jpg",
+            "image_url_details": None,
+            "status": ProductStatus.active,
+            "category_id": rng.randint(1, 10),
+            "subcategory_id": rng.randint(11, 40),
+            "attributes": {
+                "diametro": rng.choice(["1/2", "3/4", "1", "2"]),
+                "presion": f"{rng.choice([100, 160, 200])} PSI",
+                "largo": rng.choice([3, 6]),
+                "norma": ["NTC 382", "ASTM D2241"],
+            },
+            "brand_name": f"Marca {rng.randint(1, 20)}",
+            "category_name": "Tuberías",
+            "parent_category_name": "Hidráulica",
+            "available_stock": rng.randint(0, 500),
+        })
+    assert set(rows[0]) == set(PRODUCT_LIST_COLUMNS)
+    return rows
+
+
+def make_filter_values() -> dict:
+    return {
+        "brands": [{"id": i, "name": f"Marca {i}", "count": 5} for i in range(1, 21)],
+        "categories": [{"id": i, "name": f"Cat {i}", "parent_name": None, "count": 10} for i in range(1, 11)],
+        "attributes": [{"name": "diametro", "values": [{"value": "1/2", "count": 25}]}],
+        "price_range": {"min": Decimal("5.00"), "max": Decimal("900.00")},
+    }
+
+
+JOIN_COLUMNS = ("brand_name", "category_name", "parent_category_name", "available_stock")
+
+
+def make_entity_rows(rows: list[dict]) -> list[tuple]:
+    """Rows as the ORM used to return them: (Product, *join columns)"""
+    return [
+        (Product(**{k: v for k, v in row.items() if k not in JOIN_COLUMNS}), *(row[k] for k in JOIN_COLUMNS))
+        for row in rows
+    ]
+
+
+def previous_path(entity_rows: list[tuple], filter_values: dict) -> bytes:
+    products = []
+    for result in entity_rows:
+        product_dict = result[0].dict()
+        product_dict.update(dict(zip(JOIN_COLUMNS, result[1:])))
+        products.append(product_dict)
+    response = ProductListResponse(
+        data=[ProductListView(**product) for product in products],
+        total=len(products),
+        filter_values=ProductFilterValues(**filter_values),
+    )
+    # FastAPI validates the returned object against response_model before encoding
+    validated = ProductListResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def fast_path(rows: list[dict], filter_values: dict) -> bytes:
+    return FastJSONResponse({
+        "data": rows,
+        "total": len(rows),
+        "filter_values": filter_values,
+    }).body
+
+
+GRID_FIELDS = ["product_id", "name", "regular_price", "image_url"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = make_rows(args.page_size, args.seed)
+    entity_rows = make_entity_rows(rows)
+    filter_values = make_filter_values()
+
+    # Both paths must produce the same document (minus the always-null material_type_name)
+    assert json.loads(previous_path(entity_rows, filter_values)) == {
+        **json.loads(fast_path(rows, filter_values)),
+        "data": [
+            {**item, "material_type_name": None}
+            for item in json.loads(fast_path(rows, filter_values))["data"]
+        ],
+    }
+
+    grid_fields = resolve_product_fields(GRID_FIELDS)
+    sparse_rows = [{field: row[field] for field in grid_fields} for row in rows]
+
+    variants = (
+        ("previous", previous_path, entity_rows),
+        ("fast", fast_path, rows),
+        ("sparse", fast_path, sparse_rows),
+    )
+    for name, func, page in variants:
+        seconds = min(timeit.repeat(lambda: func(page, filter_values), number=args.repeat, repeat=5))
+        per_page = seconds / args.repeat
+        print(
+            f"{name:>8}: {per_page * 1e3:8.3f} ms/page  "
+            f"{per_page / args.page_size * 1e6:8.2f} us/item  "
+            f"{len(func(page, filter_values)):8d} bytes  "
+            f"({args.page_size} items)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Worker startup time: import-time breakdown of app.main and lifespan init.
+
+Imports app.main in fresh interpreters with -X importtime and reports the
+median wall time, the self time summed per top-level package and the
+slowest modules (cumulative, i.e. including what they import). Also times
+init_services(), the work the lifespan does with LAZY_INIT. No database
+needed: the engine doesn't connect until the first request.
+
+    python -m benchmarks.startup --runs 5 --top 25
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+_TIMED_IMPORT = (
+    "import time; start = time.perf_counter(); import app.main; "
+    "imported = time.perf_counter(); app.main.init_services(); "
+    "print(imported - start, time.perf_counter() - imported)"
+)
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True)
+
+
+def import_times() -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) of every module app.main imports"""
+    result = _run(["-X", "importtime", "-c", "import app.main"])
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    import_seconds, init_seconds = [], []
+    for _ in range(args.runs):
+        imported, initialized = map(float, _run(["-c", _TIMED_IMPORT]).stdout.split()[-2:])
+        import_seconds.append(imported)
+        init_seconds.append(initialized)
+    print(f"import app.main: {statistics.median(import_seconds) * 1000:8.1f} ms (median of {args.runs})")
+    print(f"init_services:   {statistics.median(init_seconds) * 1000:8.1f} ms")
+
+    modules = import_times()
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        packages[name.split(".")[0]] += self_us
+    total_us = sum(packages.values())
+
+    print(f"\nSelf time per top-level package ({total_us / 1000:.1f} ms total):")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:>28}: {self_us / 1000:8.1f} ms  {self_us / total_us:6.1%}")
+
+    print("\nSlowest modules (cumulative):")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda module: -module[2])[:args.top]:
+        print(f"{name:>40}: {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()